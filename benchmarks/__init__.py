@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for MTpy.
+
+The benchmarks use synthetic data made by benchmarks.synthetic, run them
+from the repository root with::
+
+    python -m benchmarks run
+    python -m benchmarks compare results/old.json results/new.json
+
+see benchmarks.runner for the options.
+"""
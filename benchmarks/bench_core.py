@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for mtpy.core and mtpy.analysis: EDI read/write, z2pt, Z.rotate
+and MT.interpolate
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks import synthetic
+
+
+class EdiReadWrite(object):
+    """ read and write an EDI corpus """
+    params = [10, 50]
+    param_names = ['n_stations']
+
+    def setup(self, n_stations):
+        self.temp_dir = tempfile.mkdtemp(prefix='mtpy_bench_')
+        self.edi_list = synthetic.write_edi_corpus(
+            os.path.join(self.temp_dir, 'edi'), n_stations=n_stations)
+        self.save_dir = os.path.join(self.temp_dir, 'out')
+        os.mkdir(self.save_dir)
+
+        from mtpy.core.mt import MT
+        self.mt_list = [MT(fn) for fn in self.edi_list]
+
+    def teardown(self, n_stations):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def time_read_edi(self, n_stations):
+        from mtpy.core.mt import MT
+        for fn in self.edi_list:
+            MT(fn)
+
+    def time_write_edi(self, n_stations):
+        for mt_obj in self.mt_list:
+            mt_obj.write_mt_file(save_dir=self.save_dir,
+                                 fn_basename=mt_obj.station)
+
+
+class ImpedanceTensor(object):
+    """ phase tensor and rotation of long impedance arrays """
+    params = [100, 10000]
+    param_names = ['n_freq']
+
+    def setup(self, n_freq):
+        mt_obj = synthetic.make_synthetic_mt('SYN000', -30., 140.,
+                                             n_freq=n_freq, seed=0)
+        self.z_obj = mt_obj.Z
+
+    def time_z2pt(self, n_freq):
+        # z2pt of each frequency, the way PhaseTensor computes it
+        from mtpy.analysis.pt import z_object2pt
+        z_object2pt(self.z_obj)
+
+    def time_rotate(self, n_freq):
+        self.z_obj.rotate(30.)
+
+
+class Interpolate(object):
+    """ interpolate a station onto a new set of frequencies """
+    params = [100, 1000]
+    param_names = ['n_new_freq']
+
+    def setup(self, n_new_freq):
+        self.mt_obj = synthetic.make_synthetic_mt('SYN000', -30., 140.,
+                                                  n_freq=80, seed=0)
+        self.new_freq = np.logspace(2.9, -2.9, n_new_freq)
+
+    def time_interpolate(self, n_new_freq):
+        self.mt_obj.interpolate(self.new_freq)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for mtpy.imaging: rendering a phase tensor map
+"""
+from benchmarks import synthetic
+
+
+class PhaseTensorMap(object):
+    """ phase tensor ellipses and tipper arrows of a station grid """
+    params = [25, 400]
+    param_names = ['n_stations']
+
+    def setup(self, n_stations):
+        import matplotlib
+        matplotlib.use('Agg')
+
+        n_columns = int(n_stations ** .5)
+        self.mt_list = [synthetic.make_synthetic_mt(
+                            'SYN{0:03}'.format(ii),
+                            -30. + .05 * (ii // n_columns),
+                            140. + .05 * (ii % n_columns),
+                            n_freq=40, seed=ii)
+                        for ii in range(n_stations)]
+
+    def teardown(self, n_stations):
+        import matplotlib.pyplot as plt
+        plt.close('all')
+
+    def time_plot(self, n_stations):
+        import matplotlib.pyplot as plt
+        from mtpy.imaging.phase_tensor_maps import PlotPhaseTensorMaps
+
+        ptm = PlotPhaseTensorMaps(mt_object_list=self.mt_list,
+                                  plot_freq=1.,
+                                  plot_tipper='yr',
+                                  plot_yn='n')
+        ptm.plot(show=False)
+        ptm.fig.canvas.draw()
+        plt.close(ptm.fig)
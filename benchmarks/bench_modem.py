@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for mtpy.modeling.modem: filling the data array, writing data
+files, reading and writing model files and computing rms from a residual
+file
+"""
+import os
+import shutil
+import tempfile
+
+from benchmarks import synthetic
+
+
+class ModEMFiles(object):
+    """ data, model and residual files of a synthetic survey """
+    params = [25, 100]
+    param_names = ['n_stations']
+
+    def setup(self, n_stations):
+        from mtpy.modeling.modem import Data, Model
+
+        self.temp_dir = tempfile.mkdtemp(prefix='mtpy_bench_')
+        self.edi_list = synthetic.write_edi_corpus(
+            os.path.join(self.temp_dir, 'edi'), n_stations=n_stations)
+        self.fn_dict = synthetic.write_modem_files(
+            os.path.join(self.temp_dir, 'modem'), self.edi_list)
+
+        self.data_obj = Data(edi_list=self.edi_list,
+                             period_list=synthetic.modem_period_list(),
+                             model_epsg=synthetic.MODEM_EPSG)
+        self.data_obj.get_mt_dict()
+        self.data_obj.fill_data_array()
+        self.model_obj = Model()
+        self.model_obj.read_model_file(self.fn_dict['model_fn'])
+        self.save_dir = os.path.join(self.temp_dir, 'out')
+        os.mkdir(self.save_dir)
+
+    def teardown(self, n_stations):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def time_fill_data_array(self, n_stations):
+        self.data_obj.fill_data_array()
+
+    def time_write_data_file(self, n_stations):
+        self.data_obj.write_data_file(save_path=self.save_dir, fill=False)
+
+    def time_read_model_file(self, n_stations):
+        from mtpy.modeling.modem import Model
+        Model().read_model_file(self.fn_dict['model_fn'])
+
+    def time_write_model_file(self, n_stations):
+        self.model_obj.write_model_file(save_path=self.save_dir)
+
+    def time_get_rms(self, n_stations):
+        from mtpy.modeling.modem import Residual
+        Residual(residual_fn=self.fn_dict['residual_fn']).get_rms()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the raw time series readers in mtpy.usgs: Zen3D.read_z3d and
+NIMS.read_nims
+"""
+import os
+import shutil
+import tempfile
+
+from benchmarks import synthetic
+
+
+class ReadZ3D(object):
+    """ read a Z3D file of 256 samples/second """
+    params = [60, 600]
+    param_names = ['n_seconds']
+
+    def setup(self, n_seconds):
+        self.temp_dir = tempfile.mkdtemp(prefix='mtpy_bench_')
+        self.z3d_fn = synthetic.write_z3d_file(
+            os.path.join(self.temp_dir, 'syn_20200101_000000_256_EX.Z3D'),
+            df=256, n_seconds=n_seconds)
+
+    def teardown(self, n_seconds):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def time_read_z3d(self, n_seconds):
+        from mtpy.usgs.zen import Zen3D
+        Zen3D(self.z3d_fn).read_z3d()
+
+
+class ReadNIMS(object):
+    """ read a NIMS DATA.BIN file of 8 samples/second """
+    params = [3600, 36000]
+    param_names = ['n_seconds']
+
+    def setup(self, n_seconds):
+        self.temp_dir = tempfile.mkdtemp(prefix='mtpy_bench_')
+        self.nims_fn = synthetic.write_nims_file(
+            os.path.join(self.temp_dir, 'DATA.BIN'), n_seconds=n_seconds)
+
+    def teardown(self, n_seconds):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def time_read_nims(self, n_seconds):
+        from mtpy.usgs.nims import NIMS
+        NIMS().read_nims(self.nims_fn)
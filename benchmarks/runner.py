@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Run the MTpy benchmark suite and compare results between commits.
+
+The benchmarks are written the way asv expects them, classes in the
+bench_*.py modules of this package with optional setup/teardown methods and
+time_* methods, with params and param_names for parameterized benchmarks.
+This runner does not need asv installed.
+
+Run all benchmarks and save the results, by default to
+benchmarks/results/<commit>.json::
+
+    python -m benchmarks run
+    python -m benchmarks run --bench ReadZ3D --quick -o z3d.json
+
+Compare two result files, returns 1 if any benchmark got slower than
+factor times the old time::
+
+    python -m benchmarks compare old.json new.json --factor 1.2
+"""
+import argparse
+import datetime
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+
+class Benchmark(object):
+    """
+    one time_* method of a benchmark class for one set of parameters
+    """
+
+    def __init__(self, module_name, bench_class, method_name, params=()):
+        self.module_name = module_name
+        self.bench_class = bench_class
+        self.method_name = method_name
+        self.params = tuple(params)
+
+    @property
+    def name(self):
+        name = '{0}.{1}.{2}'.format(self.module_name, self.bench_class.__name__,
+                                    self.method_name)
+        if self.params:
+            name += '({0})'.format(', '.join([repr(pp) for pp in self.params]))
+        return name
+
+    @property
+    def param_dict(self):
+        if not self.params:
+            return None
+        param_names = getattr(self.bench_class, 'param_names',
+                              ['param{0}'.format(ii + 1) for ii in
+                               range(len(self.params))])
+        return dict(zip(param_names, self.params))
+
+    def run(self, repeat=5, number=1, warmup=True):
+        """
+        time the benchmark
+
+        setup is called once, then the method is called once to warm up and
+        timed repeat times of number calls each.
+
+        :returns: dictionary of the timings in seconds per call
+        """
+        bench_obj = self.bench_class()
+        if hasattr(bench_obj, 'setup'):
+            bench_obj.setup(*self.params)
+        try:
+            method = getattr(bench_obj, self.method_name)
+            if warmup:
+                method(*self.params)
+            times = []
+            for ii in range(repeat):
+                t0 = time.perf_counter()
+                for jj in range(number):
+                    method(*self.params)
+                times.append((time.perf_counter() - t0) / number)
+        finally:
+            if hasattr(bench_obj, 'teardown'):
+                bench_obj.teardown(*self.params)
+
+        times = np.array(times)
+        return {'params': self.param_dict,
+                'min': float(times.min()),
+                'median': float(np.median(times)),
+                'mean': float(times.mean()),
+                'std': float(times.std()),
+                'repeat': repeat,
+                'number': number}
+
+
+def _get_params(bench_class, quick=False):
+    """ list of parameter tuples of a benchmark class """
+    params = getattr(bench_class, 'params', None)
+    if params is None:
+        return [()]
+    # a single parameter can be given as a list of values
+    if not isinstance(params[0], (list, tuple)):
+        params = [params]
+    if quick:
+        params = [pp[0:1] for pp in params]
+    return list(itertools.product(*params))
+
+
+def discover(pattern=None, quick=False):
+    """
+    find the benchmarks in the bench_*.py modules of this package
+
+    :param pattern: regular expression, only benchmarks with a matching name
+                    are returned
+    :type pattern: string
+
+    :param quick: only use the first value of each parameter
+    :type quick: [ True | False ]
+
+    :returns: list of Benchmark objects
+    """
+    bench_list = []
+    for module_info in sorted(pkgutil.iter_modules([BENCHMARK_DIR]),
+                              key=lambda mi: mi.name):
+        if not module_info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module('benchmarks.' + module_info.name)
+        for class_name, bench_class in inspect.getmembers(module,
+                                                          inspect.isclass):
+            if bench_class.__module__ != module.__name__:
+                continue
+            for method_name in sorted(dir(bench_class)):
+                if not method_name.startswith('time_'):
+                    continue
+                for params in _get_params(bench_class, quick):
+                    bench = Benchmark(module_info.name, bench_class,
+                                      method_name, params)
+                    if pattern is None or re.search(pattern, bench.name):
+                        bench_list.append(bench)
+    return bench_list
+
+
+def get_commit():
+    """ git commit hash of the working tree, None if it can't be found """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(bench_list, repeat=5, number=1, verbose=True):
+    """
+    run a list of benchmarks
+
+    :returns: dictionary of the results that can be written to json, the
+              timings are in results keyed by the benchmark name
+    """
+    results = {}
+    for bench in bench_list:
+        try:
+            results[bench.name] = bench.run(repeat=repeat, number=number)
+        except Exception as error:
+            results[bench.name] = {'params': bench.param_dict,
+                                   'error': '{0}: {1}'.format(
+                                       type(error).__name__, error)}
+        if verbose:
+            result = results[bench.name]
+            if 'error' in result:
+                sys.stdout.write('{0:<60} failed {1}\n'.format(
+                    bench.name, result['error']))
+            else:
+                sys.stdout.write('{0:<60} {1:>12.6f} s\n'.format(
+                    bench.name, result['min']))
+
+    return {'commit': get_commit(),
+            'date': datetime.datetime.utcnow().isoformat(),
+            'machine': platform.node(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'results': results}
+
+
+def write_results(result_dict, save_fn=None):
+    """
+    write results to a json file, by default to results/<commit>.json
+
+    :returns: full path to the json file
+    """
+    if save_fn is None:
+        if not os.path.isdir(RESULTS_DIR):
+            os.mkdir(RESULTS_DIR)
+        save_fn = os.path.join(RESULTS_DIR, '{0}.json'.format(
+            result_dict['commit'] or 'results'))
+    with open(save_fn, 'w') as fid:
+        json.dump(result_dict, fid, indent=2, sort_keys=True)
+    return save_fn
+
+
+def read_results(fn):
+    with open(fn) as fid:
+        return json.load(fid)
+
+
+def compare_results(old_dict, new_dict, factor=1.2):
+    """
+    compare the minimum times of two result dictionaries
+
+    :param factor: a benchmark is slower if the new time is more than factor
+                   times the old time and faster if less than old / factor
+    :type factor: float
+
+    :returns: list of (name, old_time, new_time, ratio, state), state is
+              one of 'slower', 'faster', 'same' or 'failed'
+    """
+    comparison = []
+    old_results = old_dict['results']
+    new_results = new_dict['results']
+    for name in sorted(set(old_results).intersection(new_results)):
+        old_time = old_results[name].get('min')
+        new_time = new_results[name].get('min')
+        if old_time is None or new_time is None:
+            comparison.append((name, old_time, new_time, None, 'failed'))
+            continue
+        ratio = new_time / old_time
+        if ratio > factor:
+            state = 'slower'
+        elif ratio < 1. / factor:
+            state = 'faster'
+        else:
+            state = 'same'
+        comparison.append((name, old_time, new_time, ratio, state))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='MTpy benchmark suite')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='run benchmarks')
+    run_parser.add_argument('-b', '--bench', default=None,
+                            help='regular expression to select benchmarks')
+    run_parser.add_argument('-o', '--output', default=None,
+                            help='json file to save the results to')
+    run_parser.add_argument('-r', '--repeat', type=int, default=5)
+    run_parser.add_argument('-n', '--number', type=int, default=1)
+    run_parser.add_argument('--quick', action='store_true',
+                            help='only the smallest parameters, one repeat')
+
+    compare_parser = subparsers.add_parser('compare',
+                                           help='compare two result files')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('-f', '--factor', type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        bench_list = discover(args.bench, quick=args.quick)
+        repeat = 1 if args.quick else args.repeat
+        result_dict = run_benchmarks(bench_list, repeat=repeat,
+                                     number=args.number)
+        save_fn = write_results(result_dict, args.output)
+        print('Wrote results to {0}'.format(save_fn))
+        return 0
+
+    elif args.command == 'compare':
+        comparison = compare_results(read_results(args.old),
+                                     read_results(args.new),
+                                     factor=args.factor)
+        for name, old_time, new_time, ratio, state in comparison:
+            if ratio is None:
+                print('{0:<60} {1}'.format(name, state))
+            else:
+                print('{0:<60} {1:>10.6f} {2:>10.6f} {3:>6.2f} {4}'.format(
+                    name, old_time, new_time, ratio, state))
+        if any(cc[4] == 'slower' for cc in comparison):
+            return 1
+        return 0
+
+    parser.print_help()
+    return 2
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic data generators for the benchmark suite.
+
+Makes data sets of any size in the formats MTpy reads, so the benchmarks do
+not depend on field data:
+
+    * EDI corpora of a grid of stations
+    * Zen Z3D and NIMS DATA.BIN raw binaries
+    * ModEM data, model and residual files
+    * long time series
+
+All generators take a seed so results are repeatable between commits.
+"""
+import datetime
+import os
+
+import numpy as np
+
+# GPS time starts 1980-01-06
+_gps_epoch = datetime.datetime(1980, 1, 6)
+_z3d_block_len = 512
+
+# the synthetic stations are in utm zone 54 south
+MODEM_EPSG = 28354
+
+
+def make_synthetic_mt(station, lat, lon, elev=0., n_freq=40,
+                      freq_range=(1e3, 1e-3), seed=None):
+    """
+    make an MT object with a smooth 2D like response plus noise
+
+    :param station: station name
+    :type station: string
+
+    :param n_freq: number of frequencies, log spaced over freq_range
+    :type n_freq: int
+
+    :returns: MT object with Z and Tipper filled
+    """
+    from mtpy.core.mt import MT
+    from mtpy.core.z import Z, Tipper
+
+    rng = np.random.RandomState(seed)
+    freq = np.logspace(np.log10(freq_range[0]), np.log10(freq_range[1]),
+                       n_freq)
+
+    # 100 Ohm-m half space with a slowly varying off diagonal impedance
+    z_mag = np.sqrt(100. * 2 * np.pi * freq * 4e-7 * np.pi) / (4e-7 * np.pi)
+    z_mag *= 1e-3
+    z_array = np.zeros((n_freq, 2, 2), dtype=complex)
+    z_array[:, 0, 1] = z_mag * np.exp(1j * np.pi / 4) * \
+        (1 + 0.2 * np.sin(np.log10(freq)))
+    z_array[:, 1, 0] = -z_mag * np.exp(1j * np.pi / 4) * \
+        (1 - 0.2 * np.sin(np.log10(freq)))
+    z_array[:, 0, 0] = 0.1 * z_mag * np.exp(1j * np.pi / 3)
+    z_array[:, 1, 1] = -0.1 * z_mag * np.exp(1j * np.pi / 3)
+    noise = rng.normal(scale=0.02, size=(n_freq, 2, 2, 2))
+    z_array *= 1 + noise[..., 0] + 1j * noise[..., 1]
+    z_err = 0.05 * np.abs(z_array)
+
+    t_array = 0.1 * (rng.normal(size=(n_freq, 1, 2)) +
+                     1j * rng.normal(size=(n_freq, 1, 2)))
+    t_err = np.zeros(t_array.shape) + 0.02
+
+    mt_obj = MT()
+    mt_obj.station = station
+    mt_obj.lat = lat
+    mt_obj.lon = lon
+    mt_obj.elev = elev
+    mt_obj.Z = Z(z_array=z_array, z_err_array=z_err, freq=freq)
+    mt_obj.Tipper = Tipper(tipper_array=t_array, tipper_err_array=t_err,
+                           freq=freq)
+
+    return mt_obj
+
+
+def write_edi_corpus(save_dir, n_stations=25, n_freq=40, lat0=-30.,
+                     lon0=140., spacing=0.05, seed=0):
+    """
+    write an EDI file for each station of a square grid of stations
+
+    :param save_dir: directory to write the edi files to
+    :type save_dir: string
+
+    :param n_stations: number of stations
+    :type n_stations: int
+
+    :param spacing: station spacing in decimal degrees
+    :type spacing: float
+
+    :returns: list of edi file names
+    """
+    if not os.path.isdir(save_dir):
+        os.makedirs(save_dir)
+
+    n_columns = int(np.ceil(np.sqrt(n_stations)))
+    edi_list = []
+    for ii in range(n_stations):
+        mt_obj = make_synthetic_mt('SYN{0:03}'.format(ii),
+                                   lat0 + spacing * (ii // n_columns),
+                                   lon0 + spacing * (ii % n_columns),
+                                   elev=10. * ii,
+                                   n_freq=n_freq,
+                                   seed=seed + ii)
+        edi_list.append(mt_obj.write_mt_file(save_dir=save_dir))
+
+    return edi_list
+
+
+def make_time_series(n_samples, df=256., seed=0):
+    """
+    make a time series of a few sine waves, 60 Hz noise and random noise
+
+    :param n_samples: number of samples
+    :type n_samples: int
+
+    :param df: sampling rate in samples/second
+    :type df: float
+
+    :returns: np.ndarray(n_samples) of floats
+    """
+    rng = np.random.RandomState(seed)
+    t = np.arange(n_samples) / float(df)
+    ts = rng.normal(scale=10., size=n_samples)
+    for freq, amp in [(df / 64., 50.), (df / 16., 20.), (0.1, 200.)]:
+        ts += amp * np.sin(2 * np.pi * freq * t)
+    if df > 120:
+        ts += 30. * np.sin(2 * np.pi * 60. * t)
+
+    return ts
+
+
+def _pad_block(block_str, length=_z3d_block_len):
+    block = block_str.encode()
+    return block + b'\x00' * (length - len(block))
+
+
+def write_z3d_file(fn, df=256, n_seconds=64, component='ex', station='100',
+                   start_time='2020-01-01,00:00:00', seed=0):
+    """
+    write a Zen Z3D file that mtpy.usgs.zen.Zen3D can read
+
+    The file has a header, schedule and metadata block followed by the data,
+    each second of data is preceded by a 64 byte GPS stamp.
+
+    :param fn: full path to the file to write
+    :type fn: string
+
+    :param df: sampling rate in samples/second
+    :type df: int
+
+    :param n_seconds: number of seconds of data
+    :type n_seconds: int
+
+    :param start_time: schedule start time as YYYY-MM-DD,hh:mm:ss in GPS time
+    :type start_time: string
+
+    :returns: fn
+    """
+    df = int(df)
+    start = datetime.datetime.strptime(start_time, '%Y-%m-%d,%H:%M:%S')
+    gps_seconds = (start - _gps_epoch).total_seconds()
+    gps_week = int(gps_seconds // 604800)
+    week_seconds = gps_seconds - gps_week * 604800
+
+    header = '\n'.join(['GPS Brd339 Logfile',
+                        'Version = 4147',
+                        'Main.hex Buildnum = 5357',
+                        'ChannelSerial = 0xD474777C',
+                        'Fpga Buildnum = 1125',
+                        'Box Serial = 0x0000010F',
+                        'Box number = 24',
+                        'Channel = 4',
+                        'A/D Gain = 1',
+                        'A/D Rate = {0}'.format(df),
+                        'Period = 4294967295',
+                        'Duty = 32767',
+                        'LogTerminal = N',
+                        'Tx.Freq = 0.000000',
+                        'Tx.Duty = 0.000000',
+                        'Lat = 0.706816081',
+                        'Long = -2.028598674',
+                        'Alt = 1456.300',
+                        'NumSats = 12',
+                        'GpsWeek = {0}'.format(gps_week),
+                        'AttenChannelsMask = 0x80', ''])
+    schedule = '\n'.join(['', 'Schedule.Date = {0}'.format(start_time[0:10]),
+                          'Schedule.Time = {0}'.format(start_time[11:]),
+                          'Schedule.Sync = 1',
+                          'Schedule.NewFile = 1',
+                          'Schedule.S/R = 2',
+                          'Schedule.Period = 60',
+                          ''])
+    metadata = '\n\nGPS Brd339/Brd357 Metadata Record\n|' + \
+               '|'.join(['RX.STN={0}'.format(station),
+                         'CH.CMP={0}'.format(component.upper()),
+                         'CH.NUMBER={0}'.format(2284),
+                         'CH.AZIMUTH=0',
+                         'CH.LENGTH=100',
+                         'JOB.NAME=benchmark']) + '|'
+
+    gps_dtype = np.dtype([('flag0', np.int32),
+                          ('flag1', np.int32),
+                          ('time', np.int32),
+                          ('lat', np.float64),
+                          ('lon', np.float64),
+                          ('num_sat', np.int32),
+                          ('gps_sens', np.int32),
+                          ('temperature', np.float32),
+                          ('voltage', np.float32),
+                          ('num_fpga', np.int32),
+                          ('num_adc', np.int32),
+                          ('pps_count', np.int32),
+                          ('dac_tune', np.int32),
+                          ('block_len', np.int32)])
+    stamps = np.zeros(n_seconds, dtype=gps_dtype)
+    stamps['flag0'] = 2147483647
+    stamps['flag1'] = -2147483648
+    stamps['time'] = (week_seconds + np.arange(n_seconds)) * 1024
+    stamps['lat'] = 0.706816081
+    stamps['lon'] = -2.028598674
+    stamps['num_sat'] = 12
+    stamps['temperature'] = 30.
+    stamps['voltage'] = 12.
+    stamps['block_len'] = df
+
+    # counts, zero is used to mark the gps stamps so the data can not be 0
+    counts = np.round(make_time_series(n_seconds * df, df, seed) * 1e4)
+    counts = counts.astype(np.int32).reshape(n_seconds, df)
+    counts[counts == 0] = 1
+    data = np.hstack([stamps.view(np.int32).reshape(n_seconds, -1), counts])
+
+    with open(fn, 'wb') as fid:
+        fid.write(_pad_block(header))
+        fid.write(_pad_block(schedule))
+        fid.write(_pad_block(metadata))
+        fid.write(data.astype('<i4').tobytes())
+
+    return fn
+
+
+def _nims_gps_strings(time_stamp):
+    """ matching GPRMC and GPGGA strings for a time stamp """
+    gprmc = '$GPRMC,{0:%H%M%S},A,3443.6088,N,11544.1000,W,000.0,000.0,' \
+            '{0:%d%m%y},013.0,E*'.format(time_stamp)
+    gpgga = '$GPGGA,{0:%H%M%S},3443.6088,N,11544.1000,W,1,08,0.9,946.6,M,' \
+            '-20.0,M,,*'.format(time_stamp)
+    return gprmc.encode(), gpgga.encode()
+
+
+def write_nims_file(fn, n_seconds=600, start_time='2019-01-10T16:00:00',
+                    gps_interval=150, seed=0):
+    """
+    write a NIMS DATA.BIN file that mtpy.usgs.nims.NIMS can read
+
+    Each second is a block of 131 bytes holding 8 samples of hx, hy, hz, ex
+    and ey as 24 bit integers.  A GPS lock and matching GPRMC and GPGGA
+    stamps are written every gps_interval seconds.
+
+    :param fn: full path to the file to write
+    :type fn: string
+
+    :param n_seconds: number of seconds (blocks) of data
+    :type n_seconds: int
+
+    :param gps_interval: seconds between GPS stamps, at least 150 so the
+                         stamps fit between locks
+    :type gps_interval: int
+
+    :returns: fn
+    """
+    block_size = 131
+    n_samples = 8
+    start = datetime.datetime.strptime(start_time, '%Y-%m-%dT%H:%M:%S')
+
+    header = '\r'.join(['>' * 41,
+                        '>>>user field' + '>' * 28,
+                        'SITE NAME: Synthetic',
+                        'STATE/PROVINCE: CA',
+                        'COUNTRY: USA',
+                        '"300b"  <-- 2CHAR EXPERIMENT CODE + 3 CHAR SITE CODE + RUN LETTER',
+                        '1105-3; 1305-3  <-- SYSTEM BOX I.D.; MAG HEAD ID (if different)',
+                        '106  0 <-- N-S Ex WIRE LENGTH (m); HEADING (deg E mag N)',
+                        '109  90 <-- E-W Ey WIRE LENGTH (m); HEADING (deg E mag N)',
+                        '1         <-- N ELECTRODE ID',
+                        '3          <-- E ELECTRODE ID',
+                        '2          <-- S ELECTRODE ID',
+                        '4          <-- W ELECTRODE ID',
+                        'Cu          <-- GROUND ELECTRODE INFO',
+                        'GPS INFO: {0:%d/%m/%y %H:%M:%S} 1616.7000 3443.6088 '
+                        '115.7350 W 946.6'.format(start),
+                        'OPERATOR: KP',
+                        'COMMENT: synthetic data', '']).encode()
+
+    blocks = np.zeros((n_seconds, block_size), dtype=np.uint8)
+    blocks[:, 0] = 1
+    blocks[:, 1] = block_size
+    blocks[:, 2] = 1
+    blocks[:, 4] = np.arange(n_seconds) % 256
+    # temperatures of about 30 degrees
+    blocks[:, 5:9] = [[80, 64, 80, 64]]
+    blocks[:, 81] = 1
+    blocks[:, 130] = 0
+
+    # 24 bit samples, magnetics then electrics
+    channels = np.round(np.array(
+        [make_time_series(n_seconds * n_samples, n_samples, seed + cc)
+         for cc in range(5)]) * 1000).astype(np.int64)
+    channels = np.clip(channels, -2**23, 2**23 - 1) % 2**24
+    for kk in range(n_samples):
+        for cc in range(5):
+            if cc < 3:
+                index = 9 + kk * 9 + cc * 3
+            else:
+                index = 82 + kk * 6 + (cc - 3) * 3
+            values = channels[cc, kk::n_samples]
+            blocks[:, index] = values // 2**16
+            blocks[:, index + 1] = (values // 2**8) % 256
+            blocks[:, index + 2] = values % 256
+
+    # gps lock in the status byte and the stamps one character per block in
+    # the 4th byte, GPRMC starts 2 seconds after the lock, GPGGA 74 seconds
+    for lock in range(1, n_seconds - 2 * 74, max(gps_interval, 150)):
+        blocks[lock, 2] = 0
+        gprmc, gpgga = _nims_gps_strings(start +
+                                         datetime.timedelta(seconds=lock))
+        for offset, gps_str in [(2, gprmc), (74, gpgga)]:
+            index = lock + offset
+            blocks[index:index + len(gps_str), 3] = \
+                np.frombuffer(gps_str, dtype=np.uint8)
+
+    # the header reader looks for the start of the data in the first 1000
+    # bytes, carriage returns and spaces in the data would confuse it
+    head = blocks.reshape(-1)[:1000]
+    head[(head == 13) | (head == 32)] += 1
+
+    with open(fn, 'wb') as fid:
+        fid.write(header)
+        fid.write(blocks.tobytes())
+
+    return fn
+
+
+def modem_period_list(n_periods=17):
+    """
+    periods the ModEM files are written for, log spaced from 0.01 to 100 s
+    """
+    return np.logspace(-2, 2, n_periods)
+
+
+def write_modem_files(save_dir, edi_list, n_periods=17, cell_size=2000,
+                      epsg=MODEM_EPSG):
+    """
+    write a ModEM data file, model file and residual file for a list of edi
+    files
+
+    The residual file is written as a data file of random residuals, which
+    is the same format as ModEM writes.
+
+    :param save_dir: directory to save the files to
+    :type save_dir: string
+
+    :param edi_list: list of edi files
+    :type edi_list: list
+
+    :returns: dictionary with keys data_fn, model_fn and residual_fn
+    """
+    from mtpy.modeling.modem import Data, Model
+
+    if not os.path.isdir(save_dir):
+        os.makedirs(save_dir)
+
+    data_obj = Data(edi_list=edi_list,
+                    save_path=save_dir,
+                    period_list=modem_period_list(n_periods),
+                    error_type_z='floor_egbert',
+                    error_value_z=5,
+                    error_type_tipper='floor_abs',
+                    error_value_tipper=.03,
+                    model_epsg=epsg)
+    data_fn = data_obj.write_data_file(fill=True, compute_error=True)
+
+    model_obj = Model(station_locations=data_obj.station_locations,
+                      cell_size_east=cell_size,
+                      cell_size_north=cell_size,
+                      pad_north=5,
+                      pad_east=5,
+                      pad_z=5,
+                      n_air_layers=5,
+                      n_layers=40,
+                      z1_layer=20,
+                      res_model=100,
+                      z_target_depth=50000)
+    model_obj.make_mesh()
+    model_obj.res_model = 10 ** np.random.RandomState(0).uniform(
+        0, 3, size=model_obj.res_model.shape)
+    model_obj.write_model_file(save_path=save_dir)
+
+    # residuals are the data scaled down, with the same errors
+    rng = np.random.RandomState(1)
+    data_array = data_obj.data_array
+    for key in ['z', 'tip']:
+        noise = rng.normal(scale=0.05, size=data_array[key].shape + (2,))
+        data_array[key] = data_array[key] * (noise[..., 0] + 1j * noise[..., 1])
+    residual_fn = data_obj.write_data_file(save_path=save_dir,
+                                           fn_basename='Modular_NLCG_000.res',
+                                           fill=False, compute_error=False)
+
+    return {'data_fn': data_fn,
+            'model_fn': model_obj.model_fn,
+            'residual_fn': residual_fn}
@@ -0,0 +1,62 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Export the RMS maps and phase tensor maps of all periods of a ModEM
+    inversion.  The data, response and residual files are read once and the
+    figures are rendered in parallel on a pool of processes.  A csv file
+    with the time spent on each figure is written next to the figures.
+
+Usage:
+    python examples/cmdline/export_modem_figures.py data_fn resp_fn res_fn out_dir [num_workers]
+
+    python examples/cmdline/export_modem_figures.py examples/model_files/ModEM/ModEM_Data.dat examples/model_files/ModEM/Modular_MPI_NLCG_004.dat examples/model_files/ModEM/Modular_MPI_NLCG_004.res /tmp/figures 4
+"""
+
+import os
+import sys
+
+from mtpy.imaging.figure_export import write_timings
+from mtpy.modeling.modem import PlotRMSMaps
+from mtpy.modeling.modem.phase_tensor_maps import PlotPTMaps
+
+
+def export_modem_figures(data_fn, resp_fn, res_fn, out_dir, num_workers=None,
+                         fig_format='png'):
+    """
+    export rms and phase tensor maps of all periods to out_dir
+
+    :return: list of FigureTiming of all figures
+    """
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    rms_plot = PlotRMSMaps(res_fn, plot_yn='n', save_path=out_dir)
+    timings = rms_plot.plot_loop(fig_format=fig_format,
+                                 num_workers=num_workers)
+
+    pt_plot = PlotPTMaps(data_fn=data_fn, resp_fn=resp_fn, plot_yn='n')
+    timings += pt_plot.save_all_figures(save_path=out_dir,
+                                        file_format=fig_format,
+                                        num_workers=num_workers)
+
+    write_timings(timings, os.path.join(out_dir, 'figure_timings.csv'))
+
+    return timings
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 5:
+        print(("USAGE: %s data_fn resp_fn res_fn out_dir [num_workers]" %
+               sys.argv[0]))
+        sys.exit(1)
+
+    num_workers = None
+    if len(sys.argv) > 5:
+        num_workers = int(sys.argv[5])
+
+    timings = export_modem_figures(sys.argv[1], sys.argv[2], sys.argv[3],
+                                   sys.argv[4], num_workers=num_workers)
+    print('exported {0} figures in {1:.1f} s of rendering'.format(
+        len(timings), sum(timing.seconds for timing in timings)))
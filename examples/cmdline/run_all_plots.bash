@@ -97,6 +97,10 @@ python examples/scripts/modem_plot_models.py /e/Data/Modeling/Isa/100hs_flat_BB/
 python examples/scripts/modem_plot_models.py /e/Data/Modeling/Isa/100hs_flat_BB/ Response
 python examples/scripts/modem_plot_models.py /e/Data/Modeling/Isa/100hs_flat_BB/ DepthSlice
 
+# export RMS maps and phase tensor maps of all periods in parallel (files are read once,
+# figures rendered on a process pool, per-figure timings written to figure_timings.csv)
+python examples/cmdline/export_modem_figures.py examples/model_files/ModEM/ModEM_Data.dat examples/model_files/ModEM/Modular_MPI_NLCG_004.dat examples/model_files/ModEM/Modular_MPI_NLCG_004.res $OUTPUT_DIR/modem_figures
+
 # view horizontal slices of a rho file
 # ( 21/02/2018 )
 # plot_depth_slice.py exist in two directories (/mtpy/imaging/plot_depth_slice.py/mtpy/modeling/modem/plot_depth_slice.py)
@@ -0,0 +1,185 @@
+"""
+Description:
+    Batched Niblett-Bostick penetration depth computation over whole surveys.
+
+    The impedance tensors of many stations are stacked once into a cube of
+    shape (n_stations, n_periods, 2, 2) on a common set of target periods.
+    Apparent resistivity, phase, Bostick depth and Niblett-Bostick
+    resistivity are then computed for all stations, periods and the
+    components ('det', 'zxy', 'zyx') in single array operations, instead of
+    calling analysis.doi.bostick_depth pointwise.
+
+Usage:
+    stack = stack_impedance(mt_obj_list, periods=[1., 10., 100.], ptol=0.1)
+    res, phase = get_resistivity_phase_cube(stack['z'], stack['periods'])
+    depth = get_penetration_depth_cube(res, stack['periods'])
+    depth[:, :, COMPONENTS.index('det')]   # (n_stations, n_periods)
+
+Date: 2026-10-19
+"""
+
+import os
+
+import numpy as np
+
+from mtpy.core import mt as mt
+from mtpy.utils.calculator import mu0
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+# order of the last axis of the resistivity, phase and depth cubes
+COMPONENTS = ('det', 'zxy', 'zyx')
+
+
+def _as_mt_obj(mt_obj):
+    """ return an MT object from an MT object or a path to an edi file """
+    if isinstance(mt_obj, str) and os.path.isfile(mt_obj):
+        return mt.MT(mt_obj)
+    elif not isinstance(mt_obj, mt.MT):
+        raise Exception("Unsupported list of objects %s" % type(mt_obj))
+    return mt_obj
+
+
+def stack_impedance(mt_obj_list, periods=None, ptol=0.1, period_index=None):
+    """
+    Stack the impedance tensors of a list of stations onto common periods.
+
+    For every target period the nearest period of each station is used. If
+    the nearest period differs from the target by more than ptol * period,
+    the station gets NaN impedances and the target period is reported.
+
+    :param mt_obj_list: list of MT objects or edi file paths
+    :param periods: target periods in seconds. If None, the periods of the
+                    first station are used.
+    :param ptol: relative period tolerance, default 0.1
+    :param period_index: optional list of period indices to select from each
+                         station instead of matching periods by value.
+    :return: dictionary with keys
+             'station' (n_stations,), 'lat', 'lon' (n_stations,),
+             'periods' (n_stations, n_periods) periods actually used,
+             'z' (n_stations, n_periods, 2, 2) complex impedance
+    """
+    mt_obj_list = [_as_mt_obj(mt_obj) for mt_obj in mt_obj_list]
+
+    if period_index is not None:
+        period_index = np.atleast_1d(np.array(period_index, dtype=int))
+        n_periods = period_index.size
+    else:
+        if periods is None:
+            periods = 1.0 / mt_obj_list[0].Z.freq
+        periods = np.atleast_1d(np.array(periods, dtype=float))
+        n_periods = periods.size
+
+    n_stations = len(mt_obj_list)
+    stack = {'station': np.array([mt_obj.station for mt_obj in mt_obj_list]),
+             'lat': np.array([mt_obj.lat for mt_obj in mt_obj_list], dtype=float),
+             'lon': np.array([mt_obj.lon for mt_obj in mt_obj_list], dtype=float),
+             'periods': np.zeros((n_stations, n_periods)),
+             'z': np.zeros((n_stations, n_periods, 2, 2), dtype=complex)}
+
+    for ii, mt_obj in enumerate(mt_obj_list):
+        freq = mt_obj.Z.freq
+        if period_index is not None:
+            if period_index.max() >= freq.size:
+                _logger.debug("Number of frequencies (Max per_index)= %s",
+                              freq.size)
+                raise Exception("Index out_of_range Error: period index must "
+                                "be less than number of periods in zeta.freq")
+            stack['periods'][ii] = 1.0 / freq[period_index]
+            stack['z'][ii] = mt_obj.Z.z[period_index]
+            continue
+
+        # nearest station frequency for all target periods at once
+        index = np.argmin(np.abs(freq[None, :] - 1.0 / periods[:, None]),
+                          axis=1)
+        station_periods = 1.0 / freq[index]
+        outside = np.abs(periods - station_periods) > periods * ptol
+        if outside.any():
+            _logger.warning("Nearest periods %s on station %s were beyond "
+                            "tolerance of %s", station_periods[outside],
+                            mt_obj.station, ptol)
+
+        stack['periods'][ii] = np.where(outside, periods, station_periods)
+        stack['z'][ii] = mt_obj.Z.z[index]
+        stack['z'][ii, outside] = np.nan
+
+    return stack
+
+
+def get_resistivity_phase_cube(z, periods):
+    """
+    Compute apparent resistivity and phase for the components in COMPONENTS.
+
+    :param z: complex impedance cube (n_stations, n_periods, 2, 2)
+    :param periods: periods in seconds, broadcastable to (n_stations, n_periods)
+    :return: (resistivity, phase), each of shape (n_stations, n_periods, 3),
+             resistivity in Ohm-m and phase in degrees
+    """
+    z = np.asarray(z)
+    periods = np.broadcast_to(np.asarray(periods, dtype=float), z.shape[:-2])
+
+    # sqrt of the determinant behaves like a single impedance component
+    z_stack = np.stack([np.linalg.det(z) ** .5, z[..., 0, 1], z[..., 1, 0]],
+                       axis=-1)
+
+    resistivity = 0.2 * periods[..., None] * np.abs(z_stack) ** 2
+    phase = np.rad2deg(np.angle(z_stack))
+
+    return resistivity, phase
+
+
+def get_penetration_depth_cube(resistivity, periods):
+    """
+    Bostick depth for a cube of apparent resistivities, the vectorised form of
+    analysis.doi.bostick_depth.
+
+    :param resistivity: apparent resistivity (n_stations, n_periods, ...)
+    :param periods: periods in seconds, broadcastable to the first two axes
+    :return: penetration depth in meters, same shape as resistivity
+    """
+    resistivity = np.asarray(resistivity, dtype=float)
+    periods = np.asarray(periods, dtype=float)
+    periods = periods.reshape(periods.shape +
+                              (1,) * (resistivity.ndim - periods.ndim))
+
+    return np.sqrt(resistivity * periods / (2 * np.pi * mu0))
+
+
+def get_niblett_bostick_cube(resistivity, phase, periods):
+    """
+    Niblett-Bostick resistivity and depth for cubes of resistivity and phase,
+    the vectorised form of analysis.niblettbostick.rhophi2rhodepth.
+
+    :param resistivity: apparent resistivity (n_stations, n_periods, ...)
+    :param phase: phase in degrees, same shape as resistivity
+    :param periods: periods in seconds, broadcastable to the first two axes
+    :return: (rho_nb, depth), both the shape of resistivity
+    """
+    resistivity = np.asarray(resistivity, dtype=float)
+    depth = get_penetration_depth_cube(resistivity, periods)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rho_nb = resistivity * (np.pi / 2 / np.deg2rad(np.asarray(phase) % 90) - 1)
+
+    return rho_nb, depth
+
+
+def get_penetration_depths(mt_obj_list, periods=None, ptol=0.1,
+                           period_index=None):
+    """
+    Penetration depths of all stations, periods and components in one call.
+
+    :param mt_obj_list: list of MT objects or edi file paths
+    :param periods: target periods in seconds, see stack_impedance
+    :param ptol: relative period tolerance
+    :param period_index: optional period indices, see stack_impedance
+    :return: (stack, depth) where stack is the dictionary returned by
+             stack_impedance and depth has shape (n_stations, n_periods, 3)
+             with the last axis ordered as COMPONENTS
+    """
+    stack = stack_impedance(mt_obj_list, periods=periods, ptol=ptol,
+                            period_index=period_index)
+    resistivity, _ = get_resistivity_phase_cube(stack['z'], stack['periods'])
+
+    return stack, get_penetration_depth_cube(resistivity, stack['periods'])
@@ -923,6 +923,9 @@ class ResidualPhaseTensor():
             Update attributes:
             rpt, rpt_err, _pt1, _pt2, _pt1err, _pt2err
 
+            The residual is computed for all frequencies at once with
+            compute_residual_pt_array.
+
         """
 
         if not ((isinstance(pt_o1, PhaseTensor)) and \
@@ -944,43 +947,17 @@ class ResidualPhaseTensor():
                     raise MTex.MTpyError_PT('PT arrays not the same shape')
                 if (not len(pt1.shape) in [2, 3]):
                     raise MTex.MTpyError_PT('PT array is not a valid shape')
+
+                # a single matrix is treated as an array of one frequency
+                if len(pt1.shape) == 2:
+                    pt1 = pt1.reshape(1, 2, 2)
+                    pt2 = pt2.reshape(1, 2, 2)
+
+                self.rpt = compute_residual_pt_array(
+                    pt1, pt2, residualtype=self.residualtype)[0]
                 if self.residualtype == 'heise':
-                    if len(pt1.shape) == 3:
-                        self.rpt = np.zeros_like(pt1)
-        
-                        for idx in range(len(pt1)):
-                            try:
-#                                self.rpt[idx] = np.eye(2) - np.dot(np.matrix(pt1[idx]).I,
-#                                                                   np.matrix(pt2[idx]))
-                                self.rpt[idx] = np.eye(2) - 0.5*(np.dot(np.matrix(pt1[idx]).I,np.matrix(pt2[idx]))+\
-                                                                 np.dot(np.matrix(pt2[idx]),np.matrix(pt1[idx]).I))
-                            except np.linalg.LinAlgError:
-                                #print 'Singular matrix at index {0}, frequency {1:.5g}'.format(idx, self.freq[idx])
-                                #print 'Setting residual PT to zeros. '
-                                self.rpt[idx] = np.zeros((2, 2))
-        
-                        self._pt1 = pt1
-                        self._pt2 = pt2
-        
-                    else:
-                        self.rpt = np.zeros((1,2,2))
-                        try:
-#                            self.rpt[0] = np.eye(2)-np.dot(np.matrix(pt1).I,
-#                                                             np.matrix(pt2))
-                            self.rpt[idx] = np.eye(2) - 0.5*(np.dot(np.matrix(pt2[idx]).I,np.matrix(pt1[idx]))+\
-                                                             np.dot(np.matrix(pt1[idx]),np.matrix(pt2[idx]).I))
-                            
-                        except np.linalg.LinAlgError:
-                            #print 'Singular matrix at frequency {0:.5g}'.format(self.freq)
-                            #print 'Setting residual PT to zeros. '
-                            pass
-        
-                        self._pt1 =  np.zeros((1,2,2))
-                        self._pt1[0] = pt1
-                        self._pt2 =  np.zeros((1,2,2))
-                        self._pt2[0] = pt2
-                elif self.residualtype == 'booker':
-                    self.rpt = pt1 - pt2
+                    self._pt1 = pt1
+                    self._pt2 = pt2
 
         else:
             print  ('Could not determine ResPT - both PhaseTensor objects must'
@@ -992,7 +969,6 @@ class ResidualPhaseTensor():
         pt2err = pt_o2.pt_err
 
         if pt1err is not None and pt2err is not None:
-            self.rpt_err = np.zeros(self.rpt.shape)
             try:
                 if (pt1err.dtype not in [float,int]) or \
                     (pt2err.dtype not in [float,int]):
@@ -1001,71 +977,22 @@ class ResidualPhaseTensor():
                     raise MTex.MTpyError_value
                 if (not len(pt1err.shape) in [2,3] ):
                     raise MTex.MTpyError_value
-                if self.rpt_err is not None:
-                    if self.rpt_err.shape != pt1err.shape:
-                        raise MTex.MTpyError_value
-                if self.residualtype == 'heise':
-                    if len(pt1err.shape) == 3:
-                        self.rpt_err = np.zeros((len(pt1),2,2))
-    
-                        for idx in range(len(pt1err)):
-                            matrix1 = pt1[idx]
-                            matrix1err = pt1err[idx]
-                            try:
-                                matrix2, matrix2err = MTcc.invertmatrix_incl_errors(
-                                                pt2[idx], inmatrix_err = pt2err[idx])
-    
-                                summand1,err1 = MTcc.multiplymatrices_incl_errors(
-                                                    matrix2, matrix1,
-                                                    inmatrix1_err = matrix2err,
-                                                    inmatrix2_err =  matrix1err)
-                                summand2,err2 = MTcc.multiplymatrices_incl_errors(
-                                                    matrix1, matrix2,
-                                                    inmatrix1_err = matrix1err,
-                                                    inmatrix2_err =  matrix2err)
-                                self.rpt_err[idx] = np.sqrt(0.25*err1**2 +0.25*err2**2)
-                            except MTex.MTpyError_inputarguments:
-                                self.rpt_err[idx] = 1e10
-    
-    
-                        self._pt_err1 = pt1err
-                        self._pt_err2 = pt2err
-    
-                    else:
-                        self.rpt_err = np.zeros((1, 2, 2))
-                        try:
-                            self.rpt_err[0] = np.eye(2) - 0.5 * np.array(
-                                            np.dot( np.matrix(pt2).I, np.matrix(pt1) )
-                                            + np.dot( np.matrix(pt1), np.matrix(pt2).I))
-                            matrix1 = pt1
-                            matrix1err = pt1err
-                            matrix2, matrix2err = MTcc.invertmatrix_incl_errors(
-                                                           pt2, inmatrix_err = pt2err)
-    
-                            summand1,err1 = MTcc.multiplymatrices_incl_errors(
-                                                matrix2, matrix1,
-                                                inmatrix1_err = matrix2err,
-                                                inmatrix2_err =  matrix1err)
-                            summand2,err2 = MTcc.multiplymatrices_incl_errors(
-                                                matrix1, matrix2,
-                                                inmatrix1_err = matrix1err,
-                                                inmatrix2_err =  matrix2err)
-    
-                            self.rpt_err = np.sqrt(0.25*err1**2 +0.25*err2**2)
-                        except MTex.MTpyError_inputarguments:
-                            self.rpt_err[idx] = 1e10
-                
-                        self._pt1err =  np.zeros((1,2,2))  
-                        self._pt1err[0] = pt1err
-                        self._pt2err = np.zeros((1, 2, 2))
-                        self._pt2err[0] = pt2err
-                elif self.residualtype == 'booker':
-                    self.rpt_err = pt1err + pt2err
-
+                if pt1err.shape[-2:] != (2, 2) or \
+                    pt1err.size != self.rpt.size:
+                    raise MTex.MTpyError_value
             except MTex.MTpyError_value:
                 raise MTex.MTpyError_PT('ERROR - both PhaseTensor objects must'
                                         'contain PT-error arrays of the same shape')
 
+            pt1err = pt1err.reshape(self.rpt.shape)
+            pt2err = pt2err.reshape(self.rpt.shape)
+            self.rpt_err = compute_residual_pt_array(
+                pt1, pt2, pt1_err=pt1err, pt2_err=pt2err,
+                residualtype=self.residualtype)[1]
+            if self.residualtype == 'heise':
+                self._pt1err = pt1err
+                self._pt2err = pt2err
+
         else:
             print  ('Could not determine Residual PT uncertainties - both'
                     ' PhaseTensor objects must contain PT-error arrays of the'
@@ -1149,6 +1076,100 @@ class ResidualPhaseTensor():
 
 # =======================================================================
 
+def _invert_2x2(pt_array):
+    """
+    invert an array of 2x2 matrices of shape (..., 2, 2)
+
+    :returns: the inverse matrices, zeros where a matrix is singular, and a
+              boolean array of shape pt_array.shape[:-2] true where a matrix
+              is singular
+    """
+    det = pt_array[..., 0, 0] * pt_array[..., 1, 1] - \
+          pt_array[..., 0, 1] * pt_array[..., 1, 0]
+    singular = det == 0
+
+    inv_array = np.empty_like(pt_array)
+    inv_array[..., 0, 0] = pt_array[..., 1, 1]
+    inv_array[..., 0, 1] = -pt_array[..., 0, 1]
+    inv_array[..., 1, 0] = -pt_array[..., 1, 0]
+    inv_array[..., 1, 1] = pt_array[..., 0, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_array /= det[..., np.newaxis, np.newaxis]
+    inv_array[singular] = 0
+
+    return inv_array, singular
+
+
+def compute_residual_pt_array(pt1, pt2, pt1_err=None, pt2_err=None,
+                              residualtype='heise'):
+    """
+    Compute the residual phase tensors of two arrays of phase tensors at
+    once, for instance the data and model response phase tensors of a whole
+    survey stacked into (n_stations, n_periods, 2, 2) cubes.
+
+    heise:  DeltaPhi = I - 0.5 * (Phi1^-1 Phi2 + Phi2 Phi1^-1), set to zero
+            where Phi1 is singular
+    booker: DeltaPhi = Phi1 - Phi2
+
+    Errors are propagated as in ResidualPhaseTensor, the heise error is set
+    to 1e10 where Phi2 is singular.
+
+    :param pt1: phase tensors of shape (..., 2, 2), e.g. the data
+    :param pt2: phase tensors of the same shape, e.g. the model response
+    :param pt1_err: errors of pt1, optional
+    :param pt2_err: errors of pt2, optional
+    :param residualtype: 'heise' or 'booker'
+    :returns: residual phase tensors and their errors of the same shape as
+              pt1, the errors are None unless pt1_err and pt2_err are given
+    """
+    pt1 = np.asarray(pt1, dtype=float)
+    pt2 = np.asarray(pt2, dtype=float)
+    if pt1.shape != pt2.shape:
+        raise MTex.MTpyError_PT('PT arrays not the same shape')
+    if pt1.shape[-2:] != (2, 2):
+        raise MTex.MTpyError_PT('PT array is not a valid shape')
+    if residualtype not in ['heise', 'booker']:
+        raise MTex.MTpyError_PT('residual type {0} not understood, use '
+                                'heise or booker'.format(residualtype))
+
+    get_err = pt1_err is not None and pt2_err is not None
+    if get_err:
+        pt1_err = np.real(np.asarray(pt1_err, dtype=float))
+        pt2_err = np.real(np.asarray(pt2_err, dtype=float))
+        if pt1_err.shape != pt1.shape or pt2_err.shape != pt1.shape:
+            raise MTex.MTpyError_PT('PT-error arrays not the same shape as '
+                                    'the PT arrays')
+
+    if residualtype == 'booker':
+        rpt_err = None
+        if get_err:
+            rpt_err = pt1_err + pt2_err
+        return pt1 - pt2, rpt_err
+
+    # --> heise
+    inv1, singular1 = _invert_2x2(pt1)
+    rpt = np.eye(2) - 0.5 * (np.matmul(inv1, pt2) + np.matmul(pt2, inv1))
+    rpt[singular1] = 0
+
+    if not get_err:
+        return rpt, None
+
+    # error of the inverse: sum_kl |inv_ik inv_lj err_kl|
+    inv2, singular2 = _invert_2x2(pt2)
+    inv2_abs = np.abs(inv2)
+    inv2_err = np.matmul(np.matmul(inv2_abs, np.abs(pt2_err)), inv2_abs)
+
+    # variances of the products inv2.pt1 and pt1.inv2
+    var1 = np.matmul(inv2_err ** 2, pt1 ** 2) + \
+           np.matmul(inv2 ** 2, pt1_err ** 2)
+    var2 = np.matmul(pt1_err ** 2, inv2 ** 2) + \
+           np.matmul(pt1 ** 2, inv2_err ** 2)
+    rpt_err = np.sqrt(0.25 * var1 + 0.25 * var2)
+    rpt_err[singular2] = 1e10
+
+    return rpt, rpt_err
+
+
 def z2pt(z_array, z_err_array=None):
     """
         Calculate Phase Tensor from Z array (incl. uncertainties)
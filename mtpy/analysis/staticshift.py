@@ -6,6 +6,9 @@ Static Shift
 
 module for estimating static shift
 
+StaticShiftSurvey reads a survey once and indexes the stations in a KD-tree,
+so spatial median static shifts of all stations are estimated in one pass.
+
 Created on Mon Aug 19 10:06:21 2013
 
 @author: jpeacock
@@ -13,17 +16,264 @@ Created on Mon Aug 19 10:06:21 2013
 
 # ==============================================================================
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
+from scipy import spatial
 
 import mtpy.core.mt as mt
 import mtpy.imaging.mtplot as mtplot
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+# convert meters to decimal degrees so we don't have to deal with zone
+# changes
+meter_to_deg_factor = 8.994423457456377e-06
+
+
+# ==============================================================================
+class StaticShiftSurvey(object):
+    """
+    Survey-level spatial index for the spatial median static shift filter.
+
+    Every EDI file of the survey is read once.  Station locations are
+    stored in a KD-tree, so nearest neighbour and radius queries run for all
+    stations at once, and
+    the resistivities of each station interpolated onto a set of
+    frequencies are cached, so they are only computed once however many
+    stations use them.
+
+    :param edi_list: list of full paths to edi files
+    :param mt_obj_list: list of MT objects, instead of edi_list
+
+    Distances are measured as in estimate_static_spatial_median: in decimal
+    degrees, converted to meters with meter_to_deg_factor.  self.east and
+    self.north hold the station locations in these units.
+
+    :Example: ::
+
+        >>> import mtpy.analysis.staticshift as ss
+        >>> survey = ss.StaticShiftSurvey.from_directory(r"/home/edi_files")
+        >>> shifts = survey.estimate_static_shift(radius=1000.)
+        >>> survey.remove_static_shift(radius=1000., num_workers=4)
+
+    """
+
+    def __init__(self, edi_list=None, mt_obj_list=None):
+        if mt_obj_list is None:
+            if edi_list is None:
+                raise ValueError('Need to input edi_list or mt_obj_list')
+            mt_obj_list = [mt.MT(edi_fn) for edi_fn in edi_list]
+        self.mt_obj_list = list(mt_obj_list)
+        for mt_obj in self.mt_obj_list:
+            mt_obj.Z.compute_resistivity_phase()
+
+        self.lat = np.array([mt_obj.lat for mt_obj in self.mt_obj_list],
+                            dtype=float)
+        self.lon = np.array([mt_obj.lon for mt_obj in self.mt_obj_list],
+                            dtype=float)
+        self.east = self.lon / meter_to_deg_factor
+        self.north = self.lat / meter_to_deg_factor
+
+        self.tree = spatial.cKDTree(np.column_stack([self.east, self.north]))
+        self._res_cache = {}
+
+    @classmethod
+    def from_directory(cls, edi_path, **kwargs):
+        """
+        make a survey from all the edi files in a directory
+        """
+        edi_list = sorted([os.path.join(edi_path, edi)
+                           for edi in os.listdir(edi_path)
+                           if edi.endswith('.edi')])
+        return cls(edi_list=edi_list, **kwargs)
+
+    @property
+    def num_stations(self):
+        return len(self.mt_obj_list)
+
+    @property
+    def station(self):
+        return np.array([mt_obj.station for mt_obj in self.mt_obj_list])
+
+    def index(self, edi_fn):
+        """
+        index of the station read from edi_fn
+        """
+        edi_fn = os.path.normpath(os.path.abspath(edi_fn))
+        for ii, mt_obj in enumerate(self.mt_obj_list):
+            if mt_obj.fn == edi_fn:
+                return ii
+        raise ValueError('{0} is not part of the survey'.format(edi_fn))
+
+    def _station_index(self, station_index):
+        if station_index is None:
+            return np.arange(self.num_stations)
+        return np.atleast_1d(np.array(station_index, dtype=int))
+
+    def query_radius(self, radius, station_index=None):
+        """
+        find the stations within radius of each station, the station itself
+        is excluded.
+
+        :param radius: search radius in meters
+        :param station_index: indices of stations to query, default all
+        :return: list of (neighbour indices, distances in meters), one for
+                 each queried station, sorted by index
+        """
+        station_index = self._station_index(station_index)
+        points = self.tree.data[station_index]
+        neighbours = self.tree.query_ball_point(points, radius)
+
+        result = []
+        for ii, nb in zip(station_index, neighbours):
+            nb = np.array(sorted(set(nb) - {ii}), dtype=int)
+            distance = np.sqrt(((self.tree.data[nb] -
+                                 self.tree.data[ii]) ** 2).sum(axis=1))
+            result.append((nb, distance))
+        return result
+
+    def query_nearest(self, k=1, station_index=None):
+        """
+        find the k nearest stations of each station, the station itself is
+        excluded.
+
+        :param k: number of neighbours
+        :param station_index: indices of stations to query, default all
+        :return: (distances, indices), each (n_queried, k).  Missing
+                 neighbours have an infinite distance and index num_stations.
+        """
+        station_index = self._station_index(station_index)
+        distances, indices = self.tree.query(self.tree.data[station_index],
+                                             k=k + 1)
+        # drop the station itself, which is not necessarily the first of
+        # several stations at the same location
+        keep = indices != station_index[:, None]
+        keep[keep.sum(axis=1) > k, -1] = False
+        return (distances[keep].reshape(-1, k),
+                indices[keep].reshape(-1, k))
+
+    def get_resistivity(self, station_index, freq):
+        """
+        resistivity of a station interpolated onto freq, cached.  Entries
+        at frequencies outside the range of the station are 0.
+
+        :return: (n_freq, 2, 2) apparent resistivity
+        """
+        freq = np.asarray(freq, dtype=float)
+        key = (station_index, freq.tobytes())
+        if key not in self._res_cache:
+            mt_obj = self.mt_obj_list[station_index]
+            res = np.zeros((freq.size, 2, 2))
+            interp_idx = np.where((freq >= mt_obj.Z.freq.min()) &
+                                  (freq <= mt_obj.Z.freq.max()))[0]
+            if interp_idx.size > 0:
+                z_interp, tip_interp = mt_obj.interpolate(freq[interp_idx])
+                z_interp.compute_resistivity_phase()
+                res[interp_idx] = z_interp.resistivity[0:interp_idx.size]
+            self._res_cache[key] = res
+        return self._res_cache[key]
+
+    def estimate_static_shift(self, radius=1000., num_freq=20, freq_skip=4,
+                              shift_tol=.15, station_index=None):
+        """
+        estimate the spatial median static shift of the x and y modes of all
+        stations in one pass.  See estimate_static_spatial_median for a
+        description of the parameters.
+
+        :param station_index: indices of stations to estimate, default all
+        :return: (n_queried, 2) static shift corrections for x and y modes,
+                 1.0 where no stations are within radius
+        """
+        station_index = self._station_index(station_index)
+        neighbours = self.query_radius(radius, station_index=station_index)
+        static_shift = np.ones((station_index.size, 2))
+
+        # stations sharing the same frequencies are estimated together
+        groups = {}
+        for jj, ii in enumerate(station_index):
+            if neighbours[jj][0].size == 0:
+                _logger.info('No stations found within given radius %.2f m '
+                             'of station %s', radius,
+                             self.mt_obj_list[ii].station)
+                continue
+            interp_freq = self.mt_obj_list[ii].Z.freq[
+                freq_skip:num_freq + freq_skip]
+            groups.setdefault(interp_freq.tobytes(),
+                              (interp_freq, []))[1].append(jj)
+
+        for interp_freq, members in groups.values():
+            nb_list = [neighbours[jj][0] for jj in members]
+            max_nb = max(nb.size for nb in nb_list)
+
+            # padded neighbour table, missing neighbours point to a NaN row
+            needed = np.unique(np.hstack(nb_list))
+            res = np.full((self.num_stations + 1, interp_freq.size, 2),
+                          np.nan)
+            for ii in needed:
+                res[ii] = self.get_resistivity(ii, interp_freq)[:, [0, 1],
+                                                                [1, 0]]
+            nb_table = np.full((len(members), max_nb), self.num_stations)
+            for kk, nb in enumerate(nb_list):
+                nb_table[kk, :nb.size] = nb
+
+            median_res = np.nanmedian(res[nb_table], axis=1)
+            station_res = np.array([
+                self.mt_obj_list[station_index[jj]].Z.resistivity[
+                    freq_skip:num_freq + freq_skip][:, [0, 1], [1, 0]]
+                for jj in members])
+            static_shift[members] = np.median(station_res / median_res,
+                                              axis=1)
+
+        # check to see if the estimated static shift is within given tolerance
+        static_shift[(1 - shift_tol < static_shift) &
+                     (static_shift < 1 + shift_tol)] = 1.0
+
+        return static_shift
+
+    def remove_static_shift(self, radius=1000., num_freq=20, freq_skip=4,
+                            shift_tol=.15, save_dir=None, num_workers=1):
+        """
+        remove the spatial median static shift from all stations and write
+        new edi files named <station>_ss.edi.
+
+        :param save_dir: directory to write the new edi files to, default is
+                         a folder called SS next to each edi file
+        :param num_workers: number of edi files written in parallel
+        :return: list of (new edi file, ss_x, ss_y), one for each station
+        """
+        static_shift = self.estimate_static_shift(radius=radius,
+                                                  num_freq=num_freq,
+                                                  freq_skip=freq_skip,
+                                                  shift_tol=shift_tol)
+
+        def write_station(ii):
+            mt_obj = self.mt_obj_list[ii]
+            ss_x, ss_y = static_shift[ii]
+            station_dir = save_dir
+            if station_dir is None:
+                station_dir = os.path.join(os.path.dirname(mt_obj.fn), 'SS')
+            if not os.path.exists(station_dir):
+                os.makedirs(station_dir, exist_ok=True)
+            new_z_obj = mt_obj.remove_static_shift(ss_x=ss_x, ss_y=ss_y)
+            new_edi_fn = mt_obj.write_mt_file(
+                save_dir=station_dir,
+                fn_basename='{0}_ss.edi'.format(mt_obj.station),
+                new_Z_obj=new_z_obj)
+            return new_edi_fn, ss_x, ss_y
+
+        if num_workers > 1:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                return list(executor.map(write_station,
+                                         range(self.num_stations)))
+        return [write_station(ii) for ii in range(self.num_stations)]
 
 
 # ==============================================================================
 
 def estimate_static_spatial_median(edi_fn, radius=1000., num_freq=20,
-                                   freq_skip=4, shift_tol=.15):
+                                   freq_skip=4, shift_tol=.15, survey=None):
     """
     Remove static shift from a station using a spatial median filter.  This
     will look at all the edi files in the same directory as edi_fn and find
@@ -61,6 +311,11 @@ def estimate_static_spatial_median(edi_fn, radius=1000., num_freq=20,
                         that bias.  If 1-tol < correction < 1+tol then the
                         correction factor is set to 1.  *default* is 0.15
 
+        **survey** : StaticShiftSurvey
+                     survey containing edi_fn, reused so the other edi
+                     files are not read again.  *default* is None, which
+                     reads all the edi files in the directory of edi_fn
+
 
     Returns
     ----------------
@@ -69,81 +324,31 @@ def estimate_static_spatial_median(edi_fn, radius=1000., num_freq=20,
                                 static shift corrections for x and y modes
 
     """
-    # convert meters to decimal degrees so we don't have to deal with zone
-    # changes
-    meter_to_deg_factor = 8.994423457456377e-06
-    dm_deg = radius * meter_to_deg_factor
-
-    # make a list of edi files in the directory
-    edi_path = os.path.dirname(edi_fn)
-    edi_list = [os.path.abspath(os.path.join(edi_path, edi))
-                for edi in os.listdir(edi_path)
-                if edi.endswith('.edi')]
-
-    edi_list.remove(os.path.abspath(edi_fn))
-
-    # read the edi file
-    mt_obj = mt.MT(edi_fn)
-    mt_obj.Z.compute_resistivity_phase()
-    interp_freq = mt_obj.Z.freq[freq_skip:num_freq + freq_skip]
-
-    # Find stations near by and store them in a list
-    mt_obj_list = []
-    for kk, kk_edi in enumerate(edi_list):
-        mt_obj_2 = mt.MT(kk_edi)
-        delta_d = np.sqrt((mt_obj.lat - mt_obj_2.lat) ** 2 +
-                          (mt_obj.lon - mt_obj_2.lon) ** 2)
-        if delta_d <= dm_deg:
-            mt_obj_2.delta_d = float(delta_d) / meter_to_deg_factor
-            mt_obj_list.append(mt_obj_2)
-
-    if len(mt_obj_list) == 0:
+    if survey is None:
+        survey = StaticShiftSurvey.from_directory(os.path.dirname(edi_fn))
+    station_index = survey.index(edi_fn)
+
+    nb_index, nb_distance = survey.query_radius(
+        radius, station_index=station_index)[0]
+    if nb_index.size == 0:
         print('No stations found within given radius {0:.2f} m'.format(radius))
         return 1.0, 1.0
 
-    # extract the resistivity values from the near by stations
-    res_array = np.zeros((len(mt_obj_list), num_freq, 2, 2))
     print('These stations are within the given {0} m radius:'.format(radius))
-    for kk, mt_obj_kk in enumerate(mt_obj_list):
-        print('\t{0} --> {1:.1f} m'.format(mt_obj_kk.station, mt_obj_kk.delta_d))
-        interp_idx = np.where((interp_freq >= mt_obj_kk.Z.freq.min()) &
-                              (interp_freq <= mt_obj_kk.Z.freq.max()))
-
-        interp_freq_kk = interp_freq[interp_idx]
-        Z_interp, Tip_interp = mt_obj_kk.interpolate(interp_freq_kk)
-        Z_interp.compute_resistivity_phase()
-        res_array[
-            kk,
-            interp_idx,
-            :,
-            :] = Z_interp.resistivity[
-            0:len(interp_freq_kk),
-            :,
-            :]
-
-    # compute the static shift of x-components
-    static_shift_x = mt_obj.Z.resistivity[freq_skip:num_freq + freq_skip, 0, 1] / \
-        np.median(res_array[:, :, 0, 1], axis=0)
-    static_shift_x = np.median(static_shift_x)
-
-    # check to see if the estimated static shift is within given tolerance
-    if 1 - shift_tol < static_shift_x and static_shift_x < 1 + shift_tol:
-        static_shift_x = 1.0
-
-    # compute the static shift of y-components
-    static_shift_y = mt_obj.Z.resistivity[freq_skip:num_freq + freq_skip, 1, 0] / \
-        np.median(res_array[:, :, 1, 0], axis=0)
-    static_shift_y = np.median(static_shift_y)
-
-    # check to see if the estimated static shift is within given tolerance
-    if 1 - shift_tol < static_shift_y and static_shift_y < 1 + shift_tol:
-        static_shift_y = 1.0
+    for ii, delta_d in zip(nb_index, nb_distance):
+        print('\t{0} --> {1:.1f} m'.format(survey.mt_obj_list[ii].station,
+                                           delta_d))
+
+    static_shift_x, static_shift_y = survey.estimate_static_shift(
+        radius=radius, num_freq=num_freq, freq_skip=freq_skip,
+        shift_tol=shift_tol, station_index=station_index)[0]
 
     return static_shift_x, static_shift_y
 
 
 def remove_static_shift_spatial_filter(edi_fn, radius=1000, num_freq=20,
-                                       freq_skip=4, shift_tol=.15, plot=False):
+                                       freq_skip=4, shift_tol=.15, plot=False,
+                                       survey=None):
     """
     Remove static shift from a station using a spatial median filter.  This
     will look at all the edi files in the same directory as edi_fn and find
@@ -185,6 +390,11 @@ def remove_static_shift_spatial_filter(edi_fn, radius=1000, num_freq=20,
                    Boolean to plot the corrected response against the
                    non-corrected response.  *default* is False
 
+        **survey** : StaticShiftSurvey
+                     survey containing edi_fn, see
+                     estimate_static_spatial_median.  To correct every
+                     station of a survey use StaticShiftSurvey.remove_static_shift
+
     Returns
     ----------------
         **new_edi_fn_ss** : string
@@ -198,28 +408,29 @@ def remove_static_shift_spatial_filter(edi_fn, radius=1000, num_freq=20,
                        If plot is False None is returned
     """
 
+    if survey is None:
+        survey = StaticShiftSurvey.from_directory(os.path.dirname(edi_fn))
+
     ss_x, ss_y = estimate_static_spatial_median(edi_fn,
                                                 radius=radius,
                                                 num_freq=num_freq,
                                                 freq_skip=freq_skip,
-                                                shift_tol=.15)
-    mt_obj = mt.MT(edi_fn)
-
-    s, z_ss = mt_obj.Z.no_ss(reduce_res_factor_x=ss_x,
-                             reduce_res_factor_y=ss_y)
-    edi_path = os.path.dirname(edi_fn)
-
-    mt_obj.Z.z = z_ss
-    new_edi_fn = os.path.join(
-        edi_path, 'SS', '{0}_ss.edi'.format(
-            mt_obj.station))
-    if not os.path.exists(os.path.dirname(new_edi_fn)):
-        os.mkdir(os.path.dirname(new_edi_fn))
-    mt_obj.write_edi_file(new_fn=new_edi_fn)
+                                                shift_tol=shift_tol,
+                                                survey=survey)
+    mt_obj = survey.mt_obj_list[survey.index(edi_fn)]
+
+    new_z_obj = mt_obj.remove_static_shift(ss_x=ss_x, ss_y=ss_y)
+    save_dir = os.path.join(os.path.dirname(edi_fn), 'SS')
+    if not os.path.exists(save_dir):
+        os.mkdir(save_dir)
+    new_edi_fn = mt_obj.write_mt_file(
+        save_dir=save_dir,
+        fn_basename='{0}_ss.edi'.format(mt_obj.station),
+        new_Z_obj=new_z_obj)
 
     if plot == True:
         rpm = mtplot.plot_multiple_mt_responses(fn_list=[edi_fn, new_edi_fn],
                                                 plot_style='compare')
-        return new_edi_fn, s[0], rpm
+        return new_edi_fn, (ss_x, ss_y), rpm
     else:
-        return new_edi_fn, s[0], None
+        return new_edi_fn, (ss_x, ss_y), None
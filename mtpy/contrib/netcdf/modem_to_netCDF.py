@@ -4,17 +4,18 @@ This code works on MTpy ModEM format output and generate a netCDF file.
 The ModEM format generates an irregular grid in local units (east, north, depth).
 Here we converted that into a regular grid in global CRS (in lon, lat, depth).
 The regular spacing we used here is the statistical mode of the spacing our input data.
-The interpolation is done in local grid before reprojecting.
+The interpolation is done in local grid before reprojecting: the regular lon/lat
+grid is projected back to the local grid in one call, the interpolation weights
+are computed once and shared by all depth layers (see mtpy.utils.resampling).
 
 @author Umma Zannat, GA, 2019
 """
 import numpy as np
 from scipy import stats
-from scipy.interpolate import interp2d
 from pyproj import Proj, transform
 
 from mtpy.modeling.modem import Model, Data
-from mtpy.utils import gis_tools
+from mtpy.utils import gis_tools, resampling
 from mtpy.contrib.netcdf import nc
 
 import argparse
@@ -58,14 +59,6 @@ def lon_lat_grid_spacing(center, width, height, to_wgs84):
     return center_lon, center_lat, shifted_lon - center_lon, shifted_lat - center_lat
 
 
-def interpolated_layer(x, y, layer):
-    """
-    Create the interpolation function for each layer.
-    see https://docs.scipy.org/doc/scipy-0.16.0/reference/interpolate.html
-    """
-    return interp2d(x, y, layer)  # bounds_error=True
-
-
 def converter(in_proj, out_proj):
     """
     Transfrom coordinates from one epsg to another.
@@ -76,9 +69,18 @@ def converter(in_proj, out_proj):
     return result
 
 
-def interpolate(resistivity_dict, source_proj, grid_proj, center, east_spacing, north_spacing):
+def interpolate(resistivity_dict, source_proj, grid_proj, center, east_spacing, north_spacing,
+                stream=False):
     """
     Interpolate resistivity data to a regular grid.
+
+    The model nodes and the regular grid are each projected in a single call
+    and the bilinear weights of the regular grid are shared by all depth layers.
+    Points outside the model take the value of the nearest edge of the model.
+
+    If stream is True, result['resistivity'] is a generator of
+    (depth index, layer) pairs that can be passed to nc.write_resistivity_grid,
+    so the whole regular grid never has to be held in memory.
     """
 
     to_grid = converter(source_proj, grid_proj)
@@ -86,46 +88,29 @@ def interpolate(resistivity_dict, source_proj, grid_proj, center, east_spacing,
 
     center_lon, center_lat, width, height = lon_lat_grid_spacing(center, east_spacing, north_spacing, to_grid)
 
-    lon_list = [to_grid(x, y)[0]
-                for x in resistivity_dict['x']
-                for y in resistivity_dict['y']]
-
-    lat_list = [to_grid(x, y)[1]
-                for x in resistivity_dict['x']
-                for y in resistivity_dict['y']]
-
-    interpolation_funcs = [interpolated_layer(resistivity_dict['x'],
-                                              resistivity_dict['y'],
-                                              resistivity_dict['resistivity'][z_index, :, :])
-                           for z_index in range(resistivity_dict['z'].shape[0])]
+    x_nodes, y_nodes = np.meshgrid(resistivity_dict['x'], resistivity_dict['y'], indexing='ij')
+    lon_list, lat_list = to_grid(x_nodes.ravel(), y_nodes.ravel())
 
     result = {
-        'longitude': uniform_interior_grid(sorted(lon_list), width, center_lon),
-        'latitude': uniform_interior_grid(sorted(lat_list), height, center_lat),
+        'longitude': uniform_interior_grid(np.sort(lon_list), width, center_lon),
+        'latitude': uniform_interior_grid(np.sort(lat_list), height, center_lat),
         'depth': resistivity_dict['z']}
 
-    result['resistivity'] = np.zeros(tuple(result[key].shape[0]
-                                           for key in ['depth', 'latitude', 'longitude']))
-
-    def uniform_layer(interp_func, latitudes, longitudes):
-        """
-        Calculate the interpolated values for the layer.
-        """
-        lats, lons = latitudes.shape[0], longitudes.shape[0]
+    # local coordinates of every regular grid node, in one call
+    longitudes, latitudes = np.meshgrid(result['longitude'], result['latitude'])
+    x, y = from_grid(longitudes, latitudes)
 
-        ll_result = np.zeros((lats, lons))
-        for j in range(lons):
-            for i in range(lats):
-                lon, lat = longitudes[j], latitudes[i]
-                x, y = from_grid(lon, lat)
+    weights = resampling.rectilinear_weights((resistivity_dict['y'], resistivity_dict['x']),
+                                             (y, x), clamp=True)
+    layers = resampling.resample_slices(weights, resistivity_dict['resistivity'])
 
-                ll_result[i, j] = interp_func(x, y)
-
-        return ll_result
-
-    for z_index in range(result['depth'].shape[0]):
-        result['resistivity'][z_index, :, :] = uniform_layer(interpolation_funcs[z_index],
-                                                             result['latitude'], result['longitude'])
+    if stream:
+        result['resistivity'] = layers
+    else:
+        result['resistivity'] = np.zeros(tuple(result[key].shape[0]
+                                               for key in ['depth', 'latitude', 'longitude']))
+        for z_index, layer in layers:
+            result['resistivity'][z_index, :, :] = layer
 
     return result
 
@@ -169,7 +154,8 @@ def main(data_file, model_file, output_file, source_proj=None):
     grid_proj = Proj(init='epsg:4283') # output grid Coordinate system 4326, 4283, 3112
     grid_proj = Proj(init='epsg:3112') # output grid Coordinate system 4326, 4283, 3112
     result = interpolate(resistivity_data, source_proj, grid_proj, center,
-                         median_spacing(model.grid_east), median_spacing(model.grid_north))
+                         median_spacing(model.grid_east), median_spacing(model.grid_north),
+                         stream=True)
 
     nc.write_resistivity_grid(output_file, grid_proj,
                               result['latitude'], result['longitude'], result['depth'],
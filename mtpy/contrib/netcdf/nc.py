@@ -7,11 +7,9 @@ import os
 
 from netCDF4 import Dataset
 import numpy as np
-from scipy import spatial
-#Not work import scipy.spatial.cKDTree as KDTree
 from pyproj import transform, Proj
 
-from mtpy.utils import gis_tools
+from mtpy.utils import gis_tools, resampling
 
 
 def IDW(source_points, source_values, query_points, k=6, p=5):
@@ -20,11 +18,8 @@ def IDW(source_points, source_values, query_points, k=6, p=5):
     and `k` nearest neighbors.
     Returns the interpolated values at `query_points`.
     """
-    tree = spatial.cKDTree(source_points, k)
-    distances, indices = tree.query(query_points, k=k)
-    inv_dist = 1. / np.power(distances, p)
-    weights = inv_dist / inv_dist.sum(axis=1)[:, np.newaxis]
-    return (weights * source_values[indices]).sum(axis=1)
+    weights = resampling.idw_weights(source_points, query_points, k=k, p=p)
+    return weights.apply(source_values)
 
 
 def create_dataset(filename, overwrite=True):
@@ -59,7 +54,13 @@ def set_grid_mapping_attrs_geographic(crs_var, proj):
 def write_resistivity_grid(output_file, epsg_code,
                            latitude, longitude, elevation, resistivity_data,
                            **kwargs):
-    """ Resistivity_data in (elevation, latitude, longitude) grid. """
+    """
+    Resistivity_data in (elevation, latitude, longitude) grid.
+
+    resistivity_data can also be an iterable of (elevation index, layer)
+    pairs, e.g. from mtpy.utils.resampling.resample_slices, in which case the
+    layers are written one at a time as they are produced.
+    """
 
     with create_dataset(output_file) as dataset:
         dataset.description = 'Resistivity Model'
@@ -90,7 +91,11 @@ def write_resistivity_grid(output_file, epsg_code,
         y[:] = longitude
         z[:] = elevation
 
-        resistivity[:, :, :] = resistivity_data
+        if isinstance(resistivity_data, np.ndarray):
+            resistivity[:, :, :] = resistivity_data
+        else:
+            for z_index, layer in resistivity_data:
+                resistivity[z_index, :, :] = layer
 
         # attach crs info
         crs_var = dataset.createVariable('crs', 'i4', ())
@@ -5,7 +5,9 @@ This code operates on a MTpy WinGlink format file and generates a NetCDF file.
 In the WinGlink format the first three columns are x, y, z coordinates in UTM (meter),
 and the fourth is the resistivity. Here we interpolated the irregularly-spaced data
 points into a grid in global WGS84 CRS using the Inverse Distance Weighing as the
-interpolation method.
+interpolation method. The grid is projected and interpolated one depth layer at a
+time, sharing a single KD-tree of the source points, and every layer is written
+to the NetCDF file as soon as it is interpolated.
 
 @author Umma Zannat, GA, 2019
 """
@@ -13,8 +15,10 @@ interpolation method.
 import argparse
 
 import numpy as np
-from pyproj import Proj
+from pyproj import Proj, transform
+from scipy import spatial
 
+from mtpy.utils import resampling
 from . import nc
 
 
@@ -37,9 +41,6 @@ def mask_interpolate_and_write(output_file,
     """
     grid_x, grid_y, grid_z, grid_points = grid_spec
 
-    # flatten grid because IDW takes a flattened array as input
-    utm_points = nc.transform_3d(grid_proj, source_proj, nc.flatten_grid(grid_points))
-
     # mask source for grid
     # this is needed because the high resistivity of the air layers contaminate
     # the IDW interpolated data underground
@@ -48,12 +49,21 @@ def mask_interpolate_and_write(output_file,
     source_points = source_points[mask]
     source_values = source_values[mask]
 
-    # interpolate data at grid points and reshape back to the grid
-    resistivity = nc.IDW(source_points, source_values, utm_points)
-    resistivity = resistivity.reshape(grid_points.shape[:3])
+    # the horizontal grid is the same for every layer, so project it only once
+    grid_lon, grid_lat = np.meshgrid(grid_x, grid_y)
+    utm_x, utm_y = transform(grid_proj, source_proj, grid_lon, grid_lat)
+
+    tree = spatial.cKDTree(source_points, 6)
+
+    def layers():
+        """ interpolate data at the grid points of one layer at a time """
+        for z_index, z in enumerate(grid_z):
+            utm_points = np.stack([utm_x, utm_y, np.full(utm_x.shape, z)], axis=-1)
+            weights = resampling.idw_weights(source_points, utm_points, tree=tree)
+            yield z_index, weights.apply(source_values)
 
     # write to output NetCDF file
-    nc.write_resistivity_grid(output_file, grid_proj, grid_y, grid_x, grid_z, resistivity.transpose([2, 0, 1]))
+    nc.write_resistivity_grid(output_file, grid_proj, grid_y, grid_x, grid_z, layers())
 
 
 def main(input_file, source_proj, false_easting, false_northing, output_file, grid_proj, left, right, resolution):
@@ -14,6 +14,7 @@
 # ==============================================================================
 import os
 import datetime
+import re
 import numpy as np
 
 import mtpy.utils.gis_tools as gis_tools
@@ -22,14 +23,22 @@ import mtpy.utils.filehandling as MTfh
 import mtpy.core.z as MTz
 from mtpy.utils.mtpylog import MtPyLog
 
-try:
-    import scipy.stats.distributions as ssd
 
-    ssd_test = True
-except ImportError:
-    print('Need scipy.stats.distributions to compute spectra errors')
-    print('Could not find scipy.stats.distributions, check distribution')
-    ssd_test = False
+def _import_distributions():
+    """
+    import scipy.stats.distributions, which is slow to import and only needed
+    to compute errors of spectra, on first use.
+
+    :returns: scipy.stats.distributions or None if scipy is not installed
+    """
+    try:
+        import scipy.stats.distributions as ssd
+    except ImportError:
+        print('Need scipy.stats.distributions to compute spectra errors')
+        print('Could not find scipy.stats.distributions, check distribution')
+        ssd = None
+    return ssd
+
 
 tab = ' ' * 4
 # ==============================================================================
@@ -38,6 +47,55 @@ tab = ' ' * 4
 _logger = MtPyLog.get_mtpy_logger(__name__)
 
 
+def _printf_format(num_format):
+    """
+    printf style equivalent of a format spec like ' 15.6e', None if the
+    spec uses features printf does not have (alignment, grouping, ...)
+    """
+    if re.match(r'^[ +-]?#?0?\d*(\.\d+)?[eEfFgG]$', num_format) is None:
+        return None
+    return '%' + num_format
+
+
+def format_data_block(values, num_format=' 15.6e', block_len=6):
+    """
+    Format a 1D array of numbers as the rows of an edi data block, with
+    block_len numbers per row, each formatted with num_format.  The whole
+    block is formatted with a single string operation, the output is the
+    same as formatting each number with '{0:{1}}'.format(value, num_format).
+
+    :param values: numbers to write
+    :type values: np.ndarray
+
+    :param num_format: format spec of each number
+    :type num_format: string
+
+    :param block_len: number of values per row
+    :type block_len: int
+
+    :returns: the rows of the block, ending with an empty line
+    :rtype: string
+    """
+    values = np.asarray(values).ravel()
+    if values.size == 0:
+        return ''
+
+    n_rows, n_rest = divmod(values.size, block_len)
+    fmt = _printf_format(num_format)
+    if fmt is not None:
+        block = ((fmt * block_len + '\n') * n_rows + fmt * n_rest) % \
+                tuple(values.tolist())
+    else:
+        num_str = ['{0:{1}}'.format(value, num_format) for value in values]
+        rows = [''.join(num_str[ii:ii + block_len])
+                for ii in range(0, values.size, block_len)]
+        block = '\n'.join(rows)
+        if n_rest == 0:
+            block += '\n'
+
+    return block + '\n'
+
+
 class Edi(object):
     """
     This class is for .edi files, mainly reading and writing.  Has been tested
@@ -365,6 +423,9 @@ class Edi(object):
         :type comp_list: list
         """
 
+        ssd = _import_distributions()
+        ssd_test = ssd is not None
+
         data_dict = {}
         avgt_dict = {}
         data_find = False
@@ -600,24 +661,30 @@ class Edi(object):
 
         # write out data only impedance and tipper
         z_data_lines = [self._data_header_str.format('impedances'.upper())]
-        self.Z.z = np.nan_to_num(self.Z.z)
-        self.Z.z_err = np.nan_to_num(self.Z.z_err)
-        self.Tipper.tipper = np.nan_to_num(self.Tipper.tipper)
-        self.Tipper.tipper_err = np.nan_to_num(self.Tipper.tipper_err)
+        # nan are written as 0 (--> empty), use copies so Z and Tipper do
+        # not recompute resistivity and phase
+        z_arr = np.nan_to_num(self.Z.z)
+        z_err_arr = np.nan_to_num(self.Z.z_err)
+        t_arr = self.Tipper.tipper
+        if t_arr is not None:
+            t_arr = np.nan_to_num(t_arr)
+        t_err_arr = self.Tipper.tipper_err
+        if t_err_arr is not None:
+            t_err_arr = np.nan_to_num(t_err_arr)
         for ii in range(2):
             for jj in range(2):
-                z_lines_real = self._write_data_block(self.Z.z[:, ii, jj].real,
+                z_lines_real = self._write_data_block(z_arr[:, ii, jj].real,
                                                       self._z_labels[2 * ii + jj][0])
-                z_lines_imag = self._write_data_block(self.Z.z[:, ii, jj].imag,
+                z_lines_imag = self._write_data_block(z_arr[:, ii, jj].imag,
                                                       self._z_labels[2 * ii + jj][1])
-                z_lines_var = self._write_data_block(self.Z.z_err[:, ii, jj]**2.,
+                z_lines_var = self._write_data_block(z_err_arr[:, ii, jj]**2.,
                                                      self._z_labels[2 * ii + jj][2])
 
                 z_data_lines += z_lines_real
                 z_data_lines += z_lines_imag
                 z_data_lines += z_lines_var
 
-        if self.Tipper.tipper is not None and np.all(self.Tipper.tipper == 0):
+        if t_arr is not None and np.all(t_arr == 0):
             trot_lines = ['']
             t_data_lines = ['']
         else:
@@ -637,11 +704,11 @@ class Edi(object):
                 # write out tipper lines
                 t_data_lines = [self._data_header_str.format('tipper'.upper())]
                 for jj in range(2):
-                    t_lines_real = self._write_data_block(self.Tipper.tipper[:, 0, jj].real,
+                    t_lines_real = self._write_data_block(t_arr[:, 0, jj].real,
                                                           self._t_labels[jj][0])
-                    t_lines_imag = self._write_data_block(self.Tipper.tipper[:, 0, jj].imag,
+                    t_lines_imag = self._write_data_block(t_arr[:, 0, jj].imag,
                                                           self._t_labels[jj][1])
-                    t_lines_var = self._write_data_block(self.Tipper.tipper_err[:, 0, jj]**2.,
+                    t_lines_var = self._write_data_block(t_err_arr[:, 0, jj]**2.,
                                                          self._t_labels[jj][2])
 
                     t_data_lines += t_lines_real
@@ -700,20 +767,15 @@ class Edi(object):
             raise MTex.MTpyError_EDI(
                 'Cannot write block for {0}'.format(data_key))
 
-        for d_index, d_comp in enumerate(data_comp_arr, 1):
-            if d_comp == 0.0 and data_key.lower() not in ['zrot', 'trot']:
-                d_comp = float(self.Header.empty)
-            # write the string in the specified format
-            num_str = '{0:{1}}'.format(d_comp, self._num_format)
-
-            # check to see if a new line is needed
-            if d_index % self._block_len == 0:
-                num_str += '\n'
-            # at the end of the block add a return
-            if d_index == data_comp_arr.size:
-                num_str += '\n'
+        data_comp_arr = np.asarray(data_comp_arr, dtype=float)
+        if data_key.lower() not in ['zrot', 'trot']:
+            data_comp_arr = np.where(data_comp_arr == 0.0,
+                                     float(self.Header.empty),
+                                     data_comp_arr)
 
-            block_lines.append(num_str)
+        block_lines.append(format_data_block(data_comp_arr,
+                                             num_format=self._num_format,
+                                             block_len=self._block_len))
 
         return block_lines
 
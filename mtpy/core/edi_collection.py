@@ -27,7 +27,7 @@ from mtpy.utils.mtpy_decorator import deprecated
 from mtpy.utils.matplotlib_utils import gen_hist_bins
 from mtpy.utils.mtpylog import MtPyLog
 import mtpy.analysis.pt as MTpt
-import mtpy.imaging.penetration
+import mtpy.analysis.penetration_depth as pendep
 
 def is_num_in_seq(anum, aseq, atol=0.0001):
     """
@@ -541,20 +541,20 @@ class EdiCollection(object):
             freq_list = 1./np.array(period_list)
         # end if
 
+        # penetration depths of all stations, periods and components in one call
+        stack, depth = pendep.get_penetration_depths(self.mt_obj_list, periods=1.0 / np.asarray(freq_list))
+        depth = -depth[:, :, [pendep.COMPONENTS.index(rho) for rho in ('det', 'zxy', 'zyx')]]
+
         with open(csvfname, "w",newline="") as csvf:
             writer = csv.writer(csvf)
             writer.writerow(csv_header)
 
-            for freq in freq_list:
+            for ifreq, freq in enumerate(freq_list):
                 pdlist = []
 
-                stations, periods, pen_depth_det, latlons = mtpy.imaging.penetration.get_penetration_depth_by_period( self.mt_obj_list, 1.0/freq)  # whichrho='det')
-                stations, periods, pen_depth_zxy, latlons = mtpy.imaging.penetration.get_penetration_depth_by_period( self.mt_obj_list, 1.0/freq,whichrho='zxy')
-                stations, periods, pen_depth_zyx, latlons = mtpy.imaging.penetration.get_penetration_depth_by_period( self.mt_obj_list, 1.0/freq,whichrho='zyx')
-
-
-                for iter in range(len(stations)):
-                    pdlist.append([stations[iter], freq, latlons[iter][1], latlons[iter][0], pen_depth_det[iter], pen_depth_zxy[iter], pen_depth_zyx[iter]])
+                for iter in range(len(stack['station'])):
+                    pdlist.append([stack['station'][iter], freq, stack['lon'][iter], stack['lat'][iter]] +
+                                  list(depth[iter, ifreq]))
 
                 csv_freq_file = os.path.join(dest_dir,
                                              '{name[0]}_{freq}Hz{name[1]}'.format(
@@ -713,7 +713,8 @@ class EdiCollection(object):
         return csvfname
 
     def export_edi_files(self, dest_dir, period_list=None,
-                                interpolate=True,period_buffer=None,longitude_format='LON'):
+                                interpolate=True,period_buffer=None,longitude_format='LON',
+                                num_workers=None):
         """
         export edi files.
         :param dest_dir: output directory
@@ -727,14 +728,17 @@ class EdiCollection(object):
                               greater than which interpolation will not stretch.
                               e.g. 1.5 means only interpolate to a maximum of
                               1.5 times each side of each frequency value
+        :param num_workers: number of processes writing the edi files,
+                            default is the number of cpus
 
-        :return:
+        :return: list of the edi files written
         """
 
         if period_list is None:
             period_list = np.array(self.get_periods_by_stats())
         # end if
 
+        write_list = []
         for mt_obj in self.mt_obj_list:
             # interpolate each station onto the period list
             # check bounds of period list
@@ -768,19 +772,24 @@ class EdiCollection(object):
                 interp_z, interp_t = mt_obj.interpolate(1. / interp_periods)
 
                 if dest_dir is not None and os.path.isdir(dest_dir):
-                    mt_obj.write_mt_file(
-                        save_dir=dest_dir,
-                        fn_basename=mt_obj.station,
-                        file_type='edi',
-                        new_Z_obj=interp_z,
-                        new_Tipper_obj=interp_t,
-                        longitude_format=longitude_format)
+                    write_list.append((mt_obj, interp_z, interp_t))
             else:
                 pass
         # end for
-    # end func
 
-        return
+        if len(write_list) == 0:
+            return []
+
+        mt_objs, interp_zs, interp_ts = zip(*write_list)
+        return mt.write_mt_files(mt_objs,
+                                 save_dir=dest_dir,
+                                 fn_basename_list=[mt_obj.station for mt_obj in mt_objs],
+                                 file_type='edi',
+                                 new_Z_obj_list=interp_zs,
+                                 new_Tipper_obj_list=interp_ts,
+                                 longitude_format=longitude_format,
+                                 num_workers=num_workers)
+    # end func
 
     def get_bounding_box(self, epsgcode=None):
         """ compute bounding box
@@ -15,39 +15,42 @@ from dateutil import parser as dt_parser
 from pathlib import Path
 
 import mtpy.core.edi as MTedi
+import mtpy.core.mt_cache as mt_cache
 import mtpy.core.z as MTz
 import mtpy.utils.gis_tools as gis_tools
-import mtpy.analysis.pt as MTpt
-import mtpy.analysis.distortion as MTdistortion
-import mtpy.core.jfile as MTj
-import mtpy.core.mt_xml as MTxml
-import mtpy.core.zmm as MTzmm
 
+from mtpy.utils import instrumentation, parallel
 from mtpy.utils.mtpylog import MtPyLog
 
 _logger = MtPyLog.get_mtpy_logger(__name__)
 # _logger.setLevel(logging.DEBUG)
 
-try:
-    import scipy
 
-    scipy_version = [int(ss) for ss in scipy.__version__.split('.')]
+def _import_interpolate():
+    """
+    import scipy.interpolate on first use, importing scipy is slow and only
+    needed to interpolate.
+
+    :returns: scipy.interpolate
+    :raises ImportError: if scipy is not installed
+    """
+    try:
+        import scipy
+        import scipy.interpolate as spi
+    except ImportError:  # pragma: no cover
+        _logger.warning('Could not find scipy.interpolate, cannot use method interpolate'
+                        'check installation you can get scipy from scipy.org.')
+        raise ImportError('could not interpolate, need to install scipy')
+
+    scipy_version = [int(ss) for ss in scipy.__version__.split('.')[:2]]
     if scipy_version[0] == 0:
         if scipy_version[1] < 14:
             warnings.warn('Note: need scipy version 0.14.0 or higher or interpolation '
                           'might not work.', ImportWarning)
             _logger.warning('Note: need scipy version 0.14.0 or higher or interpolation '
                             'might not work.')
-    import scipy.interpolate as spi
 
-    interp_import = True
-
-except ImportError:  # pragma: no cover
-    warnings.warn('Could not find scipy.interpolate, cannot use method interpolate'
-                  'check installation you can get scipy from scipy.org.')
-    _logger.warning('Could not find scipy.interpolate, cannot use method interpolate'
-                    'check installation you can get scipy from scipy.org.')
-    interp_import = False
+    return spi
 
 
 # =============================================================================
@@ -226,6 +229,8 @@ class MT(object):
     @property
     def pt(self):
         """mtpy.analysis.pt.PhaseTensor object to hold phase tensor"""
+        import mtpy.analysis.pt as MTpt
+
         return MTpt.PhaseTensor(z_object=self.Z)
 
     # ==========================================================================
@@ -340,12 +345,17 @@ class MT(object):
     # ==========================================================================
     #  read in files
     # ==========================================================================
-    def read_mt_file(self, fn, file_type=None):
+    @instrumentation.instrument('mt.MT.read_mt_file')
+    def read_mt_file(self, fn, file_type=None, use_cache=True):
         """
         Read an MT response file.
 
         .. note:: Currently only .edi, .xml, and .j files are supported
 
+        .. note:: If the cache of mtpy.core.mt_cache is on, a file that was
+                  read before and has not changed since is loaded from the
+                  cache instead of being parsed again.
+
         :param fn: full path to input file
         :type fn: string
 
@@ -354,6 +364,9 @@ class MT(object):
                           the extension.
         :type file_type: string
 
+        :param use_cache: use the cache of parsed files if it is on
+        :type use_cache: [ True | False ]
+
         :Example: ::
 
             >>> import mtpy.core.mt as mt
@@ -365,6 +378,14 @@ class MT(object):
         if file_type is None:
             file_type = os.path.splitext(fn)[1][1:].lower()
 
+        cache = mt_cache.get_cache() if use_cache else None
+        if cache is not None and os.path.isfile(fn):
+            if cache.load(self, fn, file_type):
+                return
+
+        if instrumentation.is_enabled():
+            instrumentation.add_bytes(os.path.getsize(fn))
+
         if file_type.lower() == 'edi':
             self._read_edi_file(fn)
         elif file_type.lower() == 'j':
@@ -376,6 +397,10 @@ class MT(object):
         else:
             raise MTError('File type not supported yet')
 
+        if cache is not None:
+            cache.save(self, fn, file_type)
+
+    @instrumentation.instrument('mt.MT.write_mt_file')
     def write_mt_file(self, save_dir=None, fn_basename=None, file_type='edi',
                       new_Z_obj=None, new_Tipper_obj=None, longitude_format='LON',
                       latlon_format='dms'
@@ -928,6 +953,7 @@ class MT(object):
         """
         read j file
         """
+        import mtpy.core.jfile as MTj
 
         j_obj = MTj.JFile(j_fn)
 
@@ -949,6 +975,8 @@ class MT(object):
         """
         read zmm file
         """
+        import mtpy.core.zmm as MTzmm
+
         if not isinstance(zmm_fn, Path):
             zmm_fn = Path(zmm_fn)
             
@@ -972,6 +1000,7 @@ class MT(object):
         """
         read xml file
         """
+        import mtpy.core.mt_xml as MTxml
 
         if not os.path.isfile(xml_fn):
             raise MTError('Could not find {0}, check path.'.format(xml_fn))
@@ -1300,6 +1329,7 @@ class MT(object):
         """
         Write a xml file.
         """
+        import mtpy.core.mt_xml as MTxml
 
         if new_Z is not None:
             self.Z = new_Z
@@ -1732,6 +1762,8 @@ class MT(object):
             >>>                    new_Z=new_z)
 
         """
+        import mtpy.analysis.distortion as MTdistortion
+
         dummy_z_obj = MTz.copy.deepcopy(self.Z)
         D, new_z_object = MTdistortion.remove_distortion(z_object=dummy_z_obj,
                                                          num_freq=num_freq)
@@ -1782,6 +1814,7 @@ class MT(object):
 
         return new_z_obj
 
+    @instrumentation.instrument('mt.MT.interpolate')
     def interpolate(self, new_freq_array, interp_type='slinear', bounds_error=True, period_buffer=None):
         """
         Interpolate the impedance tensor onto different frequencies
@@ -1817,9 +1850,8 @@ class MT(object):
             >>> ...                   new_Tipper_obj=new_tipper_object)
 
         """
-        # if the interpolation module has not been loaded return
-        if interp_import is False:
-            raise ImportError('could not interpolate, need to install scipy')
+        # load the interpolation module, raises an ImportError without scipy
+        spi = _import_interpolate()
 
         # make sure the input is a numpy array
         if not isinstance(new_freq_array, np.ndarray):
@@ -1980,6 +2012,131 @@ class MT(object):
         # raise NotImplementedError
 
 
+# ==============================================================================
+# write many MT objects
+# ==============================================================================
+def _init_batch_writer(mt_obj_list, write_kwargs_list):
+    state = parallel.worker_state(__name__)
+    state['mt_obj_list'] = mt_obj_list
+    state['write_kwargs_list'] = write_kwargs_list
+
+
+def _write_batch_group(index_list):
+    """
+    write the MT objects of index_list one after the other, they all go to
+    the same file name so make_unique_filename numbers them in order
+    """
+    state = parallel.worker_state(__name__)
+    fn_list = []
+    for index in index_list:
+        mt_obj = state['mt_obj_list'][index]
+        fn_list.append(mt_obj.write_mt_file(
+            **state['write_kwargs_list'][index]))
+    return fn_list
+
+
+@instrumentation.instrument('mt.write_mt_files')
+def write_mt_files(mt_obj_list, save_dir=None, fn_basename_list=None,
+                   file_type='edi', new_Z_obj_list=None,
+                   new_Tipper_obj_list=None, longitude_format='LON',
+                   latlon_format='dms', num_workers=None):
+    """
+    Write many MT objects with MT.write_mt_file on a pool of processes.
+    The files are the same as those written one at a time.
+
+    :param mt_obj_list: list of MT objects
+    :type mt_obj_list: list
+
+    :param save_dir: full path save directory, if None each object is saved
+                     to its own save_dir
+    :type save_dir: string
+
+    :param fn_basename_list: file name of each object, *default* is
+                             station.file_type
+    :type fn_basename_list: list
+
+    :param file_type: [ 'edi' | 'xml' ]
+    :type file_type: string
+
+    :param new_Z_obj_list: new Z object for each MT object, or None
+    :type new_Z_obj_list: list
+
+    :param new_Tipper_obj_list: new Tipper object for each MT object, or None
+    :type new_Tipper_obj_list: list
+
+    :param num_workers: number of processes, *default* is the number of
+                        cpus.  With 1 the files are written in this process.
+    :type num_workers: int
+
+    :returns: full path of the written files, in the order of mt_obj_list
+    :rtype: list
+
+    :Example: ::
+
+        >>> import mtpy.core.mt as mt
+        >>> mt_obj_list = [mt.MT(fn) for fn in edi_list]
+        >>> fn_list = mt.write_mt_files(mt_obj_list, save_dir=r"/home/new_edi",
+        ...                             num_workers=8)
+    """
+    mt_obj_list = list(mt_obj_list)
+    n_obj = len(mt_obj_list)
+    if fn_basename_list is None:
+        fn_basename_list = [None] * n_obj
+    if new_Z_obj_list is None:
+        new_Z_obj_list = [None] * n_obj
+    if new_Tipper_obj_list is None:
+        new_Tipper_obj_list = [None] * n_obj
+
+    write_kwargs_list = []
+    for mt_obj, fn_basename, new_z, new_t in zip(mt_obj_list,
+                                                 fn_basename_list,
+                                                 new_Z_obj_list,
+                                                 new_Tipper_obj_list):
+        if save_dir is not None:
+            mt_obj.save_dir = save_dir
+        write_kwargs_list.append({'save_dir': save_dir,
+                                  'fn_basename': fn_basename,
+                                  'file_type': file_type,
+                                  'new_Z_obj': new_z,
+                                  'new_Tipper_obj': new_t,
+                                  'longitude_format': longitude_format,
+                                  'latlon_format': latlon_format})
+
+    # objects writing to the same file name are written by the same worker,
+    # in order, so the numbering of make_unique_filename is kept
+    groups = {}
+    for index, (mt_obj, fn_basename) in enumerate(zip(mt_obj_list,
+                                                      fn_basename_list)):
+        if fn_basename is None:
+            fn_basename = '{0}.{1}'.format(mt_obj.station, file_type)
+        key = os.path.join(mt_obj.save_dir,
+                           os.path.splitext(fn_basename)[0]).lower()
+        groups.setdefault(key, []).append(index)
+    group_list = list(groups.values())
+    num_workers = parallel.get_num_workers(num_workers, len(group_list))
+
+    t0 = time.time()
+    # fork lets the workers use the objects without pickling them
+    group_fn_list = parallel.map_tasks(_write_batch_group,
+                                       [(group,) for group in group_list],
+                                       num_workers=num_workers,
+                                       initializer=_init_batch_writer,
+                                       initargs=(mt_obj_list,
+                                                 write_kwargs_list),
+                                       state=__name__, fork=True,
+                                       chunksize=None)
+
+    fn_list = [None] * n_obj
+    for group, group_fns in zip(group_list, group_fn_list):
+        for index, fn in zip(group, group_fns):
+            fn_list[index] = fn
+
+    _logger.info('Wrote {0} files with {1} processes in {2:.2f} s'.format(
+        n_obj, num_workers, time.time() - t0))
+
+    return fn_list
+
+
 # ==============================================================================
 # Site details
 # ==============================================================================
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of parsed MT response files.
+
+Parsing an EDI file from text is much slower than loading the arrays it
+holds, so MT.read_mt_file can keep what it parsed in a cache on disk and
+load it from there the next time the same file is read.  Every entry point
+that builds MT objects (EdiCollection, modem.Data, occam2d, staticshift,
+...) then re-opens a survey from the cache.
+
+Each cache entry is a binary pickle file of the parsed state of the MT
+object, the Z and Tipper objects with all their arrays, the site, location,
+field notes and header information, ...  Loading an entry takes about a
+millisecond for a typical EDI file, parsing it takes tens of milliseconds.
+The entries of the files of one directory (a survey) are kept together in
+one sub-directory of the cache.
+An entry is keyed on the absolute path of the source file and is only used
+if the size and modification time of the file are the ones it was made
+from, a file that changed is parsed again and its entry is replaced.
+
+The cache is off by default.  Turn it on with the environment variable
+MTPY_CACHE_DIR, the directory to keep the cache in::
+
+    MTPY_CACHE_DIR=~/.cache/mtpy python my_script.py
+
+or in code::
+
+    >>> from mtpy.core import mt_cache
+    >>> mt_cache.enable()                  # default directory ~/.cache/mtpy
+    >>> mt_obj = MT(edi_fn)                # parsed and cached
+    >>> mt_obj = MT(edi_fn)                # loaded from the cache
+    >>> mt_cache.get_cache().clear()
+
+.. note:: the parsed state is stored with pickle, only point the cache to
+          a directory you trust.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+ENV_VARIABLE = 'MTPY_CACHE_DIR'
+
+# change when the layout of an entry or of the cached objects changes, old
+# entries are then parsed again
+CACHE_VERSION = 1
+
+# protocol 4 or higher stores numpy arrays as raw bytes
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+# attributes of MT that are not taken from the cache
+_skip_attributes = ['_logging', '_fn']
+
+
+def get_default_cache_dir():
+    """
+    default cache directory, $XDG_CACHE_HOME/mtpy or ~/.cache/mtpy
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                os.path.join(os.path.expanduser('~'),
+                                             '.cache'))
+    return os.path.join(cache_home, 'mtpy')
+
+
+def _hash(value):
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+class MTCache(object):
+    """
+    cache of parsed MT response files in a directory
+
+    :param cache_dir: directory to keep the cache in, made if it does not
+                      exist, *default* is get_default_cache_dir()
+    :type cache_dir: string
+
+    :Example: ::
+
+        >>> from mtpy.core.mt import MT
+        >>> from mtpy.core.mt_cache import MTCache
+        >>> cache = MTCache(r"/home/mt/cache")
+        >>> mt_obj = MT()
+        >>> if not cache.load(mt_obj, edi_fn):
+        ...     mt_obj.read_mt_file(edi_fn, use_cache=False)
+        ...     cache.save(mt_obj, edi_fn)
+    """
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir()
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+
+    def get_entry_fn(self, fn):
+        """
+        full path to the cache entry of the file fn, the entries of the files
+        in one directory share a sub-directory
+        """
+        fn = os.path.normpath(os.path.abspath(fn))
+        return os.path.join(self.cache_dir, _hash(os.path.dirname(fn))[0:16],
+                            '{0}.pkl'.format(_hash(fn)))
+
+    @staticmethod
+    def _get_source_key(fn, file_type):
+        fn_stat = os.stat(fn)
+        return (CACHE_VERSION, os.path.normpath(os.path.abspath(fn)),
+                file_type.lower(), fn_stat.st_size, fn_stat.st_mtime_ns)
+
+    def load(self, mt_obj, fn, file_type):
+        """
+        fill mt_obj from the cache entry of fn
+
+        :param mt_obj: MT object to fill
+        :type mt_obj: mtpy.core.mt.MT
+
+        :param fn: full path to the MT response file
+        :type fn: string
+
+        :param file_type: [ 'edi' | 'j' | 'xml' | 'zmm' ]
+        :type file_type: string
+
+        :returns: True if mt_obj was filled, False if there is no entry or
+                  the file changed since the entry was made
+        """
+        entry_fn = self.get_entry_fn(fn)
+        if not os.path.isfile(entry_fn):
+            return False
+
+        try:
+            with open(entry_fn, 'rb') as fid:
+                # the key is pickled on its own so a stale entry is not
+                # unpickled
+                if pickle.load(fid) != self._get_source_key(fn, file_type):
+                    _logger.debug('%s changed, not using the cache', fn)
+                    return False
+                state = pickle.load(fid)
+        except Exception as error:
+            _logger.warning('Could not read cache entry %s of %s: %s',
+                            entry_fn, fn, error)
+            return False
+
+        # Z and Tipper come with their resistivity, phase, ... so they are
+        # set directly instead of being computed again by the setters
+        mt_obj.__dict__.update(state)
+        _logger.debug('Read %s from the cache', fn)
+        return True
+
+    def save(self, mt_obj, fn, file_type):
+        """
+        make or replace the cache entry of fn from mt_obj, which should just
+        have been read from fn
+
+        :returns: full path to the cache entry, None if mt_obj could not be
+                  cached
+        """
+        state = dict([(key, value) for key, value in mt_obj.__dict__.items()
+                      if key not in _skip_attributes])
+        try:
+            entry_str = (pickle.dumps(self._get_source_key(fn, file_type),
+                                      protocol=PICKLE_PROTOCOL) +
+                         pickle.dumps(state, protocol=PICKLE_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError) as error:
+            _logger.debug('Could not cache %s: %s', fn, error)
+            return None
+
+        entry_fn = self.get_entry_fn(fn)
+        entry_dir = os.path.dirname(entry_fn)
+        try:
+            if not os.path.isdir(entry_dir):
+                os.makedirs(entry_dir, exist_ok=True)
+            # write to a temporary file first so readers never see half an
+            # entry, even with several processes filling the cache
+            fid, temp_fn = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+            with os.fdopen(fid, 'wb') as temp_fid:
+                temp_fid.write(entry_str)
+            os.replace(temp_fn, entry_fn)
+        except OSError as error:
+            _logger.warning('Could not write cache entry for %s: %s',
+                            fn, error)
+            return None
+        return entry_fn
+
+    def remove(self, fn):
+        """
+        remove the cache entry of fn if there is one
+        """
+        entry_fn = self.get_entry_fn(fn)
+        if os.path.isfile(entry_fn):
+            os.remove(entry_fn)
+
+    def clear(self):
+        """
+        remove all cache entries
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for survey_dir in os.listdir(self.cache_dir):
+            survey_dir = os.path.join(self.cache_dir, survey_dir)
+            if not os.path.isdir(survey_dir):
+                continue
+            for entry_fn in os.listdir(survey_dir):
+                if entry_fn.endswith(('.pkl', '.tmp')):
+                    os.remove(os.path.join(survey_dir, entry_fn))
+            if not os.listdir(survey_dir):
+                os.rmdir(survey_dir)
+
+
+_cache = {'cache': None}
+
+
+def enable(cache_dir=None):
+    """
+    turn on the cache used by MT.read_mt_file
+
+    :param cache_dir: directory to keep the cache in, *default* is
+                      get_default_cache_dir()
+    :type cache_dir: string
+
+    :returns: the MTCache object
+    """
+    _cache['cache'] = MTCache(cache_dir)
+    return _cache['cache']
+
+
+def disable():
+    """
+    turn off the cache used by MT.read_mt_file, the entries are kept
+    """
+    _cache['cache'] = None
+
+
+def get_cache():
+    """
+    the MTCache used by MT.read_mt_file, None if the cache is off
+    """
+    return _cache['cache']
+
+
+def configure_from_environment():
+    """
+    turn on the cache if the environment variable MTPY_CACHE_DIR is set
+    """
+    cache_dir = os.environ.get(ENV_VARIABLE, '').strip()
+    if cache_dir:
+        enable(cache_dir)
+
+
+configure_from_environment()
@@ -0,0 +1,665 @@
+# -*- coding: utf-8 -*-
+"""
+HDF5 container for a whole MT survey.
+
+One file holds what is otherwise spread over EDI files, time series files
+and ModEM data and model files::
+
+    /stations/<station>                      attributes: location, site
+        transfer_function/                   freq, z, z_err, z_rotation,
+                                             tipper, tipper_err,
+                                             tipper_rotation
+        time_series/<run>/<component>        chunked and compressed data,
+                                             attributes of MTTS
+    /data/<name>                             modem.Data, a dataset for each
+                                             field of data_array, period_list
+                                             and center_point
+    /models/<name>                           modem.Model, nodes, grids,
+                                             grid_center and res_model stored
+                                             one depth slice per chunk
+
+Everything is read on request, so one station, one period of a station, part
+of a time series or one depth slice of a model can be read without loading
+the rest of the file.
+
+:Example: ::
+
+    >>> from mtpy.core.mt import MT
+    >>> from mtpy.core.survey_hdf5 import SurveyHDF5
+    >>> with SurveyHDF5(r"/home/mt/survey.h5", 'w') as survey:
+    ...     survey.add_mt_list([MT(fn) for fn in edi_list])
+    ...     survey.add_model(model_obj, name='inv01')
+    >>> with SurveyHDF5(r"/home/mt/survey.h5", 'r') as survey:
+    ...     mt_obj = survey.get_mt('mt01')
+    ...     z_obj, t_obj = survey.read_transfer_function('mt01', period=10.)
+    ...     res_slice = survey.read_model_slice('inv01', depth=1000.)
+
+.. note:: needs h5py, the time series need pandas like mtpy.core.ts.
+"""
+import numpy as np
+
+import mtpy.core.z as MTz
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+try:
+    import h5py
+except ImportError:  # pragma: no cover
+    h5py = None
+
+FORMAT_VERSION = 1
+
+# MT attribute: (object path, attribute name), object path relative to MT
+_mt_metadata = [('station', ('', 'station')),
+                ('lat', ('', 'lat')),
+                ('lon', ('', 'lon')),
+                ('elev', ('', 'elev')),
+                ('east', ('Site.Location', 'easting')),
+                ('north', ('Site.Location', 'northing')),
+                ('utm_zone', ('Site.Location', 'utm_zone')),
+                ('datum', ('Site.Location', 'datum')),
+                ('declination', ('Site.Location', 'declination')),
+                ('elev_units', ('Site.Location', 'elev_units')),
+                ('coordinate_system', ('Site.Location', 'coordinate_system')),
+                ('survey', ('Site', 'survey')),
+                ('project', ('Site', 'project')),
+                ('acquired_by', ('Site', 'acquired_by')),
+                ('start_date', ('Site', 'start_date')),
+                ('end_date', ('Site', 'end_date'))]
+
+# MTTS attributes that follow from the data and are not set when reading
+_ts_derived = ['sampling_rate', 'start_time_utc', 'stop_time_utc',
+               'n_samples']
+
+_data_attributes = ['inv_mode', 'units', 'wave_sign_impedance',
+                    'wave_sign_tipper', 'error_type_z', 'error_value_z',
+                    'error_type_tipper', 'error_value_tipper', 'formatting',
+                    'model_epsg', 'model_utm_zone', 'data_fn']
+
+_model_arrays = ['nodes_north', 'nodes_east', 'nodes_z', 'grid_north',
+                 'grid_east', 'grid_z', 'grid_center']
+
+_model_attributes = ['title', 'res_scale', 'res_initial_value', 'model_fn',
+                     'sea_level', 'mesh_rotation_angle']
+
+
+class SurveyHDF5Error(Exception):
+    pass
+
+
+def _get_nested(obj, path):
+    for name in [nn for nn in path.split('.') if nn]:
+        obj = getattr(obj, name)
+    return obj
+
+
+def _write_attrs(h5_obj, attr_dict):
+    """
+    write attributes, None values are not written
+    """
+    for key, value in attr_dict.items():
+        if value is None:
+            if key in h5_obj.attrs:
+                del h5_obj.attrs[key]
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ','.join([str(vv) for vv in value])
+        elif isinstance(value, str):
+            # numpy strings are stored as plain strings
+            value = str(value)
+        h5_obj.attrs[key] = value
+
+
+def _read_attrs(h5_obj):
+    """
+    attributes as a dictionary of python types
+    """
+    attr_dict = {}
+    for key, value in h5_obj.attrs.items():
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        elif isinstance(value, np.generic):
+            value = value.item()
+        attr_dict[key] = value
+    return attr_dict
+
+
+def _write_structured(group, array):
+    """
+    write a structured array as one dataset per field, unicode fields are
+    stored as utf-8 bytes
+    """
+    for name in array.dtype.names:
+        field_dtype = array.dtype.fields[name][0]
+        values = np.asarray(array[name])
+        if field_dtype.base.kind == 'U':
+            values = np.char.encode(values, 'utf-8')
+        if name in group:
+            del group[name]
+        dataset = group.create_dataset(name, data=values)
+        dataset.attrs['dtype'] = field_dtype.base.str
+    group.attrs['fields'] = ','.join(array.dtype.names)
+
+
+def _read_structured(group, index=slice(None)):
+    """
+    read a structured array written by _write_structured, index selects the
+    rows to read
+    """
+    names = group.attrs['fields']
+    if isinstance(names, bytes):
+        names = names.decode('utf-8')
+    names = names.split(',')
+    values = dict([(name, group[name][index]) for name in names])
+    dtype = [(name, np.dtype(group[name].attrs['dtype']), group[name].shape[1:])
+             for name in names]
+    array = np.zeros(values[names[0]].shape[0], dtype=dtype)
+    for name in names:
+        if array.dtype.fields[name][0].base.kind == 'U':
+            array[name] = np.char.decode(values[name], 'utf-8')
+        else:
+            array[name] = values[name]
+    return array
+
+
+class SurveyHDF5(object):
+    """
+    HDF5 container for the stations, transfer functions, time series, ModEM
+    data and ModEM models of a survey
+
+    :param fn: full path to the HDF5 file
+    :type fn: string
+
+    :param mode: [ 'r' | 'r+' | 'w' | 'a' ] mode to open the file in, see
+                 h5py.File, *default* is 'a'
+    :type mode: string
+
+    :param compression: compression of time series and models, any filter of
+                        h5py, *default* is 'gzip'
+    :type compression: string
+
+    :param compression_opts: compression level, *default* is 4
+    :type compression_opts: int
+
+    :param ts_chunk_size: number of samples per chunk of a time series
+    :type ts_chunk_size: int
+    """
+
+    def __init__(self, fn, mode='a', compression='gzip', compression_opts=4,
+                 ts_chunk_size=65536):
+        if h5py is None:
+            raise SurveyHDF5Error('SurveyHDF5 needs h5py, install h5py')
+        self.fn = fn
+        self.mode = mode
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.ts_chunk_size = ts_chunk_size
+
+        self._h5 = h5py.File(fn, mode)
+        if self._h5.mode != 'r':
+            self._h5.attrs['format_version'] = FORMAT_VERSION
+            for group_name in ['stations', 'data', 'models']:
+                self._h5.require_group(group_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """ close the file """
+        if self._h5 is not None:
+            self._h5.close()
+            self._h5 = None
+
+    def _get_group(self, path):
+        try:
+            return self._h5[path]
+        except KeyError:
+            raise SurveyHDF5Error('Could not find {0} in {1}'.format(path,
+                                                                     self.fn))
+
+    @staticmethod
+    def _list_group(h5_obj, path):
+        if path not in h5_obj:
+            return []
+        return sorted(h5_obj[path].keys())
+
+    @property
+    def station_list(self):
+        """ names of the stations in the file """
+        return self._list_group(self._h5, 'stations')
+
+    @property
+    def data_list(self):
+        """ names of the ModEM data sets in the file """
+        return self._list_group(self._h5, 'data')
+
+    @property
+    def model_list(self):
+        """ names of the ModEM models in the file """
+        return self._list_group(self._h5, 'models')
+
+    # ==========================================================================
+    # stations and transfer functions
+    # ==========================================================================
+    def add_mt(self, mt_obj, overwrite=True):
+        """
+        add the metadata and transfer function of an MT object, the station
+        is named mt_obj.station
+
+        :param mt_obj: MT object
+        :type mt_obj: mtpy.core.mt.MT
+
+        :param overwrite: replace the transfer function of a station already
+                          in the file, if False an error is raised
+        :type overwrite: [ True | False ]
+
+        :returns: station name
+        """
+        station = mt_obj.station
+        station_group = self._h5['stations'].require_group(station)
+        if 'transfer_function' in station_group:
+            if not overwrite:
+                raise SurveyHDF5Error('Station {0} is already in {1}'.format(
+                    station, self.fn))
+            del station_group['transfer_function']
+
+        attr_dict = dict([(key, getattr(_get_nested(mt_obj, path), name))
+                          for key, (path, name) in _mt_metadata])
+        attr_dict['fn'] = getattr(mt_obj, '_fn', None)
+        _write_attrs(station_group, attr_dict)
+
+        tf_group = station_group.create_group('transfer_function')
+        z_obj = mt_obj.Z
+        tf_group.create_dataset('freq', data=z_obj.freq)
+        tf_group.create_dataset('z', data=z_obj.z)
+        if z_obj.z_err is not None:
+            tf_group.create_dataset('z_err', data=z_obj.z_err)
+        tf_group.create_dataset('z_rotation',
+                                data=np.ones(z_obj.freq.size) *
+                                z_obj.rotation_angle)
+        t_obj = mt_obj.Tipper
+        if t_obj is not None and t_obj.tipper is not None:
+            tf_group.create_dataset('tipper', data=t_obj.tipper)
+            if t_obj.tipper_err is not None:
+                tf_group.create_dataset('tipper_err', data=t_obj.tipper_err)
+            tf_group.create_dataset('tipper_rotation',
+                                    data=np.ones(t_obj.tipper.shape[0]) *
+                                    t_obj.rotation_angle)
+        return station
+
+    def add_mt_list(self, mt_obj_list, overwrite=True):
+        """
+        add a list of MT objects, see add_mt
+
+        :returns: list of station names
+        """
+        return [self.add_mt(mt_obj, overwrite=overwrite) for mt_obj in
+                mt_obj_list]
+
+    def read_station_metadata(self, station):
+        """
+        metadata of a station
+
+        :returns: dictionary with the keys lat, lon, elev, east, north,
+                  utm_zone, datum, ... of the station
+        """
+        return _read_attrs(self._get_group('stations/{0}'.format(station)))
+
+    def get_station_locations(self):
+        """
+        location of all stations, read from the station attributes only
+
+        :returns: structured array with fields station, lat, lon, elev,
+                  east, north, utm_zone
+        """
+        station_list = self.station_list
+        locations = np.zeros(len(station_list),
+                             dtype=[('station', 'U20'), ('lat', np.float64),
+                                    ('lon', np.float64), ('elev', np.float64),
+                                    ('east', np.float64),
+                                    ('north', np.float64),
+                                    ('utm_zone', 'U4')])
+        for ii, station in enumerate(station_list):
+            attr_dict = self.read_station_metadata(station)
+            locations[ii]['station'] = station
+            for key in locations.dtype.names[1:]:
+                if attr_dict.get(key) is not None:
+                    locations[ii][key] = attr_dict[key]
+        return locations
+
+    def read_transfer_function(self, station, period=None):
+        """
+        read the impedance and tipper of a station, of all periods or of the
+        period closest to period
+
+        :param station: station name
+        :type station: string
+
+        :param period: period in seconds, None for all periods
+        :type period: float
+
+        :returns: (mtpy.core.z.Z, mtpy.core.z.Tipper), the tipper is None if
+                  the station has no tipper
+        """
+        tf_group = self._get_group('stations/{0}/transfer_function'.format(
+            station))
+        freq = tf_group['freq'][()]
+        index = slice(None)
+        if period is not None:
+            ii = int(np.argmin(np.abs(1. / freq - period)))
+            index = slice(ii, ii + 1)
+
+        def read(name):
+            if name in tf_group:
+                return tf_group[name][index]
+            return None
+
+        z_obj = MTz.Z(z_array=read('z'), z_err_array=read('z_err'),
+                      freq=freq[index])
+        z_obj.rotation_angle = read('z_rotation')
+
+        t_obj = None
+        if 'tipper' in tf_group:
+            t_obj = MTz.Tipper(tipper_array=read('tipper'),
+                               tipper_err_array=read('tipper_err'),
+                               freq=freq[index])
+            t_obj.rotation_angle = read('tipper_rotation')
+            t_obj.compute_amp_phase()
+            t_obj.compute_mag_direction()
+        return z_obj, t_obj
+
+    def get_mt(self, station, period=None):
+        """
+        make an MT object of a station
+
+        :param station: station name
+        :type station: string
+
+        :param period: only read the period closest to period (s)
+        :type period: float
+
+        :returns: mtpy.core.mt.MT
+        """
+        from mtpy.core.mt import MT
+
+        attr_dict = self.read_station_metadata(station)
+        mt_obj = MT()
+        for key, (path, name) in _mt_metadata:
+            if attr_dict.get(key) is None or key in ['east', 'north',
+                                                      'utm_zone']:
+                continue
+            setattr(_get_nested(mt_obj, path), name, attr_dict[key])
+        # keep the projection of the original object
+        for key, name in [('east', 'easting'), ('north', 'northing'),
+                          ('utm_zone', 'utm_zone')]:
+            if attr_dict.get(key) is not None:
+                setattr(mt_obj.Site.Location, name, attr_dict[key])
+        if attr_dict.get('fn') is not None:
+            mt_obj._fn = attr_dict['fn']
+
+        z_obj, t_obj = self.read_transfer_function(station, period=period)
+        mt_obj.Z = z_obj
+        if t_obj is None:
+            t_obj = MTz.Tipper(tipper_array=np.zeros((z_obj.freq.size, 1, 2),
+                                                     dtype=complex),
+                               tipper_err_array=np.zeros(
+                                   (z_obj.freq.size, 1, 2)),
+                               freq=z_obj.freq)
+        mt_obj.Tipper = t_obj
+        return mt_obj
+
+    # ==========================================================================
+    # time series
+    # ==========================================================================
+    def add_time_series(self, ts_obj, run='run_001', overwrite=True):
+        """
+        add a time series to a run of a station, the station and component
+        are ts_obj.station and ts_obj.component
+
+        :param ts_obj: time series object
+        :type ts_obj: mtpy.core.ts.MTTS
+
+        :param run: name of the run
+        :type run: string
+
+        :returns: path of the time series in the file
+        """
+        component = ts_obj.component
+        if component is None:
+            raise SurveyHDF5Error('Time series needs a component to be added')
+        run_group = self._h5['stations'].require_group(
+            '{0}/time_series/{1}'.format(ts_obj.station, run))
+        component = component.lower()
+        if component in run_group:
+            if not overwrite:
+                raise SurveyHDF5Error('{0}/{1} is already in {2}'.format(
+                    run_group.name, component, self.fn))
+            del run_group[component]
+
+        data = np.asarray(ts_obj.ts.data)
+        dataset = run_group.create_dataset(
+            component, data=data,
+            chunks=(max(1, min(self.ts_chunk_size, data.size)),),
+            compression=self.compression,
+            compression_opts=self.compression_opts)
+        _write_attrs(dataset, dict([(attr, getattr(ts_obj, attr))
+                                    for attr in ts_obj._attr_list]))
+        return dataset.name
+
+    def get_run_list(self, station):
+        """ names of the time series runs of a station """
+        return self._list_group(self._h5, 'stations/{0}/time_series'.format(
+            station))
+
+    def get_component_list(self, station, run):
+        """ components of a time series run """
+        return self._list_group(self._h5, 'stations/{0}/time_series/{1}'.format(
+            station, run))
+
+    def get_time_series(self, station, run, component, start=None,
+                        stop=None):
+        """
+        make an MTTS object of a time series or part of it
+
+        :param station: station name
+        :type station: string
+
+        :param run: name of the run
+        :type run: string
+
+        :param component: [ 'ex' | 'ey' | 'hx' | 'hy' | 'hz' ]
+        :type component: string
+
+        :param start: index of the first sample to read
+        :type start: int
+
+        :param stop: index after the last sample to read
+        :type stop: int
+
+        :returns: mtpy.core.ts.MTTS
+        """
+        import datetime
+        import dateutil.parser
+        from mtpy.core.ts import MTTS
+
+        dataset = self._get_group('stations/{0}/time_series/{1}/{2}'.format(
+            station, run, component.lower()))
+        start = 0 if start is None else int(start)
+        data = dataset[start:stop]
+        attr_dict = _read_attrs(dataset)
+
+        ts_obj = MTTS()
+        for attr in ts_obj._attr_list:
+            if attr in attr_dict and attr not in _ts_derived:
+                setattr(ts_obj, attr, attr_dict[attr])
+        ts_obj.ts = data
+        if attr_dict.get('sampling_rate') is not None:
+            ts_obj.sampling_rate = attr_dict['sampling_rate']
+        if attr_dict.get('start_time_utc') is not None:
+            start_time = dateutil.parser.parse(attr_dict['start_time_utc'])
+            start_time += datetime.timedelta(
+                seconds=start / ts_obj._sampling_rate)
+            ts_obj.start_time_utc = start_time
+        return ts_obj
+
+    # ==========================================================================
+    # ModEM data and responses
+    # ==========================================================================
+    def add_data(self, data_obj, name='data', overwrite=True):
+        """
+        add a ModEM data or response object
+
+        :param data_obj: ModEM data object with data_array filled
+        :type data_obj: mtpy.modeling.modem.Data
+
+        :param name: name of the data set, for instance 'data' or 'inv01_resp'
+        :type name: string
+
+        :returns: name
+        """
+        if data_obj.data_array is None:
+            raise SurveyHDF5Error('Data object has no data_array to add')
+        if name in self._h5['data']:
+            if not overwrite:
+                raise SurveyHDF5Error('Data {0} is already in {1}'.format(
+                    name, self.fn))
+            del self._h5['data'][name]
+        data_group = self._h5['data'].create_group(name)
+        _write_structured(data_group.create_group('data_array'),
+                          data_obj.data_array)
+        data_group.create_dataset('period_list',
+                                  data=np.asarray(data_obj.period_list))
+        if data_obj.center_point is not None:
+            _write_structured(data_group.create_group('center_point'),
+                              data_obj.center_point)
+        attr_dict = dict([(attr, getattr(data_obj, attr, None))
+                          for attr in _data_attributes])
+        attr_dict['rotation_angle'] = data_obj._rotation_angle
+        _write_attrs(data_group, attr_dict)
+        return name
+
+    def get_data(self, name='data', station_list=None):
+        """
+        make a ModEM data object
+
+        :param name: name of the data set
+        :type name: string
+
+        :param station_list: only read these stations
+        :type station_list: list
+
+        :returns: mtpy.modeling.modem.Data
+        """
+        from mtpy.modeling.modem import Data
+
+        data_group = self._get_group('data/{0}'.format(name))
+        index = slice(None)
+        if station_list is not None:
+            stations = np.char.decode(data_group['data_array/station'][()],
+                                      'utf-8')
+            index = np.nonzero(np.isin(stations, station_list))[0]
+
+        data_obj = Data()
+        data_obj.data_array = _read_structured(data_group['data_array'],
+                                               index)
+        data_obj._set_dtype(data_obj.data_array.dtype['z'].shape,
+                            data_obj.data_array.dtype['tip'].shape)
+        data_obj.period_list = data_group['period_list'][()]
+        if 'center_point' in data_group:
+            data_obj.center_point = _read_structured(
+                data_group['center_point']).view(np.recarray)
+        attr_dict = _read_attrs(data_group)
+        for attr in _data_attributes:
+            if attr in attr_dict:
+                setattr(data_obj, attr, attr_dict[attr])
+        data_obj._rotation_angle = attr_dict.get('rotation_angle', 0.0)
+        return data_obj
+
+    # ==========================================================================
+    # ModEM models
+    # ==========================================================================
+    def add_model(self, model_obj, name='model', overwrite=True):
+        """
+        add a ModEM model, the resistivity is stored in linear scale with one
+        depth slice per chunk
+
+        :param model_obj: ModEM model object with res_model filled
+        :type model_obj: mtpy.modeling.modem.Model
+
+        :param name: name of the model, for instance 'inv01'
+        :type name: string
+
+        :returns: name
+        """
+        if model_obj.res_model is None:
+            raise SurveyHDF5Error('Model object has no res_model to add')
+        if name in self._h5['models']:
+            if not overwrite:
+                raise SurveyHDF5Error('Model {0} is already in {1}'.format(
+                    name, self.fn))
+            del self._h5['models'][name]
+        model_group = self._h5['models'].create_group(name)
+        for attr in _model_arrays:
+            value = getattr(model_obj, attr)
+            if value is not None:
+                model_group.create_dataset(attr, data=np.asarray(value))
+        res_model = np.asarray(model_obj.res_model)
+        model_group.create_dataset('res_model', data=res_model,
+                                   chunks=res_model.shape[0:2] + (1,),
+                                   compression=self.compression,
+                                   compression_opts=self.compression_opts)
+        _write_attrs(model_group, dict([(attr, getattr(model_obj, attr, None))
+                                        for attr in _model_attributes]))
+        return name
+
+    def get_model(self, name='model'):
+        """
+        make a ModEM model object
+
+        :returns: mtpy.modeling.modem.Model
+        """
+        from mtpy.modeling.modem import Model
+
+        model_group = self._get_group('models/{0}'.format(name))
+        model_obj = Model()
+        # the grids are set after the nodes, which reset them to start at 0
+        for attr in _model_arrays:
+            if attr in model_group:
+                setattr(model_obj, attr, model_group[attr][()])
+        model_obj.res_model = model_group['res_model'][()]
+        attr_dict = _read_attrs(model_group)
+        for attr in _model_attributes:
+            if attr in attr_dict:
+                setattr(model_obj, attr, attr_dict[attr])
+        return model_obj
+
+    def read_model_slice(self, name='model', depth_index=None, depth=None):
+        """
+        read one depth slice of a model
+
+        :param name: name of the model
+        :type name: string
+
+        :param depth_index: index of the layer
+        :type depth_index: int
+
+        :param depth: depth (m) relative to the top of the model, the layer
+                      containing it is read, used if depth_index is None
+        :type depth: float
+
+        :returns: resistivity of the layer, np.ndarray(n_north, n_east)
+        """
+        model_group = self._get_group('models/{0}'.format(name))
+        if depth_index is None:
+            if depth is None:
+                raise SurveyHDF5Error('Need depth_index or depth')
+            grid_z = np.append(0, np.cumsum(model_group['nodes_z'][()]))
+            depth_index = int(np.clip(np.searchsorted(grid_z, depth,
+                                                      side='right') - 1,
+                                      0, grid_z.size - 2))
+        return model_group['res_model'][:, :, depth_index]
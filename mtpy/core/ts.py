@@ -15,12 +15,9 @@ import dateutil
 
 import numpy as np
 import pandas as pd
-import scipy.signal as signal
 
 import mtpy.utils.gis_tools as gis_tools
-import mtpy.processing.filter as mtfilter
-
-import matplotlib.pyplot as plt
+from mtpy.utils import instrumentation
 
 #==============================================================================
 
@@ -420,6 +417,8 @@ class MTTS(object):
                   'freqrad':freq_rad,
                   'rp':rp}
 
+        import mtpy.processing.filter as mtfilter
+
         ts, filt_list = mtfilter.adaptive_notch_filter(self.ts.data, **kwargs)
 
         self.ts.data = ts
@@ -443,6 +442,8 @@ class MTTS(object):
         * refills ts.data with decimated data and replaces sampling_rate
 
         """
+        import scipy.signal as signal
+
         # be sure the decimation factor is an integer
         dec_factor = int(dec_factor)
 
@@ -477,6 +478,8 @@ class MTTS(object):
         * filters ts.data
         """
 
+        import mtpy.processing.filter as mtfilter
+
         self.ts = mtfilter.low_pass(self.ts.data,
                                     low_pass_freq,
                                     cutoff_freq,
@@ -552,6 +555,7 @@ class MTTS(object):
 
         hdf5_store.close()
 
+    @instrumentation.instrument('ts.MTTS.write_ascii_file')
     def write_ascii_file(self, fn_ascii, chunk_size=4096):
         """
         Write an ascii format file with metadata
@@ -568,8 +572,6 @@ class MTTS(object):
 
         """
 
-        st = datetime.datetime.utcnow()
-
         # get the number of chunks to write
         chunks = int(self.ts.shape[0]/chunk_size)
 
@@ -603,13 +605,7 @@ class MTTS(object):
             fid.write('\n'.join(list(np.array(self.ts.data[(cc+1)*chunk_size:],
                                               dtype='U22'))))
 
-
-        # get an estimation of how long it took to write the file
-        et = datetime.datetime.utcnow()
-        time_diff = et-st
-
         print('--> Wrote {0}'.format(fn_ascii))
-        print('    Took {0:.2f} seconds'.format(time_diff.seconds+time_diff.microseconds*1E-6))
 
     def read_ascii_header(self, fn_ascii):
         """
@@ -693,8 +689,10 @@ class MTTS(object):
 
         start_time = self.start_time_utc
 
+        # one value per line, newer pandas refuses '\n' as a separator
         self.ts = pd.read_csv(self.fn,
-                              sep='\n',
+                              sep=r'\s+',
+                              header=None,
                               skiprows=self._end_header_line,
                               memory_map=True,
                               names=['data'])
@@ -763,9 +761,13 @@ class Spectra(object):
 
         """
 
+        import scipy.signal as signal
+
         f, p = signal.welch(data, **kwargs)
 
         if plot:
+            import matplotlib.pyplot as plt
+
             fig = plt.figure()
             ax = fig.add_subplot(1, 1, 1)
             ax.loglog(f, p, lw=1.5)
@@ -3,26 +3,91 @@ import obspy.core.trace as trace
 from obspy.core.utcdatetime import UTCDateTime
 
 import numpy as np
+import os
 import time
 
 from datetime import datetime
 
 import re
 
+from .tspyramid import TSPyramid, binminmax
+
+
+def mergetraces(traces, fill_value='latest'):
+    """
+    merge traces of one channel into a single trace in one pass, later
+    traces overwrite overlaps.  Gaps are filled by fill_value: 'latest' the
+    last sample before the gap, 'interpolate', a number or None to mask them.
+    """
+    traces = sorted(traces, key=lambda tr: tr.stats.starttime)
+    starttime = traces[0].stats.starttime
+    delta = traces[0].stats.delta
+
+    offsets = [int(round((tr.stats.starttime - starttime) / delta)) for tr in traces]
+    npts = max(offset + tr.stats.npts for offset, tr in zip(offsets, traces))
+    data = np.zeros(npts, dtype=np.result_type(*[tr.data.dtype for tr in traces]))
+    filled = np.zeros(npts, dtype=bool)
+    for offset, tr in zip(offsets, traces):
+        data[offset:offset + tr.stats.npts] = tr.data
+        filled[offset:offset + tr.stats.npts] = True
+
+    if not filled.all():
+        if fill_value == 'latest':
+            data = data[np.maximum.accumulate(np.where(filled, np.arange(npts), 0))]
+        elif fill_value == 'interpolate':
+            samples = np.flatnonzero(filled)
+            data = data.astype(float)
+            data[~filled] = np.interp(np.flatnonzero(~filled), samples, data[samples])
+        elif fill_value is None:
+            data = np.ma.masked_array(data, mask=~filled)
+        else:
+            data = data.astype(np.result_type(data, fill_value))
+            data[~filled] = fill_value
+
+    stats = traces[0].stats
+    return trace.Trace(data=data, header={'network': stats.network, 'station': stats.station,
+                                          'location': stats.location, 'channel': stats.channel,
+                                          'starttime': starttime, 'delta': delta})
+
+
+def envelope(outwave, rate: int):
+    """
+    min and max of every rate samples, keeps the spikes striding loses and
+    does not alias like decimating without a filter
+    """
+    _, low, high = binminmax(0, outwave.data, rate)
+    data = np.empty(2 * len(low))
+    data[0::2] = low
+    data[1::2] = high
+
+    tmp = trace.Trace(data=data)
+    tmp.meta['delta'] = outwave.meta['delta'] * rate / 2.
+    tmp.meta['starttime'] = outwave.meta['starttime']
+    return tmp
+
 
 class TSData():
-    def __init__(self, filename: str = None, numofsamples: int = 400, cachesize = 1e8):
+    def __init__(self, filename: str = None, numofsamples: int = 400, pyramiddir: str = None,
+                 chunklength: float = 3600.):
+        """
+        :param numofsamples: number of min/max pairs to read for a window,
+                             about the screen width in pixels
+        :param pyramiddir: where to keep the min/max pyramids, next to the
+                           ASDF file if None
+        :param chunklength: seconds of data read at a time to build a pyramid
+        """
         self.wavelist = {}
         self.wavemeta = {}
+        self.wavefile = {}
+        self.pyramids = {}
+        self.numofsamples = numofsamples
+        self.pyramiddir = pyramiddir
+        self.chunklength = chunklength
         print(("ini","!"*10))
 
         if filename is not None:
             self.loadFile(filename)
 
-        self.wavecache = {}
-        self.numofsamples = numofsamples
-        self.cachesize = cachesize
-
 
     def loadFile(self, filename: str):
         rawdata = pyasdf.ASDFDataSet(filename, mode="r")
@@ -41,85 +106,105 @@ class TSData():
                         else:
                             self.wavelist[network.code][station.code][wavename].append(str(channel))
                         self.wavemeta[str(channel)] = (rawdata, channel, wavename)
+                        self.wavefile[str(channel)] = filename
+                        self.pyramids.pop(str(channel), None)
         print((len(self.wavemeta)))
 
     def getwaveform(self, waveform: str, starttime: datetime=None, endtime: datetime=None):
+        _, channel, wavename = self.wavemeta[waveform]
+        pyramid, gaps = self.getpyramid(waveform)
 
-        if starttime is None or endtime is None:
-            timewindow = None
-        else:
-            timewindow = endtime.timestamp-starttime.timestamp
+        wave = None
+        if pyramid is not None:
+            wave = pyramid.read(None if starttime is None else starttime.timestamp,
+                                None if endtime is None else endtime.timestamp, self.numofsamples)
 
-        if waveform in self.wavecache and (timewindow is None or abs(self.wavecache[waveform][0] - timewindow)/timewindow<0.1):
-            return self.readcache(waveform, starttime, endtime)
-        elif self.writecache(waveform, timewindow):
-            return self.readcache(waveform, starttime, endtime)
-        else:
-            outwave, wavename, start_date, end_date, gaps= self.readdisc(waveform, starttime, endtime)
+        if wave is None:
+            # zoomed in further than the finest level, the samples themselves
+            outwave, wavename, start_date, end_date, gaps = self.readdisc(waveform, starttime, endtime)
             wave = np.vstack((outwave.times() + outwave.meta['starttime'].timestamp, outwave.data))
 
-            wave = wave[:, wave[0, :] != np.nan]
-            wave = wave[:, wave[1, :] != np.nan]
-            return wave, wavename, start_date, end_date, gaps
-
-
-    def writecache(self, waveform, timewindow):
-        #print('writecache', timewindow)
-        _, channel, _ = self.wavemeta[waveform]
-        if (channel.end_date - channel.start_date) / channel.sample_rate < self.cachesize:
-            outwave, wavename, start_date, end_date, gaps = \
-                self.readdisc(waveform, channel.start_date, channel.end_date, False)
-
-            if timewindow is None:
-                timewindow = end_date - start_date
-
-
-            rate = timewindow*channel.sample_rate/self.numofsamples
-            rate = int(rate)
-
-            if rate == 0:
-                pass
+        wave = wave[:, ~np.isnan(wave[0, :])]
+        wave = wave[:, ~np.isnan(wave[1, :])]
+        return wave, wavename, channel.start_date, channel.end_date, gaps
+
+    def getpyramid(self, waveform: str):
+        """
+        min/max pyramid of a channel and its gaps, built on first use and
+        when the ASDF file has changed since.  None if it can not be written.
+        """
+        if waveform not in self.pyramids:
+            _, channel, wavename = self.wavemeta[waveform]
+            filename = self.wavefile[waveform]
+            if self.pyramiddir is None:
+                path = filename + '.pyramid'
             else:
-                if rate <= 1:
-                    pass
-                elif rate > 16:
-                    tmp = trace.Trace()
-                    tmp.data = outwave.data[::rate].copy()
-                    tmp.meta['delta'] = outwave.meta['delta'] * rate
-                    tmp.meta['starttime'] = outwave.meta['starttime']
-                    outwave = tmp  # .decimate(1, True)
-                elif rate >= 1:
-                    outwave.decimate(rate)
-
-            wave = np.vstack((outwave.times() + outwave.meta['starttime'].timestamp, outwave.data))
-            wave = np.array(wave).copy()
-            self.wavecache[waveform] = timewindow, wave , wavename, start_date, end_date, gaps
-
-
-            return True
-        else:
-            return False
-
-    def readcache(self, waveform: str, starttime: datetime, endtime: datetime):
-        #print('readcache', starttime, endtime)
-        timewindow, wave, wavename, start_date, end_date, gaps = self.wavecache[waveform]
-
-        if starttime is None:
-            starttime = start_date
-
-        if endtime is None:
-            endtime = end_date
-
-
-
-        head = int((starttime - start_date)/(wave[0,1]-wave[0,0]))
-        tail = int((endtime - start_date) / (wave[0,1] - wave[0,0]))
-
-        if tail >= wave.shape[1]:
-            tail = wave.shape[1]-1
-        outwave = wave[:,head: tail]
-
-        return outwave, wavename, start_date, end_date, gaps
+                path = os.path.join(self.pyramiddir, os.path.basename(filename) + '.pyramid')
+            path = os.path.join(path, wavename + '_' + channel.start_date.strftime('%Y%m%dT%H%M%S'))
+            source = {'source_size': os.path.getsize(filename),
+                      'source_mtime': os.path.getmtime(filename)}
+
+            pyramid = TSPyramid.load(path, **source)
+            if pyramid is None:
+                try:
+                    pyramid = self.buildpyramid(waveform, path, **source)
+                except (IOError, OSError) as e:
+                    print(('no pyramid for', waveform, e))
+            self.pyramids[waveform] = pyramid
+
+        pyramid = self.pyramids[waveform]
+        if pyramid is None:
+            return None, None
+
+        _, channel, wavename = self.wavemeta[waveform]
+        ntwk, sttn = wavename.split('.')[0:2]
+        gaps = [(ntwk, sttn, channel.location_code, channel.code, UTCDateTime(t1), UTCDateTime(t2),
+                 t2 - t1, int(round((t2 - t1) * channel.sample_rate)) - 1)
+                for t1, t2 in pyramid.meta['gaps']]
+        return pyramid, gaps
+
+    def buildpyramid(self, waveform: str, path: str, **meta):
+        """
+        build the pyramid of a channel reading chunklength seconds at a time
+        """
+        print(('buildpyramid', waveform))
+        rawdata, channel, wavename = self.wavemeta[waveform]
+        ntwk = re.sub('([^.]+)(.*)','\\1', wavename)
+        sttn = re.sub('([^.]+\.)([^.]+)(.*)','\\2', wavename)
+        start_date = channel.start_date
+        end_date = channel.end_date if channel.end_date is not None else UTCDateTime()
+        delta = 1. / channel.sample_rate
+        gaps = []
+
+        def chunks():
+            lastend = None
+            chunkstart = start_date
+            while chunkstart < end_date:
+                chunkend = min(chunkstart + self.chunklength, end_date)
+                outwave = rawdata.get_waveforms(network=ntwk, station=sttn, location=channel.location_code, \
+                                channel=channel.code, starttime=chunkstart, endtime=chunkend, tag="raw_recording")
+                chunk = []
+                for w in sorted(outwave, key=lambda tr: tr.stats.starttime):
+                    if lastend is not None and w.stats.starttime - lastend > 1.5 * delta:
+                        gaps.append([lastend.timestamp, w.stats.starttime.timestamp])
+                    if lastend is None or w.stats.endtime > lastend:
+                        lastend = w.stats.endtime
+                    chunk.append((int(round((w.stats.starttime - start_date) / delta)), w.data))
+                yield chunk
+                chunkstart = chunkend
+
+        # gaps is filled while the pyramid reads the chunks, kept in the meta
+        # file as the list is only complete afterwards
+        pyramid = TSPyramid.build(path, chunks(), start_date.timestamp, delta, gaps=gaps, **meta)
+        print("pyramid finished")
+        return pyramid
+
+    def buildpyramids(self):
+        """
+        build the pyramids of all channels ahead of browsing
+        """
+        for waveform in self.wavemeta:
+            self.getpyramid(waveform)
 
     def getsegments(self, waveform: str):
         rawdata, channel, wavename = self.wavemeta[waveform]
@@ -156,30 +241,13 @@ class TSData():
 
         if len(outwave)>0:
             gaps = outwave.get_gaps()
+            outwave = mergetraces(outwave, fill_value)
 
-            mergewave = outwave[0]
-            for w in outwave[1:]:
-                mergewave = mergewave.__add__(w,fill_value=fill_value)
-
-            outwave = mergewave
-
-
-
-
-
-            rate = round(float(len(outwave.data)) / self.numofsamples)
-            if resample == False or rate<=1:
-                pass
-            elif rate>16:
-                tmp = trace.Trace()
-                tmp.data = outwave.data[::rate].copy()
-                tmp.meta['delta'] = outwave.meta['delta'] * rate
-                tmp.meta['starttime'] = outwave.meta['starttime']
-                outwave = tmp  # .decimate(1, True)
-                #print(outwave.meta['endtime'], 'new endtime  ')
-            elif rate>=1:
-                outwave.decimate(rate)
+            rate = int(round(float(len(outwave.data)) / self.numofsamples))
+            if resample and rate > 1:
+                outwave = envelope(outwave, rate)
         else:
+            gaps = []
             outwave = trace.Trace()
             outwave.data = np.array([np.nan]*self.numofsamples)
             outwave.meta['starttime'] = starttime
@@ -0,0 +1,245 @@
+import json
+import os
+
+import numpy as np
+
+
+def reduceminmax(index, low, high=None):
+    """
+    min and max over runs of equal bin index, index has to be sorted.
+    With high None low are the samples themselves, NaN is ignored.
+
+    returns the bin index, min and max of each bin
+    """
+    index = np.asarray(index)
+    low = np.asarray(low, dtype=float)
+    high = low if high is None else np.asarray(high, dtype=float)
+    if len(index) == 0:
+        return index, low, high
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+    return index[starts], np.fmin.reduceat(low, starts), \
+        np.fmax.reduceat(high, starts)
+
+
+def binminmax(offset, data, binsize):
+    """
+    min and max of the samples of data in bins of binsize samples, sample i
+    of data is sample offset + i of the grid the bins are counted on.
+    Only one copy of data is made, no per sample index.
+
+    returns the bin index, min and max of each bin
+    """
+    data = np.ma.filled(np.ma.asarray(data, dtype=float), np.nan)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64), data, data
+
+    lead = offset % binsize
+    nbins = -(-(lead + len(data)) // binsize)
+    bins = np.full(nbins * binsize, np.nan)
+    bins[lead:lead + len(data)] = data
+    bins = bins.reshape(nbins, binsize)
+
+    index = offset // binsize + np.arange(nbins, dtype=np.int64)
+    return index, np.fmin.reduce(bins, axis=1), np.fmax.reduce(bins, axis=1)
+
+
+class LevelWriter():
+    """
+    write the bins of one level of a pyramid chunk by chunk, the last bin is
+    held back so a bin split between two chunks is merged
+    """
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.parts = [open(filename + '.' + name, 'wb') for name in ['index', 'min', 'max']]
+        self.last = None
+        self.count = 0
+
+    def append(self, index, low, high):
+        if len(index) == 0:
+            return
+        if self.last is not None:
+            index = np.concatenate(([self.last[0]], index))
+            low = np.concatenate(([self.last[1]], low))
+            high = np.concatenate(([self.last[2]], high))
+        index, low, high = reduceminmax(index, low, high)
+
+        self.write(index[:-1], low[:-1], high[:-1])
+        self.last = index[-1], low[-1], high[-1]
+
+    def write(self, index, low, high):
+        for part, values in zip(self.parts, [index, low, high]):
+            np.asarray(values, dtype=float).tofile(part)
+        self.count += len(index)
+
+    def close(self, blocksize: int = 2**20):
+        if self.last is not None:
+            self.write([self.last[0]], [self.last[1]], [self.last[2]])
+        for part in self.parts:
+            part.close()
+
+        # one (3, nbins) array per level, each row is contiguous so the bin
+        # index of a memory map can be searched without reading all of it
+        level = np.lib.format.open_memmap(self.filename, mode='w+', dtype=float,
+                                          shape=(3, self.count))
+        for row, part in enumerate(self.parts):
+            if self.count > 0:
+                values = np.memmap(part.name, dtype=float, mode='r')
+                for start in range(0, self.count, blocksize):
+                    level[row, start:start + blocksize] = values[start:start + blocksize]
+                del values
+            os.remove(part.name)
+        level.flush()
+        del level
+
+
+class TSPyramid():
+    """
+    multi resolution min/max envelope of one channel stored on disk.
+
+    Level 0 has the min and max of every base samples, each level above
+    combines factor bins of the level below until a level has no more than
+    minbins bins.  A level is a (3, nbins) array of the bin index, min and
+    max saved as .npy, bins without data are left out.  Levels are read
+    through memory maps so only the bins of the requested time range are
+    loaded.
+    """
+
+    metafile = 'pyramid.json'
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, self.metafile)) as metafile:
+            self.meta = json.load(metafile)
+        self.levels = [np.load(os.path.join(path, 'level%d.npy' % level), mmap_mode='r')
+                       for level in range(self.meta['levels'])]
+
+    @classmethod
+    def load(cls, path: str, **meta):
+        """
+        open the pyramid in path if it exists and meta matches what it was
+        built with, None otherwise
+        """
+        try:
+            pyramid = cls(path)
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        for key in meta:
+            if pyramid.meta.get(key) != meta[key]:
+                return None
+        return pyramid
+
+    @classmethod
+    def build(cls, path: str, chunks, starttime: float, delta: float, base: int = 16,
+              factor: int = 4, minbins: int = 1024, **meta):
+        """
+        build the pyramid of a channel from chunks of its data, each chunk is
+        a list of (offset, data) with offset the sample index of data[0]
+        counted from starttime, chunks have to be in time order.  Only one
+        chunk is in memory at a time.  meta is saved with the pyramid.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        # level 0 from the samples
+        writer = LevelWriter(os.path.join(path, 'level0.npy'))
+        first = None
+        last = None
+        for chunk in chunks:
+            bins = [binminmax(offset, data, base) for offset, data in chunk if len(data) > 0]
+            if len(bins) == 0:
+                continue
+            for offset, data in chunk:
+                if len(data) > 0:
+                    first = offset if first is None else min(first, offset)
+                    last = offset + len(data) - 1 if last is None else max(last, offset + len(data) - 1)
+
+            index, low, high = [np.concatenate(values) for values in zip(*bins)]
+            # overlapping segments
+            if np.any(np.diff(index) < 0):
+                order = np.argsort(index, kind='mergesort')
+                index, low, high = index[order], low[order], high[order]
+            writer.append(index, low, high)
+        writer.close()
+
+        # each level from the one below, a block of bins at a time
+        levels = 1
+        count = writer.count
+        while count > minbins:
+            below = np.load(os.path.join(path, 'level%d.npy' % (levels - 1)), mmap_mode='r')
+            writer = LevelWriter(os.path.join(path, 'level%d.npy' % levels))
+            for start in range(0, below.shape[1], 2**20):
+                block = np.array(below[:, start:start + 2**20])
+                writer.append(np.floor(block[0] / factor), block[1], block[2])
+            writer.close()
+            del below
+            levels += 1
+            if writer.count == count:
+                break
+            count = writer.count
+
+        meta.update({'starttime': starttime, 'delta': delta, 'base': base, 'factor': factor,
+                     'levels': levels, 'first': first, 'last': last})
+        # the meta file marks a finished pyramid
+        metafile = os.path.join(path, cls.metafile)
+        with open(metafile + '.tmp', 'w') as outfile:
+            json.dump(meta, outfile)
+        os.replace(metafile + '.tmp', metafile)
+
+        return cls(path)
+
+    def getlevel(self, starttime: float = None, endtime: float = None, numofsamples: int = 400):
+        """
+        coarsest level with at least numofsamples bins between starttime
+        and endtime, None if level 0 has less
+        """
+        if self.meta['first'] is None:
+            return None
+        first, last = self.getsamples(starttime, endtime)
+        binsizes = self.meta['base'] * self.meta['factor'] ** np.arange(len(self.levels))
+        enough = np.flatnonzero((last - first + 1) / binsizes >= numofsamples)
+        if len(enough) == 0:
+            return None
+        return enough[-1]
+
+    def getsamples(self, starttime: float = None, endtime: float = None):
+        """
+        sample index of starttime and endtime, the first and last sample
+        if None
+        """
+        if starttime is None:
+            first = self.meta['first']
+        else:
+            first = (starttime - self.meta['starttime']) / self.meta['delta']
+        if endtime is None:
+            last = self.meta['last']
+        else:
+            last = (endtime - self.meta['starttime']) / self.meta['delta']
+        return first, last
+
+    def read(self, starttime: float = None, endtime: float = None, numofsamples: int = 400):
+        """
+        envelope between starttime and endtime (timestamps) from the
+        coarsest level that still has numofsamples bins in the window.
+
+        returns np.ndarray(2, 2 * nbins) of the time and value of the min and
+        max of each bin, None if level 0 is too coarse for the window
+        """
+        level = self.getlevel(starttime, endtime, numofsamples)
+        if level is None:
+            return None
+
+        first, last = self.getsamples(starttime, endtime)
+        binsize = self.meta['base'] * self.meta['factor'] ** level
+        bins = self.levels[level]
+        head = np.searchsorted(bins[0], np.floor(first / binsize))
+        tail = np.searchsorted(bins[0], np.floor(last / binsize), side='right')
+        index, low, high = np.array(bins[:, head:tail])
+
+        times = self.meta['starttime'] + (index + .5) * binsize * self.meta['delta']
+        wave = np.empty((2, 2 * len(index)))
+        wave[0, 0::2] = times
+        wave[0, 1::2] = times
+        wave[1, 0::2] = low
+        wave[1, 1::2] = high
+        return wave
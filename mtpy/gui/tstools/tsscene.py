@@ -67,7 +67,7 @@ class TSScene(QGraphicsScene):
 
 
         # set backend data model
-        self.data = TSData()
+        self.data = TSData(numofsamples=int(self.graphwidth))
         self.visibleWave = {}
         self.starttime = None
         self.endtime = None
@@ -458,7 +458,7 @@ class TSScene(QGraphicsScene):
     def exportwaveform(self, filename: tuple):
         traces = []
         for wave in self.visibleWave:
-            fill_value = 'last'
+            fill_value = 'latest'
             waveform, wavename, starttime, endtime, gaps = self.data.readdisc(wave, self.starttime, self.endtime, resample=False, fill_value=fill_value)
             traces.append(waveform)
 
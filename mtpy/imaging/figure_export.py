@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+FIGURE EXPORT
+==================
+
+Render and save many figures of one plot object (one per period, station or
+slice) on a pool of worker processes.
+
+The plot object reads and prepares its data once in the calling process.
+The worker processes get a copy of the prepared object when they start
+(inherited on fork, pickled once per worker otherwise), switch matplotlib to
+the Agg backend and then only draw and save figures.  Each figure is rendered
+by calling a method of the plot object with the key of the figure, the
+method must save the figure and return the file name.
+
+:Example: ::
+
+    >>> from mtpy.imaging.figure_export import export_figures
+    >>> rms_plot = PlotRMSMaps(residual_fn, plot_yn='n')
+    >>> timings = export_figures(rms_plot, 'save_period_figure',
+    ...                          range(rms_plot.residual.period_list.size),
+    ...                          num_workers=8,
+    ...                          render_kwargs={'fig_format': 'png'})
+    >>> for key, fn, seconds in timings:
+    ...     print(key, fn, seconds)
+
+"""
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+import time
+from collections import namedtuple
+
+from mtpy.utils import instrumentation, parallel
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+#: timing of one exported figure
+FigureTiming = namedtuple('FigureTiming', ['key', 'fn', 'seconds'])
+
+
+def _use_agg():
+    """ switch matplotlib to the non-interactive Agg backend """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    plt.ioff()
+    return plt
+
+
+def _init_worker(plot_obj, render, render_kwargs):
+    state = parallel.worker_state(__name__)
+    if not state.get('in_process'):
+        _use_agg()
+    state['plot_obj'] = plot_obj
+    state['render'] = render
+    state['render_kwargs'] = render_kwargs
+
+
+def _render_figure(key):
+    """ render and save the figure of key with the state of _init_worker """
+    state = parallel.worker_state(__name__)
+    in_process = state.get('in_process', False)
+    if in_process:
+        # keep the backend of the calling process, only close new figures
+        import matplotlib.pyplot as plt
+        open_figures = set(plt.get_fignums())
+    else:
+        plt = _use_agg()
+    render = getattr(state['plot_obj'], state['render'])
+    t0 = time.time()
+    try:
+        fn = render(key, **state['render_kwargs'])
+    finally:
+        if in_process:
+            for num in set(plt.get_fignums()) - open_figures:
+                plt.close(num)
+        else:
+            plt.close('all')
+
+    return FigureTiming(key, fn, time.time() - t0)
+
+
+@instrumentation.instrument('imaging.export_figures')
+def export_figures(plot_obj, render, keys, num_workers=None,
+                   render_kwargs=None):
+    """
+    render and save one figure per key on a pool of processes.
+
+    :param plot_obj: plot object with all data already read in
+    :param render: name of the method of plot_obj that draws and saves the
+                   figure of one key, called as
+                   getattr(plot_obj, render)(key, **render_kwargs) and
+                   returning the saved file name
+    :param keys: keys of the figures, e.g. period or station indices
+    :param num_workers: number of processes, default is the number of cpus.
+                        With 1 the figures are rendered in this process.
+    :param render_kwargs: dictionary of keyword arguments passed to render
+    :return: list of FigureTiming(key, fn, seconds), in the order of keys
+    """
+    keys = list(keys)
+    if render_kwargs is None:
+        render_kwargs = {}
+    num_workers = parallel.get_num_workers(num_workers, len(keys))
+
+    t0 = time.time()
+    # fork lets the workers inherit the prepared data without pickling
+    timings = parallel.map_tasks(_render_figure, [(key,) for key in keys],
+                                 num_workers=num_workers,
+                                 initializer=_init_worker,
+                                 initargs=(plot_obj, render, render_kwargs),
+                                 state=__name__, fork=True)
+
+    for timing in timings:
+        _logger.info('Saved figure {0} to {1} in {2:.2f} s'.format(*timing))
+    _logger.info('Exported {0} figures with {1} processes in {2:.2f} s'.format(
+        len(timings), num_workers, time.time() - t0))
+
+    return timings
+
+
+def write_timings(timings, fn):
+    """
+    write per figure timings to a csv file with columns key, fn, seconds
+    """
+    with open(fn, 'w') as fid:
+        fid.write('key,fn,seconds\n')
+        for key, fig_fn, seconds in timings:
+            fid.write('{0},{1},{2:.4f}\n'.format(key, fig_fn, seconds))
+
+    return fn
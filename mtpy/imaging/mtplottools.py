@@ -15,6 +15,7 @@ Contains helper functions and classes for plotting
 import numpy as np
 # import mtpy.core.mt
 from mtpy.core import mt
+import mtpy.analysis.pt as mtpt
 import mtpy.core.z as mtz
 import mtpy.utils.exceptions as mtex
 import mtpy.utils.gis_tools as gis_tools
@@ -1788,6 +1789,87 @@ def get_pt_arrays(mt_list, plot_period, sort_by='line', line_direction='ew',
 # ==============================================================================
 # function for writing values to file
 # ==============================================================================
+def get_residual_pt_arrays(mt_list1, mt_list2, freq_list,
+                           residualtype='heise'):
+    """
+    compute the residual phase tensors between two surveys for all stations
+    and frequencies at once.
+
+    Stations are matched by name and frequencies rounded to 5 decimals.  The
+    phase tensors of both surveys are put into (num_stations, num_freq, 2, 2)
+    arrays on freq_list, entries missing in either survey are left as zeros
+    and therefore have a residual of zero.
+
+    Arguments:
+    ----------
+        **mt_list1**: list of MTplot objects of survey 1
+
+        **mt_list2**: list of MTplot objects of survey 2
+
+        **freq_list**: np.ndarray(nf)
+                       all frequencies to compute the residual for
+
+        **residualtype**: [ 'heise' | 'booker' ]
+
+    Returns:
+    --------
+        **rpt**: np.ndarray(ns, nf, 2, 2)
+                 residual phase tensors of the stations in mt_list1
+
+        **rpt_err**: np.ndarray(ns, nf, 2, 2)
+                     errors of the residual phase tensors
+
+        **found**: np.ndarray(ns, dtype=bool)
+                   True where a station of mt_list1 was found in mt_list2
+    """
+    freq_dict = dict([(np.round(key, 5), value)
+                      for value, key in enumerate(freq_list)])
+    # the first station of a name in mt_list2 is used
+    mt_dict2 = dict([(mt2.station, mt2) for mt2 in mt_list2[::-1]])
+
+    shape = (len(mt_list1), len(freq_list), 2, 2)
+    pt1 = np.zeros(shape)
+    pt1_err = np.zeros(shape)
+    pt2 = np.zeros(shape)
+    pt2_err = np.zeros(shape)
+    found = np.zeros(len(mt_list1), dtype=bool)
+
+    for mm, mt1 in enumerate(mt_list1):
+        try:
+            mt2 = mt_dict2[mt1.station]
+        except KeyError:
+            print('Did not find {0} from list 1 in list 2'.format(mt1.station))
+            continue
+        found[mm] = True
+
+        # need to make sure only matched frequencies are compared
+        fdict2 = dict([(np.round(ff, 5), ii)
+                       for ii, ff in enumerate(mt2.Z.freq)])
+        index_1 = []
+        index_2 = []
+        for ii, ff in enumerate(mt1.Z.freq):
+            try:
+                index_2.append(fdict2[np.round(ff, 5)])
+                index_1.append(ii)
+            except KeyError:
+                pass
+        if len(index_1) == 0:
+            continue
+        f_index = [freq_dict[np.round(ff, 5)] for ff in mt1.Z.freq[index_1]]
+
+        pt_obj1 = mt1.pt
+        pt_obj2 = mt2.pt
+        pt1[mm, f_index] = pt_obj1.pt[index_1]
+        pt1_err[mm, f_index] = pt_obj1.pt_err[index_1]
+        pt2[mm, f_index] = pt_obj2.pt[index_2]
+        pt2_err[mm, f_index] = pt_obj2.pt_err[index_2]
+
+    rpt, rpt_err = mtpt.compute_residual_pt_array(pt1, pt2, pt1_err, pt2_err,
+                                                  residualtype=residualtype)
+
+    return rpt, rpt_err, found
+
+
 def make_value_str(value, value_list=None, spacing='{0:^8}',
                    value_format='{0: .2f}', append=False, add=False):
     """
@@ -27,6 +27,7 @@ from scipy.interpolate import griddata
 
 import mtpy
 import mtpy.modeling.occam2d_rewrite as occam2d
+import mtpy.analysis.penetration_depth as pendep
 from .imaging_base import ImagingBase, ParameterError, ImagingError
 from mtpy.core import mt as mt
 from mtpy.utils.mtpy_decorator import deprecated
@@ -82,18 +83,15 @@ class Depth1D(ImagingBase):
         self._fig.set_tight_layout(True)
         plt.grid(True)
 
-        zeta = self._data.Z  # the attribute Z represent the impedance tensor 2X2 matrix
-        freqs = zeta.freq  # frequencies
-        scale_param = np.sqrt(1.0 / (2.0 * np.pi * 4 * np.pi * 10 ** (-7)))
-
-        # The periods array
-        periods = 1.0 / freqs
+        # depths of all periods and components of this station in one call
+        stack, depth = pendep.get_penetration_depths([self._data])
+        periods = stack['periods'][0]
+        depth = depth[0]
         legendh = []
 
         if 'zxy' in self._rholist:
             # One of the 4-components: XY
-            penetration_depth = scale_param * \
-                np.sqrt(zeta.resistivity[:, 0, 1] * periods)
+            penetration_depth = depth[:, pendep.COMPONENTS.index('zxy')]
 
             # pen_zxy, = plt.semilogx(periods, -penetration_depth, '-*',label='Zxy')
             pen_zxy, = plt.loglog(
@@ -104,8 +102,7 @@ class Depth1D(ImagingBase):
             legendh.append(pen_zxy)
 
         if 'zyx' in self._rholist:
-            penetration_depth = scale_param * \
-                np.sqrt(zeta.resistivity[:, 1, 0] * periods)
+            penetration_depth = depth[:, pendep.COMPONENTS.index('zyx')]
 
             pen_zyx, = plt.loglog(
                 periods, penetration_depth, color='g', marker='o', label='Zyx')
@@ -113,8 +110,7 @@ class Depth1D(ImagingBase):
 
         if 'det' in self._rholist:
             # determinant array
-            det2 = np.abs(zeta.det)
-            det_penetration_depth = scale_param * np.sqrt(0.2 * periods * det2 * periods)
+            det_penetration_depth = depth[:, pendep.COMPONENTS.index('det')]
 
             # pen_det, = plt.semilogx(periods, -det_penetration_depth, '-^', label='Determinant')
             pen_det, = plt.loglog(
@@ -173,13 +169,19 @@ class Depth2D(ImagingBase):
 
         self._fig = plt.figure(figsize=(8, 6), dpi=80)
         self._fig.set_tight_layout(True)
-        for selected_period in self._selected_periods:
-            if period_by_index:
-                (stations, periods, pen, _) = get_penetration_depth_by_index(
-                    pr.edi_list, selected_period, whichrho=self._rho)
-            else:
-                (stations, periods, pen, _) = get_penetration_depth_by_period(
-                    pr.edi_list, selected_period, whichrho=self._rho, ptol=self._ptol)
+
+        # depths of all stations at all selected periods in one call
+        if period_by_index:
+            stack, depth = pendep.get_penetration_depths(
+                pr.edi_list, period_index=self._selected_periods)
+        else:
+            stack, depth = pendep.get_penetration_depths(
+                pr.edi_list, periods=self._selected_periods, ptol=self._ptol)
+        stations = list(stack['station'])
+        depth = -depth[:, :, pendep.COMPONENTS.index(self._rho)]
+
+        for ii, selected_period in enumerate(self._selected_periods):
+            pen = depth[:, ii]
 
             line_label = "Period=%.2e s" % selected_period
 
@@ -511,65 +513,22 @@ def get_penetration_depth_by_index(mt_obj_list, per_index, whichrho='det'):
     ----------
     mt_obj_list : list of MT
         List of stations as MT objects.
-    selected_period : float
-        The period in seconds to plot depth for.
-    ptol : float
-        Tolerance to use when finding nearest period to selected period.
-        If abs(selected_period - nearest_period) is greater than
-        ptol * selected_period, then the period is discarded and will
-        appear as a gap in the plot.
+    per_index : int
+        The period index in each station to compute depth for.
     whichrho : str
         'det', 'zxy' or 'zyx'. The component to plot.
     """
-    scale_param = np.sqrt(1.0 / (2.0 * np.pi * 4 * np.pi * 10 ** (-7)))
-
-    # per_index=0,1,2,....
-    periods = []
-    pen_depth = []
-    stations = []
-    latlons = []
-    for mt_obj in mt_obj_list:
-        if isinstance(mt_obj, str) and os.path.isfile(mt_obj):
-            mt_obj = mt.MT(mt_obj)
-        elif not isinstance(mt_obj, mt.MT):
-            raise Exception("Unsupported list of objects %s" % type(mt_obj))
-        # station id
-        stations.append(mt_obj.station)
-        # latlons
-        latlons.append((mt_obj.lat, mt_obj.lon))
-        # the attribute Z
-        zeta = mt_obj.Z
-
-        if per_index >= len(zeta.freq):
-            _logger.debug(
-                "Number of frequecies (Max per_index)= %s", len(
-                    zeta.freq))
-            raise Exception(
-                "Index out_of_range Error: period index must be less than number of periods in zeta.freq")
-
-        per = 1.0 / zeta.freq[per_index]
-        periods.append(per)
-
-        if whichrho == 'zxy':
-            penetration_depth = - scale_param * \
-                np.sqrt(zeta.resistivity[per_index, 0, 1] * per)
-        elif whichrho == 'zyx':
-            penetration_depth = - scale_param * \
-                np.sqrt(zeta.resistivity[per_index, 1, 0] * per)
-        elif whichrho == 'det':  # the 2X2 complex Z-matrix's determinant abs value
-            # determinant value at the given period index
-            det2 = np.abs(zeta.det[per_index])
-            penetration_depth = -scale_param * np.sqrt(0.2 * per * det2 * per)
-        else:
-            _logger.critical(
-                "unsupported method to compute penetration depth: %s",
-                whichrho)
-            # sys.exit(100)
-            raise Exception("unsupported method to compute penetratoin depth: %s" % whichrho)
+    if whichrho not in DEFAULT_RHOLIST:
+        _logger.critical(
+            "unsupported method to compute penetration depth: %s",
+            whichrho)
+        raise Exception("unsupported method to compute penetratoin depth: %s" % whichrho)
 
-        pen_depth.append(penetration_depth)
+    stack, depth = pendep.get_penetration_depths(mt_obj_list, period_index=[per_index])
+    pen_depth = -depth[:, 0, pendep.COMPONENTS.index(whichrho)]
 
-    return stations, periods, pen_depth, latlons
+    return (list(stack['station']), list(stack['periods'][:, 0]), list(pen_depth),
+            list(zip(stack['lat'], stack['lon'])))
 
 
 def load_edi_files(edi_path, file_list=None):
@@ -581,7 +540,7 @@ def load_edi_files(edi_path, file_list=None):
         edi_list = [mt.MT(os.path.join(edi_path, edi)) for edi in file_list]
     return edi_list
 
-# need further refactoring and testing
+
 def get_penetration_depth_by_period(mt_obj_list, selected_period, ptol=0.1, whichrho='det'):
     """
     This is a more generic and useful function to compute the penetration depths
@@ -595,68 +554,18 @@ def get_penetration_depth_by_period(mt_obj_list, selected_period, ptol=0.1, whic
     :param whichrho:
     :return: tuple of (stations, periods, penetrationdepth, lat-lons-pairs)
     """
-    scale_param = np.sqrt(1.0 / (2.0 * np.pi * 4 * np.pi * 10 ** (-7)))
-
-    # per_index=0,1,2,....
-    periods = []
-    pen_depth = []
-    stations = []
-    latlons = []
+    if whichrho not in DEFAULT_RHOLIST:
+        _logger.critical(
+            "unsupported method to compute penetration depth: %s",
+            whichrho)
+        raise Exception("unsupported method to compute penetratoin depth: %s" % whichrho)
 
     _logger.info("Getting nearest period to {} for all stations".format(selected_period))
-    for mt_obj in mt_obj_list:
-        if isinstance(mt_obj, str) and os.path.isfile(mt_obj):
-            mt_obj = mt.MT(mt_obj)
-        elif not isinstance(mt_obj, mt.MT):
-            raise Exception("Unsupported list of objects %s" % type(mt_obj))
-
-        # station id
-        stations.append(mt_obj.station)
-        # latlons
-        latlons.append((mt_obj.lat, mt_obj.lon))
-
-        # the attribute Z
-        zeta = mt_obj.Z
-        per_index = np.argmin(np.fabs(zeta.freq - 1.0/selected_period))
-        per = 1.0 / zeta.freq[per_index]
-
-        print("********* The period-index=%s coressponding to the selected_period %s"%(per_index, selected_period))
-
-        if abs(selected_period - per) > (selected_period) * ptol:
-            print("************** Different the selected period =", selected_period, per)
-            #periods.append(np.nan)
-            periods.append(selected_period)
-            pen_depth.append(np.nan)
-            _logger.warning("Nearest preiod {} on station {} was beyond tolerance of {} ".format(per, mt_obj.Site.id, ptol))
-            pass
-        else:      # Otherwise do this block to compute the edi's pen-depth correspond to the selected_period
-
-            print("********* Include this period at the index ", per,  per_index)
-            periods.append(per)
-
-            if whichrho == 'zxy':
-                penetration_depth = - scale_param * \
-                    np.sqrt(zeta.resistivity[per_index, 0, 1] * per)
-            elif whichrho == 'zyx':
-                penetration_depth = - scale_param * \
-                    np.sqrt(zeta.resistivity[per_index, 1, 0] * per)
-            elif whichrho == 'det':  # the 2X2 complex Z-matrix's determinant abs value
-                # determinant value at the given period index
-                det2 = np.abs(zeta.det[per_index])
-                penetration_depth = -scale_param * np.sqrt(0.2 * per * det2 * per)
-            else:
-                _logger.critical(
-                    "unsupported method to compute penetration depth: %s",
-                    whichrho)
-                # sys.exit(100)
-                raise Exception("unsupported method to compute penetratoin depth: %s" % whichrho)
-
-            pen_depth.append(penetration_depth)
-
-    # The returned 4 lists should have equal length!!!
-    _logger.debug("The length of stations, periods, pen_depth, latlons: %s,%s,%s,%s ", len(stations), len(periods), len(pen_depth), len(latlons) )
+    stack, depth = pendep.get_penetration_depths(mt_obj_list, periods=[selected_period], ptol=ptol)
+    pen_depth = -depth[:, 0, pendep.COMPONENTS.index(whichrho)]
 
-    return stations, periods, pen_depth, latlons
+    return (list(stack['station']), list(stack['periods'][:, 0]), list(pen_depth),
+            list(zip(stack['lat'], stack['lon'])))
 
 
 class ZComponentError(ParameterError):
@@ -20,7 +20,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 import mtpy.core.mt as mt
-from mtpy.imaging.penetration import get_index, load_edi_files, Depth3D
+import mtpy.analysis.penetration_depth as pendep
+from mtpy.imaging.penetration import get_index, get_penetration_depth_by_index, load_edi_files, Depth3D
 from mtpy.utils.mtpy_decorator import deprecated
 from mtpy.utils.mtpylog import MtPyLog
 import logging
@@ -161,45 +162,8 @@ def plot_bar3d_depth(edifiles, per_index, whichrho='det'):
         # Assume edifiles is [a list of files]
         pass
 
-    scale_param = np.sqrt(1.0 / (2.0 * np.pi * 4 * np.pi * 10 ** (-7)))
-
-    _logger.debug("The scaling parameter=%.6f" % scale_param)
-
-    # per_index=0,1,2,....
-    periods = []
-    pen_depth = []
-    stations = []
-    latlons = []
-
-    for afile in edifiles:
-        mt_obj = mt.MT(afile)
-
-        latlons.append((mt_obj.lat, mt_obj.lon))
-
-        # the attribute Z
-        zeta = mt_obj.Z
-
-        if per_index >= len(zeta.freq):
-            raise Exception(
-                "Error: input period index must be less than the number of freqs in zeta.freq=%s", len(
-                    zeta.freq))
-        per = 1.0 / zeta.freq[per_index]
-        periods.append(per)
-
-        if whichrho == 'det':  # the 2X2 complex Z-matrix's determinant abs value
-            # determinant value at the given period index
-            det2 = np.abs(zeta.det[per_index])
-            penetration_depth = -scale_param * np.sqrt(0.2 * per * det2 * per)
-        elif whichrho == 'zxy':
-            penetration_depth = - scale_param * \
-                                np.sqrt(zeta.resistivity[per_index, 0, 1] * per)
-        elif whichrho == 'zyx':
-            penetration_depth = - scale_param * \
-                                np.sqrt(zeta.resistivity[per_index, 1, 0] * per)
-
-        pen_depth.append(penetration_depth)
-
-        stations.append(mt_obj.station)
+    (stations, periods, pen_depth, latlons) = get_penetration_depth_by_index(
+        edifiles, per_index, whichrho=whichrho)
 
     # return (stations, periods, pen_depth, latlons)
 
@@ -290,33 +254,15 @@ def get_penetration_depths_from_edi_file(edifile, rholist=['det']):
     """
     _logger.debug("processing the edi file %s", edifile)
 
-    mt_obj = mt.MT(edifile)
-    zeta = mt_obj.Z  # the attribute Z represent the impedance tensor 2X2 matrix
-    freqs = zeta.freq  # frequencies
-
-    scale_param = np.sqrt(1.0 / (2.0 * np.pi * 4 * np.pi * 10 ** (-7)))
+    stack, depth = pendep.get_penetration_depths([edifile])
 
-    _logger.debug("the scale parameter should be 355.88127 =?= %s", scale_param)
+    # the last of det, zyx, zxy found in rholist is returned
+    for rho in ('det', 'zyx', 'zxy'):
+        if rho in rholist:
+            penetration_depth = depth[0, :, pendep.COMPONENTS.index(rho)]
+            break
 
-    # The periods array
-    periods = 1.0 / freqs
-
-    if 'zxy' in rholist:
-        # One of the 4-components: XY
-        penetration_depth = scale_param * \
-                            np.sqrt(zeta.resistivity[:, 0, 1] * periods)
-
-    if 'zyx' in rholist:
-        penetration_depth = scale_param * \
-                            np.sqrt(zeta.resistivity[:, 1, 0] * periods)
-
-    if 'det' in rholist:
-        # determinant is |Zeta|**2
-        det2 = np.abs(zeta.det[0])
-        penetration_depth = scale_param * \
-                            np.sqrt(0.2 * periods * det2 * periods)
-
-    latlong_d = (mt_obj.lat, mt_obj.lon, periods, penetration_depth)
+    latlong_d = (stack['lat'][0], stack['lon'][0], stack['periods'][0], penetration_depth)
     return latlong_d
 
 def create_penetration_depth_csv(edi_dir, outputcsv, zcomponent='det'):
@@ -346,23 +292,19 @@ def create_penetration_depth_csv(edi_dir, outputcsv, zcomponent='det'):
     # the first period list as a reference for checking other stations period
     periods_list0 = None
     latlon_dep = []  # CSV to be returned
+    mt_objs = []  # stations sharing the reference periods
     for afile in edi_files:
-        # for efile in edi_files[:2]:
         _logger.debug("processing %s", afile)
-        lat, lon, periods, depths = get_penetration_depths_from_edi_file(afile)
+        mt_obj = mt.MT(afile)
+        periods = 1.0 / mt_obj.Z.freq
         if periods_list0 is None:
             periods_list0 = periods  # initial value assignment
-            #depth_string = ','.join(['%.2f' % num for num in depths])
-            #latlon_dep.append((lat, lon, depth_string))
-            latlon_dep.append(["Lat","Lon"] + list(periods)) #The first line header
-            latlon_dep.append([lat, lon] + list(depths))
-
+            latlon_dep.append(["Lat", "Lon"] + list(periods))  # The first line header
+            mt_objs.append(mt_obj)
 
         # same length and same values.
         elif len(periods) == len(periods_list0) and (periods == periods_list0).all():
-            # depth_string = ','.join(['%.2f' % num for num in depths])
-            # latlon_dep.append((lat, lon, depth_string))
-            latlon_dep.append([lat, lon] + list(depths))
+            mt_objs.append(mt_obj)
         else:
             _logger.error(
                 "MT Periods Not Equal !! %s %s VS %s %s",
@@ -370,6 +312,13 @@ def create_penetration_depth_csv(edi_dir, outputcsv, zcomponent='det'):
             # raise Exception ("MTPy Exception: Periods Not Equal")
             # pass this edi, let's continue
 
+    # depths of all stations and periods in one call
+    if mt_objs:
+        stack, depth = pendep.get_penetration_depths(mt_objs, periods=periods_list0)
+        depth = depth[:, :, pendep.COMPONENTS.index(zcomponent)]
+        for lat, lon, depths in zip(stack['lat'], stack['lon'], depth):
+            latlon_dep.append([lat, lon] + list(depths))
+
     # logger.debug(latlon_dep)
 
     if outputcsv is None:
@@ -24,7 +24,9 @@ import matplotlib.tri as tri
 import mtpy.utils.gis_tools as gis_tools
 import mtpy.imaging.mtcolors as mtcl
 import mtpy.imaging.mtplottools as mtpl
+import mtpy.imaging.pt_collections as pt_collections
 import mtpy.analysis.pt as MTpt
+from mtpy.utils import instrumentation
 from mtpy.utils.mtpylog import MtPyLog
 from mtpy.utils.plot_geotiff_imshow import plot_geotiff_on_axes
 
@@ -550,6 +552,7 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
     # -----------------------------------------------
     # The main plot method for this module
     # -----------------------------------------------
+    @instrumentation.instrument('imaging.PlotPhaseTensorMaps.plot')
     def plot(self, fig=None, save_path=None, show=True,
              raster_dict={'lons': [], 'lats': [],
                           'vals': [], 'levels': 50, 'cmap': 'rainbow',
@@ -669,6 +672,7 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
         ck = self.ellipse_colorby
 
         # --> set the bounds on the segmented colormap
+        bounds = None
         if cmap == 'mt_seg_bl2wh2rd':
             bounds = np.arange(ckmin, ckmax + ckstep, ckstep)
 
@@ -679,8 +683,12 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
         elif self.mapscale == 'm' or self.mapscale == 'km':
             self.tickstrfmt = '%.0f'
 
-        # make some empty arrays
+        # make some empty arrays, ellipses and arrows are collected as
+        # rows of (x, y, width, height, angle, color value) and
+        # (x, y, dx, dy) and drawn as single collections after the loop
         elliplist = []
+        arrow_real_list = []
+        arrow_imag_list = []
         latlist = np.zeros(len(self.mt_list))
         lonlist = np.zeros(len(self.mt_list))
         self.plot_xarr = np.zeros(len(self.mt_list))
@@ -830,32 +838,9 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
                     eheight = phimin * scaling
                     ewidth = phimax * scaling
 
-                # make an ellipse
-                ellipd = patches.Ellipse((plotx, ploty),
-                                         width=ewidth,
-                                         height=eheight,
-                                         angle=90 - eangle,
-                                         lw=self.lw,
-                                         **self.kwargs)
-
-                # get ellipse color
-                if cmap.find('seg') > 0:
-                    ellipd.set_facecolor(mtcl.get_plot_color(colorarray,
-                                                             self.ellipse_colorby,
-                                                             cmap,
-                                                             ckmin,
-                                                             ckmax,
-                                                             bounds=bounds))
-                else:
-                    ellipd.set_facecolor(mtcl.get_plot_color(colorarray,
-                                                             self.ellipse_colorby,
-                                                             cmap,
-                                                             ckmin,
-                                                             ckmax))
-
                 # ==> add ellipse to the plot
-                elliplist.append(ellipd)
-                lpax.add_artist(ellipd)
+                elliplist.append((plotx, ploty, ewidth, eheight,
+                                  90 - eangle, colorarray))
 
                 # -----------Plot Induction Arrows---------------------------
                 if self.plot_tipper.find('y') == 0:
@@ -885,16 +870,7 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
                             tyr = ti.mag_real[jj] * ascale * \
                                 np.cos((ti.angle_real[jj]) * np.pi / 180 + adir)
 
-                            lpax.arrow(plotx,
-                                       ploty,
-                                       txr,
-                                       tyr,
-                                       width=self.arrow_lw,
-                                       facecolor=self.arrow_color_real,
-                                       edgecolor=self.arrow_color_real,
-                                       length_includes_head=False,
-                                       head_width=self.arrow_head_width,
-                                       head_length=self.arrow_head_length)
+                            arrow_real_list.append((plotx, ploty, txr, tyr))
                         else:
                             pass
 
@@ -906,16 +882,7 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
                             tyi = ti.mag_imag[jj] * ascale * \
                                 np.cos((ti.angle_imag[jj]) * np.pi / 180 + adir)
 
-                            lpax.arrow(plotx,
-                                       ploty,
-                                       txi,
-                                       tyi,
-                                       width=self.arrow_lw,
-                                       facecolor=self.arrow_color_imag,
-                                       edgecolor=self.arrow_color_imag,
-                                       length_includes_head=False,
-                                       head_width=self.arrow_head_width,
-                                       head_length=self.arrow_head_length)
+                            arrow_imag_list.append((plotx, ploty, txi, tyi))
 
                 # ------------Plot station name------------------------------
                 try:
@@ -932,6 +899,27 @@ class PlotPhaseTensorMaps(mtpl.PlotSettings):
             else:
                 _logger.warn('Did not find {0:.5g} Hz for station {1}'.format(self.plot_freq, mt.station))
 
+        # ==> draw all ellipses and induction arrows as single collections
+        if len(elliplist) > 0:
+            ex, ey, ewidth, eheight, eangle, ecolor = np.array(elliplist).T
+            pt_collections.plot_ellipses(lpax, ex, ey, ewidth, eheight, eangle,
+                                         color_values=ecolor,
+                                         comp=self.ellipse_colorby,
+                                         cmap=cmap, ckmin=ckmin, ckmax=ckmax,
+                                         bounds=bounds if cmap.find('seg') > 0 else None,
+                                         lw=self.lw, **self.kwargs)
+
+        for arrow_list, arrow_color in [(arrow_real_list, self.arrow_color_real),
+                                        (arrow_imag_list, self.arrow_color_imag)]:
+            if len(arrow_list) > 0:
+                arrow_x, arrow_y, arrow_dx, arrow_dy = np.array(arrow_list).T
+                pt_collections.plot_arrows(lpax, arrow_x, arrow_y, arrow_dx, arrow_dy,
+                                           width=self.arrow_lw,
+                                           color=arrow_color,
+                                           length_includes_head=False,
+                                           head_width=self.arrow_head_width,
+                                           head_length=self.arrow_head_length)
+
         # --> set axes properties depending on map scale------------------------
         if self.mapscale == 'deg':
             lpax.set_xlabel('Longitude',
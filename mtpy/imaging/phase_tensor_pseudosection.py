@@ -17,6 +17,7 @@ import numpy as np
 
 import mtpy.imaging.mtcolors as mtcl
 import mtpy.imaging.mtplottools as mtpl
+import mtpy.imaging.pt_collections as pt_collections
 
 
 # ==============================================================================
@@ -483,8 +484,16 @@ class PlotPhaseTensorPseudoSection(mtpl.PlotSettings):
 
         nseg = float((ckmax - ckmin) / (2 * ckstep))
 
+        bounds = None
         if cmap == 'mt_seg_bl2wh2rd':
             bounds = np.arange(ckmin, ckmax + ckstep, ckstep)
+
+        # ellipses and arrows of all stations are collected as arrays of
+        # (x, y, width, height, angle, color value) and (x, y, dx, dy)
+        ellipse_list = []
+        arrow_real_list = []
+        arrow_imag_list = []
+
         # plot phase tensor ellipses
         for ii, mt in enumerate(self.mt_list):
             self.stationlist.append(
@@ -588,96 +597,62 @@ class PlotPhaseTensorPseudoSection(mtpl.PlotSettings):
             minlist.append(min(colorarray))
             maxlist.append(max(colorarray))
 
-            for jj, ff in enumerate(periodlist):
-
-                # make sure the ellipses will be visable
-                eheight = phimin[jj] / phimax[jj] * es
-                ewidth = phimax[jj] / phimax[jj] * es
-
-                # create an ellipse scaled by phimin and phimax and orient
-                # the ellipse so that north is up and east is right
-                # need to add 90 to do so instead of subtracting
-                ellipd = patches.Ellipse((offset * self.xstretch,
-                                          np.log10(ff) * self.ystretch),
-                                         width=ewidth,
-                                         height=eheight,
-                                         edgecolor='k',
-                                         lw=0.5,
-                                         angle=azimuth[jj] + 90)
-
-                # get ellipse color
-                if cmap.find('seg') > 0:
-                    ellipd.set_facecolor(mtcl.get_plot_color(colorarray[jj],
-                                                             self.ellipse_colorby,
-                                                             cmap,
-                                                             ckmin,
-                                                             ckmax,
-                                                             bounds=bounds))
-                else:
-                    ellipd.set_facecolor(mtcl.get_plot_color(colorarray[jj],
-                                                             self.ellipse_colorby,
-                                                             cmap,
-                                                             ckmin,
-                                                             ckmax))
-
-                # == =add the ellipse to the plot == ========
-                self.ax.add_artist(ellipd)
-
-                # --------- Add induction arrows if desired -------------------
-                if self.plot_tipper.find('y') == 0:
-
-                    # --> plot real tipper
-                    if self.plot_tipper == 'yri' or self.plot_tipper == 'yr':
-                        txr = tmr[jj] * np.sin(tar[jj] * np.pi / 180 +
-                                               np.pi * self.arrow_direction) * \
-                            self.arrow_size
-                        tyr = -tmr[jj] * np.cos(tar[jj] * np.pi / 180 +
-                                                np.pi * self.arrow_direction) * \
-                            self.arrow_size
-
-                        maxlength = np.sqrt((txr / self.arrow_size) ** 2 +
-                                            (tyr / self.arrow_size) ** 2)
-
-                        if maxlength > self.arrow_threshold:
-                            pass
-                        elif ((txr > 0) or (tyr>0)):
-#                        else:
-                            self.ax.arrow(offset * self.xstretch,
-                                          np.log10(ff) * self.ystretch,
-                                          txr,
-                                          tyr,
-                                          lw=alw,
-                                          facecolor=self.arrow_color_real,
-                                          edgecolor=self.arrow_color_real,
-                                          length_includes_head=False,
-                                          head_width=awidth,
-                                          head_length=aheight)
-
-                    # --> plot imaginary tipper
-                    if self.plot_tipper == 'yri' or self.plot_tipper == 'yi':
-                        txi = tmi[jj] * np.sin(tai[jj] * np.pi / 180 +
-                                               np.pi * self.arrow_direction) * \
-                            self.arrow_size
-                        tyi = -tmi[jj] * np.cos(tai[jj] * np.pi / 180 +
-                                                np.pi * self.arrow_direction) * \
-                            self.arrow_size
-
-                        maxlength = np.sqrt((txi / self.arrow_size) ** 2 +
-                                            (tyi / self.arrow_size) ** 2)
-                        if maxlength > self.arrow_threshold:
-                            pass
-#                        else:
-                        elif ((txr > 0) or (tyr>0)):
-                            self.ax.arrow(offset * self.xstretch,
-                                          np.log10(ff) * self.ystretch,
-                                          txi,
-                                          tyi,
-                                          lw=alw,
-                                          facecolor=self.arrow_color_imag,
-                                          edgecolor=self.arrow_color_imag,
-                                          length_includes_head=False,
-                                          head_width=awidth,
-                                          head_length=aheight)
+            # make sure the ellipses will be visable
+            with np.errstate(divide='ignore', invalid='ignore'):
+                eheight = phimin / phimax * es
+                ewidth = phimax / phimax * es
+
+            # collect the ellipses scaled by phimin and phimax and oriented
+            # so that north is up and east is right, need to add 90 to do so
+            # instead of subtracting.  They are drawn all at once below.
+            ex = np.repeat(offset * self.xstretch, n)
+            ey = np.log10(periodlist) * self.ystretch
+            ellipse_list.append(np.array([ex, ey, ewidth, eheight,
+                                          azimuth + 90, colorarray]))
+
+            # --------- Add induction arrows if desired -------------------
+            if self.plot_tipper.find('y') == 0:
+                adir = np.pi * self.arrow_direction
+                txr = tmr * np.sin(tar * np.pi / 180 + adir) * self.arrow_size
+                tyr = -tmr * np.cos(tar * np.pi / 180 + adir) * self.arrow_size
+                txi = tmi * np.sin(tai * np.pi / 180 + adir) * self.arrow_size
+                tyi = -tmi * np.cos(tai * np.pi / 180 + adir) * self.arrow_size
+                plot_arrow = (txr > 0) | (tyr > 0)
+
+                # --> plot real tipper
+                if self.plot_tipper == 'yri' or self.plot_tipper == 'yr':
+                    maxlength = np.sqrt((txr / self.arrow_size) ** 2 +
+                                        (tyr / self.arrow_size) ** 2)
+                    keep = (maxlength <= self.arrow_threshold) & plot_arrow
+                    arrow_real_list.append(np.array([ex, ey, txr, tyr])[:, keep])
+
+                # --> plot imaginary tipper
+                if self.plot_tipper == 'yri' or self.plot_tipper == 'yi':
+                    maxlength = np.sqrt((txi / self.arrow_size) ** 2 +
+                                        (tyi / self.arrow_size) ** 2)
+                    keep = (maxlength <= self.arrow_threshold) & plot_arrow
+                    arrow_imag_list.append(np.array([ex, ey, txi, tyi])[:, keep])
+
+        # == =add the ellipses and arrows to the plot == ========
+        ex, ey, ewidth, eheight, eangle, ecolor = np.hstack(ellipse_list)
+        pt_collections.plot_ellipses(self.ax, ex, ey, ewidth, eheight, eangle,
+                                     color_values=ecolor,
+                                     comp=self.ellipse_colorby,
+                                     cmap=cmap, ckmin=ckmin, ckmax=ckmax,
+                                     bounds=bounds if cmap.find('seg') > 0 else None,
+                                     edgecolor='k', lw=0.5)
+
+        for arrow_list, arrow_color in [(arrow_real_list, self.arrow_color_real),
+                                        (arrow_imag_list, self.arrow_color_imag)]:
+            if len(arrow_list) > 0:
+                arrow_x, arrow_y, arrow_dx, arrow_dy = np.hstack(arrow_list)
+                pt_collections.plot_arrows(self.ax, arrow_x, arrow_y,
+                                           arrow_dx, arrow_dy,
+                                           lw=alw,
+                                           color=arrow_color,
+                                           length_includes_head=False,
+                                           head_width=awidth,
+                                           head_length=aheight)
 
         # --> Set plot parameters
         self._plot_periodlist = plot_periodlist
@@ -28,6 +28,7 @@ import mtpy.imaging.mtcolors as mtcl
 #  Plot apparent resistivity and phase
 # ==============================================================================
 from mtpy import MtPyLog
+from mtpy.utils import instrumentation
 from mtpy.imaging.mtplottools import PlotSettings
 
 
@@ -454,6 +455,7 @@ class PlotMTResponse(PlotSettings):
         else:
             return None
 
+    @instrumentation.instrument('imaging.PlotMTResponse.plot')
     def plot(self, show=True, overlay_mt_obj=None):
         """
         plotResPhase(filename,fig_num) will plot the apparent resistivity and 
@@ -291,7 +291,8 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
                           center point 
      plot_title           title of the plot
      plot_yn              plot the pseudo section on instance creation
-     residual_pt_list     list ofmtpy.pt.ResidualPhaseTensor objects
+     residual_pt_list     list of mtpy.pt.PhaseTensor objects of the
+                          residual phase tensor of each station
      rot90                [ True | False ] rotates the residual phase tensors 
                           by 90 degrees if set to True
      rot_z                rotates the impedence tensor of each station by 
@@ -412,7 +413,7 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
                                             {'range':(0,10), 'cmap':'mt_yl2rd',
                                              'size':.005,
                                              'colorby':'geometric_mean'}) 
-            self._read_ellipse_dict()
+            self._read_ellipse_dict(self._ellipse_dict)
             self.ellipse_scale = kwargs.pop('ellipse_scale', None)
         elif self.map_scale == 'm':        
             self.xpad = kwargs.pop('xpad', 1000)
@@ -422,7 +423,7 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
                                             {'range':(0,5), 'cmap':'mt_yl2rd',
                                              'size':500,
                                              'colorby':'geometric_mean'})
-            self._read_ellipse_dict()
+            self._read_ellipse_dict(self._ellipse_dict)
             self.ellipse_scale = kwargs.pop('ellipse_scale', None)
 
         elif self.map_scale == 'km':        
@@ -433,7 +434,7 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
                                             {'range':(0,5), 'cmap':'mt_yl2rd',
                                              'size':.5,
                                              'colorby':'geometric_mean'})
-            self._read_ellipse_dict()
+            self._read_ellipse_dict(self._ellipse_dict)
             self.ellipse_scale = kwargs.pop('ellipse_scale', None)
 
 
@@ -540,9 +541,9 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
         
         freq_list = []
         for mt1 in self.mt_list1:
-            freq_list.extend(mt1.freq)
+            freq_list.extend(mt1.Z.freq)
         for mt2 in self.mt_list2:
-            freq_list.extend(mt2.freq)
+            freq_list.extend(mt2.Z.freq)
             
         self.freq_list = np.array(sorted(set(freq_list), reverse=True))
                 
@@ -554,9 +555,7 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
         """
         
         self._get_freq_list()
-        freq_dict = dict([(np.round(key, 5), value) 
-                           for value, key in enumerate(self.freq_list)])
-                               
+
         num_freq = self.freq_list.shape[0]
         num_station = len(self.mt_list1)
         
@@ -573,107 +572,43 @@ class PlotResidualPTMaps(mtpl.MTEllipse):
                                          ('skew', (np.float, num_freq)),
                                          ('azimuth', (np.float, num_freq)),
                                          ('geometric_mean', (np.float, num_freq))])
-                                         
+
+        #compute the residual phase tensors of all stations at once
+        rpt, rpt_err, found = mtpl.get_residual_pt_arrays(self.mt_list1,
+                                                          self.mt_list2,
+                                                          self.freq_list)
+        res_pt = mtpt.PhaseTensor(pt_array=rpt.reshape(-1, 2, 2),
+                                  pt_err_array=rpt_err.reshape(-1, 2, 2),
+                                  freq=np.tile(self.freq_list, num_station))
+        phimin = res_pt.phimin.reshape(num_station, num_freq)
+        phimax = res_pt.phimax.reshape(num_station, num_freq)
+
+        self.rpt_array['phimin'] = abs(phimin)
+        self.rpt_array['phimax'] = abs(phimax)
+        self.rpt_array['skew'] = res_pt.beta.reshape(num_station, num_freq)
+        self.rpt_array['azimuth'] = res_pt.azimuth.reshape(num_station,
+                                                           num_freq)
+        self.rpt_array['geometric_mean'] = np.sqrt(abs(phimin * phimax))
+
+        st_1, st_2 = self.station_id
         self.residual_pt_list = []
         for mm, mt1 in enumerate(self.mt_list1):
-            station_find = False
-            fdict1 = dict([(np.round(ff, 5), ii) 
-                            for ii, ff in enumerate(mt1.freq)])
-            for mt2 in self.mt_list2:
-                if mt2.station == mt1.station:
-                    fdict2 = dict([(np.round(ff, 5), ii) 
-                                    for ii, ff in enumerate(mt2.freq)])
-                    
-                    #need to make sure only matched frequencies are compared
-                    index_1 = []
-                    index_2 = []
-                    for key1 in sorted(fdict1.keys()):
-                        try:
-                            index_2.append(fdict2[key1])
-                            index_1.append(fdict1[key1])
-                        except KeyError:
-                            'Did not find {0:.4e} Hz in {1}'.format(key1, 
-                                                                  mt2.fn)
-                                                                  
-                    #need to sort the index list, otherwise weird things happen
-                    index_1.sort()
-                    index_2.sort()
-                    
-                    #create new Z objects that have similar frequencies                                              
-                    new_z1 = mtpl.mtz.Z(z_array=mt1.z[index_1],
-                                        z_err_array=mt1.z_err[index_1],
-                                        freq=mt1.freq[index_1])
-                    new_z2 = mtpl.mtz.Z(z_array=mt2.z[index_2],
-                                        z_err_array=mt2.z_err[index_2],
-                                        freq=mt2.freq[index_2])
-                                        
-                    #make new phase tensor objects
-                    pt1 = mtpt.PhaseTensor(z_object=new_z1)
-                    pt2 = mtpt.PhaseTensor(z_object=new_z2)
+            if not found[mm]:
+                continue
+            #keep a residual phase tensor object of each station
+            station_rpt = mtpt.PhaseTensor(pt_array=rpt[mm],
+                                           pt_err_array=rpt_err[mm],
+                                           freq=self.freq_list)
+            station_rpt.station = mt1.station
+            station_rpt.lat = mt1.lat
+            station_rpt.lon = mt1.lon
+            self.residual_pt_list.append(station_rpt)
+
+            self.rpt_array[mm]['station'] = mt1.station[st_1:st_2]
+            self.rpt_array[mm]['lat'] = mt1.lat
+            self.rpt_array[mm]['lon'] = mt1.lon
+            self.rpt_array[mm]['elev'] = mt1.elev
 
-                    #compute residual phase tensor
-                    rpt = mtpt.ResidualPhaseTensor(pt1, pt2)
-                    rpt.compute_residual_pt(pt1, pt2)
-                    
-                    #add some attributes to residual phase tensor object
-                    rpt.station = mt1.station
-                    rpt.lat = mt1.lat
-                    rpt.lon = mt1.lon
-                    
-                    #append to list for manipulating later
-                    self.residual_pt_list.append(rpt)
-                    
-                    #be sure to tell the program you found the station
-                    station_find = True
-                   
-                    #put stuff into an array because we cannot set values of 
-                    #rpt, need this for filtering.
-                    st_1, st_2 = self.station_id
-                    self.rpt_array[mm]['station'] = mt1.station[st_1:st_2]
-                    self.rpt_array[mm]['lat'] = mt1.lat
-                    self.rpt_array[mm]['lon'] = mt1.lon
-                    self.rpt_array[mm]['elev'] = mt1.elev
-                    
-                    rpt_fdict = dict([(np.round(key, 5), value)
-                                       for value, key in enumerate(rpt.freq)])
-                    for f_index, freq in enumerate(rpt.freq):
-                        aa = freq_dict[np.round(freq, 5)]
-                        try:
-                            try:
-                                rr = rpt_fdict[np.round(freq, 5)]
-                                
-                                self.rpt_array[mm]['phimin'][aa] = \
-                                            abs(rpt.residual_pt.phimin[0][rr])
-                                self.rpt_array[mm]['phimax'][aa] = \
-                                            abs(rpt.residual_pt.phimax[0][rr])
-                                self.rpt_array[mm]['skew'][aa] = \
-                                                    rpt.residual_pt.beta[0][rr]
-                                self.rpt_array[mm]['azimuth'][aa] = \
-                                                    rpt.residual_pt.azimuth[0][rr]
-                                self.rpt_array[mm]['geometric_mean'][aa] = \
-                                            np.sqrt(abs(rpt.residual_pt.phimin[0][rr]*\
-                                                    rpt.residual_pt.phimax[0][rr]))
-                            except IndexError:
-                                print('-'*50)
-                                print(mt1.station) 
-                                print('freq_index for 1:  {0}'.format(f_index))
-                                print('freq looking for:  {0}'.format(freq))
-                                print('index in big    :  {0}'.format(aa))
-                                print('index in 1      :  {0} '.format(rr))
-                                print('len_1 = {0}, len_2 = {1}'.format(
-                                        len(mt2.freq), len(mt1.freq)))
-                                print('len rpt_freq = {0}'.format(len(rpt.freq)))
-                        except KeyError:
-                            print('Station {0} does not have {1:.5f}Hz'.format(
-                                   mt1.station, freq))
-                        
-                    
-                    break
-                else:
-                    pass
-            if station_find == False:
-                print('Did not find {0} from list 1 in list 2'.format(mt1.station))
-               
         # from the data get the relative offsets and sort the data by them
         self.rpt_array.sort(order=['lon', 'lat'])
         
@@ -238,7 +238,8 @@ class PlotResidualPTps(mtpl.MTEllipse):
      offset_list          array of relative offsets of each station
      plot_title           title of the plot
      plot_yn              plot the pseudo section on instance creation
-     residual_pt_list     list ofmtpy.pt.ResidualPhaseTensor objects
+     residual_pt_list     list of mtpy.pt.PhaseTensor objects of the
+                          residual phase tensor of each station
      rot90                rotates the residual phase tensors by 90 degrees
                           if set to True
      rpt_array            structured array with all the important information.
@@ -343,7 +344,7 @@ class PlotResidualPTps(mtpl.MTEllipse):
                                         {'cmap': 'mt_yl2rd',
                                          'range': (0, 10),
                                          'colorby': 'geometric_mean'})
-        self._read_ellipse_dict()
+        self._read_ellipse_dict(self._ellipse_dict)
         self.ellipse_scale = kwargs.pop('ellipse_scale', 10)
 
         #--> set colorbar properties---------------------------------
@@ -453,9 +454,9 @@ class PlotResidualPTps(mtpl.MTEllipse):
 
         freq_list = []
         for mt1 in self.mt_list1:
-            freq_list.extend(mt1.freq)
+            freq_list.extend(mt1.Z.freq)
         for mt2 in self.mt_list2:
-            freq_list.extend(mt2.freq)
+            freq_list.extend(mt2.Z.freq)
 
         self.freq_list = np.array(sorted(set(freq_list), reverse=True))
 
@@ -467,11 +468,8 @@ class PlotResidualPTps(mtpl.MTEllipse):
         """
         log_path = os.path.dirname(os.path.dirname(self.fn_list1[0]))
         log_fn = os.path.join(log_path, 'Residual_PT.log')
-        logfid = file(log_fn, 'w')
 
         self._get_freq_list()
-        freq_dict = dict([(np.round(key, 5), value)
-                          for value, key in enumerate(self.freq_list)])
 
         num_freq = self.freq_list.shape[0]
         num_station = len(self.mt_list1)
@@ -490,133 +488,57 @@ class PlotResidualPTps(mtpl.MTEllipse):
                                          ('azimuth', (np.float, num_freq)),
                                          ('geometric_mean', (np.float, num_freq))])
 
+        # compute the residual phase tensors of all stations at once
+        rpt, rpt_err, found = mtpl.get_residual_pt_arrays(self.mt_list1,
+                                                          self.mt_list2,
+                                                          self.freq_list)
+        res_pt = mtpt.PhaseTensor(pt_array=rpt.reshape(-1, 2, 2),
+                                  pt_err_array=rpt_err.reshape(-1, 2, 2),
+                                  freq=np.tile(self.freq_list, num_station))
+        phimin = res_pt.phimin.reshape(num_station, num_freq)
+        phimax = res_pt.phimax.reshape(num_station, num_freq)
+
+        self.rpt_array['phimin'] = phimin
+        self.rpt_array['phimax'] = phimax
+        self.rpt_array['skew'] = res_pt.beta.reshape(num_station, num_freq)
+        self.rpt_array['azimuth'] = res_pt.azimuth.reshape(num_station,
+                                                           num_freq)
+        self.rpt_array['geometric_mean'] = np.sqrt(abs(phimin * phimax))
+
+        st_1, st_2 = self.station_id
         self.residual_pt_list = []
-        for mm, mt1 in enumerate(self.mt_list1):
-            station_find = False
-            fdict1 = dict([(np.round(ff, 5), ii)
-                           for ii, ff in enumerate(mt1.freq)])
-            for mt2 in self.mt_list2:
-                if mt2.station == mt1.station:
-                    logfid.write('{0}{1}{0}\n'.format('=' * 30, mt1.station))
-                    fdict2 = dict([(np.round(ff, 5), ii)
-                                   for ii, ff in enumerate(mt2.freq)])
-
-                    # need to make sure only matched frequencies are compared
-                    index_1 = []
-                    index_2 = []
-                    for key1 in sorted(fdict1.keys()):
-                        try:
-                            index_2.append(fdict2[key1])
-                            index_1.append(fdict1[key1])
-                            logfid.write('-' * 20 + '\n')
-                            logfid.write('found {0} in both\n'.format(key1))
-                            logfid.write('Index 1={0}, Index 2={1}\n'.format(
-                                         fdict1[key1], fdict2[key1]))
-                        except KeyError:
-                            'Did not find {0:.4e} Hz in {1}'.format(key1,
-                                                                    mt2.fn)
-
-                    # need to sort the index list, otherwise weird things
-                    # happen
-                    index_1.sort()
-                    index_2.sort()
-
-                    # create new Z objects that have similar frequencies
-                    new_z1 = mtpl.mtz.Z(z_array=mt1.z[index_1],
-                                        z_err_array=mt1.z_err[index_1],
-                                        freq=mt1.freq[index_1])
-                    new_z2 = mtpl.mtz.Z(z_array=mt2.z[index_2],
-                                        z_err_array=mt2.z_err[index_2],
-                                        freq=mt2.freq[index_2])
-
-                    # make new phase tensor objects
-                    pt1 = mtpt.PhaseTensor(z_object=new_z1)
-                    pt2 = mtpt.PhaseTensor(z_object=new_z2)
-
-                    # compute residual phase tensor
-                    rpt = mtpt.ResidualPhaseTensor(pt1, pt2)
-                    rpt.compute_residual_pt(pt1, pt2)
-
-                    # add some attributes to residual phase tensor object
-                    rpt.station = mt1.station
-                    rpt.lat = mt1.lat
-                    rpt.lon = mt1.lon
-
-                    # append to list for manipulating later
-                    self.residual_pt_list.append(rpt)
-
-                    # be sure to tell the program you found the station
-                    station_find = True
-
-                    # put stuff into an array because we cannot set values of
-                    # rpt, need this for filtering.
-                    st_1, st_2 = self.station_id
-                    self.rpt_array[mm]['station'] = mt1.station[st_1:st_2]
-                    self.rpt_array[mm]['lat'] = mt1.lat
-                    self.rpt_array[mm]['lon'] = mt1.lon
-                    self.rpt_array[mm]['elev'] = mt1.elev
-                    self.rpt_array[mm]['freq'][:] = self.freq_list
-
-                    rpt_fdict = dict([(np.round(key, 5), value)
-                                      for value, key in enumerate(rpt.freq)])
-
-                    for f_index, freq in enumerate(rpt.freq):
-                        aa = freq_dict[np.round(freq, 5)]
-                        try:
-                            rr = rpt_fdict[np.round(freq, 5)]
-                            try:
-                                self.rpt_array[mm]['phimin'][aa] = \
-                                    rpt.residual_pt.phimin[0][rr]
-                                self.rpt_array[mm]['phimax'][aa] = \
-                                    rpt.residual_pt.phimax[0][rr]
-                                self.rpt_array[mm]['skew'][aa] = \
-                                    rpt.residual_pt.beta[0][rr]
-                                self.rpt_array[mm]['azimuth'][aa] = \
-                                    rpt.residual_pt.azimuth[0][rr]
-                                self.rpt_array[mm]['geometric_mean'][aa] = \
-                                    np.sqrt(abs(rpt.residual_pt.phimin[0][rr] *
-                                                rpt.residual_pt.phimax[0][rr]))
-                                logfid.write('Freq={0:.5f} '.format(freq))
-                                logfid.write('Freq_list_index={0} '.format(
-                                    np.where(self.freq_list == freq)[0][0]))
-                                logfid.write('rpt_array_index={0} '.format(aa))
-                                logfid.write('rpt_dict={0} '.format(rr))
-                                logfid.write('rpt.freq_index={0} '.format(
-                                    np.where(rpt.freq == freq)[0][0]))
-                                logfid.write('Phi_max={0:2f} '.format(
-                                    rpt.residual_pt.phimax[0][rr]))
-                                logfid.write('Phi_min={0:2f} '.format(
-                                    rpt.residual_pt.phimin[0][rr]))
-                                logfid.write('Skew={0:2f} '.format(
-                                    rpt.residual_pt.beta[0][rr]))
-                                logfid.write('Azimuth={0:2f}\n'.format(
-                                    rpt.residual_pt.azimuth[0][rr]))
-
-                            except IndexError:
-                                print('-' * 50)
-                                print(mt1.station)
-                                print('freq_index for 1:  {0}'.format(f_index))
-                                print('freq looking for:  {0}'.format(freq))
-                                print('index in big    :  {0}'.format(aa))
-                                print('index in 1      :  {0} '.format(rr))
-                                print('len_1 = {0}, len_2 = {1}'.format(
-                                    len(mt2.freq), len(mt1.freq)))
-                                print('len rpt_freq = {0}'.format(len(rpt.freq)))
-                        except KeyError:
-                            print('Station {0} does not have {1:.5f}Hz'.format(
-                                mt1.station, freq))
-
-                    break
-                else:
-                    pass
-            if station_find == False:
-                print('Did not find {0} from list 1 in list 2'.format(
-                    mt1.station))
+        with open(log_fn, 'w') as logfid:
+            for mm, mt1 in enumerate(self.mt_list1):
+                if not found[mm]:
+                    continue
+                # keep a residual phase tensor object of each station
+                station_rpt = mtpt.PhaseTensor(pt_array=rpt[mm],
+                                               pt_err_array=rpt_err[mm],
+                                               freq=self.freq_list)
+                station_rpt.station = mt1.station
+                station_rpt.lat = mt1.lat
+                station_rpt.lon = mt1.lon
+                self.residual_pt_list.append(station_rpt)
+
+                self.rpt_array[mm]['station'] = mt1.station[st_1:st_2]
+                self.rpt_array[mm]['lat'] = mt1.lat
+                self.rpt_array[mm]['lon'] = mt1.lon
+                self.rpt_array[mm]['elev'] = mt1.elev
+                self.rpt_array[mm]['freq'][:] = self.freq_list
+
+                logfid.write('{0}{1}{0}\n'.format('=' * 30, mt1.station))
+                for aa, freq in enumerate(self.freq_list):
+                    logfid.write('Freq={0:.5f} '.format(freq))
+                    logfid.write('rpt_array_index={0} '.format(aa))
+                    logfid.write('Phi_max={0:2f} '.format(phimax[mm, aa]))
+                    logfid.write('Phi_min={0:2f} '.format(phimin[mm, aa]))
+                    logfid.write('Skew={0:2f} '.format(
+                        self.rpt_array[mm]['skew'][aa]))
+                    logfid.write('Azimuth={0:2f}\n'.format(
+                        self.rpt_array[mm]['azimuth'][aa]))
 
         # from the data get the relative offsets and sort the data by them
         self._get_offsets()
-
-        logfid.close()
     #-------------------------------------------------------------------
 
     def _apply_median_filter(self, kernel=(3, 3)):
@@ -55,6 +55,7 @@ class PlotTF(object):
         self.tf_nhwv = kwargs.pop('nhwv', None)
         self.tf_thresh = kwargs.pop('thresh', None)
         self.tf_robust_type = kwargs.pop('robusttype', 'median')
+        self.tf_n_average = kwargs.pop('n_average', 1)
 
 
         self.fig_num = kwargs.pop('fig_num', 1)
@@ -214,8 +215,8 @@ class PlotTF(object):
                 self.tf_ngwv = 2**3-1
 
             kwargs = {'nhs':self.tf_nh,
-                      'nhwv':self.tf_nh,
-                      'ngwv':self.tf_ng,
+                      'nhwv':self.tf_nhwv,
+                      'ngwv':self.tf_ngwv,
                       'sigmat':self.tf_sigmat,
                       'sigmaf':self.tf_sigmaf,
                       'tstep': self.tf_tstep,
@@ -338,8 +339,7 @@ class PlotTF(object):
                       'alpha':self.tf_alpha,
                       'tstep': self.tf_tstep,
                       'nfbins':self.tf_nfbins,
-                      'threshold':self.tf_thresh,
-                      'robusttype':self.tf_robust_type,
+                      'thresh':self.tf_thresh,
                       'df':self.df}
 
             tf_tuple = mttf.reassigned_smethod(self.time_series, **kwargs)
@@ -347,6 +347,28 @@ class PlotTF(object):
             self.time_list = tf_tuple[1]
             self.freq_list = tf_tuple[2]
 
+        #--> spectrogram or smethod computed block by block for long time
+        #    series, the power of n_average windows is averaged
+        elif self.tf_type == 'spectrogram':
+            if self.tf_nh == None:
+                self.tf_nh = 2**8
+            if self.tf_ng == None:
+                self.tf_ng = 1
+
+            kwargs = {'nh':self.tf_nh,
+                      'L':self.tf_L,
+                      'tstep': self.tf_tstep,
+                      'ng':self.tf_ng,
+                      'nfbins':self.tf_nfbins,
+                      'sigmaL':self.tf_sigmaL,
+                      'n_average':self.tf_n_average,
+                      'df':self.df}
+
+            tf_tuple = mttf.spectrogram(self.time_series, **kwargs)
+            self.tf_array = tf_tuple[0]
+            self.time_list = tf_tuple[1]
+            self.freq_list = tf_tuple[2]
+
         else:
             raise mtex.MTpyError_inputarguments('{0}'.format(self.tf_type)+
                         ' is not definded see mtpy.processing.tf for options')
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Shared renderer for phase tensor ellipses and induction arrows.
+
+Instead of one matplotlib patch per station and period, the outlines of all
+ellipses (or arrows) of a plot are computed as vertex arrays with numpy and
+drawn as a single PolyCollection, colored through a vectorized colormap
+lookup (mtcolors.get_plot_colors).  The shapes are the same as those of
+matplotlib.patches.Ellipse and Axes.arrow (FancyArrow).
+
+:Example: ::
+
+    >>> import mtpy.imaging.pt_collections as ptc
+    >>> width, height = ptc.get_ellipse_size(pt.phimin, pt.phimax, 2)
+    >>> colors = mtcl.get_plot_colors(pt.phimin, 'phimin', 'mt_bl2gr2rd',
+    ...                               0, 90)
+    >>> ptc.plot_ellipses(ax, x, y, width, height, 90 - pt.azimuth,
+    ...                   facecolors=colors, lw=.5)
+    >>> ptc.plot_arrows(ax, x, y, tx, ty, width=.05, head_width=.1,
+    ...                 head_length=.1, color='k')
+
+"""
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+import mtpy.imaging.mtcolors as mtcl
+
+
+def get_ellipse_size(phimin, phimax, ellipse_size, min_size=.0000001):
+    """
+    width and height of phase tensor ellipses scaled so that phimax has the
+    length ellipse_size.  Ellipses that are not physically sensible
+    (phimin or phimax 0 or larger than 100) are shrunk to a dot.
+
+    :return: (width, height) arrays
+    """
+    phimin = np.nan_to_num(np.asarray(phimin, dtype=float))
+    phimax = np.nan_to_num(np.asarray(phimax, dtype=float))
+
+    bad = (phimax == 0) | (phimax > 100) | (phimin == 0) | (phimin > 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaling = ellipse_size / phimax
+    width = np.where(bad, min_size * ellipse_size, phimax * scaling)
+    height = np.where(bad, min_size * ellipse_size, phimin * scaling)
+
+    return width, height
+
+
+def ellipse_vertices(x, y, width, height, angle, num_points=36):
+    """
+    outline of ellipses, as drawn by matplotlib.patches.Ellipse.
+
+    :param x, y: centers of the ellipses
+    :param width, height: full lengths of the horizontal and vertical axes
+                          before rotation
+    :param angle: rotation in degrees anti-clockwise
+    :param num_points: number of vertices of each outline
+    :return: vertices of shape (n_ellipses, num_points, 2)
+    """
+    x, y, width, height, angle = [np.atleast_1d(np.asarray(vv, dtype=float))
+                                  for vv in np.broadcast_arrays(
+                                      x, y, width, height, angle)]
+    theta = np.linspace(0, 2 * np.pi, num_points)
+    rot = np.deg2rad(angle)[:, None]
+
+    ex = .5 * width[:, None] * np.cos(theta)
+    ey = .5 * height[:, None] * np.sin(theta)
+    vx = x[:, None] + ex * np.cos(rot) - ey * np.sin(rot)
+    vy = y[:, None] + ex * np.sin(rot) + ey * np.cos(rot)
+
+    return np.stack([vx, vy], axis=-1)
+
+
+def arrow_vertices(x, y, dx, dy, width=0.001, head_width=None,
+                   head_length=None, length_includes_head=False,
+                   overhang=0):
+    """
+    outline of arrows, as drawn by Axes.arrow (a full FancyArrow).
+
+    :param x, y: tails of the arrows
+    :param dx, dy: lengths of the arrows along x and y
+    :param width: width of the arrow tails
+    :param head_width: width of the arrow heads, default 3 * width
+    :param head_length: length of the arrow heads, default 1.5 * head_width
+    :param length_includes_head: True if the head is part of dx, dy
+    :param overhang: fraction the head is swept back
+    :return: (vertices of shape (n_arrows, 8, 2), boolean mask of the
+             arrows with non zero length, which are the only ones returned)
+    """
+    x, y, dx, dy = [np.atleast_1d(np.asarray(vv, dtype=float))
+                    for vv in np.broadcast_arrays(x, y, dx, dy)]
+    if head_width is None:
+        head_width = 3 * width
+    if head_length is None:
+        head_length = 1.5 * head_width
+
+    distance = np.hypot(dx, dy)
+    drawn = distance > 0
+    x, y, dx, dy, distance = [vv[drawn] for vv in (x, y, dx, dy, distance)]
+
+    length = distance if length_includes_head else distance + head_length
+
+    # left half of the arrow pointing along +x with the tip at 0
+    half = np.zeros((distance.size, 5, 2))
+    half[:, 1] = [-head_length, -head_width / 2.]
+    half[:, 2] = [-head_length * (1 - overhang), -width / 2.]
+    half[:, 3, 0] = -length
+    half[:, 3, 1] = -width / 2.
+    half[:, 4, 0] = -length
+    if not length_includes_head:
+        half[:, :, 0] += head_length
+
+    coords = np.concatenate([half[:, :-1], half[:, -2::-1] * [1, -1]], axis=1)
+
+    # rotate onto the arrow direction and move to the tail
+    cx = (dx / distance)[:, None]
+    sx = (dy / distance)[:, None]
+    vx = coords[..., 0] * cx - coords[..., 1] * sx + (x + dx)[:, None]
+    vy = coords[..., 0] * sx + coords[..., 1] * cx + (y + dy)[:, None]
+
+    return np.stack([vx, vy], axis=-1), drawn
+
+
+def plot_ellipses(ax, x, y, width, height, angle, facecolors=None,
+                  color_values=None, comp=None, cmap=None, ckmin=None,
+                  ckmax=None, bounds=None, num_points=36, **kwargs):
+    """
+    draw ellipses as a single PolyCollection.
+
+    The face colors are either given directly with facecolors or looked up
+    for color_values with mtcolors.get_plot_colors(color_values, comp, cmap,
+    ckmin, ckmax, bounds).  Other keyword arguments are passed on to
+    PolyCollection (lw, edgecolor, zorder, ...).
+
+    :return: the PolyCollection added to ax
+    """
+    if facecolors is None and color_values is not None:
+        facecolors = mtcl.get_plot_colors(color_values, comp, cmap,
+                                          ckmin=ckmin, ckmax=ckmax,
+                                          bounds=bounds)
+    if facecolors is not None:
+        kwargs['facecolors'] = facecolors
+
+    verts = ellipse_vertices(x, y, width, height, angle,
+                             num_points=num_points)
+    collection = PolyCollection(verts, **kwargs)
+    ax.add_collection(collection, autolim=False)
+
+    return collection
+
+
+def plot_arrows(ax, x, y, dx, dy, width=0.001, head_width=None,
+                head_length=None, length_includes_head=False, color=None,
+                **kwargs):
+    """
+    draw arrows as a single PolyCollection, the same shapes as Axes.arrow.
+    Arrows of zero length are not drawn.  color sets both face and edge
+    colors, other keyword arguments are passed on to PolyCollection.
+
+    :return: the PolyCollection added to ax
+    """
+    verts, drawn = arrow_vertices(x, y, dx, dy, width=width,
+                                  head_width=head_width,
+                                  head_length=head_length,
+                                  length_includes_head=length_includes_head)
+    if color is not None:
+        kwargs.setdefault('facecolors', color)
+        kwargs.setdefault('edgecolors', color)
+    collection = PolyCollection(verts, **kwargs)
+    ax.add_collection(collection, autolim=False)
+
+    return collection
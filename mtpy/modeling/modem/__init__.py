@@ -1,3 +1,5 @@
+import importlib
+
 from .exception import ModEMError, DataError
 from .station import Stations
 from .data import Data
@@ -7,15 +9,28 @@ from .control_inv import ControlInv
 from .control_fwd import ControlFwd
 from .convariance import Covariance
 from .config import ModEMConfig
-from .model_manipulator import ModelManipulator
-from .plot_response import PlotResponse
 # from .plot_pt_maps import PlotPTMaps
 # from .plot_depth_slice import PlotDepthSlice
 # from mtpy.imaging.modem_phase_tensor_maps import PlotPTMaps  # can cause circular import error
 # from mtpy.imaging.plot_depth_slice import PlotDepthSlice     # can cause circular import error
-from .plot_slices import PlotSlices
-from .plot_rms_maps import PlotRMSMaps
-from .phase_tensor_maps import PlotPTMaps
+
+# the plotting classes pull in matplotlib and GDAL, they are imported when
+# first accessed as attributes of this package
+_lazy_classes = {'ModelManipulator': '.model_manipulator',
+                 'PlotResponse': '.plot_response',
+                 'PlotSlices': '.plot_slices',
+                 'PlotRMSMaps': '.plot_rms_maps',
+                 'PlotPTMaps': '.phase_tensor_maps'}
+
+
+def __getattr__(name):
+    try:
+        module_name = _lazy_classes[name]
+    except KeyError:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(
+            __name__, name))
+    return getattr(importlib.import_module(module_name, __name__), name)
+
 
 __all__ = [
             'ModEMError', 'DataError', 'Stations', 'Data', 'Model', 'Residual',
@@ -23,5 +38,3 @@ __all__ = [
            'PlotResponse',  'PlotSlices', 'PlotRMSMaps'
            # ,'PlotPTMaps', 'PlotDepthSlice'
            ]
-
-
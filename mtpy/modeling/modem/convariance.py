@@ -13,6 +13,7 @@ import os
 
 import numpy as np
 
+from mtpy.utils import instrumentation
 from mtpy.utils.mtpylog import MtPyLog
 from .exception import CovarianceError
 from .model import Model
@@ -26,6 +27,30 @@ except ImportError:
 __all__ = ['Covariance']
 
 
+def _format_mask_layers(mask_arr):
+    """
+    format the masks of each layer of mask_arr (nx, ny, nz) as lines of
+    '{0:^3.0f}' cells, the cells of all layers are made at once
+    """
+    values, inverse = np.unique(mask_arr, return_inverse=True)
+    inverse = inverse.reshape(mask_arr.shape).transpose(2, 0, 1)
+    cells = ['{0:^3.0f}'.format(value) for value in values]
+    width = len(cells[0])
+    if any([len(cell) != width for cell in cells]):
+        cells = np.array(cells, dtype=object)
+        return [''.join([''.join(row) + '\n' for row in cells[layer]])
+                for layer in inverse]
+
+    # one byte per character, a new line after each row
+    cells = np.frombuffer(''.join(cells).encode('ascii'),
+                          dtype=np.uint8).reshape(len(values), width)
+    layers = cells[inverse].reshape(inverse.shape[0], inverse.shape[1], -1)
+    layers = np.concatenate([layers, np.full(layers.shape[0:2] + (1,),
+                                             ord('\n'), dtype=np.uint8)],
+                            axis=2)
+    return [layer.tobytes().decode('ascii') for layer in layers]
+
+
 class Covariance(object):
     """
     read and write covariance files
@@ -74,6 +99,7 @@ class Covariance(object):
 
 
 
+    @instrumentation.instrument('modem.Covariance.write_covariance_file')
     def write_covariance_file(self, cov_fn=None, save_path=None,
                               cov_fn_basename=None, model_fn=None,
                               sea_water=0.3, air=1e12):  #
@@ -91,11 +117,10 @@ class Covariance(object):
 
             print('Reading {0}'.format(model_fn))
             self.grid_dimensions = mod_obj.res_model.shape
-            if self.mask_arr is None:
-                self.mask_arr = np.ones_like(mod_obj.res_model)
-            self.mask_arr[np.where(mod_obj.res_model >= air * .9)] = 0
-            self.mask_arr[np.where((mod_obj.res_model <= sea_water * 1.1) &
-                                   (mod_obj.res_model >= sea_water * .9))] = 9
+            self.mask_arr = self.get_mask_from_model(mod_obj,
+                                                     sea_water=sea_water,
+                                                     air=air,
+                                                     mask_arr=self.mask_arr)
 
         if self.grid_dimensions is None:
             raise CovarianceError('Grid dimensions are None, input as (Nx, Ny, Nz)')
@@ -157,14 +182,10 @@ class Covariance(object):
                                      self.grid_dimensions[2]))
 
         # need to flip north and south.
-        write_mask_arr = self.mask_arr[::-1, :, :].copy()
-        for zz in range(self.mask_arr.shape[2]):
+        layer_list = _format_mask_layers(self.mask_arr[::-1, :, :])
+        for zz, layer_str in enumerate(layer_list):
             clines.append(' {0:<8.0f}{0:<8.0f}\n'.format(zz + 1))
-            for nn in range(self.mask_arr.shape[0]):
-                cline = ''
-                for ee in range(self.mask_arr.shape[1]):
-                    cline += '{0:^3.0f}'.format(write_mask_arr[nn, ee, zz])
-                clines.append(cline + '\n')
+            clines.append(layer_str)
 
         with open(self.cov_fn, 'w') as cfid:
             cfid.writelines(clines)
@@ -185,49 +206,89 @@ class Covariance(object):
         self.cov_fn_basename = os.path.basename(self.cov_fn)
 
         with open(cov_fn, 'r') as fid:
-            lines = fid.readlines()
+            lines = [line for line in fid.readlines()
+                     if line.strip() and not line.lstrip().startswith(('+', '|'))]
+
+        try:
+            nx, ny, nz = [int(ii) for ii in lines[0].split()]
+            self.smoothing_north = np.array(lines[1].split(), dtype=float)
+            self.smoothing_east = np.array(lines[2].split(), dtype=float)
+            self.smoothing_z = float(lines[3].split()[0])
+            self.smoothing_num = int(lines[4].split()[0])
+            self.exceptions_num = int(lines[5].split()[0])
+            self.exception_list = [[int(ii) for ii in line.split()]
+                                   for line in lines[6:6 + self.exceptions_num]]
+        except (IndexError, ValueError) as error:
+            raise CovarianceError('Could not read {0}: {1}'.format(cov_fn, error))
+
+        # the blocks of masks, each is two layer indices and nx x ny masks,
+        # parsed all at once
+        mask_values = np.fromstring(''.join(lines[6 + self.exceptions_num:]),
+                                    dtype=int, sep=' ')
+
+        self.grid_dimensions = (nx, ny, nz)
+        self.mask_arr = np.ones((nx, ny, nz), dtype=int)
+        block_size = 2 + nx * ny
+        if mask_values.size % block_size != 0:
+            raise CovarianceError('Could not read {0}: the masks are not blocks '
+                                  'of {1} x {2}'.format(cov_fn, nx, ny))
+        for block in mask_values.reshape(-1, block_size):
+            # starts at 1 but python starts at 0, north is flipped in the file
+            self.mask_arr[:, :, block[0] - 1:block[1]] = \
+                block[2:].reshape(nx, ny)[::-1, :, np.newaxis]
+
+    def get_mask_from_model(self, model_obj, sea_water=0.3, air=1e12,
+                            mask_arr=None, surface_name='topography'):
+        """
+        make the mask array from a model, 0 for air, 9 for sea and 1 or
+        the value in mask_arr for the rest
 
-        num_find = False
-        east_find = False
-        north_find = False
-        count = 0
+        The air and sea cells are the ones with the air and sea water
+        resistivity (within 10 %).  If the model has a surface in
+        surface_dict, the cells above it are air above sea level (z=0)
+        and sea below it as well.
 
-        for line in lines:
-            if line.find('+') >= 0 or line.find('|') >= 0:
-                continue
-            else:
-                line_list = line.strip().split()
-                if len(line_list) == 0:
-                    continue
-                elif len(line_list) == 1 and not num_find and line_list[0].find('.') == -1:
-                    self.smoothing_num = int(line_list[0])
-                    num_find = True
-                elif len(line_list) == 1 and num_find and line_list[0].find('.') == -1:
-                    self.exceptions_num = int(line_list[0])
-                elif len(line_list) == 1 and line_list[0].find('.') >= 0:
-                    self.smoothing_z = float(line_list[0])
-                elif len(line_list) == 3:
-                    nx, ny, nz = [int(ii) for ii in line_list]
-                    self.grid_dimensions = (nx, ny, nz)
-                    self.mask_arr = np.ones((nx, ny, nz), dtype=np.int)
-                    self.smoothing_east = np.zeros(ny)
-                    self.smoothing_north = np.zeros(nx)
-                elif len(line_list) == 2:
-                    # starts at 1 but python starts at 0
-                    index_00, index_01 = [int(ii) - 1 for ii in line_list]
-                    count = 0
-                elif line_list[0].find('.') >= 0 and north_find == False:
-                    self.smoothing_north = np.array(line_list, dtype=np.float)
-                    north_find = True
-                elif line_list[0].find('.') >= 0 and north_find == True:
-                    self.smoothing_east = np.array(line_list, dtype=np.float)
-                    east_find = True
-                elif north_find and east_find:
-                    line_list = np.array(line_list, dtype=np.int)
-                    line_list = line_list.reshape((ny, 1))
-
-                    self.mask_arr[count, :, index_00:index_01 + 1] = line_list
-                    count += 1
+        :param model_obj: model to make the mask for
+        :type model_obj: mtpy.modeling.modem.Model
+
+        :param sea_water: resistivity of sea water, *default* is 0.3
+        :type sea_water: float
+
+        :param air: resistivity of air, *default* is 1e12
+        :type air: float
+
+        :param mask_arr: masks of the rest of the model, *default* is 1
+        :type mask_arr: np.ndarray
+
+        :param surface_name: key of the surface in model_obj.surface_dict,
+                             *default* is 'topography'
+        :type surface_name: string
+
+        :returns: mask array, same shape as model_obj.res_model
+        """
+        res_model = model_obj.res_model
+        if mask_arr is None:
+            mask_arr = np.ones(res_model.shape, dtype=int)
+        else:
+            mask_arr = np.array(mask_arr)
+
+        is_air = res_model >= air * .9
+        is_sea = (res_model <= sea_water * 1.1) & (res_model >= sea_water * .9)
+
+        surface_dict = getattr(model_obj, 'surface_dict', None)
+        if surface_dict is not None and surface_name in surface_dict:
+            # depth of the cells between the top of the model and the surface
+            above = model_obj.get_cells_between_surfaces(
+                np.zeros(res_model.shape[0:2]) + model_obj.grid_z[0],
+                -surface_dict[surface_name])
+            below_sea_level = np.mean([model_obj.grid_z[:-1],
+                                       model_obj.grid_z[1:]], axis=0) > 0
+            is_sea |= above & below_sea_level
+            is_air |= above & ~below_sea_level
+
+        mask_arr[is_air] = 0
+        mask_arr[is_sea] = 9
+        return mask_arr
 
     def get_parameters(self):
 
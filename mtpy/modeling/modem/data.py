@@ -22,9 +22,11 @@ from mtpy.core import mt as mt
 from mtpy.core import z as mtz
 from mtpy.modeling import ws3dinv as ws
 from mtpy.utils import gis_tools as gis_tools
+from mtpy.utils import instrumentation
 from mtpy.utils.mtpy_decorator import deprecated
 from mtpy.utils.mtpylog import MtPyLog
 
+from mtpy.modeling.modem import error_models
 from mtpy.modeling.modem.exception import ModEMError, DataError
 from mtpy.modeling.modem.station import Stations
 from mtpy.modeling.modem.model import Model
@@ -40,6 +42,19 @@ except ImportError:
           '    python setup.py build -compiler=mingw32  or \n'
           '    python setup.py build -compiler=cygwin')
 
+# format of the parts of a line of the data file, x==north, y==east, z==+down
+_data_line_formats = {
+    '1': {'period': '%-12.5e',
+          'station': '%7s% 9.3f% 9.3f% 12.3f% 12.3f% 12.3f',
+          'component': '%4s',
+          'value': '% 14.6e% 14.6e',
+          'error': '% 14.6e'},
+    '2': {'period': '%-14.6e',
+          'station': '%-10s% 14.6f% 14.6f% 15.3f% 12.3f% 10.3f',
+          'component': '%12s',
+          'value': '% 17.6e% 17.6e',
+          'error': '% 14.6e'}}
+
 
 # =============================================================================
 class Data(object):
@@ -117,6 +132,13 @@ class Data(object):
                                 * 'median'  sets error to
                                             error_value_z * median([Zxx, Zxy, Zyx, Zyy])
                                             (non zeros)
+                                * 'off_diagonals' sets error to
+                                            error_value_z * Zxy for Zxx, Zxy
+                                            and error_value_z * Zyx for Zyx, Zyy
+                                * 'percent' sets error to
+                                            error_value_z * Z of each component
+                                * any error model registered with
+                                  modem.error_models.register_error_model
                            A 2x2 numpy array of error_type_z can be specified to
                            explicitly set the error_type_z for each component.
 
@@ -646,10 +668,16 @@ class Data(object):
 
         self.get_relative_station_locations()
 
-    def fill_data_array(self, new_edi_dir=None, use_original_freq=False, longitude_format='LON'):
+    @instrumentation.instrument('modem.Data.fill_data_array')
+    def fill_data_array(self, new_edi_dir=None, use_original_freq=False, longitude_format='LON',
+                        num_workers=None):
         """
         fill the data array from mt_dict
 
+        :param new_edi_dir: directory to write edi files of the data
+                            interpolated onto period_list, None for no files
+        :param num_workers: number of processes writing the new edi files,
+                            default is the number of cpus
         """
 
         if self.period_list is None:
@@ -667,6 +695,7 @@ class Data(object):
         self.data_array = np.zeros(ns, dtype=self._dtype)
 
         rel_distance = False
+        write_list = []
         for ii, s_key in enumerate(sorted(self.mt_dict.keys())):
             mt_obj = self.mt_dict[s_key]
             if d_array:
@@ -755,16 +784,22 @@ class Data(object):
                 # FZ: try to output a new edi files. Compare with original edi?
                 if new_edi_dir is not None and os.path.isdir(new_edi_dir):
                     # new_edifile = os.path.join(new_edi_dir, mt_obj.station + '.edi')
-                    mt_obj.write_mt_file(
-                        save_dir=new_edi_dir,
-                        fn_basename=mt_obj.station,
-                        file_type='edi',
-                        new_Z_obj=interp_z,
-                        new_Tipper_obj=interp_t,
-                        longitude_format=longitude_format)
+                    write_list.append((mt_obj, interp_z, interp_t))
             else:
                 pass
 
+        # write the new edi files in one batch
+        if len(write_list) > 0:
+            mt_objs, interp_zs, interp_ts = zip(*write_list)
+            mt.write_mt_files(mt_objs,
+                              save_dir=new_edi_dir,
+                              fn_basename_list=[mt_obj.station for mt_obj in mt_objs],
+                              file_type='edi',
+                              new_Z_obj_list=interp_zs,
+                              new_Tipper_obj_list=interp_ts,
+                              longitude_format=longitude_format,
+                              num_workers=num_workers)
+
         # BM: If we can't get relative locations from MT object, 
         #  then get them from Station object
         if not rel_distance:
@@ -856,6 +891,10 @@ class Data(object):
     def compute_inv_error(self):
         """
         compute the error from the given parameters
+
+        the error of z is computed for all stations and periods at once by
+        the error model of error_type_z, more error models can be added with
+        mtpy.modeling.modem.error_models.register_error_model
         """
         # copy values over to inversion error
         self.data_array['z_inv_err'] = self.data_array['z_err']
@@ -870,94 +909,16 @@ class Data(object):
         else:
             raise DataError("Unsupported error type (tipper): {}".format(self.error_type_tipper))
 
-        # consistency checks
-        error_type_z_list = np.atleast_1d(self.error_type_z)
-
-        if (error_type_z_list.size != 1 and error_type_z_list.size != 4):
-            raise DataError('Either specify a single error_type_z for all components, or ' \
-                            'a 2x2 numpy array of error_type_z.')
-        # end if
-
-        # compute error for z
-        err_value = self.error_value_z / 100.
-        for ss in range(self.data_array.shape[0]):
-            for ff in range(max([self._t_shape[0], self._z_shape[0]])):
-                d_xx = abs(self.data_array['z'][ss, ff, 0, 0])
-                d_xy = abs(self.data_array['z'][ss, ff, 0, 1])
-                d_yx = abs(self.data_array['z'][ss, ff, 1, 0])
-                d_yy = abs(self.data_array['z'][ss, ff, 1, 1])
-                d = np.array([d_xx, d_xy, d_yx, d_yy])
-                nz = np.nonzero(d)
-
-                if d.sum() == 0.0:  # YG: only works if all d >= 0
-                    continue
-
-                err = np.zeros((error_type_z_list.size,
-                                np.atleast_2d(err_value).shape[0],
-                                np.atleast_2d(err_value).shape[1]))
-                for ei, error_type_z in enumerate(error_type_z_list.flatten()):
-                    if 'egbert' in error_type_z:
-                        # if both components masked, then take error floor from
-                        # max of z_xx or z_yy
-                        if (d_xy==0.0 and d_yx==0.0):
-                            err[ei] = err_value * np.max([d_xx,d_yy])
-                        # else use the off diagonals depending on data availability
-                        else:
-                            if d_xy == 0.0:
-                                d_xy = d_yx
-                            if d_yx == 0.0:
-                                d_yx = d_xy
-                            err[ei] = err_value * np.sqrt(d_xy * d_yx)
-
-                    elif 'median' in error_type_z:
-                        err[ei] = err_value * np.median(d[nz])
-
-                    elif 'mean_od' in error_type_z:
-                        dod = np.array([d_xy, d_yx])
-                        nzod = np.nonzero(dod)
-                        err[ei] = err_value * np.mean(dod[nzod])
-
-                    elif 'eigen' in error_type_z:
-                        d2d = d.reshape((2, 2))
-                        err[ei] = err_value * np.abs(np.linalg.eigvals(d2d)).mean()
-                        if np.atleast_1d(err[ei]).sum() == 0:
-                            err[ei] = err_value * d[nz].mean()
-
-                    elif 'off_diagonals' in error_type_z:
-                        # apply same error to xy and xx, and to yx and yy
-                        # value is a % of xy and yx respectively
-                        err[ei] = np.array([[d_xy, d_xy],[d_yx, d_yx]])*err_value
-
-                    elif 'percent' in error_type_z:
-                        # apply separate error floors to each component
-                        err[ei] = err_value * np.abs(d[ei])
-                    else:
-                        raise DataError('error type (z) {0} not understood'.format(error_type_z))
-                # end for
-
-                if(error_type_z_list.size == 1):
-                    self.data_array['z_inv_err'][ss, ff, :, :] = err[0]
-                else:
-                    for ei in np.arange(error_type_z_list.size):
-                        ix, iy = np.divmod(ei, 2)
-                        if (err.shape[1] > 1):
-                            self.data_array['z_inv_err'][ss, ff, ix, iy] = err[ei, ix, iy]
-                        else:
-                            self.data_array['z_inv_err'][ss, ff, ix, iy] = err[ei, 0, 0]
-                        # end if
-                    # end for
-                # end if
-
-        # if there is an error floor
-        if 'floor' in self.error_type_z:
-            f_index = np.where(self.data_array['z_inv_err'] < self.data_array['z_err'])
-            self.data_array['z_inv_err'][f_index] = self.data_array['z_err'][f_index]
-
-
+        # compute error for z, see error_models for the error types
+        self.data_array['z_inv_err'] = error_models.compute_z_inv_error(
+            self.data_array['z'], self.data_array['z_err'],
+            self.error_type_z, self.error_value_z)
 
+    @instrumentation.instrument('modem.Data.write_data_file')
     def write_data_file(self, save_path=None, fn_basename=None,
                         rotation_angle=None, compute_error=True, fill=True,
-                        elevation=False, use_original_freq=False, longitude_format='LON'):
+                        elevation=False, use_original_freq=False, longitude_format='LON',
+                        chunk_size=None):
         """
         write data file for ModEM
         will save file as save_path/fn_basename
@@ -976,6 +937,12 @@ class Data(object):
                                 angle to rotate the data by assuming N = 0,
                                 E = 90. *default* is 0.0
 
+            **chunk_size** : int
+                             number of stations to format at a time, the
+                             data lines are written to the file as they are
+                             made instead of keeping the whole file in
+                             memory. *default* is None, all at once
+
         Outputs:
         ----------
             **data_fn** : string
@@ -1021,6 +988,25 @@ class Data(object):
             self.data_array['rel_elev'][:] = 0.0
             self.center_point.elev = 0.0
 
+        self._check_data_line_format()
+        d_lines = self._iter_data_lines(compute_error, elevation, chunk_size)
+        if chunk_size is None:
+            # make all the lines before the file is opened
+            d_lines = list(d_lines)
+
+        print("self.data_fn ==",  self.data_fn)
+        with open(self.data_fn, 'w') as dfid:
+            dfid.writelines(d_lines)
+
+        self._logger.info('Wrote ModEM data file to {0}'.format(self.data_fn))
+        return self.data_fn
+
+    def _iter_data_lines(self, compute_error=True, elevation=False,
+                         chunk_size=None):
+        """
+        iterate over the header and data lines of the data file, the data
+        lines of chunk_size stations come as one string
+        """
         d_lines = []
         for inv_mode in self.inv_mode_dict[self.inv_mode]:
             if 'impedance' in inv_mode.lower():
@@ -1063,77 +1049,93 @@ class Data(object):
             if compute_error:
                 self.compute_inv_error()
 
-            for ss in range(self.data_array['z'].shape[0]):
-                for ff in range(self.data_array['z'].shape[1]):
-                    for comp in self.inv_comp_dict[inv_mode]:
-                        # index values for component with in the matrix
-                        z_ii, z_jj = self.comp_index_dict[comp]
-
-                        # get the correct key for data array according to comp
-                        if comp.find('z') == 0:
-                            c_key = 'z'
-                        elif comp.find('t') == 0:
-                            c_key = 'tip'
-
-                        # get the value for that competent at that frequency
-                        zz = self.data_array[ss][c_key][ff, z_ii, z_jj]
-                        if zz.real != 0.0 and zz.imag != 0.0 and zz.real != 1e32 and zz.imag != 1e32:
-                            if self.formatting == '1':
-                                per = '{0:<12.5e}'.format(self.period_list[ff])
-                                sta = '{0:>7}'.format(self.data_array[ss]['station'])#.decode('UTF-8'))
-                                lat = '{0:> 9.3f}'.format(self.data_array[ss]['lat'])
-                                lon = '{0:> 9.3f}'.format(self.data_array[ss]['lon'])
-                                eas = '{0:> 12.3f}'.format(self.data_array[ss]['rel_east'])
-                                nor = '{0:> 12.3f}'.format(self.data_array[ss]['rel_north'])
-                                ele = '{0:> 12.3f}'.format(self.data_array[ss]['rel_elev'])
-                                com = '{0:>4}'.format(comp.upper())
-                                if self.units.lower() == 'ohm':
-                                    rea = '{0:> 14.6e}'.format(zz.real / 796.)
-                                    ima = '{0:> 14.6e}'.format(zz.imag / 796.)
-                                elif self.units.lower() not in ("[v/m]/[t]", "[mv/km]/[nt]"):
-                                    raise DataError("Unsupported unit \"{}\"".format(self.units))
-                                else:
-                                    rea = '{0:> 14.6e}'.format(zz.real)
-                                    ima = '{0:> 14.6e}'.format(zz.imag)
-
-                            elif self.formatting == '2':
-                                per = '{0:<14.6e}'.format(self.period_list[ff])
-                                sta = '{0:<10}'.format(self.data_array[ss]['station'])
-                                lat = '{0:> 14.6f}'.format(self.data_array[ss]['lat'])
-                                lon = '{0:> 14.6f}'.format(self.data_array[ss]['lon'])
-                                eas = '{0:> 12.3f}'.format(self.data_array[ss]['rel_east'])
-                                nor = '{0:> 15.3f}'.format(self.data_array[ss]['rel_north'])
-                                ele = '{0:> 10.3f}'.format(self.data_array[ss]['rel_elev'])
-                                com = '{0:>12}'.format(comp.upper())
-                                if self.units.lower() == 'ohm':
-                                    rea = '{0:> 17.6e}'.format(zz.real / 796.)
-                                    ima = '{0:> 17.6e}'.format(zz.imag / 796.)
-                                elif self.units.lower() not in ("[v/m]/[t]", "[mv/km]/[nt]"):
-                                    raise DataError("Unsupported unit \"{}\"".format(self.units))
-                                else:
-                                    rea = '{0:> 17.6e}'.format(zz.real)
-                                    ima = '{0:> 17.6e}'.format(zz.imag)
-                            else:
-                                raise NotImplementedError(
-                                    "format {}({}) is not supported".format(self.formatting, type(self.formatting)))
-
-                            # get error from inversion error
-                            abs_err = self.data_array['{0}_inv_err'.format(c_key)][ss, ff, z_ii, z_jj]
-
-                            if np.isinf(abs_err) or np.isnan(abs_err):
-                                abs_err = 10 ** (np.floor(np.log10(abs(max([float(rea),
-                                                                            float(ima)])))))
-                            abs_err = '{0:> 14.6e}'.format(abs(abs_err))
-                            # make sure that x==north, y==east, z==+down
-                            dline = ''.join([per, sta, lat, lon, nor, eas, ele, com, rea, ima, abs_err, '\n'])
-
-                            d_lines.append(dline)
-        print("self.data_fn ==",  self.data_fn)
-        with open(self.data_fn, 'w') as dfid:
-            dfid.writelines(d_lines)
+            for d_line in d_lines:
+                yield d_line
+            d_lines = []
+
+            n_stations = self.data_array.shape[0]
+            if chunk_size is None:
+                chunk_size = max(n_stations, 1)
+            for ss in range(0, n_stations, chunk_size):
+                yield self.get_data_lines(inv_mode,
+                                          self.data_array[ss:ss + chunk_size])
+
+    def _check_data_line_format(self):
+        if self.formatting not in _data_line_formats:
+            raise NotImplementedError(
+                "format {}({}) is not supported".format(self.formatting, type(self.formatting)))
+        if self.units.lower() not in ("ohm", "[v/m]/[t]", "[mv/km]/[nt]"):
+            raise DataError("Unsupported unit \"{}\"".format(self.units))
+
+    def get_data_lines(self, inv_mode, data_array=None):
+        """
+        get the data lines of one data type of the data file
+
+        The components of all stations and periods are selected and scaled
+        as arrays, only the numbers of a line are formatted one by one.
+        Components that are 0, 1e32 or nan are not written.
+
+        :param inv_mode: data type, a key of inv_comp_dict
+        :type inv_mode: string
+
+        :param data_array: stations to get the lines for, *default* is
+                           data_array.  compute_inv_error has to be run
+                           before.
+        :type data_array: np.ndarray(dtype=self._dtype)
+
+        :returns: data lines as one string
+        """
+        if data_array is None:
+            data_array = self.data_array
+        self._check_data_line_format()
+        fmt = _data_line_formats[self.formatting]
+
+        comp_list = self.inv_comp_dict[inv_mode]
+        c_key = 'z' if comp_list[0].find('z') == 0 else 'tip'
+        z_ii, z_jj = np.array([self.comp_index_dict[comp]
+                               for comp in comp_list]).T
+        # (station, period, component)
+        values = data_array[c_key][:, :, z_ii, z_jj]
+        abs_err = data_array['{0}_inv_err'.format(c_key)][:, :, z_ii, z_jj]
+        has_data = np.ones(values.shape, dtype=bool)
+        for part in [values.real, values.imag]:
+            has_data &= (part != 0.0) & (part != 1e32) & ~np.isnan(part)
+        ss, ff, cc = np.nonzero(has_data)
+        if ss.size == 0:
+            return ''
+
+        values = values[ss, ff, cc]
+        abs_err = abs_err[ss, ff, cc]
+        if c_key == 'z' and self.units.lower() == 'ohm':
+            values = values / 796.
+
+        # the parts of a line that repeat are formatted once
+        per_list = [fmt['period'] % period for period in self.period_list]
+        sta_list = [fmt['station'] % tuple(row) for row in zip(
+            data_array['station'].tolist(), data_array['lat'].tolist(),
+            data_array['lon'].tolist(), data_array['rel_north'].tolist(),
+            data_array['rel_east'].tolist(), data_array['rel_elev'].tolist())]
+        com_list = [fmt['component'] % comp.upper() for comp in comp_list]
+
+        bad_err = ~np.isfinite(abs_err)
+        if bad_err.any():
+            # order of magnitude of the larger of the written real and
+            # imaginary parts
+            value_str = np.array([fmt['value'] % (value.real, value.imag)
+                                  for value in values[bad_err]])
+            abs_err[bad_err] = [10 ** np.floor(np.log10(abs(max(
+                [float(number) for number in line.split()]))))
+                for line in value_str]
+        abs_err = np.abs(abs_err)
+
+        line_fmt = fmt['value'] + fmt['error'] + '\n'
+        return ''.join([per_list[f_index] + sta_list[s_index] +
+                        com_list[c_index] + line_fmt % (re, im, err)
+                        for s_index, f_index, c_index, re, im, err in zip(
+                            ss.tolist(), ff.tolist(), cc.tolist(),
+                            values.real.tolist(), values.imag.tolist(),
+                            abs_err.tolist())])
 
-        self._logger.info('Wrote ModEM data file to {0}'.format(self.data_fn))
-        return self.data_fn
 
     @deprecated("error type from GA implementation, not fully tested yet")
     def _impedance_components_error_meansqr(self, c_key, ss, z_ii, z_jj):
@@ -1343,6 +1345,7 @@ class Data(object):
 
         return ws_data.data_fn, station_info.station_fn
 
+    @instrumentation.instrument('modem.Data.read_data_file')
     def read_data_file(self, data_fn=None, center_utm=None):
         """ Read ModEM data file
 
@@ -1373,6 +1376,7 @@ class Data(object):
 
         with open (self.data_fn, 'r') as dfid:
             dlines = dfid.readlines()
+        instrumentation.add_bytes(os.path.getsize(self.data_fn))
 
         # dfid.close()
 
@@ -0,0 +1,247 @@
+"""
+==================
+ModEM
+==================
+
+Error models for the impedance data of a ModEM data file.
+
+An error model computes the inversion error of every impedance element from
+the absolute values of the impedance tensors.  It works on all stations and
+periods at once, on an array of shape (..., 2, 2), and returns an array that
+broadcasts to it.
+
+The error types understood by Data.error_type_z are registered here, more
+can be added with register_error_model::
+
+    >>> import numpy as np
+    >>> from mtpy.modeling.modem import error_models
+    >>> @error_models.register_error_model('max_od')
+    ... def max_od(z_abs, error_value):
+    ...     od = np.maximum(z_abs[..., 0, 1], z_abs[..., 1, 0])
+    ...     return error_value * od[..., None, None]
+    >>> modem_data.error_type_z = 'max_od_floor'
+
+"""
+import numpy as np
+
+from .exception import DataError
+
+__all__ = ['register_error_model', 'get_error_model', 'get_error_model_names',
+           'compute_z_inv_error']
+
+# name --> function, in the order the names are matched in an error type
+_error_models = {}
+
+
+def register_error_model(name, func=None):
+    """
+    register an error model for the impedance
+
+    :param name: name of the error model, an error type that contains the
+                 name uses the model, e.g. 'egbert_floor' uses 'egbert'
+    :type name: string
+
+    :param func: function(z_abs, error_value) that returns the error for
+                 z_abs, the absolute values of the impedance with shape
+                 (..., 2, 2).  error_value is the relative error, a float
+                 or a (2, 2) array.  The returned array has to broadcast to
+                 the shape of z_abs.  If None, register_error_model returns
+                 a decorator.
+    :type func: function
+
+    :returns: func
+    """
+    if func is None:
+        def decorator(func):
+            return register_error_model(name, func)
+        return decorator
+
+    if 'floor' in name:
+        raise DataError('error model name {0} can not contain "floor", it '
+                        'is used to set an error floor'.format(name))
+    _error_models[name] = func
+    return func
+
+
+def get_error_model_names():
+    """
+    names of the registered error models
+    """
+    return list(_error_models.keys())
+
+
+def get_error_model(error_type):
+    """
+    get the error model for an error type
+
+    :param error_type: name of the error model, or a name that contains it
+                       like 'egbert_floor'.  Names are matched in the order
+                       they were registered.
+    :type error_type: string
+
+    :returns: function of the error model
+    """
+    error_type = str(error_type)
+    if error_type in _error_models:
+        return _error_models[error_type]
+    for name, func in _error_models.items():
+        if name in error_type:
+            return func
+    raise DataError('error type (z) {0} not understood'.format(error_type))
+
+
+def _nonzero_mean(values, axis):
+    """
+    mean of the non zero values along axis, nan if they are all zero
+    """
+    count = np.count_nonzero(values, axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return values.sum(axis=axis) / count
+
+
+def _expand(values, error_value):
+    """
+    one value per tensor --> (..., 1, 1) times error_value
+    """
+    return error_value * values[..., np.newaxis, np.newaxis]
+
+
+@register_error_model('egbert')
+def egbert(z_abs, error_value):
+    """
+    error_value * sqrt(|Zxy * Zyx|), see Egbert & Kelbert.  If one of the
+    off diagonals is zero the other one is used, if both are zero the
+    maximum of the diagonals.
+    """
+    d_xy = z_abs[..., 0, 1]
+    d_yx = z_abs[..., 1, 0]
+    no_xy = d_xy == 0
+    no_yx = d_yx == 0
+    err = np.sqrt(np.where(no_xy, d_yx, d_xy) * np.where(no_yx, d_xy, d_yx))
+    err = np.where(no_xy & no_yx,
+                   np.maximum(z_abs[..., 0, 0], z_abs[..., 1, 1]), err)
+    return _expand(err, error_value)
+
+
+@register_error_model('median')
+def median(z_abs, error_value):
+    """
+    error_value * median([Zxx, Zxy, Zyx, Zyy]) of the non zero values
+    """
+    z_flat = z_abs.reshape(z_abs.shape[:-2] + (4,))
+    z_flat = np.where(z_flat == 0, np.nan, z_flat)
+    # the nans are sorted to the end, the median of the count non zero
+    # values is the mean of the middle one or two of them
+    z_sort = np.sort(z_flat, axis=-1)
+    count = np.count_nonzero(~np.isnan(z_flat), axis=-1)[..., np.newaxis]
+    low = np.take_along_axis(z_sort, np.maximum(count - 1, 0) // 2, -1)
+    high = np.take_along_axis(z_sort, count // 2, -1)
+    err = np.where(count > 0, (low + high) / 2., np.nan)[..., 0]
+    return _expand(err, error_value)
+
+
+@register_error_model('mean_od')
+def mean_od(z_abs, error_value):
+    """
+    error_value * mean([Zxy, Zyx]) of the non zero values
+    """
+    z_od = np.stack([z_abs[..., 0, 1], z_abs[..., 1, 0]], axis=-1)
+    return _expand(_nonzero_mean(z_od, -1), error_value)
+
+
+@register_error_model('eigen')
+def eigen(z_abs, error_value):
+    """
+    error_value * mean(abs(eigenvalues(|Z|))), or error_value * mean of
+    the non zero values of |Z| if the eigenvalues are zero
+    """
+    # eigenvalues of [[a, b], [c, d]] are (tr +/- sqrt(tr**2 - 4 det)) / 2
+    trace = z_abs[..., 0, 0] + z_abs[..., 1, 1]
+    det = (z_abs[..., 0, 0] * z_abs[..., 1, 1] -
+           z_abs[..., 0, 1] * z_abs[..., 1, 0])
+    root = np.sqrt((trace ** 2 - 4 * det).astype(complex))
+    err = (np.abs(trace + root) + np.abs(trace - root)) / 4.
+    z_flat = z_abs.reshape(z_abs.shape[:-2] + (4,))
+    err = np.where(err == 0, _nonzero_mean(z_flat, -1), err)
+    return _expand(err, error_value)
+
+
+@register_error_model('off_diagonals')
+def off_diagonals(z_abs, error_value):
+    """
+    error_value * Zxy for Zxx and Zxy, error_value * Zyx for Zyx and Zyy
+    """
+    err = np.repeat(z_abs[..., [0, 1], [1, 0]][..., np.newaxis], 2, axis=-1)
+    return error_value * err
+
+
+@register_error_model('percent')
+def percent(z_abs, error_value):
+    """
+    error_value * |Z| of each component
+    """
+    return error_value * z_abs
+
+
+def compute_z_inv_error(z, z_err, error_type, error_value):
+    """
+    compute the inversion error of the impedance
+
+    :param z: impedance tensors, shape (..., 2, 2), usually
+              (n_stations, n_periods, 2, 2)
+    :type z: np.ndarray(complex)
+
+    :param z_err: error of the impedance, same shape as z.  Tensors that
+                  are all zero keep this error.
+    :type z_err: np.ndarray(float)
+
+    :param error_type: name of the error model, or a 2x2 array of names to
+                       set the error model of each component.  A component
+                       whose error type contains 'floor' is not given an
+                       error smaller than z_err.
+    :type error_type: string or np.ndarray(2, 2)
+
+    :param error_value: error in percent, or a 2x2 array of errors to set
+                        the error of each component
+    :type error_value: float or np.ndarray(2, 2)
+
+    :returns: inversion error, same shape as z_err
+    """
+    error_type_list = np.atleast_1d(error_type).flatten()
+    if error_type_list.size not in (1, 4):
+        raise DataError('Either specify a single error_type_z for all '
+                        'components, or a 2x2 numpy array of error_type_z.')
+    error_type_list = np.resize(error_type_list, 4).reshape(2, 2)
+
+    error_value = np.asarray(error_value, dtype=float) / 100.
+    if error_value.size not in (1, 4):
+        raise DataError('Either specify a single error_value_z for all '
+                        'components, or a 2x2 numpy array of error_value_z.')
+    if error_value.size == 4:
+        error_value = error_value.reshape(2, 2)
+    else:
+        error_value = error_value.flatten()[0]
+
+    z_abs = np.abs(z)
+    z_err = np.asarray(z_err)
+    inv_err = np.array(z_err, dtype=float)
+
+    # tensors that are all zero are not in the data
+    has_data = z_abs.sum(axis=(-2, -1)) != 0
+    z_abs = z_abs[has_data]
+
+    err = np.zeros(z_abs.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for name in np.unique(error_type_list):
+            is_type = error_type_list == name
+            err[..., is_type] = np.broadcast_to(
+                get_error_model(name)(z_abs, error_value),
+                z_abs.shape)[..., is_type]
+    inv_err[has_data] = err
+
+    # error floors
+    is_floor = np.array([['floor' in str(name) for name in row]
+                         for row in error_type_list])
+    inv_err = np.where(is_floor & (inv_err < z_err), z_err, inv_err)
+
+    return inv_err
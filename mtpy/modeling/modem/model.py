@@ -23,6 +23,7 @@ from scipy import stats as stats, interpolate as spi
 import mtpy.utils.calculator as mtcc
 from mtpy.modeling import ws3dinv as ws
 from mtpy.utils import mesh_tools as mtmesh, gis_tools as gis_tools, filehandling as mtfh
+from mtpy.utils import instrumentation
 from mtpy.utils.mtpylog import MtPyLog
 from .exception import ModelError
 import mtpy.utils.gocad as mtgocad
@@ -382,6 +383,7 @@ class Model(object):
         return np.array([self.nodes_z[0:ii].sum() 
                          for ii in range(self.nodes_z.size)])
     
+    @instrumentation.instrument('modem.Model.make_mesh')
     def make_mesh(self):
         """
         create finite element mesh according to user-input parameters.
@@ -642,16 +644,32 @@ class Model(object):
 
         # FZ: should ref-define the self.res_model if its shape has changed after topo air layer are added
 
+        # assign resistivity value
+        self.res_model[self.get_cells_between_surfaces(top_surface,
+                                                       bottom_surface)] = resistivity_value
+
+    def get_cells_between_surfaces(self, top_surface, bottom_surface):
+        """
+        find the cells with their centre below top_surface and at or above
+        bottom_surface, for all columns of the model at once
+
+        :param top_surface: depth of the top surface, (n_north, n_east)
+        :type top_surface: np.ndarray
+
+        :param bottom_surface: depth of the bottom surface, (n_north, n_east)
+        :type bottom_surface: np.ndarray
+
+        :returns: boolean array, True for the cells between the surfaces,
+                  same shape as res_model
+        """
         gcz = np.mean([self.grid_z[:-1], self.grid_z[1:]], axis=0)
 
         self._logger.debug("gcz is the cells centre coordinates: %s, %s" %
                            (len(gcz), gcz))
 
-        # assign resistivity value
-        for j in range(len(self.res_model)):
-            for i in range(len(self.res_model[j])):
-                ii = np.where((gcz > top_surface[j, i]) & (gcz <= bottom_surface[j, i]))[0]
-                self.res_model[j, i, ii] = resistivity_value
+        top_surface = np.asarray(top_surface)[:, :, np.newaxis]
+        bottom_surface = np.asarray(bottom_surface)[:, :, np.newaxis]
+        return (gcz > top_surface) & (gcz <= bottom_surface)
 
     def plot_mesh(self, east_limits=None, north_limits=None, z_limits=None,
                   **kwargs):
@@ -1074,6 +1092,7 @@ class Model(object):
         
         
         
+    @instrumentation.instrument('modem.Model.write_model_file')
     def write_model_file(self, **kwargs):
         """
         will write an initial file for ModEM.
@@ -1223,6 +1242,7 @@ class Model(object):
 
         self._logger.info('Wrote file to: {0}'.format(self.model_fn))
 
+    @instrumentation.instrument('modem.Model.read_model_file')
     def read_model_file(self, model_fn=None):
         """
         read an initial file and return the pertinent information including
@@ -1282,6 +1302,7 @@ class Model(object):
 
         with open(self.model_fn, 'r') as ifid:
             ilines = ifid.readlines()
+        instrumentation.add_bytes(os.path.getsize(self.model_fn))
 
         self.title = ilines[0].strip()
 
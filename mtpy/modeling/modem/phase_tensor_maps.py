@@ -4,22 +4,25 @@
 """
 import os
 import os.path as op
+import time
 
 import matplotlib.colorbar as mcb
 import matplotlib.gridspec as gridspec
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.colors import Normalize
-from matplotlib.patches import Ellipse
 
 import mtpy.analysis.pt as mtpt
 import mtpy.imaging.mtcolors as mtcl
 import mtpy.imaging.mtplottools as mtplottools
+import mtpy.imaging.pt_collections as ptc
+from mtpy.imaging.figure_export import FigureTiming, export_figures
 import mtpy.modeling.ws3dinv as ws
 import mtpy.utils.exceptions as mtex
 from mtpy.utils.calculator import nearest_index
 from mtpy.utils.gis_tools import epsg_project
 from mtpy.utils import basemap_tools
+from mtpy.utils import instrumentation
 from mtpy.modeling.modem import Data, Model
 import logging, traceback
 
@@ -304,86 +307,41 @@ class PlotPTMaps(mtplottools.MTEllipse):
         put pt parameters into something useful for plotting
         """
 
-        ns = len(list(self.data_obj.mt_dict.keys()))
+        key_list = list(self.data_obj.mt_dict.keys())
+        mt_list = [self.data_obj.mt_dict[key] for key in key_list]
+        ns = len(key_list)
         nf = len(self.data_obj.period_list)
 
-        data_pt_arr = np.zeros((nf, ns), dtype=[('phimin', np.float),
-                                                ('phimax', np.float),
-                                                ('skew', np.float),
-                                                ('azimuth', np.float),
-                                                ('east', np.float),
-                                                ('north', np.float),
-                                                ('lon', np.float),
-                                                ('lat', np.float),
-                                                ('station', 'S10')])
+        pt_dtype = [('phimin', np.float),
+                    ('phimax', np.float),
+                    ('skew', np.float),
+                    ('azimuth', np.float),
+                    ('east', np.float),
+                    ('north', np.float),
+                    ('lon', np.float),
+                    ('lat', np.float),
+                    ('station', 'S10')]
+
+        # phase tensors of all stations as (stations, periods, 2, 2) cubes
+        data_pt = np.array([mt_obj.pt.pt for mt_obj in mt_list])
+        data_pt_arr = self._get_pt_array(data_pt, mt_list, pt_dtype)
+
         if self.resp_fn is not None:
-            model_pt_arr = np.zeros((nf, ns), dtype=[('phimin', np.float),
-                                                     ('phimax', np.float),
-                                                     ('skew', np.float),
-                                                     ('azimuth', np.float),
-                                                     ('east', np.float),
-                                                     ('north', np.float),
-                                                     ('lon', np.float),
-                                                     ('lat', np.float),
-                                                     ('station', 'S10')])
-
-            res_pt_arr = np.zeros((nf, ns), dtype=[('phimin', np.float),
-                                                   ('phimax', np.float),
-                                                   ('skew', np.float),
-                                                   ('azimuth', np.float),
-                                                   ('east', np.float),
-                                                   ('north', np.float),
-                                                   ('lon', np.float),
-                                                   ('lat', np.float),
-                                                   ('geometric_mean', np.float),
-                                                   ('station', 'S10')])
-
-        for ii, key in enumerate(self.data_obj.mt_dict.keys()):
-            east = self.data_obj.mt_dict[key].grid_east / self.dscale
-            north = self.data_obj.mt_dict[key].grid_north / self.dscale
-            lon = self.data_obj.mt_dict[key].lon
-            lat = self.data_obj.mt_dict[key].lat
-            dpt = self.data_obj.mt_dict[key].pt
-            data_pt_arr[:, ii]['east'] = east
-            data_pt_arr[:, ii]['north'] = north
-            data_pt_arr[:, ii]['lon'] = lon
-            data_pt_arr[:, ii]['lat'] = lat
-            data_pt_arr[:, ii]['phimin'] = dpt.phimin
-            data_pt_arr[:, ii]['phimax'] = dpt.phimax
-            data_pt_arr[:, ii]['azimuth'] = dpt.azimuth
-            data_pt_arr[:, ii]['skew'] = dpt.beta
-            data_pt_arr[:, ii]['station'] = self.data_obj.mt_dict[key].station
-            if self.resp_fn is not None:
-                mpt = self.resp_obj.mt_dict[key].pt
-                try:
-                    rpt = mtpt.ResidualPhaseTensor(pt_object1=dpt,
-                                                   pt_object2=mpt,
-                                                   residualtype=self.residual_pt_type)
-                    rpt = rpt.residual_pt
-                    res_pt_arr[:, ii]['east'] = east
-                    res_pt_arr[:, ii]['north'] = north
-                    res_pt_arr[:, ii]['lon'] = lon
-                    res_pt_arr[:, ii]['lat'] = lat
-                    res_pt_arr[:, ii]['phimin'] = rpt.phimin
-                    res_pt_arr[:, ii]['phimax'] = rpt.phimax
-                    res_pt_arr[:, ii]['azimuth'] = rpt.azimuth
-                    res_pt_arr[:, ii]['skew'] = rpt.beta
-                    res_pt_arr[:, ii]['station'] = self.data_obj.mt_dict[key].station
-                    res_pt_arr[:, ii]['geometric_mean'] = np.sqrt(np.abs(rpt.phimin) *
-                                                                  np.abs(rpt.phimax))
-                except mtex.MTpyError_PT:
-                    print(key, dpt.pt.shape, mpt.pt.shape)
-
-                model_pt_arr[:, ii]['east'] = east
-                model_pt_arr[:, ii]['north'] = north
-                model_pt_arr[:, ii]['lon'] = lon
-                model_pt_arr[:, ii]['lat'] = lat
-                model_pt_arr[:, ii]['phimin'] = mpt.phimin
-                model_pt_arr[:, ii]['phimax'] = mpt.phimax
-                model_pt_arr[:, ii]['azimuth'] = mpt.azimuth
-                model_pt_arr[:, ii]['skew'] = mpt.beta
-                model_pt_arr[
-                    :, ii]['station'] = self.data_obj.mt_dict[key].station
+            resp_pt = np.array([self.resp_obj.mt_dict[key].pt.pt
+                                for key in key_list])
+            model_pt_arr = self._get_pt_array(resp_pt, mt_list, pt_dtype)
+
+            res_dtype = pt_dtype[:-1] + [('geometric_mean', np.float),
+                                         ('station', 'S10')]
+            try:
+                rpt = mtpt.compute_residual_pt_array(
+                    data_pt, resp_pt, residualtype=self.residual_pt_type)[0]
+                res_pt_arr = self._get_pt_array(rpt, mt_list, res_dtype)
+                res_pt_arr['geometric_mean'] = np.sqrt(
+                    np.abs(res_pt_arr['phimin']) * np.abs(res_pt_arr['phimax']))
+            except mtex.MTpyError_PT:
+                print(data_pt.shape, resp_pt.shape)
+                res_pt_arr = np.zeros((nf, ns), dtype=res_dtype)
 
         # make these attributes
         self.pt_data_arr = data_pt_arr
@@ -391,6 +349,38 @@ class PlotPTMaps(mtplottools.MTEllipse):
             self.pt_resp_arr = model_pt_arr
             self.pt_resid_arr = res_pt_arr
 
+    def _get_pt_array(self, pt_cube, mt_list, dtype):
+        """
+        fill a structured array (periods, stations) with the phase tensor
+        parameters of a (stations, periods, 2, 2) cube of phase tensors and
+        the locations of the stations in mt_list
+        """
+        ns, nf = pt_cube.shape[:2]
+        pt_obj = mtpt.PhaseTensor(pt_array=pt_cube.reshape(ns * nf, 2, 2),
+                                  freq=np.tile(1. / self.data_obj.period_list,
+                                               ns))
+
+        pt_arr = np.zeros((nf, ns), dtype=dtype)
+        pt_arr['phimin'] = pt_obj.phimin.reshape(ns, nf).T
+        pt_arr['phimax'] = pt_obj.phimax.reshape(ns, nf).T
+        pt_arr['azimuth'] = pt_obj.azimuth.reshape(ns, nf).T
+        pt_arr['skew'] = pt_obj.beta.reshape(ns, nf).T
+        pt_arr['east'] = [mt_obj.grid_east / self.dscale for mt_obj in mt_list]
+        pt_arr['north'] = [mt_obj.grid_north / self.dscale for mt_obj in mt_list]
+        pt_arr['lon'] = [mt_obj.lon for mt_obj in mt_list]
+        pt_arr['lat'] = [mt_obj.lat for mt_obj in mt_list]
+        pt_arr['station'] = [mt_obj.station for mt_obj in mt_list]
+
+        return pt_arr
+
+    def _get_ellipse_axes(self, pt_period):
+        """
+        width and height of the ellipses of one period, scaled so the largest
+        phimax of the period has the length ellipse_size
+        """
+        scaling = self.ellipse_size / pt_period['phimax'].max()
+        return pt_period['phimax'] * scaling, pt_period['phimin'] * scaling
+
     def plot_on_axes(self, ax, m, periodIdx, ptarray='data', ellipse_size_factor=10000,
                      cvals=None, map_scale='m', centre_shift=[0, 0], plot_tipper='n',
                      tipper_size_factor=1e5, **kwargs):
@@ -419,44 +409,38 @@ class PlotPTMaps(mtplottools.MTEllipse):
         k = periodIdx
         pt_array = getattr(self, 'pt_' + ptarray + '_arr')
 
-        for i in range(len(pt_array[k])):
-            lon = pt_array[k]['lon'][i]
-            lat = pt_array[k]['lat'][i]
-            if self.normalise_ellipses:
-                phimax = pt_array[k]['phimax'][i] / pt_array[k]['phimax'][i]
-                phimin = pt_array[k]['phimin'][i] / pt_array[k]['phimax'][i]
-            else:
-                phimax = pt_array[k]['phimax'][i] / pt_array[k]['phimax'].max()
-                phimin = pt_array[k]['phimin'][i] / pt_array[k]['phimax'].max()
-            az = pt_array[k]['azimuth'][i]
-            if ptarray == 'resid':
-                phimin = np.abs(phimin)
-            nskew = pt_array[k]['skew'][i]
-
-            # print az
-            if (phimax > 0 and phimin > 0):
-                c = None
-                if (cvals is not None): c = cvals[i]
-                if (c is not None): kwargs['facecolor'] = c
-
-                if m is None:
-                    x = pt_array[k]['east'][i]
-                    y = pt_array[k]['north'][i]
-                    if map_scale == 'km':
-                        x /= 1e3
-                        y /= 1e3
-                else:
-                    x, y = m(lon, lat)
-
-                # matplotlib angles are defined as degrees anticlockwise from positive x direction.
-                # therefore we need to adjust az accordingly
-                e = Ellipse([x, y],
-                            phimax * ellipse_size_factor,
-                            phimin * ellipse_size_factor,
-                            90. - az, **kwargs)
-                ax.add_artist(e)
-            # end if
-        # end for
+        pt_period = pt_array[k]
+        if self.normalise_ellipses:
+            phimax = pt_period['phimax'] / pt_period['phimax']
+            phimin = pt_period['phimin'] / pt_period['phimax']
+        else:
+            phimax = pt_period['phimax'] / pt_period['phimax'].max()
+            phimin = pt_period['phimin'] / pt_period['phimax'].max()
+        az = pt_period['azimuth']
+        if ptarray == 'resid':
+            phimin = np.abs(phimin)
+
+        plot_mask = (phimax > 0) & (phimin > 0)
+        if cvals is not None:
+            kwargs['facecolors'] = np.asarray(cvals)[plot_mask]
+
+        if m is None:
+            x = pt_period['east'][plot_mask]
+            y = pt_period['north'][plot_mask]
+            if map_scale == 'km':
+                x = x / 1e3
+                y = y / 1e3
+        else:
+            x, y = m(pt_period['lon'][plot_mask], pt_period['lat'][plot_mask])
+
+        # matplotlib angles are defined as degrees anticlockwise from positive x direction.
+        # therefore we need to adjust az accordingly
+        ptc.plot_ellipses(ax, x, y,
+                          phimax[plot_mask] * ellipse_size_factor,
+                          phimin[plot_mask] * ellipse_size_factor,
+                          90. - az[plot_mask], **kwargs)
+        kwargs.pop('facecolors', None)
+
         if 'y' in plot_tipper:
             # if neither r or i provided, assume that we want to plot both
             if plot_tipper == 'y':
@@ -470,7 +454,9 @@ class PlotPTMaps(mtplottools.MTEllipse):
         
 
 
-    def plot(self, period = None, periodIdx = 0, save2file=None, **kwargs):
+    @instrumentation.instrument('modem.PlotPTMaps.plot')
+    def plot(self, period = None, periodIdx = 0, save2file=None, show=True,
+             **kwargs):
         """ Plot phase tensor maps for data and or response, each figure is of a
         different period.  If response is input a third column is added which is
         the residual phase tensor showing where the model is not fitting the data
@@ -478,6 +464,8 @@ class PlotPTMaps(mtplottools.MTEllipse):
 
         Args:
             period: the period index to plot, default=0
+            show: if False the figure is not shown, e.g. when it is only
+                rendered to be saved
 
         Returns:
 
@@ -602,107 +590,45 @@ class PlotPTMaps(mtplottools.MTEllipse):
 
             # --> plot data phase tensors
             print(kwargs)
-            for pt in self.pt_data_arr[data_ii]:
-                eheight = pt['phimin'] / \
-                    self.pt_data_arr[data_ii]['phimax'].max() * \
-                    self.ellipse_size
-                ewidth = pt['phimax'] / \
-                    self.pt_data_arr[data_ii]['phimax'].max() * \
-                    self.ellipse_size
-
-                ellipse = Ellipse((pt['east'],
-                                   pt['north']),
-                                  width=ewidth,
-                                  height=eheight,
-                                  angle=90 - pt['azimuth'],
-                                  **kwargs)
-
-                # get ellipse color
-                if self.ellipse_cmap.find('seg') > 0:
-                    ellipse.set_facecolor(mtcl.get_plot_color(pt[self.ellipse_colorby],
-                                                              self.ellipse_colorby,
-                                                              self.ellipse_cmap,
-                                                              ckmin,
-                                                              ckmax,
-                                                              bounds=bounds))
-                else:
-                    ellipse.set_facecolor(mtcl.get_plot_color(pt[self.ellipse_colorby],
-                                                              self.ellipse_colorby,
-                                                              self.ellipse_cmap,
-                                                              ckmin,
-                                                              ckmax))
+            if self.ellipse_cmap.find('seg') > 0:
+                seg_bounds = bounds
+            else:
+                seg_bounds = None
 
-                axd.add_artist(ellipse)
+            pt_data = self.pt_data_arr[data_ii]
+            ewidth, eheight = self._get_ellipse_axes(pt_data)
+            ptc.plot_ellipses(axd, pt_data['east'], pt_data['north'],
+                              ewidth, eheight, 90 - pt_data['azimuth'],
+                              color_values=pt_data[self.ellipse_colorby],
+                              comp=self.ellipse_colorby,
+                              cmap=self.ellipse_cmap, ckmin=ckmin,
+                              ckmax=ckmax, bounds=seg_bounds, **kwargs)
 
             # -----------plot response phase tensors---------------
             if self.resp_fn is not None:
                 rcmin = np.floor(self.pt_resid_arr['geometric_mean'].min())
                 rcmax = np.floor(self.pt_resid_arr['geometric_mean'].max())
-                for mpt, rpt in zip(self.pt_resp_arr[data_ii],
-                                    self.pt_resid_arr[data_ii]):
-                    eheight = mpt['phimin'] / \
-                        self.pt_resp_arr[data_ii]['phimax'].max() * \
-                        self.ellipse_size
-                    ewidth = mpt['phimax'] / \
-                        self.pt_resp_arr[data_ii]['phimax'].max() * \
-                        self.ellipse_size
-
-                    ellipsem = Ellipse((mpt['east'],
-                                        mpt['north']),
-                                       width=ewidth,
-                                       height=eheight,
-                                       angle=90 - mpt['azimuth'],
-                                       **kwargs)
-
-                    # get ellipse color
-                    if self.ellipse_cmap.find('seg') > 0:
-                        ellipsem.set_facecolor(mtcl.get_plot_color(mpt[self.ellipse_colorby],
-                                                                   self.ellipse_colorby,
-                                                                   self.ellipse_cmap,
-                                                                   ckmin,
-                                                                   ckmax,
-                                                                   bounds=bounds))
-                    else:
-                        ellipsem.set_facecolor(mtcl.get_plot_color(mpt[self.ellipse_colorby],
-                                                                   self.ellipse_colorby,
-                                                                   self.ellipse_cmap,
-                                                                   ckmin,
-                                                                   ckmax))
-
-                    axm.add_artist(ellipsem)
-
-                    # -----------plot residual phase tensors---------------
-                    eheight = rpt['phimin'] / \
-                        self.pt_resid_arr[data_ii]['phimax'].max() * \
-                        self.ellipse_size
-                    ewidth = rpt['phimax'] / \
-                        self.pt_resid_arr[data_ii]['phimax'].max() * \
-                        self.ellipse_size
-
-                    ellipser = Ellipse((rpt['east'],
-                                        rpt['north']),
-                                       width=ewidth,
-                                       height=eheight,
-                                       angle=rpt['azimuth'],
-                                       **kwargs)
-
-                    # get ellipse color
-                    rpt_color = np.sqrt(abs(rpt['phimin'] * rpt['phimax']))
-                    if self.ellipse_cmap.find('seg') > 0:
-                        ellipser.set_facecolor(mtcl.get_plot_color(rpt_color,
-                                                                   'geometric_mean',
-                                                                   self.residual_cmap,
-                                                                   ckmin,
-                                                                   ckmax,
-                                                                   bounds=bounds))
-                    else:
-                        ellipser.set_facecolor(mtcl.get_plot_color(rpt_color,
-                                                                   'geometric_mean',
-                                                                   self.residual_cmap,
-                                                                   ckmin,
-                                                                   ckmax))
 
-                    axr.add_artist(ellipser)
+                pt_resp = self.pt_resp_arr[data_ii]
+                ewidth, eheight = self._get_ellipse_axes(pt_resp)
+                ptc.plot_ellipses(axm, pt_resp['east'], pt_resp['north'],
+                                  ewidth, eheight, 90 - pt_resp['azimuth'],
+                                  color_values=pt_resp[self.ellipse_colorby],
+                                  comp=self.ellipse_colorby,
+                                  cmap=self.ellipse_cmap, ckmin=ckmin,
+                                  ckmax=ckmax, bounds=seg_bounds, **kwargs)
+
+                # -----------plot residual phase tensors---------------
+                pt_resid = self.pt_resid_arr[data_ii]
+                ewidth, eheight = self._get_ellipse_axes(pt_resid)
+                rpt_color = np.sqrt(abs(pt_resid['phimin'] *
+                                        pt_resid['phimax']))
+                ptc.plot_ellipses(axr, pt_resid['east'], pt_resid['north'],
+                                  ewidth, eheight, pt_resid['azimuth'],
+                                  color_values=rpt_color,
+                                  comp='geometric_mean',
+                                  cmap=self.residual_cmap, ckmin=ckmin,
+                                  ckmax=ckmax, bounds=seg_bounds, **kwargs)
 
             # --> set axes properties
             # data
@@ -823,7 +749,8 @@ class PlotPTMaps(mtplottools.MTEllipse):
             if save2file is not None:
                 fig.savefig(save2file, dpi=self.fig_dpi, bbox_inches='tight')
 
-            plt.show()
+            if show:
+                plt.show()
             self.fig_list.append(fig)
 
             return fig
@@ -868,12 +795,13 @@ class PlotPTMaps(mtplottools.MTEllipse):
                       'head_width':size_factor*0.07, 
                       'head_length': size_factor*0.1}
         kwargs_tip.update(kwargs)
-        
-        for sidx in range(len(self.data_obj.data_array)):
-            if 'r' in plot_tipper:
-                ax.arrow(x[sidx],y[sidx],size_factor*rx[sidx],size_factor*ry[sidx],color='k',**kwargs_tip)
-            if 'i' in plot_tipper:
-                ax.arrow(x[sidx],y[sidx],size_factor*ix[sidx],size_factor*iy[sidx],color='b',**kwargs_tip)
+
+        if 'r' in plot_tipper:
+            ptc.plot_arrows(ax, x, y, size_factor*rx, size_factor*ry,
+                            color='k', **kwargs_tip)
+        if 'i' in plot_tipper:
+            ptc.plot_arrows(ax, x, y, size_factor*ix, size_factor*iy,
+                            color='b', **kwargs_tip)
 
 
     def _get_pt_data_list(self, attribute, xykeys=['east', 'north']):
@@ -1106,11 +1034,35 @@ class PlotPTMaps(mtplottools.MTEllipse):
 
 
 
+    def save_period_figure(self, period_index, save_path, fig_dpi=None,
+                           file_format='pdf', orientation='landscape'):
+        """
+        plot the phase tensor map of one period of plot_period_list and save
+        it to save_path as PT_DepthSlice_{period}s.file_format
+
+        :return: file name of the saved figure
+        """
+        if fig_dpi is None:
+            fig_dpi = self.fig_dpi
+
+        self.plot(period=period_index, show=False)
+        fig = self.fig_list.pop()
+        save_fn = os.path.join(save_path, 'PT_DepthSlice_{0:.5g}s.{1}'.format(
+            self.plot_period_list[period_index], file_format))
+        fig.savefig(save_fn, dpi=fig_dpi, format=file_format,
+                    orientation=orientation, bbox_inches='tight')
+        plt.close(fig)
+
+        return save_fn
+
     def save_all_figures(self, save_path=None, fig_dpi=None, file_format='pdf',
-                    orientation='landscape', close_fig='y'):
+                    orientation='landscape', close_fig='y', num_workers=None):
         """
         save_figure will save all figures in fig_list to save_fn.
 
+        If no figures have been plotted yet, every period in plot_period_list
+        is plotted and saved on num_workers processes.
+
         Arguments:
         -----------
 
@@ -1141,6 +1093,17 @@ class PlotPTMaps(mtplottools.MTEllipse):
                              * 'y' will close the plot after saving.
                              * 'n' will leave plot open
 
+            **num_workers** : int
+                              number of processes to render the periods
+                              with if fig_list is empty, *default* is the
+                              number of cpus
+
+        Returns:
+        -----------
+            list of FigureTiming(key, fn, seconds) of the saved figures,
+            the key is the index in plot_period_list if the periods were
+            rendered, else the index in fig_list
+
         :Example: ::
 
             >>> # to save plot as jpg
@@ -1161,7 +1124,22 @@ class PlotPTMaps(mtplottools.MTEllipse):
             except:
                 raise IOError('Need to input a correct directory path')
 
-        for fig in self.fig_list:
+        if len(self.fig_list) == 0:
+            if self.data_obj is None:
+                self._read_files()
+            timings = export_figures(self, 'save_period_figure',
+                                     range(len(self.plot_period_list)),
+                                     num_workers=num_workers,
+                                     render_kwargs={'save_path': save_path,
+                                                    'fig_dpi': fig_dpi,
+                                                    'file_format': file_format,
+                                                    'orientation': orientation})
+            self.fig_fn = timings[-1].fn if timings else None
+            return timings
+
+        timings = []
+        for ii, fig in enumerate(self.fig_list):
+            t0 = time.time()
             per = fig.canvas.get_window_title()
             save_fn = os.path.join(save_path, 'PT_DepthSlice_{0}s.{1}'.format(
                 per, file_format))
@@ -1176,4 +1154,7 @@ class PlotPTMaps(mtplottools.MTEllipse):
 
             self.fig_fn = save_fn
             print('Saved figure to: ' + self.fig_fn)
+            timings.append(FigureTiming(ii, save_fn, time.time() - t0))
+
+        return timings
             
\ No newline at end of file
@@ -25,6 +25,7 @@ from shapely.geometry import Point, Polygon
 from matplotlib import colors as colors, pyplot as plt, colorbar as mcb, cm
 from matplotlib.ticker import MultipleLocator, FormatStrFormatter
 
+from mtpy.imaging.figure_export import export_figures
 from mtpy.utils import basemap_tools
 from mtpy.utils.plot_geotiff_imshow import plot_geotiff_on_axes
 from mtpy.utils.mtpylog import MtPyLog
@@ -241,8 +242,8 @@ class PlotRMSMaps(object):
         ii = plot_dict['index'][0]
         jj = plot_dict['index'][1]
 
+        # rms_array is computed once by read_residual_fn
         rms = np.zeros(self.residual.residual_array.shape[0])
-        self.residual.get_rms()
         if plot_dict['label'].startswith('$Z'):
             rms = self.residual.rms_array['rms_z_component_period'][:, self.period_index, ii, jj]
         elif plot_dict['label'].startswith('$T'):
@@ -743,21 +744,40 @@ class PlotRMSMaps(object):
         if fig_close:
             plt.close(self.fig)
 
-    def plot_loop(self, fig_format='png', style='point'):
+        return save_fn
+
+    def save_period_figure(self, period_index, fig_format='png',
+                           style='point'):
+        """
+        plot and save the rms map of one period
+
+        :param period_index: index of the period in residual.period_list
+        :param: style [ 'point' | 'map' ]
+        :return: file name of the saved figure
+        """
+        self.period_index = period_index
+        if style == 'point':
+            self.plot()
+        elif style == 'map':
+            self.plot_map()
+
+        return self.save_figure(fig_format=fig_format)
+
+    def plot_loop(self, fig_format='png', style='point', num_workers=None):
         """
         loop over all periods and save figures accordingly
 
         :param: style [ 'point' | 'map' ]
+        :param num_workers: number of processes rendering the periods in
+                            parallel, None uses all cpus
+        :return: list of FigureTiming(period index, file name, seconds)
         """
 
-        for f_index in range(self.residual.period_list.size):
-            self.period_index = f_index
-            if style == 'point':
-                self.plot()
-                self.save_figure(fig_format=fig_format)
-            elif style == 'map':
-                self.plot_map()
-                self.save_figure(fig_format=fig_format)
+        return export_figures(self, 'save_period_figure',
+                              range(self.residual.period_list.size),
+                              num_workers=num_workers,
+                              render_kwargs={'fig_format': fig_format,
+                                             'style': style})
 
 
 # ==================================================================================
@@ -14,6 +14,7 @@ import os.path as op
 import numpy as np
 from numpy.lib import recfunctions
 
+from mtpy.utils import instrumentation
 from .data import Data
 
 __all__ = ['Residual']
@@ -226,6 +227,7 @@ class Residual(object):
 
 
 
+    @instrumentation.instrument('modem.Residual.get_rms')
     def get_rms(self, residual_fn=None):
         
         if residual_fn is None:
@@ -46,6 +46,7 @@ import scipy.interpolate as spi
 import mtpy.core.mt as mt
 import mtpy.modeling.winglink as MTwl
 import mtpy.analysis.geometry as MTgy
+from mtpy.imaging.figure_export import export_figures
 from mtpy.imaging.mtplottools import plot_errorbar
 import mtpy.utils.calculator as mtcc
 import mtpy.utils.mesh_tools as mtmesh
@@ -3426,6 +3427,10 @@ class PlotResponse():
 
         self.wl_fn = kwargs.pop('wl_fn', None)
 
+        self._data_obj = None
+        self._resp_obj_list = []
+        self._wl_output = None
+
         self.color_mode = kwargs.pop('color_mode', 'color')
 
         self.ms = kwargs.pop('ms', 1.5)
@@ -3517,29 +3522,73 @@ class PlotResponse():
         if self.plot_yn == 'y':
             self.plot()
 
-    def plot(self):
+    def _read_files(self):
+        """
+        read the data, response and winglink files once, they are shared
+        by the plots of all stations
+        """
+        if self._data_obj is not None:
+            return
+
+        self._data_obj = Data()
+        self._data_obj.read_data_file(self.data_fn)
+
+        # create station list
+        self.station_list = [rp['station'] for rp in self._data_obj.data]
+
+        self._resp_obj_list = []
+        if self.resp_fn is not None:
+            for rfn in self.resp_fn:
+                resp_obj = Response()
+                resp_obj.read_response_file(rfn)
+                self._resp_obj_list.append(resp_obj)
+
+        # read in winglink data file
+        if self.wl_fn != None:
+            self._wl_output = MTwl.readOutputFile(self.wl_fn)
+
+    def get_plot_station_indices(self):
+        """
+        indices into station_list of the stations selected by plot_type
+        """
+        self._read_files()
+        if self.plot_type == '1':
+            return list(range(len(self.station_list)))
+
+        if type(self.plot_type) is not list:
+            self.plot_type = [self.plot_type]
+
+        pstation_list = []
+        for ii, station in enumerate(self.station_list):
+            for pstation in self.plot_type:
+                if station.find(pstation) >= 0:
+                    pstation_list.append(ii)
+
+        return pstation_list
+
+    def plot(self, station_indices=None):
         """
         plot the data and model response, if given, in individual plots.
+
+        :param station_indices: indices into station_list of the stations to
+                                plot, default are the stations selected by
+                                plot_type
          
         """
 
-        data_obj = Data()
-        data_obj.read_data_file(self.data_fn)
+        self._read_files()
+        data_obj = self._data_obj
 
         rp_list = data_obj.data
         nr = len(rp_list)
 
-        # create station list
-        self.station_list = [rp['station'] for rp in rp_list]
-
         # boolean for adding winglink output to the plots 0 for no, 1 for yes
         addwl = 0
         # read in winglink data file
         if self.wl_fn != None:
             addwl = 1
             self.subplot_hspace + .1
-            wld, wlrp_list, wlplist, wlslist, wltlist = MTwl.readOutputFile(
-                self.wl_fn)
+            wld, wlrp_list, wlplist, wlslist, wltlist = self._wl_output
             sdict = dict([(ostation, wlistation) for wlistation in wlslist
                           for ostation in self.station_list
                           if wlistation.find(ostation) >= 0])
@@ -3548,18 +3597,10 @@ class PlotResponse():
         period = data_obj.period
 
         # ---------------plot each respones in a different figure---------------
-        if self.plot_type == '1':
-            pstation_list = list(range(len(self.station_list)))
-
+        if station_indices is None:
+            pstation_list = self.get_plot_station_indices()
         else:
-            if type(self.plot_type) is not list:
-                self.plot_type = [self.plot_type]
-
-            pstation_list = []
-            for ii, station in enumerate(self.station_list):
-                for pstation in self.plot_type:
-                    if station.find(pstation) >= 0:
-                        pstation_list.append(ii)
+            pstation_list = list(station_indices)
 
         # set the grid of subplots
         if self.plot_tipper == 'y':
@@ -3810,10 +3851,7 @@ class PlotResponse():
             # ------------------- plot model response --------------------------
             if self.resp_fn is not None:
                 num_resp = len(self.resp_fn)
-                for rr, rfn in enumerate(self.resp_fn):
-                    resp_obj = Response()
-                    resp_obj.read_response_file(rfn)
-
+                for rr, resp_obj in enumerate(self._resp_obj_list):
                     rp = resp_obj.resp
                     # create colors for different responses
                     if self.color_mode == 'color':
@@ -4243,10 +4281,37 @@ class PlotResponse():
         plt.close('all')
         self.plot()
 
+    def save_station_figure(self, station_index, save_path, fig_fmt='pdf',
+                            fig_dpi=None):
+        """
+        plot the response of one station and save it to
+        save_path/station_resp.fig_fmt
+
+        :param station_index: index of the station in station_list
+        :return: file name of the saved figure
+        """
+        if fig_dpi is None:
+            fig_dpi = self.fig_dpi
+
+        self.fig_list = []
+        self.plot(station_indices=[station_index])
+        fdict = self.fig_list.pop()
+        svfn = os.path.join(save_path,
+                            '{0}_resp.{1}'.format(fdict['station'], fig_fmt))
+        fdict['fig'].savefig(svfn, dpi=fig_dpi)
+        plt.close(fdict['fig'])
+
+        return svfn
+
     def save_figures(self, save_path, fig_fmt='pdf', fig_dpi=None,
-                     close_fig='y'):
+                     close_fig='y', num_workers=None):
         """
         save all the figure that are in self.fig_list
+
+        If no figures have been plotted yet, the stations selected by
+        plot_type are plotted and saved on num_workers processes, the
+        default is the number of cpus.  Returns a list of
+        FigureTiming(station index, file name, seconds) in that case.
         
         :Example: ::
             
@@ -4260,6 +4325,14 @@ class PlotResponse():
         if not os.path.exists(save_path):
             os.mkdir(save_path)
 
+        if len(self.fig_list) == 0:
+            return export_figures(self, 'save_station_figure',
+                                  self.get_plot_station_indices(),
+                                  num_workers=num_workers,
+                                  render_kwargs={'save_path': save_path,
+                                                 'fig_fmt': fig_fmt,
+                                                 'fig_dpi': fig_dpi})
+
         for fdict in self.fig_list:
             svfn = '{0}_resp.{1}'.format(fdict['station'], fig_fmt)
             fdict['fig'].savefig(os.path.join(save_path, svfn),
@@ -72,7 +72,6 @@ import numpy as np
 
 import matplotlib.pyplot as plt
 from matplotlib.ticker import MultipleLocator
-from matplotlib.patches import Ellipse
 from matplotlib.colors import Normalize
 import matplotlib.colorbar as mcb
 import matplotlib.gridspec as gridspec
@@ -86,6 +85,7 @@ import mtpy.modeling.winglink as wl
 import mtpy.utils.exceptions as mtex
 import mtpy.analysis.pt as mtpt
 import mtpy.imaging.mtcolors as mtcl
+import mtpy.imaging.pt_collections as ptc
 
 try:
     from evtk.hl import gridToVTK, pointsToVTK
@@ -4910,90 +4910,43 @@ class PlotPTMaps(mtplottools.MTEllipse):
 
 
             #--> plot phase tensor ellipses for each stations
-            for jj in range(n_stations):
-                #-----------plot data phase tensors---------------
-                eheight = pt.phimin[0][jj]/pt.phimax[0].max()*self.ellipse_size
-                ewidth = pt.phimax[0][jj]/pt.phimax[0].max()*self.ellipse_size
-
-                ellipse = Ellipse((self.station_east[jj],
-                                   self.station_north[jj]),
-                                   width=ewidth,
-                                   height=eheight,
-                                   angle=90-pt.azimuth[0][jj])
-
-                #get ellipse color
-                if self.ellipse_cmap.find('seg')>0:
-                    ellipse.set_facecolor(mtcl.get_plot_color(colorarray[jj],
-                                                         self.ellipse_colorby,
-                                                         self.ellipse_cmap,
-                                                         ckmin,
-                                                         ckmax,
-                                                         bounds=bounds))
-                else:
-                    ellipse.set_facecolor(mtcl.get_plot_color(colorarray[jj],
-                                                         self.ellipse_colorby,
-                                                         self.ellipse_cmap,
-                                                         ckmin,
-                                                         ckmax))
-
-                axd.add_artist(ellipse)
-                if self.resp is not None:
-                    #-----------plot response phase tensors---------------
-                    eheight = mpt.phimin[0][jj]/mpt.phimax[0].max()*\
-                              self.ellipse_size
-                    ewidth = mpt.phimax[0][jj]/mpt.phimax[0].max()*\
-                              self.ellipse_size
-
-                    ellipsem = Ellipse((self.station_east[jj],
-                                       self.station_north[jj]),
-                                       width=ewidth,
-                                       height=eheight,
-                                       angle=90-mpt.azimuth[0][jj])
-
-                    #get ellipse color
-                    if self.ellipse_cmap.find('seg')>0:
-                        ellipsem.set_facecolor(mtcl.get_plot_color(mcarray[jj],
-                                                         self.ellipse_colorby,
-                                                         self.ellipse_cmap,
-                                                         ckmin,
-                                                         ckmax,
-                                                         bounds=bounds))
-                    else:
-                        ellipsem.set_facecolor(mtcl.get_plot_color(mcarray[jj],
-                                                         self.ellipse_colorby,
-                                                         self.ellipse_cmap,
-                                                         ckmin,
-                                                         ckmax))
-
-                    axm.add_artist(ellipsem)
-                    #-----------plot residual phase tensors---------------
-                    eheight = rpt.phimin[0][jj]/rpt.phimax[0].max()*\
-                                self.ellipse_size
-                    ewidth = rpt.phimax[0][jj]/rpt.phimax[0].max()*\
-                                self.ellipse_size
-
-                    ellipser = Ellipse((self.station_east[jj],
-                                       self.station_north[jj]),
-                                       width=ewidth,
-                                       height=eheight,
-                                       angle=rpt.azimuth[0][jj])
-
-                    #get ellipse color
-                    if self.ellipse_cmap.find('seg')>0:
-                        ellipser.set_facecolor(mtcl.get_plot_color(rcarray[jj],
-                                                     self.ellipse_colorby,
-                                                     self.residual_cmap,
-                                                     rcmin,
-                                                     rcmax,
-                                                     bounds=bounds))
-                    else:
-                        ellipser.set_facecolor(mtcl.get_plot_color(rcarray[jj],
-                                                     self.ellipse_colorby,
-                                                     self.residual_cmap,
-                                                     rcmin,
-                                                     rcmax))
-
-                    axr.add_artist(ellipser)
+            if self.ellipse_cmap.find('seg')>0:
+                seg_bounds = bounds
+            else:
+                seg_bounds = None
+
+            #-----------plot data phase tensors---------------
+            escale = self.ellipse_size/pt.phimax[0].max()
+            ewidth = pt.phimax[0]*escale
+            eheight = pt.phimin[0]*escale
+            ptc.plot_ellipses(axd, self.station_east, self.station_north,
+                              ewidth, eheight, 90-pt.azimuth[0],
+                              color_values=colorarray,
+                              comp=self.ellipse_colorby,
+                              cmap=self.ellipse_cmap, ckmin=ckmin,
+                              ckmax=ckmax, bounds=seg_bounds)
+            if self.resp is not None:
+                #-----------plot response phase tensors---------------
+                escale = self.ellipse_size/mpt.phimax[0].max()
+                ewidth = mpt.phimax[0]*escale
+                eheight = mpt.phimin[0]*escale
+                ptc.plot_ellipses(axm, self.station_east, self.station_north,
+                                  ewidth, eheight, 90-mpt.azimuth[0],
+                                  color_values=mcarray,
+                                  comp=self.ellipse_colorby,
+                                  cmap=self.ellipse_cmap, ckmin=ckmin,
+                                  ckmax=ckmax, bounds=seg_bounds)
+
+                #-----------plot residual phase tensors---------------
+                escale = self.ellipse_size/rpt.phimax[0].max()
+                ewidth = rpt.phimax[0]*escale
+                eheight = rpt.phimin[0]*escale
+                ptc.plot_ellipses(axr, self.station_east, self.station_north,
+                                  ewidth, eheight, rpt.azimuth[0],
+                                  color_values=rcarray,
+                                  comp=self.ellipse_colorby,
+                                  cmap=self.residual_cmap, ckmin=rcmin,
+                                  ckmax=rcmax, bounds=seg_bounds)
 
             #--> set axes properties
             # data
@@ -0,0 +1,560 @@
+#!/usr/bin/env python
+
+"""
+mtpy/processing/instrument.py
+
+Functions for the removal of instrument response from time series data and
+the anti-aliased decimation of time series, for single arrays and for
+directory trees of MTpy time series (ts) files.
+
+@UofA, 2013 (LK)
+
+"""
+
+#=================================================================
+import math
+import os
+import os.path as op
+
+import numpy as np
+import scipy.signal as signal
+
+import mtpy.utils.exceptions as MTex
+import mtpy.utils.filehandling as MTfh
+from mtpy.utils import parallel
+
+#=================================================================
+
+
+def interpolate_response(freqs, responsedata, instr_type=None):
+    """
+    Interpolate an instrument response onto an array of frequencies.
+
+    :param freqs: frequencies in Hz, negative frequencies take the response
+                  of their absolute value
+    :param responsedata: array (N, 3) of frequency, real and imaginary part,
+                         sorted by frequency
+    :param instr_type: None for linear interpolation of real and imaginary
+                       parts, 'lemi' for the characteristics of LEMI coils:
+                       below 0.4 Hz linear in LogLog scale of real and
+                       imaginary parts, up to 1000 Hz linear in LogLin scale
+                       of absolute value and phase, above linear in LogLin
+                       scale of real and imaginary parts
+    :returns: complex response, 0 outside the frequency range of the
+              response data
+    """
+    freqs = np.abs(np.asarray(freqs, dtype=float))
+    instr_freqs = responsedata[:, 0]
+    instr_spectrum = responsedata[:, 1] + 1j * responsedata[:, 2]
+
+    response = np.zeros(freqs.shape, dtype=complex)
+    inside = (freqs >= instr_freqs[0]) & (freqs <= instr_freqs[-1])
+    freq = freqs[inside]
+
+    if instr_type is None:
+        response[inside] = np.interp(freq, instr_freqs, instr_spectrum.real) + \
+            1j * np.interp(freq, instr_freqs, instr_spectrum.imag)
+
+    elif instr_type.lower() == 'lemi':
+        logfreq = np.log(freq)
+        loginstrfreqs = np.log(instr_freqs)
+        values = np.zeros(freq.shape, dtype=complex)
+
+        low = freq <= 0.4
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values[low] = np.exp(np.interp(logfreq[low], loginstrfreqs,
+                                           np.log(instr_spectrum.real))) + \
+                1j * np.exp(np.interp(logfreq[low], loginstrfreqs,
+                                      np.log(instr_spectrum.imag)))
+
+        nominal = (freq > 0.4) & (freq <= 1000)
+        values[nominal] = np.interp(logfreq[nominal], loginstrfreqs,
+                                    np.abs(instr_spectrum)) * \
+            np.exp(1j * np.interp(logfreq[nominal], loginstrfreqs,
+                                  np.angle(instr_spectrum)))
+
+        high = freq > 1000
+        values[high] = np.interp(logfreq[high], loginstrfreqs,
+                                 instr_spectrum.real) + \
+            1j * np.interp(logfreq[high], loginstrfreqs, instr_spectrum.imag)
+
+        response[inside] = values
+
+    else:
+        raise MTex.MTpyError_inputarguments('Instrument type {0} not '
+                                            'implemented yet'.format(instr_type))
+
+    return response
+
+
+class InstrumentResponse(object):
+    """
+    Instrument response of a channel, read once and interpolated once per
+    frequency grid.
+
+    The response interpolated onto the frequencies of an FFT is cached by
+    FFT length and sampling rate, so all blocks of a time series and all
+    files with the same sampling share it.
+
+    :param responsedata: array (N, 3) of frequency, real and imaginary part
+                         or the name of a file with these 3 columns
+    :param instr_type: see 'interpolate_response'
+    """
+
+    def __init__(self, responsedata, instr_type=None):
+        if isinstance(responsedata, str):
+            try:
+                responsedata = np.loadtxt(responsedata)
+            except (IOError, ValueError):
+                raise MTex.MTpyError_inputarguments('Response file ({0}) '
+                    'cannot be read'.format(responsedata))
+
+        responsedata = np.array(responsedata, dtype=float)
+        if responsedata.ndim != 2 or responsedata.shape[1] != 3:
+            raise MTex.MTpyError_inputarguments('Response data in wrong '
+                'format - must be 3 columns: freq,real,imag')
+
+        self.responsedata = responsedata[np.argsort(responsedata[:, 0])]
+        self.instr_type = instr_type
+        self._response_cache = {}
+
+    @property
+    def freq_min(self):
+        return self.responsedata[0, 0]
+
+    @property
+    def freq_max(self):
+        return self.responsedata[-1, 0]
+
+    def get_block_length(self, samplingrate):
+        """
+        Default block length, a power of 2 holding 4 periods of the lowest
+        frequency of the response.
+        """
+        return int(2 ** np.ceil(np.log2(max(2., 4. * samplingrate /
+                                            self.freq_min))))
+
+    def get_response(self, nfft, samplingrate):
+        """
+        Response at the frequencies of an FFT of length nfft (np.fft.rfft).
+        """
+        key = (int(nfft), float(samplingrate))
+        if key not in self._response_cache:
+            self._response_cache[key] = interpolate_response(
+                np.fft.rfftfreq(int(nfft), 1. / samplingrate),
+                self.responsedata, self.instr_type)
+        return self._response_cache[key]
+
+    def correct(self, data, samplingrate, block_length=None, offset=None):
+        """
+        Correct a time series for the instrument response.
+
+        The series is cut into blocks of 'block_length' samples overlapping
+        by half, each tapered by a Hann window (the windows add up to 1),
+        zero padded to twice its length, divided by the response in the
+        frequency domain and added back at its place.  The spectrum is set
+        to zero outside the frequency range of the response.  Blocks start
+        half a block before the first sample, so series cut from a longer
+        one at multiples of half a block give the same result there.
+
+        :param data: time series
+        :param samplingrate: sampling rate in Hz
+        :param block_length: even number of samples per block, *default*
+                             see 'get_block_length'
+        :param offset: value removed before and re-attached after the
+                       correction, *default* is the mean of data
+        :returns: corrected time series
+        """
+        data = np.asarray(data, dtype=float)
+        n_samples = len(data)
+        if n_samples < 1:
+            raise MTex.MTpyError_ts_data(
+                'Error - Length of TS to correct is zero!')
+
+        if block_length is None:
+            block_length = self.get_block_length(samplingrate)
+        block_length = int(block_length) + int(block_length) % 2
+        hop = block_length // 2
+        nfft = 2 * block_length
+        if offset is None:
+            offset = np.mean(data)
+
+        window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(block_length) /
+                                    block_length)
+        response = self.get_response(nfft, samplingrate)
+        inverse = np.zeros(response.shape, dtype=complex)
+        inverse[response != 0] = 1. / response[response != 0]
+
+        # block k covers padded[k*hop:k*hop+block_length], its result is
+        # centred in the FFT buffer and lands on output[k*hop:k*hop+nfft]
+        n_blocks = -(-n_samples // hop) + 1
+        padded = np.zeros((n_blocks + 1) * hop)
+        padded[hop:hop + n_samples] = data - offset
+        output = np.zeros((n_blocks + 3) * hop)
+
+        group = max(1, 2 ** 22 // nfft)
+        for first in range(0, n_blocks, group):
+            last = min(first + group, n_blocks)
+            blocks = np.lib.stride_tricks.as_strided(
+                padded[first * hop:],
+                shape=(last - first, block_length),
+                strides=(hop * padded.strides[0], padded.strides[0]))
+            buffer = np.zeros((last - first, nfft))
+            buffer[:, hop:hop + block_length] = blocks * window
+            corrected = np.fft.irfft(np.fft.rfft(buffer, axis=1) * inverse,
+                                     n=nfft, axis=1)
+            # nfft is 4 hops, each hop of a block goes to a distinct place
+            output_hops = output.reshape(-1, hop)
+            for jj in range(4):
+                output_hops[first + jj:last + jj] += \
+                    corrected[:, jj * hop:(jj + 1) * hop]
+
+        return output[2 * hop:2 * hop + n_samples] + offset
+
+
+def correct_for_instrument_response(data, samplingrate, responsedata,
+                                    instr_type=None):
+    """
+    Correct input time series for instrument response.
+    Instr.Resp. is given as 3 column array: frequency, real part, imaginary part.
+
+    See 'InstrumentResponse.correct', use an InstrumentResponse object to
+    correct more than one time series with the same response.
+    """
+    return InstrumentResponse(responsedata, instr_type).correct(data,
+                                                                samplingrate)
+
+
+def get_decimation_stages(decimation_factor):
+    """
+    Split a decimation factor into stages of at most 10 (where possible),
+    largest first.
+    """
+    decimation_factor = int(decimation_factor)
+    if decimation_factor < 1:
+        raise MTex.MTpyError_inputarguments('Decimation factor must be an '
+                                            'integer >= 1')
+
+    primes = []
+    remainder = decimation_factor
+    prime = 2
+    while prime * prime <= remainder:
+        while remainder % prime == 0:
+            primes.append(prime)
+            remainder //= prime
+        prime += 1
+    if remainder > 1:
+        primes.append(remainder)
+
+    stages = []
+    for prime in sorted(primes, reverse=True):
+        for ii, stage in enumerate(stages):
+            if stage * prime <= 10:
+                stages[ii] *= prime
+                break
+        else:
+            stages.append(prime)
+
+    return sorted(stages, reverse=True)
+
+
+def get_decimation_margin(decimation_factor):
+    """
+    Number of input samples at each end of a series that 'decimate' does not
+    compute as for a longer series.
+    """
+    margin = 0
+    step = 1
+    for stage in get_decimation_stages(decimation_factor):
+        # half the length of the FIR filter of scipy.signal.decimate
+        margin += 10 * stage * step
+        step *= stage
+    return margin
+
+
+def decimate(data, decimation_factor):
+    """
+    Decimate a time series by an integer factor with an anti-alias filter.
+
+    Each stage of 'get_decimation_stages' applies the zero phase FIR low pass
+    filter of scipy.signal.decimate before keeping every stage-th sample, so
+    the first sample is kept and no phase shift is introduced.
+
+    :returns: samples 0, decimation_factor, 2*decimation_factor, ... filtered
+    """
+    data = np.asarray(data, dtype=float)
+    for stage in get_decimation_stages(decimation_factor):
+        if stage > 1:
+            data = signal.decimate(data, stage, ftype='fir', zero_phase=True)
+    return data
+
+
+def read_ts_data(tsfile):
+    """
+    Read the single column data of an MTpy ts file in one pass, lines
+    beginning with # are ignored.
+    """
+    with open(tsfile, 'rb') as F:
+        content = F.read()
+    if b'#' in content:
+        content = b'\n'.join([line for line in content.splitlines()
+                              if not line.lstrip().startswith(b'#')])
+    return np.array(content.split(), dtype=float)
+
+
+def write_ts_data(tsfile, header, data, fmt='%.10g'):
+    """
+    Write an MTpy ts file from a header dictionary and data.
+    """
+    with open(tsfile, 'w') as F:
+        F.write(MTfh.get_ts_header_string(header))
+        F.write('\n'.join(map(fmt.__mod__, data.tolist())))
+        F.write('\n')
+
+
+def get_ts_runs(lo_files):
+    """
+    Group MTpy ts files into continuous runs.
+
+    Files of the same station, channel and sampling rate are sorted by
+    starting time, a file starting within half a sample of the end of the
+    one before continues its run.  Gaps and overlaps start a new run.
+
+    :returns: list of runs, each a list of (file, header, offset) with the
+              offset of the first sample of the file in the run
+    """
+    channels = {}
+    for fn in lo_files:
+        try:
+            header = MTfh.read_ts_header(fn)
+            samplingrate = float(header['samplingrate'])
+            t_min = float(header['t_min'])
+            nsamples = int(float(header['nsamples']))
+        except (MTex.MTpyError_ts_data, MTex.MTpyError_inputarguments,
+                KeyError, ValueError):
+            print('\tWARNING - not a valid MTpy TS data file: {0} '.format(fn))
+            continue
+        key = (header.get('station'), header.get('channel'), samplingrate)
+        channels.setdefault(key, []).append((t_min, nsamples, fn, header))
+
+    lo_runs = []
+    for key in sorted(channels, key=str):
+        samplingrate = key[2]
+        run = None
+        run_start = run_end = None
+        for t_min, nsamples, fn, header in sorted(channels[key],
+                                                  key=lambda i: i[0]):
+            if run is not None:
+                offset = (t_min - run_start) * samplingrate
+                if abs(offset - run_end) < 0.5:
+                    run.append((fn, header, run_end))
+                    run_end += nsamples
+                    continue
+            run = [(fn, header, 0)]
+            run_start = t_min
+            run_end = nsamples
+            lo_runs.append(run)
+
+    return lo_runs
+
+
+def _init_batch_processing(lo_runs, responsedata, instr_type, process_kwargs):
+    state = parallel.worker_state(__name__)
+    state['lo_runs'] = lo_runs
+    state['response'] = None
+    if responsedata is not None:
+        state['response'] = InstrumentResponse(responsedata, instr_type)
+    state['process_kwargs'] = process_kwargs
+    state['data_cache'] = {}
+    state['run_offsets'] = {}
+
+
+def _read_cached(fn):
+    """
+    read_ts_data keeping the last files, neighbouring files of a run are
+    read for the margins of each other
+    """
+    cache = parallel.worker_state(__name__)['data_cache']
+    if fn not in cache:
+        if len(cache) >= 4:
+            cache.pop(next(iter(cache)))
+        cache[fn] = read_ts_data(fn)
+    return cache[fn]
+
+
+def _process_batch_file(run_index, file_index):
+    """
+    Correct and decimate one file of a run with margins from its neighbours,
+    on a block and decimation grid counted from the start of the run.
+    """
+    state = parallel.worker_state(__name__)
+    run = state['lo_runs'][run_index]
+    response = state['response']
+    kwargs = state['process_kwargs']
+    channels = kwargs['channels']
+    decimation_factor = kwargs['decimation_factor']
+
+    fn, header, offset = run[file_index]
+    header = dict(header)
+    samplingrate = float(header['samplingrate'])
+    nsamples = int(float(header['nsamples']))
+    run_length = run[-1][2] + int(float(run[-1][1]['nsamples']))
+
+    correct = response is not None and (
+        channels is None or str(header.get('channel')).upper() in channels)
+
+    align = decimation_factor
+    margin = get_decimation_margin(decimation_factor)
+    if correct:
+        block_length = kwargs['block_length']
+        if block_length is None:
+            block_length = response.get_block_length(samplingrate)
+        block_length = int(block_length) + int(block_length) % 2
+        hop = block_length // 2
+        align = align * hop // math.gcd(align, hop)
+        margin += 4 * hop
+
+    # the part of the run with the file and its margins, starting on the grid
+    start = max(0, (offset - margin) // align * align)
+    end = min(run_length, offset + nsamples + margin)
+    lo_data = []
+    for run_fn, run_header, run_offset in run:
+        run_nsamples = int(float(run_header['nsamples']))
+        if run_offset < end and run_offset + run_nsamples > start:
+            data = _read_cached(run_fn)
+            if len(data) != run_nsamples:
+                raise MTex.MTpyError_ts_data('Wrong number of samples in '
+                                             'data: {0}'.format(run_fn))
+            lo_data.append(data[max(0, start - run_offset):
+                                end - run_offset])
+    data = np.concatenate(lo_data)
+
+    if correct:
+        # one offset for the whole run, the mean of its first file
+        if run_index not in state['run_offsets']:
+            state['run_offsets'][run_index] = np.mean(
+                _read_cached(run[0][0]))
+        data = response.correct(data, samplingrate, block_length,
+                                offset=state['run_offsets'][run_index])
+        unit = str(header.get('unit', ''))
+        if unit[-6:].lower() != '(true)':
+            header['unit'] = unit + '(true)'
+
+    first = -(-offset // decimation_factor) * decimation_factor
+    if decimation_factor > 1:
+        data = decimate(data, decimation_factor)
+        header['samplingrate'] = samplingrate / decimation_factor
+        if header['samplingrate'] % 1 == 0:
+            header['samplingrate'] = int(header['samplingrate'])
+    data = data[(first - start) // decimation_factor:
+                -(-(offset + nsamples - start) // decimation_factor)]
+
+    header['t_min'] = float(header['t_min']) + (first - offset) / samplingrate
+    if header['t_min'] % 1 == 0:
+        header['t_min'] = int(header['t_min'])
+    header['nsamples'] = len(data)
+
+    outfile = op.join(kwargs['outputdir'],
+                      op.relpath(fn, kwargs['inputdir']))
+    outfile = ''.join([op.splitext(outfile)[0] + kwargs['suffix'],
+                       op.splitext(outfile)[1]])
+    if not op.isdir(op.dirname(outfile)):
+        try:
+            os.makedirs(op.dirname(outfile))
+        except OSError:
+            # made by another worker
+            pass
+    write_ts_data(outfile, header, data)
+    print('\t wrote file %s' % (outfile))
+
+    return outfile
+
+
+def process_ts_files(inputdir, outputdir, responsedata=None,
+                     decimation_factor=1, channels=None, instr_type=None,
+                     block_length=None, recursive=True, suffix='',
+                     num_workers=None):
+    """
+    Remove the instrument response from and decimate the MTpy ts files of a
+    directory tree.
+
+    Files are grouped into continuous runs (see 'get_ts_runs').  Each file is
+    processed with enough samples of the neighbouring files of its run that
+    the result equals processing the whole run at once, without holding the
+    run in memory.  The response is read once per process and interpolated
+    once per frequency grid.  Files are processed on a pool of processes.
+
+    The output files keep the relative path and file name of the input file
+    (plus 'suffix'), the header is updated for unit, sampling rate, starting
+    time and number of samples.
+
+    :param inputdir: directory with MTpy ts files
+    :param outputdir: output directory
+    :param responsedata: instrument response, array (N, 3) of frequency,
+                         real and imaginary part or file name, None for
+                         decimation only
+    :param decimation_factor: integer decimation factor, 1 for response
+                              removal only
+    :param channels: channels corrected for the response, *default* is all,
+                     the other channels are only decimated (or not written
+                     without decimation)
+    :param instr_type: response interpolation, see 'interpolate_response'
+    :param block_length: samples per block of the response removal, see
+                         'InstrumentResponse.correct'
+    :param recursive: include subdirectories
+    :param suffix: appended to the output file names
+    :param num_workers: number of processes, *default* is the number of
+                        cpus.  With 1 the files are processed in this process.
+    :returns: list of the written files
+    """
+    inputdir = op.abspath(inputdir)
+    outputdir = op.abspath(outputdir)
+    if inputdir == outputdir:
+        raise MTex.MTpyError_inputarguments('Output directory cannot be the '
+                                            'same as the input file location')
+    decimation_factor = int(decimation_factor)
+    if decimation_factor < 1:
+        raise MTex.MTpyError_inputarguments('Decimation factor must be an '
+                                            'integer >= 1')
+    if channels is not None:
+        channels = [i.upper() for i in channels]
+    if responsedata is not None:
+        responsedata = InstrumentResponse(responsedata,
+                                          instr_type).responsedata
+
+    lo_files = []
+    for dirpath, dirnames, filenames in os.walk(inputdir):
+        # never read back what is written
+        dirnames[:] = sorted([i for i in dirnames
+                              if op.join(dirpath, i) != outputdir])
+        lo_files.extend([op.join(dirpath, i) for i in sorted(filenames)])
+        if not recursive:
+            break
+
+    lo_runs = get_ts_runs(lo_files)
+    if len(lo_runs) == 0:
+        raise MTex.MTpyError_inputarguments('No MTpy TS data files in '
+                                            'directory {0}'.format(inputdir))
+
+    process_kwargs = {'inputdir': inputdir,
+                      'outputdir': outputdir,
+                      'decimation_factor': decimation_factor,
+                      'channels': channels,
+                      'block_length': block_length,
+                      'suffix': suffix}
+    # files that are neither corrected nor decimated are left out
+    tasks = [(run_index, file_index)
+             for run_index, run in enumerate(lo_runs)
+             for file_index, (fn, header, offset) in enumerate(run)
+             if decimation_factor > 1 or (responsedata is not None and (
+                 channels is None or
+                 str(header.get('channel')).upper() in channels))]
+    # neighbouring files go to the same worker, which has them cached
+    lo_written = parallel.map_tasks(_process_batch_file, tasks,
+                                    num_workers=num_workers,
+                                    initializer=_init_batch_processing,
+                                    initargs=(lo_runs, responsedata,
+                                              instr_type, process_kwargs),
+                                    state=__name__, chunksize=None)
+
+    return lo_written
@@ -14,6 +14,8 @@ JP, 2013
 
 import numpy as np
 import scipy.signal as sps
+from numpy.lib.stride_tricks import as_strided
+from scipy import ndimage
 
 
 # =================================================================
@@ -306,7 +308,332 @@ def wvd_analytic_signal(fx):
     return fxa
 
 
-def stft(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10):
+def _get_analytic_signals(fx):
+    """
+    analytic signals fa, fb of the auto spectra of fx or the cross spectra of
+    fx = [fx1, fx2] and the length of the time series
+    """
+    # check to see if computing auto or cross-spectra
+    if isinstance(fx, list):
+        fx = np.array(fx)
+    try:
+        fn, fm = fx.shape
+        if fm > fn:
+            fm, fn = fx.shape
+    except ValueError:
+        fn = len(fx)
+        fm = 1
+
+    if fm > 1:
+        print('computing cross spectra')
+        # compute the analytic signal of function f and dctrend
+        fa = wvd_analytic_signal(fx[0])[0:fn]
+        fb = wvd_analytic_signal(fx[1])[0:fn]
+    else:
+        # compute the analytic signal of function f and dctrend
+        fa = sps.hilbert(dctrend(fx))
+        fb = fa
+
+    return fa, fb, fn
+
+
+def get_windows(fx, nh, tstep):
+    """
+    get the short time windows of fx as a strided view, nothing is copied
+
+    Arguments:
+    ----------
+        **fx** : np.ndarray(..., n)
+                 time series, one or more channels along the first axes
+
+        **nh** : int
+                 window length
+
+        **tstep** : int
+                    number of samples between windows
+
+    Returns:
+    --------
+        **windows** : np.ndarray(..., (n - nh) / tstep + 1, nh)
+                      read only view of the windows, window ii starts at
+                      sample ii * tstep
+    """
+    fx = np.asarray(fx)
+    n_windows = max((fx.shape[-1] - nh) // tstep + 1, 0)
+    return as_strided(fx, shape=fx.shape[:-1] + (n_windows, nh),
+                      strides=fx.strides[:-1] + (fx.strides[-1] * tstep,
+                                                 fx.strides[-1]),
+                      writeable=False)
+
+
+def get_lag_products(fa, fb, tlst, tau_max):
+    """
+    get the instantaneous correlation conj(fa[t - tau]) * fb[t + tau] of a
+    block of time instances for all time lags at once with index arithmetic
+
+    Arguments:
+    ----------
+        **fa**, **fb** : np.ndarray(n)
+                         analytic signals, fb = fa for the auto correlation
+
+        **tlst** : np.ndarray(nt)
+                   time instances
+
+        **tau_max** : int
+                      largest time lag
+
+    Returns:
+    --------
+        **Rnn** : np.ndarray(nt, 2 * tau_max + 1)
+                  correlation of lag tau in column tau + tau_max, lags that
+                  reach past either end of the time series are zero
+
+        **tau_min** : np.ndarray(nt)
+                      largest lag of each time instance,
+                      min(t, tau_max, n - t - 1)
+    """
+    tlst = np.asarray(tlst, dtype='int')
+    tau_lst = np.arange(-tau_max, tau_max + 1)
+    tau_min = np.minimum(np.minimum(tlst, tau_max), len(fa) - tlst - 1)
+    valid = abs(tau_lst) <= tau_min[:, np.newaxis]
+    tau_valid = np.where(valid, tau_lst, 0)
+
+    Rnn = np.conjugate(fa[tlst[:, np.newaxis] - tau_valid]) * \
+        fb[tlst[:, np.newaxis] + tau_valid]
+    Rnn[~valid] = 0
+
+    return Rnn, tau_min
+
+
+def smooth_frequency(FX, g):
+    """
+    smooth spectra along the last axis with the window g, the same as
+    np.convolve(padzeros(FX, npad=len(FX) + len(g) - 1), g, 'valid') for each
+    spectrum but as one convolution of all of them
+
+    Arguments:
+    ----------
+        **FX** : np.ndarray(..., nf)
+                 spectra to smooth
+
+        **g** : np.ndarray(ng)
+                smoothing window
+
+    Returns:
+    --------
+        **FXsmooth** : np.ndarray(..., nf)
+                       smoothed spectra
+    """
+    FX = np.asarray(FX)
+    ng = len(g)
+
+    def convolve(values):
+        # origin lines the window up with the start of the zero padded
+        # spectra like the 'valid' convolution
+        return ndimage.convolve1d(values, g, axis=-1, mode='constant',
+                                  origin=(ng - 1) // 2)
+
+    if np.iscomplexobj(FX):
+        return convolve(FX.real) + 1j * convolve(FX.imag)
+    return convolve(FX)
+
+
+def _get_frequency_window(ng):
+    """
+    hanning window to smooth in the frequency domain, ng is forced to be odd
+    """
+    if np.remainder(ng, 2) != 1:
+        ng = ng - 1
+        print('ng forced to be odd as ng-1')
+    return normalize_L2(np.hanning(ng))
+
+
+def _smethod(pxx, L, sigmaL=None):
+    """
+    S-method from the STFT pxx(..., nf, nt) for all frequencies at once
+    """
+    tfarray = abs(pxx) ** 2
+    nf = pxx.shape[-2]
+    # frequency shifts, symmetric for odd L
+    Llst = np.arange(L) - (L - 1) // 2
+    # create a frequency gaussian window
+    if sigmaL is None:
+        sigmaL = L / (1 * np.sqrt(2 * np.log(2)))
+    p = sps.gaussian(L, sigmaL)
+
+    # sum over the shifts for all frequencies
+    f_start = int(L / 2)
+    f_stop = nf - int(L / 2) - 1
+    if f_stop > f_start:
+        smpxx = np.zeros(pxx.shape[:-2] + (f_stop - f_start, pxx.shape[-1]),
+                         dtype=pxx.dtype)
+        for pp, ll in zip(p, Llst):
+            smpxx += pp * pxx[..., f_start + ll:f_stop + ll, :] * \
+                pxx[..., f_start - ll:f_stop - ll, :].conj()
+        tfarray[..., f_start:f_stop, :] += 2 * np.real(smpxx)
+    # normalize
+    tfarray[..., int(L / 2):int(-L / 2), :] /= L
+
+    return tfarray
+
+
+def iter_stft(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, nfbins=2 ** 10,
+              block_size=2 ** 10):
+    """
+    iterate over the short time Fourier transform of one or more channels a
+    block of windows at a time, so long time series never have to be in
+    memory as a whole.
+
+    The windows of a block are a strided view of the data, the mean of each
+    window is removed and they are transformed with one rfft.  The positive
+    frequencies are doubled to compare with stft, which transforms the
+    analytic signal.
+
+    Arguments:
+    -----------
+        **fx** : np.ndarray(n) or np.ndarray(n_channels, n)
+                 time series, can be anything that reads a slice along the
+                 last axis into memory like np.memmap or an h5py dataset
+
+        **nh** : int (should be power of 2)
+                 window length for each time step
+                 *default* is 2**8 = 256
+
+        **tstep** : int
+                    number of sample between short windows
+                    *default* is 2**7 = 128
+
+        **ng** : int (should be odd)
+                 length of smoothing window along frequency plane
+
+        **nfbins** : int (should be power of 2 and equal or larger than nh)
+                     number of frequency bins
+
+        **block_size** : int
+                         number of windows in a block
+                         *default* is 2**10
+
+    Returns:
+    --------
+        generator of
+
+        **tlst** : np.array()
+                   time instances of the windows in the block
+
+        **tfarray** : np.ndarray(..., nfbins/2, len(tlst))
+                      STFT of the block, frequencies flipped like stft
+    """
+    n_windows = max((fx.shape[-1] - nh) // tstep + 1, 0)
+
+    h = normalize_L2(np.hanning(nh))
+    if ng != 1:
+        g = _get_frequency_window(ng)
+
+    for w_start in range(0, n_windows, block_size):
+        w_stop = min(w_start + block_size, n_windows)
+        block = np.asarray(fx[..., w_start * tstep:(w_stop - 1) * tstep + nh],
+                           dtype=float)
+        windows = get_windows(block, nh, tstep)
+        windows = windows - windows.mean(axis=-1)[..., np.newaxis]
+
+        FX = np.fft.rfft(windows * h, n=nfbins, axis=-1)[..., :int(nfbins / 2)]
+        FX[..., 1:] *= 2
+        if ng != 1:
+            FX = smooth_frequency(FX, g)
+
+        yield (np.arange(w_start, w_stop) * tstep,
+               np.swapaxes(FX[..., ::-1], -1, -2))
+
+
+def spectrogram(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10,
+                L=1, sigmaL=None, n_average=1, block_size=2 ** 10):
+    """
+    calculate the power spectrogram of one or more channels block by block,
+    see iter_stft.  For long time series the power of n_average
+    consecutive windows is averaged so the spectrogram fits in memory, a
+    full day at 4096 Hz with tstep=2**7 and n_average=2**6 has about 43000
+    time instances.
+
+    Arguments:
+    -----------
+        **fx** : np.ndarray(n) or np.ndarray(n_channels, n)
+                 time series, can be anything that reads a slice along the
+                 last axis into memory like np.memmap or an h5py dataset
+
+        **nh** : int (should be power of 2)
+                 window length for each time step
+                 *default* is 2**8 = 256
+
+        **tstep** : int
+                    number of sample between short windows
+                    *default* is 2**7 = 128
+
+        **ng** : int (should be odd)
+                 length of smoothing window along frequency plane
+
+        **df** : float
+                 sampling frequency
+
+        **nfbins** : int (should be power of 2 and equal or larger than nh)
+                     number of frequency bins
+
+        **L** : int (should be odd)
+                length of window for S-method calculation, 1 for the
+                spectrogram
+
+        **sigmaL** : float
+                     full width half max of gaussian window for L
+
+        **n_average** : int
+                        number of windows to average
+                        *default* is 1
+
+        **block_size** : int
+                         number of windows to transform at a time, rounded
+                         up to a multiple of n_average
+                         *default* is 2**10
+
+    Returns:
+    --------
+        **tfarray** : np.ndarray(..., nfbins/2, n_windows/n_average)
+                      spectrogram in units of power
+
+        **tlst** : np.array()
+                   time instance of the first window of each average
+
+        **flst** : np.ndarray(nfbins/2)
+                   frequency array containing only positive frequencies where
+                   the Fourier coeffients were calculated
+    """
+    df = float(df)
+    flst = np.fft.fftfreq(nfbins, 1 / df)[0:int(nfbins / 2)]
+    block_size = int(np.ceil(block_size / float(n_average))) * n_average
+
+    tf_list = []
+    t_list = []
+    for tlst, pxx in iter_stft(fx, nh=nh, tstep=tstep, ng=ng, nfbins=nfbins,
+                               block_size=block_size):
+        if L > 1:
+            tfarray = _smethod(pxx, L, sigmaL)
+        else:
+            tfarray = abs(pxx) ** 2
+        if n_average > 1:
+            index = np.arange(0, tlst.size, n_average)
+            count = np.diff(np.append(index, tlst.size))
+            tfarray = np.add.reduceat(tfarray, index, axis=-1) / count
+            tlst = tlst[index]
+        tf_list.append(tfarray)
+        t_list.append(tlst)
+
+    if len(tf_list) == 0:
+        shape = np.shape(fx)[:-1] + (int(nfbins / 2), 0)
+        return np.zeros(shape), np.zeros(0, dtype=int), flst
+
+    return np.concatenate(tf_list, axis=-1), np.concatenate(t_list), flst
+
+
+def stft(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10,
+         block_size=2 ** 10):
     """
     calculate the spectrogam of the given function by calculating the fft of
     a window of length nh at each time instance with an interval of tstep.
@@ -337,6 +664,9 @@ def stft(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10):
         **nfbins** : int (should be power of 2 and equal or larger than nh)
                      number of frequency bins
 
+        **block_size** : int
+                         number of windows to transform at a time
+
     Returns:
     --------
         **tfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
@@ -371,14 +701,7 @@ def stft(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10):
 
     # make a hanning window to smooth in frequency domain
     if ng != 1:
-        if np.remainder(ng, 2) != 1:
-            ng = ng - 1
-            print('ng forced to be odd as ng-1')
-        else:
-            pass
-        g = normalize_L2(np.hanning(ng))
-    else:
-        pass
+        g = _get_frequency_window(ng)
 
     # make time step list
     tlst = np.arange(start=0, stop=fn - nh + 1, step=tstep)
@@ -395,28 +718,93 @@ def stft(fx, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10):
     # positive ones
     fa = sps.hilbert(dctrend(fx))
 
-    # compute the fft at each window instance
-    for place, ii in enumerate(tlst):
-        fxwin = fa[ii:ii + nh] * h
-
+    # compute the fft of a block of windows at a time
+    windows = get_windows(fa, nh, tstep)
+    for start in range(0, len(tlst), block_size):
         # get only positive frequencies
-        FXwin = np.fft.fft(padzeros(fxwin, npad=nfbins))[:int(nfbins / 2)]
+        FXwin = np.fft.fft(windows[start:start + block_size] * h, n=nfbins,
+                           axis=-1)[:, :int(nfbins / 2)]
 
         # smooth in frequency plane
         if ng != 1:
-            FXwin = np.convolve(padzeros(FXwin, npad=len(FXwin) + ng - 1), g,
-                                'valid')
-        else:
-            pass
+            FXwin = smooth_frequency(FXwin, g)
 
         # pull out only positive quadrant, flip array for plotting
-        tfarray[:, place] = FXwin[::-1]
+        tfarray[:, start:start + block_size] = FXwin[:, ::-1].T
 
     return tfarray, tlst, flst
 
 
+def _get_reassignment_stft(fx, tlst, h, nfbins, block_size):
+    """
+    STFTs of fx with the window h, the ramp window and the derivative of h
+    for the time instances tlst, a block of time instances at a time.
+    Returns the negative frequencies (nfbins/2, nt) of each.
+    """
+    nx = len(fx)
+    lh = int((len(h) - 1) / 2)
+    tau = np.arange(start=-lh, stop=lh + 1, step=1)
+
+    # window, ramp window and derivative of window
+    windows = np.array([h, h * tau, dwindow(h)]).conj()
+
+    # time shifts of each time instance are limited by the ends of fx
+    tau_max = min(int(np.round(nx / 2.)), lh)
+    # compute the frequency spots to be calculated
+    ff = np.remainder(nfbins + tau, nfbins)
+
+    spectra = np.zeros((3, int(nfbins / 2), len(tlst)), dtype='complex')
+    for start in range(0, len(tlst), block_size):
+        tt = tlst[start:start + block_size, np.newaxis]
+        valid = (tau >= -np.minimum(tau_max, tt - 1)) & \
+            (tau <= np.minimum(tau_max, nx - tt - 1))
+        xlst = np.where(valid, tt + tau, 0)
+        normh = np.sqrt(np.sum(valid * abs(h) ** 2, axis=-1))
+
+        tfr = np.zeros((3, len(tt), nfbins), dtype='complex')
+        tfr[:, :, ff] = np.where(valid, fx[xlst], 0) / normh[:, np.newaxis] * \
+            windows[:, np.newaxis, :]
+
+        # compute Fourier Transform, get only negative frequencies
+        spec = np.fft.fft(tfr, axis=-1)[:, :, int(nfbins / 2):]
+        spectra[:, :, start:start + block_size] = np.swapaxes(spec, -1, -2)
+
+    return spectra
+
+
+def _get_reassignment_shifts(spec, spect, specd, nfbins):
+    """
+    time and frequency shift of each point of the spectrogram to its center
+    of gravity, zero where spec is zero
+    """
+    zerofind = np.nonzero(abs(spec))
+    twspec = np.zeros(spec.shape, dtype='float')
+    dwspec = np.zeros(spec.shape, dtype='float')
+    twspec[zerofind] = np.round(np.real(spect[zerofind] / spec[zerofind]))
+    dwspec[zerofind] = np.round(np.imag((nfbins / 2.) * specd[zerofind] /
+                                        spec[zerofind]) / (np.pi))
+
+    return twspec, dwspec
+
+
+def _get_reassignment_index(reassign, twspec, dwspec, nfbins):
+    """
+    frequency and time index where the points in reassign are moved to
+    """
+    nt = reassign.shape[1]
+    kk, nn = np.nonzero(reassign)
+    # get center of gravity index in time direction
+    nhat = (nn + twspec[kk, nn]).astype('int')
+    nhat = np.minimum(np.maximum(nhat, 1), nt - 1)
+    # get center of gravity index in frequency direction
+    khat = (kk - dwspec[kk, nn]).astype('int')
+    khat = np.remainder(khat - 1, int(nfbins / 2))
+
+    return khat, nhat
+
+
 def reassigned_stft(fx, nh=2 ** 6 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, alpha=4,
-                    threshold=None):
+                    threshold=None, block_size=2 ** 8):
     """
     Computes the reassigned spectrogram by estimating the center of gravity of
     the signal and condensing dispersed energy back to that location.  Works
@@ -453,6 +841,10 @@ def reassigned_stft(fx, nh=2 ** 6 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, alp
                         If None the threshold is automatically calculated
                         *default* is None
 
+        **block_size** : int
+                         number of time instances to transform at a time
+                         *default* is 2**8
+
     Returns:
         **rtfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
                        reassigned spectrogram in units of amplitude
@@ -481,59 +873,20 @@ def reassigned_stft(fx, nh=2 ** 6 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, alp
 
     # compute gaussian window
     h = gausswin(nh, alpha=alpha)
-    lh = (nh - 1) / 2
-
-    # compute ramp window
-    th = h * np.arange(start=-lh, stop=lh + 1, step=1)
-
-    # compute derivative of window
-    dh = dwindow(h)
 
     # make a time list of indexes
     tlst = np.arange(start=0, stop=nx, step=tstep)
-    nt = len(tlst)
 
     # make a frequency list
-    flst = np.fft.fftfreq(nfbins, 1. / df)[nfbins / 2:]
-    return_flst = np.fft.fftfreq(nfbins, 1. / df)[0:nfbins / 2]
-
-    # initialize some time-frequency arrays
-    tfr = np.zeros((nfbins, nt), dtype='complex')
-    tf2 = np.zeros((nfbins, nt), dtype='complex')
-    tf3 = np.zeros((nfbins, nt), dtype='complex')
+    return_flst = np.fft.fftfreq(nfbins, 1. / df)[0:int(nfbins / 2)]
 
     # compute components for reassignment
-    for ii, tt in enumerate(tlst):
-        # create a time shift list
-        tau = np.arange(start=-min([np.round(nx / 2.), lh, tt - 1]),
-                        stop=min([np.round(nx / 2.), lh, nx - tt - 1]) + 1)
-        # compute the frequency spots to be calculated
-        ff = np.remainder(nfbins + tau, nfbins)
-        xlst = tt + tau
-        hlst = lh + tau
-        normh = np.sqrt(np.sum(abs(h[hlst]) ** 2))
-        tfr[ff, ii] = fx[xlst] * h[hlst].conj() / normh
-        tf2[ff, ii] = fx[xlst] * th[hlst].conj() / normh
-        tf3[ff, ii] = fx[xlst] * dh[hlst].conj() / normh
-
-    # compute Fourier Transform
-    spec = np.fft.fft(tfr, axis=0)
-    spect = np.fft.fft(tf2, axis=0)
-    specd = np.fft.fft(tf3, axis=0)
-
-    # get only positive frequencies
-    spec = spec[nfbins / 2:, :]
-    spect = spect[nfbins / 2:, :]
-    specd = specd[nfbins / 2:, :]
+    spec, spect, specd = _get_reassignment_stft(fx, tlst, h, nfbins,
+                                                block_size)
 
     # check to make sure no spurious zeros floating around
     spec[np.where(abs(spec) < 1.E-6)] = 0.0
-    zerofind = np.nonzero(abs(spec))
-    twspec = np.zeros((nfbins / 2, nt), dtype='float')
-    dwspec = np.zeros((nfbins / 2, nt), dtype='float')
-    twspec[zerofind] = np.round(np.real(spect[zerofind] / spec[zerofind]) / 1)
-    dwspec[zerofind] = np.round(np.imag((nfbins / 2.) *
-                                        specd[zerofind] / spec[zerofind]) / (np.pi))
+    twspec, dwspec = _get_reassignment_shifts(spec, spect, specd, nfbins)
 
     # compute reassignment
     rtfarray = np.zeros_like(spec)
@@ -541,32 +894,27 @@ def reassigned_stft(fx, nh=2 ** 6 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, alp
     if threshold is None:
         threshold = 1.E-4 * np.mean(fx[tlst])
 
-    for nn in range(nt):
-        for kk in range(nfbins / 2):
-            if abs(spec[kk, nn]) > threshold:
-                # get center of gravity index in time direction
-                nhat = int(nn + twspec[kk, nn])
-                nhat = int(min([max([nhat, 1]), nt - 1]))
-                # get center of gravity index in frequency direction
-                khat = int(kk - dwspec[kk, nn])
-                khat = int(np.remainder(np.remainder(khat - 1, nfbins / 2) + nfbins / 2,
-                                        nfbins / 2))
-                # reassign energy
-                rtfarray[khat, nhat] = rtfarray[khat, nhat] + spec[kk, nn]
-                spect[kk, nn] = khat + 1j * nhat
-            else:
-                spect[kk, nn] = np.inf * (1 + 1j)
-                rtfarray[kk, nn] = rtfarray[kk, nn] + spec[kk, nn]
+    # reassign energy to the center of gravity of each point above the
+    # threshold, keep the rest where it is
+    reassign = abs(spec) > threshold
+    khat, nhat = _get_reassignment_index(reassign, twspec, dwspec, nfbins)
+    np.add.at(rtfarray, (khat, nhat), spec[reassign])
+    rtfarray[~reassign] += spec[~reassign]
 
     return rtfarray, tlst, return_flst, spec
 
 
-def wvd(fx, nh=2 ** 8 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0):
+def wvd(fx, nh=2 ** 8 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0,
+        block_size=2 ** 8):
     """
     calculates the Wigner-Ville distribution of f.
 
     Can compute the cross spectra by inputting fx as [fx1,fx2]
 
+    The correlation functions of a block of time instances are computed with
+    get_lag_products and transformed with one fft, so memory is bounded by
+    block_size * nfbins.
+
     Arguments:
     ----------
                 **fx** : list or np.ndarray
@@ -587,9 +935,13 @@ def wvd(fx, nh=2 ** 8 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0):
         **nfbins** : int (should be power of 2 and equal or larger than nh)
                      number of frequency bins
 
+        **block_size** : int
+                         number of time instances to transform at a time
+                         *default* is 2**8
+
     Returns:
     --------
-        **tfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
+        **tfarray** : np.ndarray(nfbins, len(fx)/tstep)
                       spectrogram in units of amplitude
 
         **tlst** : np.array()
@@ -600,35 +952,14 @@ def wvd(fx, nh=2 ** 8 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0):
                    the Fourier coeffients were calculated
 
     """
-    # check to see if computing auto or cross-spectra
-    if isinstance(fx, list):
-        fx = np.array(fx)
-    try:
-        fn, fm = fx.shape
-        if fm > fn:
-            fm, fn = fx.shape
-    except ValueError:
-        fn = len(fx)
-        fm = 1
-
-    if fm > 1:
-        fn = fn[0]
-        print('computing cross spectra')
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx[0])
-        fb = wvd_analytic_signal(fx[1])
-    else:
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx)
-        fa = sps.hilbert(dctrend(fx))
-        fb = fa.copy()
+    fa, fb, fn = _get_analytic_signals(fx)
 
-    fn = len(fa)
     # sampling period
     df = float(df)
     dt = 1. / df
-    # time shift
-    tau = (nh - 1) / 2
+    # time shift, at most nfbins lags fit in a column
+    tau = min(int((nh - 1) / 2), int((nfbins - 1) / 2))
+    tau_lst = np.arange(start=-tau, stop=tau + 1, step=1, dtype='int')
 
     # create a time array such that the first point is centered on time window
     tlst = np.arange(start=0, stop=fn - 1, step=tstep, dtype='int')
@@ -637,38 +968,164 @@ def wvd(fx, nh=2 ** 8 - 1, tstep=2 ** 5, nfbins=2 ** 10, df=1.0):
     tfarray = np.zeros((nfbins, len(tlst)), dtype='complex')
 
     # create a frequency array with just positive frequencies
-    flst = np.fft.fftfreq(nfbins, dt)[0:nfbins / 2]
-
-    # calculate pseudo WV
-    for point, nn in enumerate(tlst):
-        # calculate the smallest timeshift possible
-        tau_min = min(nn, tau, fn - nn - 1)
-        # make a timeshift array
-        tau_lst = np.arange(start=-tau_min, stop=tau_min + 1, step=1,
-                            dtype='int')
+    flst = np.fft.fftfreq(nfbins, dt)[0:int(nfbins / 2)]
+
+    # calculate pseudo WV a block of time instances at a time
+    for start in range(0, len(tlst), block_size):
         # calculate rectangular windowed correlation function of analytic
         # signal
-        Rnn = 4 * np.conjugate(fa[nn - tau_lst]) * fb[nn + tau_lst]
-        # calculate fft of windowed correlation function
-        # put into tfarray
-        tfarray[:, point] = padzeros(Rnn, npad=nfbins)[::-1]
-
-    # compute Fourier Transform of array along the time axis
-    tfarray = np.fft.fft(tfarray, axis=0)
-    # normalize
-    tfarray = tfarray / nh
+        Rnn, tau_min = get_lag_products(fa, fb, tlst[start:start + block_size],
+                                        tau)
+        # put the correlation function of each time instance into a row of
+        # length nfbins, padded with zeros and flipped.  Lags past tau_min are
+        # zero and wrap around to columns that are not used otherwise.
+        cols = np.remainder(nfbins - 1 - tau_min[:, np.newaxis] - tau_lst,
+                            nfbins)
+        Rpad = np.zeros((len(Rnn), nfbins), dtype='complex')
+        Rpad[np.arange(len(Rnn))[:, np.newaxis], cols] = 4 * Rnn
+
+        # compute Fourier Transform of the block along the lags and normalize
+        tfarray[:, start:start + block_size] = np.fft.fft(Rpad, axis=-1).T / nh
 
     return tfarray, tlst, flst
 
 
+def _get_spwvd_windows(fn, nh=None, ng=None, sigmat=None, sigmaf=None):
+    """
+    gaussian lag window h and time smoothing window g of the smoothed
+    pseudo Wigner-Ville distribution, both odd and normalized to sum to 1
+    """
+    # note window length should be odd so that h,g[0]=1,nh>ng
+    if nh is None:
+        nh = np.floor(fn / 2.)
+    # make sure the window length is odd
+    if np.remainder(nh, 2) == 0:
+        nh += 1
+    # calculate length for time smoothing window
+    if ng is None:
+        ng = np.floor(fn / 5.)
+    if np.remainder(ng, 2) == 0:
+        ng += 1
+    # calculate standard deviations for gaussian windows
+    if sigmat is None:
+        sigmah = nh / (6 * np.sqrt(2 * np.log(2)))
+    else:
+        sigmah = sigmat
+
+    if sigmaf is None:
+        sigmag = ng / (6 * np.sqrt(2 * np.log(2)))
+    else:
+        sigmag = sigmaf
+    nh = int(nh)
+    ng = int(ng)
+    # calculate windows and normalize
+    h = sps.gaussian(nh, sigmah)
+    h /= sum(h)
+
+    g = sps.gaussian(ng, sigmag)
+    g /= sum(g)
+
+    return h, g
+
+
+def _spwvd(fa, fb, tlst, h, g, nfbins, block_size):
+    """
+    smoothed pseudo Wigner-Ville distribution (nfbins, len(tlst)) of the
+    analytic signals fa and fb at the evenly spaced time instances tlst,
+    before flipping.
+
+    The lag products fa[m + tau] * conj(fb[m - tau]) of the samples around a
+    block of time instances are smoothed in time for all lags at once, where
+    g is normalized over the lag products inside the time series, and
+    transformed with one fft.
+    """
+    fn = len(fa)
+    Lh = int((len(h) - 1) / 2)  # midpoint index of window h
+    Lg = int((len(g) - 1) / 2)  # midpoint index of window g
+    nhalf = int(nfbins / 2)
+    if len(tlst) > 1:
+        tstep = tlst[1] - tlst[0]
+    else:
+        tstep = 1
+
+    # lags that are calculated, the lag nfbins/2 is the average of the
+    # positive and negative half
+    tau_lst = np.arange(min(Lh, nhalf) + 1)
+    tau_pos = tau_lst[1:nhalf]
+
+    # sum of g[Lg + p] for p_start <= p < p_stop is
+    # gsum[p_stop + Lg] - gsum[p_start + Lg]
+    gsum = np.append(0, np.cumsum(g))
+
+    # short smoothing windows are summed over strided windows of the lag
+    # products, long ones are convolved with an fft.  Either way keep the
+    # arrays of a block small.
+    if len(g) <= 8 * tstep:
+        def smooth(R):
+            return np.dot(get_windows(R.T, len(g), tstep), g[::-1]).T
+        n_block = 2 ** 22 // (len(g) * len(tau_lst))
+    else:
+        def smooth(R):
+            return sps.fftconvolve(R, g[:, np.newaxis], mode='valid',
+                                   axes=0)[::tstep]
+        n_block = 2 ** 22 // (tstep * len(tau_lst))
+    block_size = max(1, min(block_size, n_block))
+
+    tfarray = np.zeros((nfbins, len(tlst)), dtype='complex')
+    for start in range(0, len(tlst), block_size):
+        tt = tlst[start:start + block_size]
+
+        # lag products of the samples around the block, zero where either
+        # sample is outside the time series
+        mm = np.arange(tt[0] - Lg, tt[-1] + Lg + 1)[:, np.newaxis]
+        valid = (mm >= tau_lst) & (mm < fn - tau_lst)
+        m_plus = np.where(valid, mm + tau_lst, 0)
+        m_minus = np.where(valid, mm - tau_lst, 0)
+        Rp = np.where(valid, fa[m_plus] * np.conjugate(fb[m_minus]), 0)
+        Rm = np.where(valid, fa[m_minus] * np.conjugate(fb[m_plus]), 0)
+
+        # smooth in time, sum of g[Lg + p] * R[t - p] over the window
+        # centered on each time instance
+        Rp = smooth(Rp)
+        Rm = smooth(Rm)
+
+        # normalize by g over the lag products inside the time series,
+        # those are t - fn + 1 + tau <= p <= t - tau
+        p_start = np.clip(tt[:, np.newaxis] - fn + 1 + tau_lst, -Lg, Lg + 1)
+        p_stop = np.clip(tt[:, np.newaxis] - tau_lst + 1, -Lg, Lg + 1)
+        has_lag = p_stop > p_start
+        gnorm = np.where(has_lag, gsum[p_stop + Lg] - gsum[p_start + Lg], 1)
+        Rp = np.where(has_lag, Rp / gnorm, 0)
+        Rm = np.where(has_lag, Rm / gnorm, 0)
+
+        # window the lags with h, positive lags first and the negative lags
+        # from the end
+        tfblock = np.zeros((len(tt), nfbins), dtype='complex')
+        tfblock[:, 0] = h[Lh] * Rp[:, 0]
+        tfblock[:, tau_pos] = h[Lh + tau_pos] * Rp[:, tau_pos]
+        tfblock[:, nfbins - tau_pos] = h[Lh - tau_pos] * Rm[:, tau_pos]
+        if Lh >= nhalf:
+            middle = (tt >= nhalf) & (tt <= fn - nhalf - 1)
+            tfblock[middle, nhalf] = .5 * (h[Lh + nhalf] * Rp[middle, nhalf] +
+                                           h[Lh - nhalf] * Rm[middle, nhalf])
+
+        tfarray[:, start:start + block_size] = np.fft.fft(tfblock, axis=-1).T
+
+    return tfarray
+
+
 def spwvd(fx, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, nh=None, ng=None, sigmat=None,
-          sigmaf=None):
+          sigmaf=None, block_size=2 ** 6):
     """
     Calculates the smoothed pseudo Wigner-Ville distribution for an array
     fx. Smoothed with Gaussians windows to get best localization.
 
     Can be input as [fx1, fx2] to compute cross spectra.
 
+    The lag products around a block of time instances are smoothed in time
+    for all lags at once and transformed with one fft, so memory is bounded
+    by the block size.
+
     Arguments:
     -----------
         **fx** : list or np.ndarray
@@ -700,9 +1157,13 @@ def spwvd(fx, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, nh=None, ng=None, sigmat=Non
                      std of window g, ie full width half max of gaussian
                      *default* is None and sigmaf is calculate automatically
 
+        **block_size** : int
+                         number of time instances to transform at a time
+                         *default* is 2**6
+
     Returns:
     --------
-        **tfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
+        **tfarray** : np.ndarray(nfbins, len(fx)/tstep)
                       SPWVD spectrogram in units of amplitude
 
         **tlst** : np.array()
@@ -712,131 +1173,39 @@ def spwvd(fx, tstep=2 ** 5, nfbins=2 ** 10, df=1.0, nh=None, ng=None, sigmat=Non
                    frequency array containing only positive frequencies where
                    the Fourier coeffients were calculated
     """
-    # check to see if calculating the auto or cross spectra
-    if isinstance(fx, list):
-        fx = np.array(fx)
-
-    try:
-        fn, fm = fx.shape
-        if fm > fn:
-            fm, fn = fx.shape
-    except ValueError:
-        fn = len(fx)
-        fm = 1
-    if fm > 1:
-        print('computing cross spectra')
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx[0])
-        fb = wvd_analytic_signal(fx[1])
-
-    else:
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx)
-        fa = sps.hilbert(dctrend(fx))
-        fb = fa.copy()
-        print('Computed Analytic signal')
+    fa, fb, fn = _get_analytic_signals(fx)
 
     # sampling period
     df = float(df)
     dt = 1 / df
 
     # create normalize windows in time (g) and frequency (h)
-    # note window length should be odd so that h,g[0]=1,nh>ng
-    if nh is None:
-        nh = np.floor(fn / 2.)
-    # make sure the window length is odd
-    if np.remainder(nh, 2) == 0:
-        nh += 1
-    # calculate length for time smoothing window
-    if ng is None:
-        ng = np.floor(fn / 5.)
-    if np.remainder(ng, 2) == 0:
-        ng += 1
-    # calculate standard deviations for gaussian windows
-    if sigmat is None:
-        sigmah = nh / (6 * np.sqrt(2 * np.log(2)))
-    else:
-        sigmah = sigmat
-
-    if sigmaf is None:
-        sigmag = ng / (6 * np.sqrt(2 * np.log(2)))
-    else:
-        sigmag = sigmaf
-    nh = int(nh)
-    ng = int(ng)
-    print('nh=' + str(nh) + '; ng=' + str(ng))
-    # calculate windows and normalize
-    h = sps.gaussian(nh, sigmah)
-    h /= sum(h)
-
-    g = sps.gaussian(ng, sigmag)
-    g /= sum(g)
-
-    Lh = (nh - 1) / 2  # midpoint index of window h
-    Lg = (ng - 1) / 2  # midpoint index of window g
+    h, g = _get_spwvd_windows(fn, nh, ng, sigmat, sigmaf)
+    print('nh=' + str(len(h)) + '; ng=' + str(len(g)))
 
     # create a time array such that the first point is centered on time window
-    tlst = np.arange(start=0, stop=fn + 1, step=tstep, dtype='int')
-
-    # create an empty array to put the tf in
-    # make sure data type is complex
-    tfarray = np.zeros((nfbins, len(tlst)), dtype='complex')
+    tlst = np.arange(start=0, stop=fn, step=tstep, dtype='int')
 
     # create a frequency array with just positive frequencies
-    flst = np.fft.fftfreq(nfbins, dt)[0:nfbins / 2]
-
-    # calculate pseudo WV
-    for point, t in enumerate(tlst):
-        # find the smallest possible time shift
-        tau_max = min(t + Lg - 1, fn - t + Lg, round(nfbins / 2), Lh)
-        # create time lag list
-        taulst = np.arange(start=-min(Lg, fn - t), stop=min(Lg, t - 1) + 1, step=1,
-                           dtype='int')
-        # calculate windowed correlation function of analytic function for
-        # zero frequency
-        tfarray[0, point] = sum(2 * (g[Lg + taulst] / sum(g[Lg + taulst])) *
-                                fa[t - taulst - 1] * np.conjugate(fb[t - taulst - 1]))
-        # calculate tfd by calculating convolution of window and correlation
-        # function as sum of correlation function over the lag period times the
-        # window at that point. Calculate symmetrical segments for FFT later
-        for mm in range(tau_max):
-            taulst = np.arange(start=-min(Lg, fn - t - mm - 1), stop=min(Lg, t - mm - 1) + 1,
-                               step=1, dtype='int')
-            # compute positive half
-            gm = 2 * (g[Lg + taulst] / sum(g[Lg + taulst]))
-            Rmm = sum(gm * fa[t + mm - taulst - 1] *
-                      np.conjugate(fb[t - mm - taulst]))
-            tfarray[mm, point] = h[Lh + mm - 1] * Rmm
-            # compute negative half
-            Rmm = sum(gm * fa[t - mm - taulst] *
-                      np.conjugate(fb[t + mm - taulst - 1]))
-            tfarray[nfbins - mm - 1, point] = h[Lh - mm] * Rmm
-        mm = round(nfbins / 2)
-
-        if t <= fn - mm and t >= mm and mm <= Lh:
-            print('doing weird thing')
-            taulst = np.arange(start=-min(Lg, fn - t - mm), stop=min(Lg, fn - t, mm) + 1,
-                               step=1, dtype='int')
-            gm = g[Lg + taulst] / sum(g[Lg + taulst])
-            tfarray[mm - 1, point] = .5 * \
-                (sum(h[Lh + mm] * (gm * fa[t + mm - taulst - 1] *
-                                   np.conjugate(fb[t - mm - taulst]))) +
-                 sum(h[Lh - mm] * (gm * fa[t - mm - taulst] *
-                                   np.conjugate(fb[t + mm - taulst - 1]))))
-
-    tfarray = np.fft.fft(tfarray, axis=0)
-    # rotate for plotting purposes so that (t=0,f=0) is at the lower left
-    tfarray = np.rot90(tfarray.T, 1)
+    flst = np.fft.fftfreq(nfbins, dt)[0:int(nfbins / 2)]
+
+    # calculate pseudo WV and flip for plotting purposes so that (t=0,f=0) is
+    # at the lower left
+    tfarray = _spwvd(fa, fb, tlst, h, g, nfbins, block_size)[::-1]
 
     return tfarray, tlst, flst
 
 
 def robust_wvd(fx, nh=2 ** 7 - 1, ng=2 ** 4 - 1, tstep=2 ** 4, nfbins=2 ** 8, df=1.0,
-               sigmat=None, sigmaf=None):
+               sigmat=None, sigmaf=None, block_size=None):
     """
     Calculate the robust Wigner-Ville distribution for an array
     fx. Smoothed with Gaussians windows to get best localization.
 
+    The frequency shifted correlation functions of a block of time instances
+    and all frequencies are smoothed with one convolution and the median is
+    taken along the lags.
+
     Arguments:
     -----------
         **fx** : list or np.ndarray
@@ -869,6 +1238,11 @@ def robust_wvd(fx, nh=2 ** 7 - 1, ng=2 ** 4 - 1, tstep=2 ** 4, nfbins=2 ** 8, df
                      std of window g, ie full width half max of gaussian
                      *default* is None and sigmaf is calculate automatically
 
+        **block_size** : int
+                         number of time instances to compute at a time
+                         *default* is None, so that a block has about 2**22
+                         values for all frequencies and lags
+
     Returns:
     --------
         **tfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
@@ -881,31 +1255,9 @@ def robust_wvd(fx, nh=2 ** 7 - 1, ng=2 ** 4 - 1, tstep=2 ** 4, nfbins=2 ** 8, df
                    frequency array containing only positive frequencies where
                    the Fourier coeffients were calculated
     """
-    # check to see if computing the auto or cross spectra
-    if isinstance(fx, list):
-        fx = np.array(fx)
-
-    try:
-        fn, fm = fx.shape
-        if fm > fn:
-            fm, fn = fx.shape
-    except ValueError:
-        fn = len(fx)
-        fm = 1
-    if fm > 1:
-        print('computing cross spectra')
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx[0])
-        fb = wvd_analytic_signal(fx[1])
-
-    else:
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx)
-        fa = sps.hilbert(dctrend(fx))
-        fb = fa.copy()
-        print('Computed Analytic signal')
+    fa, fb, fn = _get_analytic_signals(fx)
 
-        # make sure window length is odd
+    # make sure window length is odd
     if nh is None:
         nh = np.floor(fn / 2.)
     # make sure the window length is odd
@@ -938,28 +1290,34 @@ def robust_wvd(fx, nh=2 ** 7 - 1, ng=2 ** 4 - 1, tstep=2 ** 4, nfbins=2 ** 8, df
     g = sps.gaussian(ng, sigmaf)
     g /= sum(g)
 
-    mlst = np.arange(start=-nh / 2 + 1, stop=nh / 2 + 1, step=1, dtype='int')
-    tlst = np.arange(start=nh / 2, stop=nfx - nh / 2, step=tstep)
+    mlst = np.arange(start=-nh // 2 + 1, stop=nh // 2 + 1, step=1, dtype='int')
+    tlst = np.arange(start=nh // 2, stop=nfx - nh // 2, step=tstep)
     # make a frequency list for plotting exporting only positive frequencies
     # get only positive frequencies
-    flst = np.fft.fftfreq(nfbins, dt)[nfbins / 2:]
+    flst = np.fft.fftfreq(nfbins, dt)[nfbins // 2:]
     flst[-1] = 0
-    flstp = np.fft.fftfreq(nfbins, 2 * dt)[0:nfbins / 2]
+    flstp = np.fft.fftfreq(nfbins, 2 * dt)[0:nfbins // 2]
 
     # create an empty array to put the tf in
-    tfarray = np.zeros((nfbins / 2, len(tlst)), dtype='complex')
+    tfarray = np.zeros((nfbins // 2, len(tlst)), dtype='complex')
 
-    for tpoint, nn in enumerate(tlst):
+    # frequency shift of each lag (nf, nh)
+    shift = np.exp(1j * 4 * np.pi * np.outer(flst, mlst) * dt)
+
+    # a block of time instances at a time to keep the (nt, nf, nh) array small
+    if block_size is None:
+        block_size = max(1, 2 ** 22 // shift.size)
+    for start in range(0, len(tlst), block_size):
+        tt = tlst[start:start + block_size, np.newaxis]
         # calculate windowed correlation function of analytic function
-        fxwin = h * fa[nn + mlst] * fb[nn - mlst].conj()
-        for fpoint, mm in enumerate(flst):
-            fxmed = np.convolve(g, fxwin * np.exp(1j * 4 * np.pi * mlst * mm * dt),
-                                mode='same') / (nh * ng)
-            fxmedpoint = np.median(fxmed.real)
-            if fxmedpoint == 0.0:
-                tfarray[fpoint, tpoint] = 1E-10
-            else:
-                tfarray[fpoint, tpoint] = fxmedpoint
+        fxwin = h * fa[tt + mlst] * fb[tt - mlst].conj()
+        # only the real part is needed and g is real
+        fxshift = (fxwin[:, np.newaxis, :] * shift).real
+        fxmed = ndimage.convolve1d(fxshift, g, axis=-1,
+                                   mode='constant') / (nh * ng)
+        tfpoint = np.median(fxmed, axis=-1)
+        tfpoint[tfpoint == 0.0] = 1E-10
+        tfarray[:, start:start + block_size] = tfpoint.T
 
     tfarray = (4. * nh / dt) * tfarray
 
@@ -967,12 +1325,16 @@ def robust_wvd(fx, nh=2 ** 7 - 1, ng=2 ** 4 - 1, tstep=2 ** 4, nfbins=2 ** 8, df
 
 
 def specwv(fx, tstep=2 ** 5, nfbins=2 ** 10, nhs=2 ** 8, nhwv=2 ** 9 - 1, ngwv=2 ** 3 - 1,
-           df=1.0):
+           df=1.0, sigmat=None, sigmaf=None, block_size=2 ** 6):
     """
     Calculates the Wigner-Ville distribution mulitplied by the STFT windowed
     by the common gaussian window h for an array f.  Handy for removing cross
     terms in the wvd.
 
+    The smoothed pseudo Wigner-Ville distribution is computed at the centers
+    of the STFT windows, every other frequency of it lines up with the
+    frequencies of the STFT.
+
     Arguments:
     -----------
         **fx** : list or np.ndarray
@@ -1001,6 +1363,16 @@ def specwv(fx, tstep=2 ** 5, nfbins=2 ** 10, nhs=2 ** 8, nhwv=2 ** 9 - 1, ngwv=2
         **nfbins** : int (should be power of 2 and equal or larger than nh)
                      number of frequency bins
 
+        **sigmat** : float
+                    std of the WVD window, see spwvd
+
+        **sigmaf** : float
+                     std of the WVD smoothing window, see spwvd
+
+        **block_size** : int
+                         number of time instances of the WVD to transform at
+                         a time, see spwvd
+
 
     Returns:
     --------
@@ -1018,21 +1390,24 @@ def specwv(fx, tstep=2 ** 5, nfbins=2 ** 10, nhs=2 ** 8, nhwv=2 ** 9 - 1, ngwv=2
     # calculate stft
     pst, tlst, flst = stft(fx, nh=nhs, tstep=tstep, nfbins=nfbins, df=df)
 
-    # calculate new time step so WVD and STFT will align
-    ntstep = len(fx) / (len(tlst) * 2.)
+    # calculate spwvd at the center of each STFT window so WVD and STFT
+    # will align in time, flip like spwvd
+    fa, fb, fn = _get_analytic_signals(fx)
+    h, g = _get_spwvd_windows(fn, nhwv, ngwv, sigmat, sigmaf)
+    pwv = _spwvd(fa, fb, tlst + nhs // 2, h, g, nfbins, block_size)[::-1]
 
-    # calculate spwvd
-    pwv, twv, fwv = spwvd(fx, tstep=ntstep, nfbins=nfbins, df=df,
-                          nh=nhwv, ng=ngwv)
+    # the WVD has twice the frequency resolution of the STFT, STFT row ii is
+    # at the frequency of WVD row 2 * ii + 1
+    pwv = pwv[1::2]
 
     # multiply the two together normalize
-    tfarray = pst / pst.max() * pwv / pwv.max()
+    tfarray = pst / abs(pst).max() * pwv / abs(pwv).max()
 
     return tfarray, tlst, flst
 
 
 def modifiedb(fx, tstep=2 ** 5, nfbins=2 ** 10,
-              df=1.0, nh=2 ** 8 - 1, beta=.2):
+              df=1.0, nh=2 ** 8 - 1, beta=.2, block_size=2 ** 8):
     """
     Calculates the modified b distribution as defined by cosh(n)^-2 beta
     for an array fx.  Supposed to remove cross terms in the WVD.
@@ -1059,6 +1434,10 @@ def modifiedb(fx, tstep=2 ** 5, nfbins=2 ** 10,
         **beta** : float
                    smoothing coefficient ussully between [0, 1]
 
+        **block_size** : int
+                         number of time instances to transform at a time
+                         *default* is 2**8
+
     Returns:
     --------
         **tfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
@@ -1071,34 +1450,15 @@ def modifiedb(fx, tstep=2 ** 5, nfbins=2 ** 10,
                    frequency array containing only positive frequencies where
                    the Fourier coeffients were calculated
     """
-    # check to see if calculating the auto or cross spectra
-    if isinstance(fx, list):
-        fx = np.array(fx)
-    try:
-        fn, fm = fx.shape
-        if fm > fn:
-            fm, fn = fx.shape
-    except ValueError:
-        fn = len(fx)
-        fm = 1
-
-    if fm > 1:
-        fn = fn[0]
-        print('computing cross spectra')
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx[0])
-        fb = wvd_analytic_signal(fx[1])
-    else:
-        # compute the analytic signal of function f and dctrend
-        fa = wvd_analytic_signal(fx)
-        fa = sps.hilbert(dctrend(fx))
-        fb = fa.copy()
+    fa, fb, fn = _get_analytic_signals(fx)
 
     # sampling period
     df = float(df)
     dt = 1. / df
 
-    tau = (nh - 1) / 2  # midpoint index of window h
+    # midpoint index of window h, at most nfbins lags fit in a column
+    tau = min(int((nh - 1) / 2), int((nfbins - 1) / 2))
+    tau_lst = np.arange(start=-tau, stop=tau + 1, step=1, dtype='int')
 
     # create a time array such that the first point is centered on time window
     tlst = np.arange(start=0, stop=fn - 1, step=tstep, dtype='int')
@@ -1107,25 +1467,32 @@ def modifiedb(fx, tstep=2 ** 5, nfbins=2 ** 10,
     tfarray = np.zeros((nfbins, len(tlst)), dtype='complex')
 
     # create a frequency array with just positive frequencies
-    flst = np.fft.fftfreq(nfbins, dt)[0:nfbins / 2]
-
-    # calculate pseudo WV
-    for point, nn in enumerate(tlst):
-        # calculate the smallest timeshift possible
-        tau_min = min(nn, tau, fn - nn - 1)
-        # make a timeshift array
-        taulst = np.arange(start=-tau_min, stop=tau_min +
-                           1, step=1, dtype='int')
-        # create modified b window
-        mbwin = np.cosh(taulst) ** (-2 * beta)
-        mbwin = mbwin / sum(mbwin)
-        MBwin = np.fft.fft(padzeros(mbwin, npad=nfbins))
+    flst = np.fft.fftfreq(nfbins, dt)[0:int(nfbins / 2)]
+
+    # calculate pseudo WV a block of time instances at a time
+    for start in range(0, len(tlst), block_size):
         # calculate windowed correlation function of analytic function
-        Rnn = np.conjugate(fa[nn - taulst]) * fb[nn + taulst]
+        Rnn, tau_min = get_lag_products(fa, fb, tlst[start:start + block_size],
+                                        tau)
+        # create modified b window of the lags of each time instance
+        valid = abs(tau_lst) <= tau_min[:, np.newaxis]
+        mbwin = np.where(valid, np.cosh(tau_lst) ** (-2 * beta), 0)
+        mbwin = mbwin / mbwin.sum(axis=-1)[:, np.newaxis]
+
+        # pad with zeros to nfbins starting with lag -tau_min, lags past
+        # tau_min are zero and wrap around to columns that are not used
+        # otherwise
+        rows = np.arange(len(Rnn))[:, np.newaxis]
+        cols = np.remainder(tau_lst + tau_min[:, np.newaxis], nfbins)
+        Rpad = np.zeros((len(Rnn), nfbins), dtype='complex')
+        Rpad[rows, cols] = Rnn
+        MBpad = np.zeros((len(Rnn), nfbins))
+        MBpad[rows, cols] = mbwin
+
         # calculate fft of windowed correlation function
-        FTRnn = MBwin * np.fft.fft(padzeros(Rnn, npad=nfbins))
+        FTRnn = np.fft.fft(MBpad, axis=-1) * np.fft.fft(Rpad, axis=-1)
         # put into tfarray
-        tfarray[:, point] = FTRnn[::-1]
+        tfarray[:, start:start + block_size] = FTRnn[:, ::-1].T
 
     # need to cut the time frequency array in half due to the WVD assuming
     # time series sampled at twice nyquist.
@@ -1134,6 +1501,62 @@ def modifiedb(fx, tstep=2 ** 5, nfbins=2 ** 10,
     return tfarray, tlst, flst
 
 
+def _robust_stft(fx, reduce_func, nh, tstep, df, nfbins):
+    """
+    robust STFT, reduce_func(values, axis) makes the estimate of the
+    frequency shifted windows along axis for a block of windows and all
+    frequencies at once
+    """
+    # get length of input time series
+    nfx = len(fx)
+
+    # compute time shift list
+    mlst = np.arange(nh) - int(nh / 2) + 1
+    # compute time locations to take STFT
+    tlst = np.arange(start=0, stop=nfx - nh + 1, step=tstep)
+
+    # make a frequency list for plotting exporting only positive frequencies
+    df = float(df)
+    flst = np.fft.fftfreq(nfbins, 1 / df)
+    flstc = flst[int(nfbins / 2):]
+    # Note: these are actually the negative frequencies but works better for
+    # calculations
+    flstp = flst[0:int(nfbins / 2)]
+
+    # make time window and normalize
+    sigmanh = nh / (6 * np.sqrt(2 * np.log(2)))
+    h = sps.gaussian(nh, sigmanh)
+    h = h / sum(h)
+
+    # create an empty array to put the tf in and initialize a complex value
+    tfarray = np.zeros((int(nfbins / 2), len(tlst)), dtype='complex')
+
+    # take the hilbert transform of the signal to make complex and remove
+    # negative frequencies
+    fa = sps.hilbert(dctrend(fx))
+    fa = fa / fa.std()
+
+    # frequency shift of each sample of a window (nf, nh)
+    shift = np.exp(1j * 2 * np.pi * np.outer(flstc, mlst) / df)
+
+    # windowed analytic function, a block of windows at a time to keep the
+    # (windows, nf, nh) array small
+    windows = get_windows(fa, nh, tstep)
+    block_size = max(1, 2 ** 22 // shift.size)
+    for start in range(0, len(tlst), block_size):
+        fxwin = h * windows[start:start + block_size]
+        fxshift = fxwin[:, np.newaxis, :] * shift
+        tfpoint = reduce_func(fxshift.real, -1) + \
+            1j * reduce_func(fxshift.imag, -1)
+        tfpoint[tfpoint == 0.0] = 1E-10
+        tfarray[:, start:start + block_size] = tfpoint.T
+
+    # normalize tfarray
+    tfarray = (4. * nh * df) * tfarray
+
+    return tfarray, tlst, flstp
+
+
 def robust_stft_median(fx, nh=2 ** 8, tstep=2 ** 5, df=1.0, nfbins=2 ** 10):
     """
     Calculates the robust spectrogram using the vector median simplification.
@@ -1171,53 +1594,9 @@ def robust_stft_median(fx, nh=2 ** 8, tstep=2 ** 5, df=1.0, nfbins=2 ** 10):
                    the Fourier coeffients were calculated
     """
 
-    # get length of input time series
-    nfx = len(fx)
-
-    # compute time shift list
-    mlst = np.arange(start=-nh / 2 + 1, stop=nh / 2 + 1, step=1, dtype='int')
-    # compute time locations to take STFT
-    tlst = np.arange(start=0, stop=nfx - nh + 1, step=tstep)
-
-    # make a frequency list for plotting exporting only positive frequencies
-    flst = np.fft.fftfreq(nfbins, 1 / df)
-    flstc = flst[nfbins / 2:]
-    # Note: these are actually the negative frequencies but works better for
-    # calculations
-    flstp = flst[0:nfbins / 2]
-
-    # make time window and normalize
-    sigmanh = nh / (6 * np.sqrt(2 * np.log(2)))
-    h = sps.gaussian(nh, sigmanh)
-    h = h / sum(h)
-
-    # create an empty array to put the tf in and initialize a complex value
-    tfarray = np.zeros((nfbins / 2, len(tlst)), dtype='complex')
-
-    # take the hilbert transform of the signal to make complex and remove
-    # negative frequencies
-    fa = sps.hilbert(dctrend(fx))
-    fa = fa / fa.std()
-
-    # make a frequency list for plotting exporting only positive frequencies
-    # get only positive frequencies
-    flst = np.fft.fftfreq(nfbins, 1 / df)[nfbins / 2:]
-
-    for tpoint, nn in enumerate(tlst):
-        # calculate windowed correlation function of analytic function
-        fxwin = h * fa[nn:nn + nh]
-        for fpoint, mm in enumerate(flstc):
-            fxmed = fxwin * np.exp(1j * 2 * np.pi * mlst * mm / df)
-            fxmedreal = np.median(fxmed.real)
-            fxmedimag = np.median(fxmed.imag)
-            if fxmedreal + 1j * fxmedimag == 0.0:
-                tfarray[fpoint, tpoint] = 1E-10
-            else:
-                tfarray[fpoint, tpoint] = fxmedreal + 1j * fxmedimag
-    # normalize tfarray
-    tfarray = (4. * nh * df) * tfarray
-
-    return tfarray, tlst, flstp
+    # median of the real and imaginary parts of the frequency shifted windows
+    return _robust_stft(fx, lambda values, axis: np.median(values, axis=axis),
+                        nh, tstep, df, nfbins)
 
 
 def robust_stft_L(fx, alpha=.325, nh=2 ** 8, tstep=2 **
@@ -1265,59 +1644,16 @@ def robust_stft_L(fx, alpha=.325, nh=2 ** 8, tstep=2 **
 
     """
 
-    # get length of input time series
-    nfx = len(fx)
-
-    # compute time shift list
-    mlst = np.arange(start=-nh / 2 + 1, stop=nh / 2 + 1, step=1, dtype='int')
-    # compute time locations to take STFT
-    tlst = np.arange(start=0, stop=nfx - nh + 1, step=tstep)
-
-    # make a frequency list for plotting exporting only positive frequencies
-    flst = np.fft.fftfreq(nfbins, 1 / df)
-    flstc = flst[nfbins / 2:]
-    # Note: these are actually the negative frequencies but works better for
-    # calculations
-    flstp = flst[0:nfbins / 2]
-
-    # make time window and normalize
-    sigmanh = nh / (6 * np.sqrt(2 * np.log(2)))
-    h = sps.gaussian(nh, sigmanh)
-    h /= sum(h)
-
-    # create an empty array to put the tf in and initialize a complex value
-    tfarray = np.zeros((nfbins / 2, len(tlst)), dtype='complex')
-
-    # take the hilbert transform of the signal to make complex and remove
-    # negative frequencies
-    fa = sps.hilbert(dctrend(fx))
-    fa /= fa.std()
-
-    # make a frequency list for plotting exporting only positive frequencies
-    # get only positive frequencies
-    flst = np.fft.fftfreq(nfbins, 1 / df)[nfbins / 2:]
-
     # create list of coefficients
     a = np.zeros(nh)
-    a[(nh - 2) * alpha:alpha * (2 - nh) + nh - 1] = 1. / \
+    a[int((nh - 2) * alpha):int(alpha * (2 - nh) + nh - 1)] = 1. / \
         (nh * (1 - 2 * alpha) + 4 * alpha)
 
-    for tpoint, nn in enumerate(tlst):
-        # calculate windowed correlation function of analytic function
-        fxwin = h * fa[nn:nn + nh]
-        for fpoint, mm in enumerate(flstc):
-            fxelement = fxwin * np.exp(1j * 2 * np.pi * mlst * mm / df)
-            fxreal = np.sort(fxelement.real)[::-1]
-            fximag = np.sort(fxelement.imag)[::-1]
-            tfpoint = sum(a * (fxreal + 1j * fximag))
-            if tfpoint == 0.0:
-                tfarray[fpoint, tpoint] = 1E-10
-            else:
-                tfarray[fpoint, tpoint] = tfpoint
-    # normalize tfarray
-    tfarray = (4. * nh * df) * tfarray
+    def l_estimate(values, axis):
+        # sum of the sorted values weighted by a
+        return np.sum(a * np.sort(values, axis=axis)[..., ::-1], axis=axis)
 
-    return tfarray, tlst, flstp
+    return _robust_stft(fx, l_estimate, nh, tstep, df, nfbins)
 
 
 def smethod(fx, L=11, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10,
@@ -1407,27 +1743,8 @@ def smethod(fx, L=11, nh=2 ** 8, tstep=2 ** 7, ng=1, df=1.0, nfbins=2 ** 10,
         pxx, tlst, flst = stft(fa, nh=nh, tstep=tstep, ng=ng, df=df,
                                nfbins=nfbins)
 
-    # make an new array to put the new tfd in
-    tfarray = abs(pxx) ** 2
-    # get shape of spectrogram
-    nf, nt = tfarray.shape
-    # create a list of frequency shifts
-    Llst = np.arange(start=-L / 2 + 1, stop=L / 2 + 1, step=1, dtype='int')
-    # create a frequency gaussian window
-    if sigmaL is None:
-        sigmaL = L / (1 * np.sqrt(2 * np.log(2)))
-    p = sps.gaussian(L, sigmaL)
-    # make a matrix of windows
-    pm = np.zeros((L, nt))
-    for kk in range(nt):
-        pm[:, kk] = p
-
-    # loop over frequency and calculate the s-method
-    for ff in range(int(L / 2), nf - int(L / 2) - 1):
-        tfarray[ff, :] = tfarray[ff, :] + 2 * np.real(np.sum(pm * pxx[ff + Llst, :] *
-                                                             pxx[ff - Llst, :].conj(), axis=0))
-    # normalize
-    tfarray[int(L / 2):int(-L / 2)] /= L
+    # compute the s-method for all frequencies at once
+    tfarray = _smethod(pxx, L, sigmaL)
 
     return tfarray, tlst, flst, pxx
 
@@ -1525,24 +1842,23 @@ def robust_smethod(fx, L=5, nh=2 ** 7, tstep=2 ** 5, nfbins=2 ** 10, df=1.0,
             raise NameError('robusttype {0} undefined'.format(robusttype))
 
     # compute frequency shift list
-    Llst = np.arange(start=-L / 2 + 1, stop=L / 2 + 1, step=1, dtype='int')
+    Llst = np.arange(start=-L // 2 + 1, stop=L // 2 + 1, step=1, dtype='int')
 
     # compute the frequency window of length L
     if sigmaL is None:
         sigmaL = L / 3 * (np.sqrt(2 * np.log(2)))
     lwin = gausswin(L, sigmaL)
     lwin /= sum(lwin)
-    pm = np.zeros((L, len(tlst)))
-    for kk in range(len(tlst)):
-        pm[:, kk] = lwin
 
     smarray = pxx.copy()
-    # compute S-method
-    for ff in range(L / 2, nfbins / 2 - L / 2):
-        smarray[ff, :] = smarray[ff, :] + 2 * np.real(np.sum(pm * pxx[ff + Llst, :] *
-                                                             pxx[ff - Llst,
-                                                                 :].conj(),
-                                                             axis=0))
+    # compute S-method for all frequencies at once, one shift at a time
+    f_start = L // 2
+    f_stop = nfbins // 2 - L // 2
+    smsum = np.zeros_like(smarray[f_start:f_stop])
+    for ll, pm in zip(Llst, lwin):
+        smsum += pm * pxx[f_start + ll:f_stop + ll] * \
+            pxx[f_start - ll:f_stop - ll].conj()
+    smarray[f_start:f_stop] += 2 * np.real(smsum)
     # normalize
     smarray = (2. / (L * nh)) * smarray
 
@@ -1550,7 +1866,7 @@ def robust_smethod(fx, L=5, nh=2 ** 7, tstep=2 ** 5, nfbins=2 ** 10, df=1.0,
 
 
 def reassigned_smethod(fx, nh=2 ** 7 - 1, tstep=2 ** 4, nfbins=2 ** 9, df=1.0, alpha=4,
-                       thresh=.01, L=5):
+                       thresh=.01, L=5, block_size=2 ** 8):
     """
     Calulates the reassigned S-method as described by Djurovic[1999] by
     using the spectrogram to estimate the reassignment.
@@ -1587,6 +1903,10 @@ def reassigned_smethod(fx, nh=2 ** 7 - 1, tstep=2 ** 4, nfbins=2 ** 9, df=1.0, a
         **nfbins** : int (should be power of 2 and equal or larger than nh)
                      number of frequency bins
 
+        **block_size** : int
+                         number of time instances to transform at a time
+                         *default* is 2**8
+
     Returns:
     --------
         **tfarray** : np.ndarray(nfbins/2, len(fx)/tstep)
@@ -1616,114 +1936,70 @@ def reassigned_smethod(fx, nh=2 ** 7 - 1, tstep=2 ** 4, nfbins=2 ** 9, df=1.0, a
     if fm > 1:
         print('computing cross spectra')
         fa = fx[0]
-        fb = fx[1]
         fa = fa.reshape(fn)
-        fb = fb.reshape(fn)
     else:
         fa = fx
         fa = fa.reshape(fn)
-        fb = fa.copy()
 
-    nx = len(fx)
+    # make sure window length is odd
+    if np.remainder(nh, 2) == 0:
+        nh = nh + 1
 
     # compute gaussian window
     h = gausswin(nh, alpha=alpha)
-    lh = (nh - 1) / 2
-
-    # compute ramp window
-    th = h * np.arange(start=-lh, stop=lh + 1, step=1)
-
-    # compute derivative of window
-    dh = dwindow(h)
 
     # make a time list of indexes
-    tlst = np.arange(start=0, stop=nx, step=tstep)
-    nt = len(tlst)
+    tlst = np.arange(start=0, stop=fn, step=tstep)
 
     # make frequency list for plotting
-    flst = np.fft.fftfreq(nfbins, 1. / df)[:nfbins / 2]
-
-    # initialize some time-frequency arrays
-    tfh = np.zeros((nfbins, nt), dtype='complex')
-    tfth = np.zeros((nfbins, nt), dtype='complex')
-    tfdh = np.zeros((nfbins, nt), dtype='complex')
+    flst = np.fft.fftfreq(nfbins, 1. / df)[:nfbins // 2]
 
     # compute components for reassignment
-    for ii, tt in enumerate(tlst):
-        # create a time shift list
-        tau = np.arange(start=-min([np.round(nx / 2.), lh, tt - 1]),
-                        stop=min([np.round(nx / 2.), lh, nx - tt - 1]) + 1)
-        # compute the frequency spots to be calculated
-        ff = np.remainder(nfbins + tau, nfbins)
-        # make lists of data points for each window calculation
-        xlst = tt + tau
-        hlst = lh + tau
-        normh = np.sqrt(np.sum(abs(h[hlst]) ** 2))
-        tfh[ff, ii] = fx[xlst] * h[hlst].conj() / normh
-        tfth[ff, ii] = fx[xlst] * th[hlst].conj() / normh
-        tfdh[ff, ii] = fx[xlst] * dh[hlst].conj() / normh
-
-    # compute Fourier Transform
-    spech = np.fft.fft(tfh, axis=0)
-    specth = np.fft.fft(tfth, axis=0)
-    specdh = np.fft.fft(tfdh, axis=0)
-
-    # get only positive frequencies
-    spech = spech[nfbins / 2:, :]
-    specth = specth[nfbins / 2:, :]
-    specdh = specdh[nfbins / 2:, :]
+    spech, specth, specdh = _get_reassignment_stft(fa, tlst, h, nfbins,
+                                                   block_size)
 
     # check to make sure no spurious zeros floating around
     szf = np.where(abs(spech) < 1.E-6)
     spech[szf] = 0.0 + 0.0j
-    zerofind = np.nonzero(abs(spech))
-    twspec = np.zeros((nfbins / 2, nt), dtype='float')
-    dwspec = np.zeros((nfbins / 2, nt), dtype='float')
-    twspec[zerofind] = np.round(np.real(specth[zerofind] / spech[zerofind]))
-    dwspec[zerofind] = np.round(np.imag((nfbins / 2.) * specdh[zerofind] /
-                                        spech[zerofind]) / (np.pi))
+    twspec, dwspec = _get_reassignment_shifts(spech, specth, specdh, nfbins)
 
     # get shape of spectrogram
     nf, nt = spech.shape
 
     # -----calculate s-method-----
-    Llst = np.arange(start=-L / 2 + 1, stop=L / 2 + 1, step=1, dtype='int')
+    Llst = np.arange(start=-L // 2 + 1, stop=L // 2 + 1, step=1, dtype='int')
 
     # make and empty array of zeros
     sm = np.zeros_like(spech)
 
     # put values where L cannot be value of L, near top and bottom
-    sm[0:L / 2, :] = abs(spech[0:L / 2, :]) ** 2
-    sm[-L / 2:, :] = abs(spech[-L / 2:, :]) ** 2
-
-    # calculate s-method
-    for ff in range(L / 2, nf - L / 2 - 1):
-        sm[ff, :] = 2 * np.real(np.sum(spech[ff + Llst, :] * spech[ff - Llst, :].conj(),
-                                       axis=0)) / L
+    sm[0:L // 2, :] = abs(spech[0:L // 2, :]) ** 2
+    sm[-L // 2:, :] = abs(spech[-L // 2:, :]) ** 2
+
+    # calculate s-method for all frequencies at once, one shift at a time
+    f_start = L // 2
+    f_stop = nf - L // 2 - 1
+    smsum = np.zeros_like(sm[f_start:f_stop])
+    for ll in Llst:
+        smsum += spech[f_start + ll:f_stop + ll] * \
+            spech[f_start - ll:f_stop - ll].conj()
+    sm[f_start:f_stop] = 2 * np.real(smsum) / L
 
     # ------compute reassignment-----
-    rtfarray = np.zeros((nfbins / 2, nt))
+    rtfarray = np.zeros((nfbins // 2, nt))
 
     threshold = thresh * np.max(abs(sm))
 
-    for nn in range(nt):
-        for kk in range(nf):
-            if abs(spech[kk, nn]) > threshold:
-                # get center of gravity index in time direction from
-                # spectrogram
-                nhat = int(nn + twspec[kk, nn])
-                nhat = int(min([max([nhat, 1]), nt - 1]))
-                # get center of gravity index in frequency direction from spec
-                khat = int(kk - dwspec[kk, nn])
-                khat = int(np.remainder(np.remainder(khat - 1, nfbins / 2) + nfbins / 2,
-                                        nfbins / 2))
-                rtfarray[khat, nhat] = rtfarray[khat, nhat] + abs(sm[kk, nn])
-            else:
-                rtfarray[kk, nn] = rtfarray[kk, nn] + sm[kk, nn]
+    # move the s-method of each point above the threshold to the center of
+    # gravity of the spectrogram, keep the rest where it is
+    reassign = abs(spech) > threshold
+    khat, nhat = _get_reassignment_index(reassign, twspec, dwspec, nfbins)
+    np.add.at(rtfarray, (khat, nhat), abs(sm[reassign]))
+    rtfarray[~reassign] += sm[~reassign].real
 
     # place values where L cannot be L
-    rtfarray[:L / 2, :] = abs(sm[:L / 2, :])
-    rtfarray[-L / 2:, :] = abs(sm[-L / 2:, :])
+    rtfarray[:L // 2, :] = abs(sm[:L // 2, :])
+    rtfarray[-L // 2:, :] = abs(sm[-L // 2:, :])
 
     # for plotting purposes set anything that is 0 to 1, so that log(1) will
     # plot as zero
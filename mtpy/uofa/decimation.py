@@ -4,7 +4,7 @@
 Decimation for MTpy ts-data (mtd) files
 
 
-- no filtering applied
+- anti-alias filtered (mtpy.processing.instrument.decimate)
 - only integer ratios of orignal/output sampling allowed
 
 """
@@ -13,10 +13,9 @@ Decimation for MTpy ts-data (mtd) files
 import os
 import sys
 import os.path as op
-import numpy as np
-import mtpy.utils.filehandling as MTfh
 import mtpy.utils.exceptions as MTex
-import scipy.signal as ss
+import mtpy.processing.instrument as MTin
+import numpy as np
 
 
 def run():
@@ -63,98 +62,13 @@ def run():
 
     decimation_factor = int(decimation_factor)
 
-    lo_files = os.listdir(inpath)
-
-    lo_files = [i for i in lo_files if op.isfile(op.join(inpath, i))]
-
-    if len(lo_files) == 0:
-        sys.exit(
-            '\n\tERROR - no data files in directory {0} \n'.format(inpath))
-
-    for fn in lo_files:
-        infile = os.path.join(inpath, fn)
-        outfile = os.path.join(outpath, fn)
-
-        try:
-            header = MTfh.read_ts_header(infile)
-        except MTex.MTpyError_ts_data:
-            # no TS data file
-            print('\n\tWARNING - not a valid MTpy TS data file: {0} '.format(infile))
-            header = None
-            # continue
-
-        if header is not None:
-            old_sampling = header['samplingrate']
-            new_sampling = old_sampling / decimation_factor
-
-        try:
-            data = []
-            F = open(infile)
-            for i in F:
-                try:
-                    if i.startswith('#'):
-                        continue
-
-                    data.append(float(i.strip()))
-                except:
-                    continue
-
-            data = np.asarray(data)
-            N = len(data)
-
-        except:
-            print('\tERROR - file does not contain single column data: {0} - SKIPPED'.format(infile))
-            continue
-
-        if header is not None:
-            n_samples = header['nsamples']
-
-        print('Decimating file {0} by factor {1} '.format(infile, decimation_factor))
-
-        if n_samples % decimation_factor != 0:
-            print('\tWarning - decimation of file not continuous due to mismatching decimation factor')
-
-        # to avoid ringing in the downsampled data: use de-meaning, padding,
-        # tapering:
-        padlength = int(0.1 * N)
-        if padlength % decimation_factor != 0:
-            padlength = int(padlength / decimation_factor) * decimation_factor
-
-        meanvalue = np.mean(data)
-        data -= meanvalue
-        prepad = np.ones((padlength)) * data[0]
-        postpad = np.ones((padlength)) * data[-1]
-        padded_data = np.append(prepad, data)
-        padded_data = np.append(padded_data, postpad)
-
-        tapered = taper_data(padded_data)
-
-        filtered = ss.resample(tapered,
-                               int(len(tapered) / decimation_factor),
-                               window='blackman')
-
-        new_padding = padlength / decimation_factor
-        padding_cut = filtered[new_padding:-new_padding]
-
-        new_data = padding_cut - np.mean(padding_cut) + meanvalue
-
-        Fout = open(outfile, 'w')
-
-        if header is not None:
-            header['nsamples'] = len(new_data)
-            header['samplingrate'] = new_sampling
-
-            new_header_line = MTfh.get_ts_header_string(header)
-
-            Fout.write(new_header_line)
-
-        for i in new_data:
-            if i % 1 == 0:
-                Fout.write('{0:d}\n'.format(int(i)))
-            else:
-                Fout.write('{0:.8}\n'.format(i))
-        # np.savetxt(Fout,new_data)
-        Fout.close()
+    print('Decimating files in {0} by factor {1} '.format(inpath, decimation_factor))
+    try:
+        MTin.process_ts_files(inpath, outpath,
+                              decimation_factor=decimation_factor,
+                              recursive=False)
+    except MTex.MTpyError_inputarguments as e:
+        sys.exit('\n\tERROR - {0} \n'.format(e))
 
     print('\nOutput files written to {0}'.format(outpath))
     print('\n...Done\n')
@@ -2,9 +2,9 @@
 
 """
 Fast decimation for MTpy ts-data (mtd) files
-(Quick and dirty)
 
-- no filtering applied
+- anti-alias filtered, files processed on a pool of processes
+  (mtpy.processing.instrument.process_ts_files)
 - only integer ratios of orignal/output sampling allowed
 
 """
@@ -13,9 +13,8 @@ Fast decimation for MTpy ts-data (mtd) files
 import os
 import sys
 import os.path as op
-import numpy as np
-import mtpy.utils.filehandling as MTfh
 import mtpy.utils.exceptions as MTex
+import mtpy.processing.instrument as MTin
 
 
 def run():
@@ -62,107 +61,13 @@ def run():
 
     decimation_factor = int(decimation_factor)
 
-    lo_files = os.listdir(inpath)
-
-    lo_files = [i for i in lo_files if op.isfile(op.join(inpath, i))]
-
-    if len(lo_files) == 0:
-        sys.exit(
-            '\n\tERROR - no data files in directory {0} \n'.format(inpath))
-
-    for fn in lo_files:
-        infile = os.path.join(inpath, fn)
-        outfile = os.path.join(outpath, fn)
-
-        try:
-            header = MTfh.read_ts_header(infile)
-        except MTex.MTpyError_ts_data:
-            # no TS data file
-            print('\n\tWARNING - not a valid MTpy TS data file: {0} '.format(infile))
-            header = None
-            # continue
-
-        if header is not None:
-            old_sampling = header['samplingrate']
-            new_sampling = old_sampling / decimation_factor
-
-        new_data = []
-        try:
-            #new_data = []
-            #old_data = []
-            counter = 1
-            tempdata = 0
-            for line in open(infile):
-                line = line.strip().split()
-                if line[0].startswith('#'):
-                    continue
-                val = float(line[0])
-                tempdata += val
-
-                if counter == 1:
-                    new_data.append(val)  # tempdata/decimation_factor)
-                    tempdata = 0
-                counter += 1
-                if counter == (decimation_factor + 1):
-                    counter = 1
-
-            # if counter != 0:
-            #    new_data.append(tempdata/counter)
-
-        # except:
-
-                # if val%1==0:
-                #    val = int(val)
-                # old_data.append(val)
-
-            #old_data = np.array(old_data)
-
-        except:
-            print('\tERROR - file does not contain single column data: {0} - SKIPPED'.format(infile))
-            continue
-
-        #len_data = len(old_data)
-        if header is not None:
-            n_samples = header['nsamples']
-
-            # if len_data != n_samples:
-            # print '\tWARNING - header shows wrong number of samples: {0}
-            # instead of {1}'.format(n_samples,len_data)
-
-        print('Decimating file {0} by factor {1} '.format(infile, decimation_factor))
-
-        if n_samples % decimation_factor != 0:
-            print('\tWarning - decimation of file not continuous due to mismatching decimation factor')
-
-        #new_data = old_data[::decimation_factor]
-
-        # index = 0
-        # while index < len(new_data):
-        #     old_data_index = index * decimation_factor
-        #     try:
-        #         new_data[index] = np.mean(old_data[old_data_index:old_data_index+decimation_factor])
-        #     except:
-        #         new_data[index] = np.mean(old_data[old_data_index:])
-
-        #     index += 1
-
-        Fout = open(outfile, 'w')
-
-        if header is not None:
-            header['nsamples'] = len(new_data)
-            header['samplingrate'] = new_sampling
-
-            new_header_line = MTfh.get_ts_header_string(header)
-
-            Fout.write(new_header_line)
-
-        for i in new_data:
-            if i % 1 == 0:
-                Fout.write('{0:d}\n'.format(int(i)))
-            else:
-                Fout.write('{0:.8}\n'.format(i))
-        # np.savetxt(Fout,new_data)
-        Fout.close()
+    print('Decimating files in {0} by factor {1} '.format(inpath, decimation_factor))
+    try:
+        MTin.process_ts_files(inpath, outpath,
+                              decimation_factor=decimation_factor,
+                              recursive=False)
+    except MTex.MTpyError_inputarguments as e:
+        sys.exit('\n\tERROR - {0} \n'.format(e))
 
     print('\nOutput files written to {0}'.format(outpath))
     print('\n...Done\n')
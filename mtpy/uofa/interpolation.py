@@ -17,10 +17,10 @@ calibration files (only LEMI coils so far), non evenly sampled data, ...
 
 
 import numpy as np
-import math
-import cmath
 import sys
 
+import mtpy.processing.instrument as MTin
+
 
 def interpolate_instrumentresponse(
         freq, instrument_response, instr_type='lemi'):
@@ -46,11 +46,12 @@ def interpolate_lemi_coils_response(freq, instrument_response):
         response array with LEMI characteristics.
 
         Input:
-        - frequency of interest
+        - frequency of interest or array of frequencies
         - instrument response array (dimension Nx3): frequency, real, imaginary
 
         Output:
-        - complex valued instrument response for the given frequency
+        - complex valued instrument response for the given frequency (array),
+          0 outside the frequency range of the response array
 
         LEMI characteristics:
         * frequencies <0.4 Hz:
@@ -62,72 +63,10 @@ def interpolate_lemi_coils_response(freq, instrument_response):
 
     """
 
-    # find the value closest to the current freq, assume it's lower
-    closest_lower = np.abs(freq - instrument_response[:, 0]).argmin()
-
-    # in case the closest frequency value is not lower but higher,
-    # take the freq value below as lower bound for the interval:
-    if instrument_response[closest_lower, 0] > freq:
-        closest_lower -= 1
-
-    # define the interval:
-    instrfreq1 = instrument_response[closest_lower, 0]
-    instrfreq2 = instrument_response[closest_lower + 1, 0]
-
-    # take the interval values:
-    realval1 = instrument_response[closest_lower, 1]
-    realval2 = instrument_response[closest_lower + 1, 1]
-    imagval1 = instrument_response[closest_lower, 2]
-    imagval2 = instrument_response[closest_lower + 1, 2]
-
-    # for linear interpolation in abs/angle instead of real/imag:
-    absval1 = np.abs(np.complex(realval1, imagval1))
-    phival1 = np.angle(np.complex(realval1, imagval1)) / np.pi * 180
-    absval2 = np.abs(np.complex(realval2, imagval2))
-    phival2 = np.angle(np.complex(realval2, imagval2)) / np.pi * 180
-
-    # interpolate real and imaginary part independently in log-space:
-    logfreq1 = np.log(instrfreq1)
-    logfreq2 = np.log(instrfreq2)
-
-    loginterval = logfreq2 - logfreq1
-    logfreq = np.log(freq)
-    weight = (logfreq2 - logfreq) / loginterval
-
-    # for low frequencies take the log of the values to get into loglog space:
-    if freq <= 0.4:
-        logrealval1 = np.log(realval1)
-        logrealval2 = np.log(realval2)
-        logimagval1 = np.log(imagval1)
-        logimagval2 = np.log(imagval2)
-
-        interpval_real = np.exp(weight * logrealval1 +
-                                (1 - weight) * logrealval2)
-        interpval_imag = np.exp(weight * logimagval1 +
-                                (1 - weight) * logimagval2)
-
-    # nominal range goes up to 1000 Hz
-    elif 0.4 < freq <= 1000:
-        # linear interpolation on res phase instead of real/imag
-        interpval_abs = weight * absval1 + (1 - weight) * absval2
-        interpval_phi = weight * phival1 + (1 - weight) * phival2
-        interpval_real = np.real(
-            cmath.rect(
-                interpval_abs,
-                interpval_phi /
-                180. *
-                np.pi))
-        interpval_imag = np.imag(
-            cmath.rect(
-                interpval_abs,
-                interpval_phi /
-                180. *
-                np.pi))
-
-    else:
-        interpval_real = weight * realval1 + (1 - weight) * realval2
-        interpval_imag = weight * imagval1 + (1 - weight) * imagval2
-
-    interpolated_value = np.complex(interpval_real, interpval_imag)
+    values = MTin.interpolate_response(np.atleast_1d(freq),
+                                       np.asarray(instrument_response),
+                                       'lemi')
+    if np.ndim(freq) == 0:
+        return complex(values[0])
 
-    return interpolated_value
+    return values
@@ -8,11 +8,12 @@
 
 #import gc
 from numpy import *
+import itertools
 import sys
 import os
 import os.path as op
 
-from pyrocko import trace, util, io
+import mtpy.utils.mseed as MTms
 
 #import pdb
 
@@ -118,75 +119,53 @@ def read_timestampfile(indir, prefix):
     return t0, sampling
 
 
-def run(infile, outfn, station, t0, samplingrate, chan='n', nw='', loc=''):
-
-    channels = 'NESW'
-
-    # read in data:
-    data = []
-    print('\t reading file {0} ... '.format(infile))
+def read_columns(infile, idx_ch, chunk_size=2**16):
+    """
+    Read the data of one channel chunk by chunk, from a file with one
+    column per channel (n, e, s, w) or a single column.
+    """
     Fin = open(infile)
-    for line in Fin:
-        if line.strip()[0] == '#':
+    while True:
+        lines = list(itertools.islice(Fin, chunk_size))
+        if len(lines) == 0:
+            break
+        lines = [line for line in lines
+                 if len(line.strip()) > 0 and line.strip()[0] != '#']
+        if len(lines) == 0:
             continue
-        data.append([int(float(i)) for i in line.strip().split()])
+        n_columns = len(lines[0].split())
+        data = array(''.join(lines).split(), dtype=float).reshape(
+            -1, n_columns)
+        if n_columns > idx_ch:
+            data = data[:, idx_ch]
+        else:
+            data = data[:, 0]
+        yield data.astype(int32)
     Fin.close()
-    data = array(data, dtype=int32)
-    # print '...done!'
-
-    stationname = station
-    deltat = 1. / samplingrate
 
-    lo_traces = []
 
-    lo_chans = []
-    try:
-        lo_chans = list(chan.lower())
-    except:
-        lo_chans = ['n']
+def run(infile, outfn, station, t0, samplingrate, chan='n', nw='', loc=''):
 
-    print('\t building MiniSeed trace object(s)...')
-    if len(lo_chans) > 1:
-        try:
-            for c in lo_chans:
-                location = c.upper()
-                idx_ch = channel_dict[c]
-                if idx_ch in [0, 2]:
-                    channel = 'NS'
-                else:
-                    channel = 'EW'
-
-            print('station {1} - channel {0} - location {2}'.format(channel, stationname, location))
-            if idx_ch in [0, 1]:
-                lo_traces.append(trace.Trace(station=stationname, channel=channel,
-                                             location=location, deltat=deltat, tmin=t0, ydata=data[:, idx_ch]))
-            else:
-                # correct for polarity of 'redundant' channels
-                lo_traces.append(trace.Trace(station=stationname, channel=channel,
-                                             location=location, deltat=deltat, tmin=t0, ydata=-data[:, idx_ch]))
-        except:
-            lo_chans = [chan.lower()[0]]
-            lo_traces = []
-
-    if len(lo_chans) == 1:
-        idx_ch = channel_dict[lo_chans[0]]
-        location = channels[idx_ch]
-        if idx_ch in [0, 2]:
-            channel = 'NS'
-        else:
-            channel = 'EW'
+    channels = 'NESW'
 
-        if idx_ch in [2, 3]:
-            data *= -1
+    idx_ch = channel_dict[chan.lower()[0]]
+    location = channels[idx_ch]
+    if idx_ch in [0, 2]:
+        channel = 'NS'
+    else:
+        channel = 'EW'
 
-        lo_traces = [trace.Trace(station=stationname, channel=channel,
-                                 location=location, deltat=deltat, tmin=t0, ydata=data)]
+    stats = {'network': nw, 'station': station, 'location': location,
+             'channel': channel, 'sampling_rate': samplingrate,
+             'starttime': t0}
 
-    # pdb.set_trace()
-    # print '...done!'
+    # correct for polarity of 'redundant' channels
+    chunks = read_columns(infile, idx_ch)
+    if idx_ch in [2, 3]:
+        chunks = (-data for data in chunks)
 
-    print('\t writing file %s ... ' % outfn)
-    io.save(lo_traces, outfn)
+    print('\t converting file {0} to {1} ... '.format(infile, outfn))
+    MTms.write_miniseed(outfn, stats, chunks)
     print('\t ...done')
     return
 
@@ -53,61 +53,53 @@ def concatenate1station650(indir, outfile):
 
     # initialise carrying varibles
     header = False
-    N = None
-    E = None
-    S = None
-    W = None
-    t0 = None
+    last = None
 
     print('Browsing/reading files in %s' % (indir))
 
     # go through files in directory
     for infile in lo_files:
         try:
-            Fin = open(infile)
-            # scan all lines
-            for line in Fin:
-
-                indata = line.strip().split()
-                # 4 channel values are integers
-                indata[:-1] = [int(float(i)) for i in indata[:-1]]
-                # 1 time stamp is high precision float64
-                indata[-1] = np.round(np.float64(indata[-1]), 2)
-
-                if header is False:
-                    # set first values of first file as initial points
-                    N = int(indata[1])
-                    E = int(indata[2])
-                    S = int(indata[3])
-                    W = int(indata[4])
-                    t0 = int(indata[5])
-
-                    headerline = '# %d\t%d\t%d\t%d\t%d\n' % (N, E, S, W, t0)
-
-                    # write to header line
-                    Fout.write(headerline)
-
-                    # one header per file:
-                    header = True
-
-                # define ongoing line entries as differences to values from
-                # line before
-                currentline = '%d\t%d\t%d\t%d\t\n' % (
-                    indata[1] - N, indata[2] - E, indata[3] - S, indata[4] - W)
-                Fout.write(currentline)
-
-                # update carrying variables
-                N = int(indata[1])
-                E = int(indata[2])
-                S = int(indata[3])
-                W = int(indata[4])
-
-            Fin.close()
+            # parse the whole file at once
+            with open(infile, 'rb') as Fin:
+                content = Fin.read().strip()
+            n_columns = len(content.split(b'\n', 1)[0].split())
+            indata = np.array(content.split(), dtype=np.float64).reshape(
+                -1, n_columns)
+            # 4 channel values are integers
+            values = indata[:, 1:5].astype(np.int64)
 
         except:
             print('\tWARNING - could not read data from file: %s' % (infile))
             continue
 
+        if len(values) == 0:
+            continue
+
+        if header is False:
+            # set first values of first file as initial points, 1 time
+            # stamp is high precision float64
+            last = values[0]
+            t0 = int(np.round(indata[0, 5], 2))
+
+            headerline = '# %d\t%d\t%d\t%d\t%d\n' % (
+                last[0], last[1], last[2], last[3], t0)
+
+            # write to header line
+            Fout.write(headerline)
+
+            # one header per file:
+            header = True
+
+        # define ongoing line entries as differences to values from
+        # line before
+        differences = np.diff(np.vstack((last, values)), axis=0)
+        Fout.write(''.join(['%d\t%d\t%d\t%d\t\n' % tuple(line)
+                            for line in differences.tolist()]))
+
+        # update carrying variables
+        last = values[-1]
+
     Fout.close()
 
 
@@ -129,27 +129,24 @@ def convert_ms2ts(indir, outdir, combine=True, invert=False):
             'ERROR - Cannot set up output directory {0}'.format(outpath))
     lo_indirs = [op.join(indir, i) for i in lo_indirs]
 
+    lo_infiles = []
+    lo_outfiles = []
     for idx_ipath, inpath in enumerate(lo_indirs):
-        lo_infiles = [i for i in os.listdir(inpath) if
-                      op.isfile(op.abspath(op.join(inpath, i)))]
-
-        lo_outfiles = [op.abspath(op.join(lo_outdirs[idx_ipath], i)) for
-                       i in lo_infiles]
-
-        lo_infiles = [op.abspath(op.join(indir, inpath, i))
-                      for i in lo_infiles]
-
-        for idx_fn, fn in enumerate(lo_infiles):
-
-            print('reading file {0}'.format(fn))
-            try:
-                outfn = MTms.quadrupol_convertfile_miniseed2ts(fn,
-                                                               lo_outfiles[idx_fn], combine, invert)
-
-                print('wrote file(s) {0}'.format(outfn))
-            except:
-                print('Warning - file {0} is not in valid miniseed  format!!!'.format(fn))
-                continue
+        lo_fn = [i for i in os.listdir(inpath) if
+                 op.isfile(op.abspath(op.join(inpath, i)))]
+
+        lo_outfiles.extend([op.abspath(op.join(lo_outdirs[idx_ipath], i)) for
+                            i in lo_fn])
+        lo_infiles.extend([op.abspath(op.join(indir, inpath, i))
+                           for i in lo_fn])
+
+    # files are converted in parallel, a window of data at a time
+    lo_written = MTms.convert_quadrupol_files(lo_infiles, lo_outfiles,
+                                              combine=combine, invert=invert,
+                                              legacy_header=True)
+    for outfn in lo_written:
+        if len(outfn) > 0:
+            print('wrote file(s) {0}'.format(outfn))
 
 
 if __name__ == '__main__':
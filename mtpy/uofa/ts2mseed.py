@@ -29,8 +29,6 @@ import fnmatch
 
 import mtpy.utils.exceptions as MTex
 import mtpy.utils.mseed as MTms
-import mtpy.utils.filehandling as MTfh
-#reload(MTfh)
 #reload(MTex)
 #reload(MTms)
 
@@ -112,29 +110,29 @@ def main():
         raise MTex.MTpyError_inputarguments(
             'ERROR - Cannot set up output directory {0}'.format(outpath))
 
+    lo_infiles = []
+    lo_outfiles = []
     for idx_ipath, inpath in enumerate(lo_indirs):
-        lo_infiles = [
-            i for i in os.listdir(inpath) if op.isfile(
-                op.abspath(
-                    op.join(
-                        inpath,
-                        i)))]
-        lo_outfiles = [
-            op.abspath(
-                op.join(
-                    lo_outdirs[idx_ipath],
-                    i)) for i in lo_infiles]
-        lo_infiles = [op.abspath(op.join(inpath, i)) for i in lo_infiles]
-
-        for idx_fn, fn in enumerate(lo_infiles):
-
-            if MTfh.validate_ts_file(fn) is False:
-                print('Warning - MT ts data file {0} is not valid (check header)!!!'.format(fn))
-                # continue
-            print('reading file {0}'.format(fn))
-            outfn = MTms.convertfile_ts2miniseed(
-                fn, lo_outfiles[idx_fn], location=location, network=network)
+        lo_fn = [i for i in os.listdir(inpath) if
+                 op.isfile(op.abspath(op.join(inpath, i)))]
+
+        for fn in lo_fn:
+            infile = op.abspath(op.join(inpath, fn))
+            try:
+                MTms.read_ts_header(infile)
+            except:
+                print('Warning - MT ts data file {0} is not valid (check header)!!!'.format(infile))
+                continue
+            lo_infiles.append(infile)
+            lo_outfiles.append(op.abspath(op.join(lo_outdirs[idx_ipath], fn)))
+
+    # files are converted in parallel, chunk by chunk
+    lo_written = MTms.convert_ts_files(lo_infiles, lo_outfiles,
+                                       location=location, network=network)
+    for outfn in lo_written:
+        if len(outfn) > 0:
             print('wrote file {0}'.format(outfn))
 
+
 if __name__ == '__main__':
     main()
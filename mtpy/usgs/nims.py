@@ -24,8 +24,8 @@ import pandas as pd
 import logging
 
 from mtpy.core import ts
+from mtpy.utils import instrumentation
 
-from matplotlib import pyplot as plt
 
 ### setup logger
 logging.basicConfig(filename='ReadNIMSData.log', 
@@ -1110,6 +1110,7 @@ class NIMS(NIMSHeader):
         
         return return_info_array, return_data_array, duplicate_list
         
+    @instrumentation.instrument('nims.NIMS.read_nims')
     def read_nims(self, fn=None):
         """
         Read NIMS DATA.BIN file.
@@ -1149,7 +1150,6 @@ class NIMS(NIMSHeader):
         if fn is not None:
             self.fn = fn
 
-        st = datetime.datetime.now()
         ### read in header information and get the location of end of header
         self.read_header(self.fn)
         
@@ -1158,7 +1158,8 @@ class NIMS(NIMSHeader):
         with open(self.fn, 'rb') as fid:
             fid.seek(self.data_start_seek)
             data_str = fid.read()
-            
+        instrumentation.add_bytes(self.data_start_seek + len(data_str))
+
         ### read in full string as unsigned integers
         data = np.frombuffer(data_str, dtype=np.uint8)
         
@@ -1235,9 +1236,6 @@ class NIMS(NIMSHeader):
                                                        self.gps_list)
         ### align data 
         self.ts = self.align_data(data_array, self.stamps) 
-        et = datetime.datetime.now()
-        
-        print('--> Took {0:.2f} seconds'.format((et-st).total_seconds()))
 
     def _get_first_gps_stamp(self, stamps):
         """
@@ -1420,7 +1418,8 @@ class NIMS(NIMSHeader):
         """
         plot time series
         """
-        
+        from matplotlib import pyplot as plt
+
         fig = plt.figure(fig_num)
         ax_list = []
         n = len(order)
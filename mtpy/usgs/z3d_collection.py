@@ -19,6 +19,7 @@ import pandas as pd
 from pathlib import Path
 
 from mtpy.usgs import zen
+from mtpy.usgs import zen_calibration
 from mtpy.core import ts as mtts
 
 # =============================================================================
@@ -156,26 +157,10 @@ class Z3DCollection(object):
 
     def get_calibrations(self, calibration_path):
         """
-        get coil calibrations
+        get coil calibrations, the directory is only listed again if it
+        changed
         """
-        if calibration_path is None:
-            print('ERROR: Calibration path is None')
-            return {}
-
-        if not isinstance(calibration_path, Path):
-            calibration_path = Path(calibration_path)
-
-        if not calibration_path.exists():
-            print('WARNING: could not find calibration path: '
-                  '{0}'.format(calibration_path))
-            return {}
-
-        calibration_dict = {}
-        for cal_fn in calibration_path.glob('*.csv'):
-            cal_num = cal_fn.stem
-            calibration_dict[cal_num] = cal_fn
-
-        return calibration_dict
+        return zen_calibration.get_calibration_dict(calibration_path)
 
     def get_z3d_info(self, z3d_fn_list, calibration_path=None):
         """
@@ -22,8 +22,8 @@ import string
 import shutil
 import numpy as np
 
-import mtpy.imaging.plotspectrogram as plotspectrogram
 import mtpy.core.ts as mtts
+from mtpy.utils import instrumentation
 
 try:
     import win32api
@@ -1094,6 +1094,7 @@ class Zen3D(object):
             self._read_metadata(fid=file_id)
 
     #======================================
+    @instrumentation.instrument('zen.Zen3D.read_z3d')
     def read_z3d(self, Z3Dfn=None):
         """
         read in z3d file and populate attributes accordingly
@@ -1114,10 +1115,10 @@ class Zen3D(object):
             self.fn = Z3Dfn
 
         #print(u'------- Reading {0} ---------'.format(self.fn))
-        st = time.time()
 
         #get the file size to get an estimate of how many data points there are
         file_size = os.path.getsize(self.fn)
+        instrumentation.add_bytes(file_size)
 
         # using the with statement works in Python versions 2.7 or higher
         # the added benefit of the with statement is that it will close the
@@ -1194,10 +1195,6 @@ class Zen3D(object):
         print('    found {0} GPS time stamps'.format(self.gps_stamps.shape[0]))
         print('    found {0} data points'.format(self.ts_obj.ts.data.size))
 
-        # time it
-        et = time.time()
-        print('INFO: --> Reading data took: {0:.3f} seconds'.format(et-st))
-
     #=================================================
     def _fill_ts_obj(self, ts_data):
         """
@@ -1596,7 +1593,8 @@ class Zen3D(object):
 
     #==================================================
     def plot_spectrogram(self, time_window=2**8, time_step=2**6, s_window=11,
-                         frequency_window=1, n_freq_bins=2**9, sigma_L=None):
+                         frequency_window=1, n_freq_bins=2**9, sigma_L=None,
+                         n_average=None):
         """
         plot the spectrogram of the data using the S-method
         Arguments:
@@ -1617,6 +1615,11 @@ class Zen3D(object):
             **n_freq_bins** : int
                             (should be power of 2 and equal or larger than nh)
                             number of frequency bins
+            **n_average** : int
+                            number of windows to average, the S-method is
+                            then computed block by block, use this for long
+                            records like a full day at 4096 Hz
+                            *default* is None
         Returns:
         ---------
             **ptf** : mtpy.imaging.plotspectrogram.PlotTF object
@@ -1625,6 +1628,11 @@ class Zen3D(object):
         kwargs = {'nh':time_window, 'tstep':time_step, 'L':s_window,
                   'ng':frequency_window, 'df':self.df, 'nfbins':n_freq_bins,
                   'sigmaL': sigma_L}
+        if n_average is not None:
+            kwargs['tf_type'] = 'spectrogram'
+            kwargs['n_average'] = n_average
+        import mtpy.imaging.plotspectrogram as plotspectrogram
+
         ptf = plotspectrogram.PlotTF(self.ts_obj.ts.data.to_numpy(), **kwargs)
 
         return ptf
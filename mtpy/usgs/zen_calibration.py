@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+====================
+Zen Calibration
+====================
+    * Cache of coil calibrations and of the coil and board responses
+      interpolated onto the frequencies of an FFT
+    * Frequency domain calibration of many channels at once
+
+Coil calibration files are .csv files named by the coil number, for
+instance 2884.csv, with columns frequency (Hz), amplitude (mV/nT) and
+phase (milliradians), the same as the coil calibration in the metadata of a
+Z3D file.  The board calibration comes from the Z3D metadata.
+
+Calibration files are read once per coil and the response of a coil or a
+board is computed once per sampling rate and FFT length.  A response is
+removed by dividing the spectra of the data by it, for all channels of a
+window at once::
+
+    >>> from mtpy.usgs import zen_calibration
+    >>> cal_cache = zen_calibration.CalibrationCache(r"/home/mt/calibrations")
+    >>> response = np.array([cal_cache.get_response(256, 4096, coil_num=cc)
+    ...                      for cc in ['2884', '2885', '2886']])
+    >>> # data is (n_channels, n_samples) in mV, spectra in nT
+    >>> spectra = zen_calibration.calibrate_windows(data, response, 4096)
+"""
+# =============================================================================
+# Imports
+# =============================================================================
+import os
+from pathlib import Path
+
+import numpy as np
+
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+# phases of coil and board calibrations are in milliradians
+PHASE_SCALE = 1E-3
+
+_calibration_dict_cache = {}
+
+
+# =============================================================================
+# read calibrations
+# =============================================================================
+class CalibrationError(Exception):
+    pass
+
+
+def get_calibration_dict(calibration_path):
+    """
+    find the coil calibration files in a directory, the directory is only
+    listed again if it changed
+
+    :param calibration_path: path to calibration files
+    :type calibration_path: string or Path
+
+    :return: dictionary of coil number: Path to calibration file
+    :rtype: dictionary
+    """
+    if calibration_path is None:
+        print('ERROR: Calibration path is None')
+        return {}
+
+    if not isinstance(calibration_path, Path):
+        calibration_path = Path(calibration_path)
+
+    if not calibration_path.exists():
+        print('WARNING: could not find calibration path: '
+              '{0}'.format(calibration_path))
+        return {}
+
+    key = str(calibration_path.resolve())
+    mtime = os.stat(key).st_mtime_ns
+    if key not in _calibration_dict_cache or \
+            _calibration_dict_cache[key][0] != mtime:
+        calibration_dict = {}
+        for cal_fn in calibration_path.glob('*.csv'):
+            calibration_dict[cal_fn.stem] = cal_fn
+        _calibration_dict_cache[key] = (mtime, calibration_dict)
+
+    return dict(_calibration_dict_cache[key][1])
+
+
+def read_coil_calibration(cal_fn):
+    """
+    read a coil calibration file
+
+    :param cal_fn: full path to the .csv calibration file with columns
+                   frequency, amplitude, phase, lines that do not start with
+                   a number are skipped
+    :type cal_fn: string or Path
+
+    :return: calibration with fields frequency, amplitude, phase
+    :rtype: np.recarray
+    """
+    cal_list = []
+    with open(cal_fn, 'r') as fid:
+        for line in fid:
+            line_list = line.replace(',', ' ').split()
+            if len(line_list) < 3:
+                continue
+            try:
+                cal_list.append([float(value) for value in line_list[0:3]])
+            except ValueError:
+                continue
+    if len(cal_list) == 0:
+        raise CalibrationError('No calibration found in {0}'.format(cal_fn))
+
+    return np.core.records.fromrecords(cal_list,
+                                       names='frequency, amplitude, phase')
+
+
+def interpolate_response(calibration, freq):
+    """
+    complex response of a calibration at the frequencies freq, amplitude and
+    phase are interpolated linearly in log frequency and kept constant
+    outside the calibrated band
+
+    :param calibration: calibration with fields frequency, amplitude, phase
+    :type calibration: np.recarray
+
+    :param freq: frequencies (Hz)
+    :type freq: np.ndarray
+
+    :return: complex response at freq
+    :rtype: np.ndarray
+    """
+    cal_freq = np.asarray(calibration['frequency'], dtype=float)
+    order = np.argsort(cal_freq)
+    cal_log_freq = np.log10(cal_freq[order])
+
+    freq = np.asarray(freq, dtype=float)
+    log_freq = np.full(freq.shape, cal_log_freq[0])
+    positive = freq > 0
+    log_freq[positive] = np.log10(freq[positive])
+
+    amplitude = np.interp(log_freq, cal_log_freq,
+                          np.asarray(calibration['amplitude'],
+                                     dtype=float)[order])
+    phase = np.interp(log_freq, cal_log_freq,
+                      np.asarray(calibration['phase'], dtype=float)[order])
+    return amplitude * np.exp(1j * phase * PHASE_SCALE)
+
+
+# =============================================================================
+# cache
+# =============================================================================
+class CalibrationCache(object):
+    """
+    Cache of coil calibrations and of interpolated coil and board responses.
+
+    Coil calibrations are read from the calibration path the first time a
+    coil is used, or can be added from the metadata of a Z3D file.
+    Responses are kept by coil or board and by sampling rate and FFT length.
+
+    :param calibration_path: path to coil calibration files
+    :type calibration_path: string or Path
+    """
+
+    def __init__(self, calibration_path=None):
+        self._coil_cal_dict = {}
+        self._response_dict = {}
+        self.calibration_dict = {}
+        self._calibration_path = None
+        self.calibration_path = calibration_path
+
+    @property
+    def calibration_path(self):
+        return self._calibration_path
+
+    @calibration_path.setter
+    def calibration_path(self, calibration_path):
+        self._calibration_path = calibration_path
+        if calibration_path is None:
+            self.calibration_dict = {}
+        else:
+            self.calibration_dict = get_calibration_dict(calibration_path)
+
+    def clear(self):
+        """
+        forget all calibrations and responses
+        """
+        self._coil_cal_dict = {}
+        self._response_dict = {}
+
+    def add_coil_calibration(self, coil_num, coil_cal):
+        """
+        add the calibration of a coil, for instance Zen3D.metadata.coil_cal
+
+        :param coil_num: coil number
+        :type coil_num: string
+
+        :param coil_cal: calibration with fields frequency, amplitude, phase
+        :type coil_cal: np.recarray
+        """
+        coil_num = str(coil_num)
+        self._coil_cal_dict[coil_num] = coil_cal
+        for key in [kk for kk in self._response_dict
+                    if kk[0:2] == ('coil', coil_num)]:
+            del self._response_dict[key]
+
+    def get_coil_calibration(self, coil_num):
+        """
+        calibration of a coil, read from its calibration file once
+
+        :return: calibration with fields frequency, amplitude, phase
+        :rtype: np.recarray
+        """
+        coil_num = str(coil_num)
+        if coil_num not in self._coil_cal_dict:
+            try:
+                cal_fn = self.calibration_dict[coil_num]
+            except KeyError:
+                raise CalibrationError('Could not find a calibration for '
+                                       'coil {0}'.format(coil_num))
+            _logger.debug('Reading coil calibration %s', cal_fn)
+            self._coil_cal_dict[coil_num] = read_coil_calibration(cal_fn)
+        return self._coil_cal_dict[coil_num]
+
+    @staticmethod
+    def get_fft_freq(sampling_rate, n_fft):
+        """ frequencies of np.fft.rfft of n_fft samples """
+        return np.fft.rfftfreq(int(n_fft), 1. / float(sampling_rate))
+
+    def get_coil_response(self, coil_num, sampling_rate, n_fft):
+        """
+        response of a coil at the frequencies of an FFT of n_fft samples
+
+        :return: complex response, np.ndarray(n_fft // 2 + 1)
+        """
+        key = ('coil', str(coil_num), float(sampling_rate), int(n_fft))
+        if key not in self._response_dict:
+            self._response_dict[key] = interpolate_response(
+                self.get_coil_calibration(coil_num),
+                self.get_fft_freq(sampling_rate, n_fft))
+        return self._response_dict[key]
+
+    def get_board_response(self, board_id, board_cal, sampling_rate, n_fft):
+        """
+        response of a channel board at the frequencies of an FFT of n_fft
+        samples.  The board calibration made at the sampling rate is used if
+        there is one.
+
+        :param board_id: name of the board, responses are kept by board_id
+        :type board_id: string
+
+        :param board_cal: calibration with fields frequency, rate, amplitude,
+                          phase, for instance Zen3D.metadata.board_cal
+        :type board_cal: np.recarray
+
+        :return: complex response, np.ndarray(n_fft // 2 + 1)
+        """
+        key = ('board', str(board_id), float(sampling_rate), int(n_fft))
+        if key not in self._response_dict:
+            rate_cal = board_cal
+            if 'rate' in board_cal.dtype.names:
+                rate_index = np.nonzero(np.asarray(board_cal['rate'],
+                                                   dtype=float) ==
+                                        float(sampling_rate))[0]
+                if rate_index.size > 0:
+                    rate_cal = board_cal[rate_index]
+            self._response_dict[key] = interpolate_response(
+                rate_cal, self.get_fft_freq(sampling_rate, n_fft))
+        return self._response_dict[key]
+
+    def get_response(self, sampling_rate, n_fft, coil_num=None,
+                     board_id=None, board_cal=None):
+        """
+        response of a channel, the product of the coil response and the
+        board response, ones for a channel without either
+
+        :return: complex response, np.ndarray(n_fft // 2 + 1)
+        """
+        response = np.ones(int(n_fft) // 2 + 1, dtype=complex)
+        if coil_num is not None:
+            response = response * self.get_coil_response(coil_num,
+                                                         sampling_rate, n_fft)
+        if board_cal is not None:
+            response = response * self.get_board_response(board_id, board_cal,
+                                                          sampling_rate,
+                                                          n_fft)
+        return response
+
+    def get_z3d_response(self, z3d_obj, n_fft, board=True):
+        """
+        response of the channel of a Z3D file, the coil calibration of the
+        Z3D metadata is used if there is no calibration file for the coil
+
+        :param z3d_obj: Z3D object with metadata read
+        :type z3d_obj: mtpy.usgs.zen.Zen3D
+
+        :param n_fft: length of the FFT
+        :type n_fft: int
+
+        :param board: include the board response
+        :type board: [ True | False ]
+
+        :return: complex response, np.ndarray(n_fft // 2 + 1)
+        """
+        coil_num = None
+        if z3d_obj.component in ['hx', 'hy', 'hz']:
+            coil_num = str(z3d_obj.coil_num)
+            if coil_num not in self._coil_cal_dict and \
+                    coil_num not in self.calibration_dict:
+                coil_cal = z3d_obj.metadata.coil_cal
+                if coil_cal is None or len(coil_cal) == 0:
+                    raise CalibrationError('No calibration for coil '
+                                           '{0}'.format(coil_num))
+                self.add_coil_calibration(coil_num, coil_cal)
+
+        board_id = None
+        board_cal = None
+        if board and z3d_obj.metadata.board_cal is not None and \
+                len(z3d_obj.metadata.board_cal) > 0:
+            board_cal = z3d_obj.metadata.board_cal
+            board_id = '{0}_{1}'.format(z3d_obj.header.box_serial,
+                                        z3d_obj.header.channel)
+
+        return self.get_response(z3d_obj.df, n_fft, coil_num=coil_num,
+                                 board_id=board_id, board_cal=board_cal)
+
+
+# =============================================================================
+# frequency domain calibration
+# =============================================================================
+def _check_response(response):
+    """ response with zeros replaced by ones so they can be divided by """
+    response = np.asarray(response)
+    return np.where(np.abs(response) > 0, response, 1.)
+
+
+def calibrate_spectra(spectra, response):
+    """
+    remove a response from spectra
+
+    :param spectra: spectra, the last axis is frequency
+    :type spectra: np.ndarray(..., n_freq)
+
+    :param response: complex response that broadcasts against spectra, for
+                     instance (n_channels, 1, n_freq) for spectra of
+                     (n_channels, n_windows, n_freq)
+    :type response: np.ndarray
+
+    :return: calibrated spectra
+    """
+    return spectra / _check_response(response)
+
+
+def calibrate_windows(data, response, window_length, step=None,
+                      window='hann'):
+    """
+    calibrated spectra of windows of many channels at once
+
+    :param data: time series, one channel per row
+    :type data: np.ndarray(n_channels, n_samples)
+
+    :param response: response of each channel at the frequencies of an FFT
+                     of window_length samples
+    :type response: np.ndarray(n_channels, window_length // 2 + 1)
+
+    :param window_length: number of samples in a window
+    :type window_length: int
+
+    :param step: number of samples between the start of windows, *default*
+                 is window_length
+    :type step: int
+
+    :param window: taper of each window [ 'hann' | None ]
+    :type window: string
+
+    :return: spectra of the windows with the response removed
+    :rtype: np.ndarray(n_channels, n_windows, window_length // 2 + 1)
+    """
+    data = np.atleast_2d(data)
+    window_length = int(window_length)
+    step = window_length if step is None else int(step)
+    n_windows = (data.shape[1] - window_length) // step + 1
+    if n_windows < 1:
+        raise CalibrationError('Time series of {0} samples is shorter than a '
+                               'window of {1}'.format(data.shape[1],
+                                                      window_length))
+
+    windows = np.lib.stride_tricks.as_strided(
+        data, shape=(data.shape[0], n_windows, window_length),
+        strides=(data.strides[0], data.strides[1] * step, data.strides[1]),
+        writeable=False)
+    if window == 'hann':
+        windows = windows * np.hanning(window_length)
+    elif window is not None:
+        raise CalibrationError('Window {0} not supported'.format(window))
+
+    spectra = np.fft.rfft(windows, axis=-1)
+    return calibrate_spectra(spectra,
+                             np.asarray(response)[:, np.newaxis, :])
+
+
+def remove_response(data, response):
+    """
+    remove responses from whole time series of many channels with one FFT of
+    all channels
+
+    :param data: time series, one channel per row
+    :type data: np.ndarray(n_channels, n_samples)
+
+    :param response: response of each channel at the frequencies of an FFT
+                     of n_samples
+    :type response: np.ndarray(n_channels, n_samples // 2 + 1)
+
+    :return: calibrated time series
+    :rtype: np.ndarray(n_channels, n_samples)
+    """
+    data = np.atleast_2d(data)
+    spectra = np.fft.rfft(data, axis=-1)
+    return np.fft.irfft(calibrate_spectra(spectra, response),
+                        n=data.shape[-1], axis=-1)
+
+
+def calibrate_z3d_list(z3d_obj_list, cal_cache, board=True):
+    """
+    remove the coil and board responses from the time series of Z3D files,
+    channels with the same sampling rate and length are calibrated together.
+    The time series should be in mV, magnetic channels are returned in nT.
+
+    :param z3d_obj_list: Z3D objects with the time series read
+    :type z3d_obj_list: list of mtpy.usgs.zen.Zen3D
+
+    :param cal_cache: calibration cache
+    :type cal_cache: CalibrationCache
+
+    :param board: include the board response
+    :type board: [ True | False ]
+    """
+    groups = {}
+    for z3d_obj in z3d_obj_list:
+        key = (float(z3d_obj.df), z3d_obj.ts_obj.ts.data.size)
+        groups.setdefault(key, []).append(z3d_obj)
+
+    for (sampling_rate, n_samples), group in groups.items():
+        data = np.array([np.asarray(z3d_obj.ts_obj.ts.data, dtype=float)
+                         for z3d_obj in group])
+        response = np.array([cal_cache.get_z3d_response(z3d_obj, n_samples,
+                                                        board=board)
+                             for z3d_obj in group])
+        calibrated = remove_response(data, response)
+        for z3d_obj, cal_data in zip(group, calibrated):
+            z3d_obj.ts_obj.ts.data = cal_data
+            if z3d_obj.component in ['hx', 'hy', 'hz']:
+                z3d_obj.ts_obj.units = 'nT'
@@ -23,6 +23,7 @@ import mtpy.utils.exceptions as mtex
 import mtpy.imaging.plotnresponses as plotnresponses
 import mtpy.imaging.plotresponse as plotresponse
 import mtpy.usgs.zen as zen
+import mtpy.usgs.zen_calibration as zen_calibration
 import mtpy.core.edi as mtedi
 import mtpy.core.ts as mtts
 from mtpy.usgs import z3d_collection as zc
@@ -395,22 +396,12 @@ class Z3D2EDI(object):
         :return: sets calibration_dict internally for use later
         """
         self.calibration_path = calibration_path
-        if self.calibration_path is None:
-            print('ERROR: Calibration path is None')
-            self.calibration_dict = {}
-
-        if not isinstance(self.calibration_path, Path):
+        if self.calibration_path is not None and \
+                not isinstance(self.calibration_path, Path):
             self.calibration_path = Path(self.calibration_path)
 
-        if not self.calibration_path.exists():
-            print('WARNING: could not find calibration path: '
-                  '{0}'.format(self.calibration_path))
-            self.calibration_dict = {}
-
-        self.calibration_dict = {}
-        for cal_fn in self.calibration_path.glob('*.csv'):
-            cal_num = cal_fn.stem
-            self.calibration_dict[cal_num] = cal_fn
+        self.calibration_dict = zen_calibration.get_calibration_dict(
+            self.calibration_path)
 
     def convert_z3d_to_mtts(self, station_z3d_dir, rr_station_z3d_dir=None,
                             use_blocks_dict=None, overwrite=False,
@@ -24,6 +24,7 @@ import mtpy.utils.gis_tools as gis_tools
 import mtpy.utils.configfile as mtcf
 import mtpy.core.edi as mtedi
 import mtpy.usgs.zen as zen
+from mtpy.utils import parallel
 
 #==============================================================================
 datetime_fmt = '%Y-%m-%d,%H:%M:%S'
@@ -1511,6 +1512,175 @@ class ZongeMTEdit():
         print('Wrote mtedit config file to {0}'.format(self.cfg_fn))
         
     
+#==============================================================================
+# read avg files output from mtedit
+#==============================================================================
+avg_components = ['zxx', 'zxy', 'zyx', 'zyy', 'tzx', 'tzy']
+avg_comp_index = {'zxx':(0,0), 'zxy':(0,1), 'zyx':(1,0), 'zyy':(1,1),
+                  'tzx':(0,0), 'tzy':(0,1)}
+avg_info_keys = ['Skp', 'Freq', 'E.mag', 'B.mag', 'Z.mag', 'Z.phz',
+                 'ARes.mag', 'ARes.%err', 'Z.perr', 'Coher', 'FC.NUse',
+                 'FC.NTry']
+avg_info_dtype = np.dtype([(kk.lower(), tt) 
+                           for kk, tt in zip(avg_info_keys,
+                                             [int, float, float, float, float,
+                                              float, float, float, float,
+                                              float, int, int])])
+
+
+def read_avg_components(avg_fn):
+    """
+    read the header and the data of each component of an .avg file output
+    by MTEdit, the data of a component are converted in one go.
+
+    Arguments:
+    ----------
+        **avg_fn** : string
+                     full path to .avg file
+
+    Outputs:
+    ---------
+        **header_dict** : dictionary
+                          header values keyed by attribute name of
+                          ZongeMTAvg, e.g. GPS_Lat
+
+        **comp_dict** : dictionary
+                        structured array of dtype avg_info_dtype for each
+                        component in the file, e.g. 'zxy'
+    """
+    with open(avg_fn, 'r') as fid:
+        alines = fid.readlines()
+
+    header_dict = {}
+    comp_lines = {}
+    akey = None
+    for aline in alines:
+        if aline.find('=') > 0 and aline.find('$') == 0:
+            alst = [aa.strip() for aa in aline.strip().split('=')]
+            if alst[1].lower() in avg_components:
+                akey = alst[1].lower()
+                comp_lines[akey] = []
+            else:
+                hkey = alst[0][1:].replace('.', '_')
+                if hkey.lower().find('length'):
+                    alst[1] = alst[1][0:-1]
+                try:
+                    header_dict[hkey] = float(alst[1])
+                except ValueError:
+                    header_dict[hkey] = alst[1]
+        elif aline[0] in 'S$':
+            pass
+        # data line
+        elif len(aline) > 2 and akey is not None:
+            comp_lines[akey].append(aline)
+
+    comp_dict = {}
+    for akey, lines in comp_lines.items():
+        values = np.array(''.join(lines).replace('*', '0.50').replace(',', ' ').split(),
+                          dtype=float).reshape(len(lines), -1)
+        comp_arr = np.zeros(len(lines), dtype=avg_info_dtype)
+        for cc, ckey in enumerate(avg_info_dtype.names):
+            comp_arr[ckey] = values[:, cc]
+        comp_dict[akey] = comp_arr
+
+    return header_dict, comp_dict
+
+
+def avg_to_complex(zmag, zphase, z_coordinate='down'):
+    """
+    convert magnitude and phase (milliradians) output by MTEdit into real
+    and imaginary parts
+    """
+    if type(zmag) is np.ndarray:
+        assert len(zmag) == len(zphase)
+
+    if z_coordinate == 'up':
+        zreal = zmag*np.cos((zphase/1000)%np.pi)
+        zimag = zmag*np.sin((zphase/1000)%np.pi)
+    else:
+        zreal = zmag*np.cos((zphase/1000))
+        zimag = zmag*np.sin((zphase/1000))
+
+    return zreal, zimag
+
+
+def align_avg_components(comp_dict, z_coordinate='down', freq=None):
+    """
+    fill impedance and tipper arrays from the components of .avg files.
+
+    Each component is put at the index of its frequencies on a common
+    frequency axis, entries a component has no data for are 0 with an
+    error of 1.
+
+    Arguments:
+    ----------
+        **comp_dict** : dictionary
+                        structured arrays of the components, see
+                        read_avg_components
+
+        **z_coordinate** : [ 'down' | 'up' ]
+                           with 'up' zyx and the tipper change sign
+
+        **freq** : np.ndarray
+                   frequencies of the arrays, *default* is all frequencies
+                   of the components sorted
+
+    Outputs:
+    ---------
+        **freq**, **z** (nf, 2, 2), **z_err**, **tipper** (nf, 1, 2),
+        **tipper_err** : np.ndarrays, tipper and tipper_err are None if
+                         there is no tipper component
+    """
+    comp_freq = dict([(ckey, comp_dict[ckey]['freq'] != 0)
+                      for ckey in comp_dict if ckey in avg_components])
+    if freq is None:
+        freq = np.unique(np.concatenate(
+            [comp_dict[ckey]['freq'][nonzero]
+             for ckey, nonzero in comp_freq.items()] + [np.zeros(0)]))
+    freq = np.asarray(freq, dtype=float)
+    nf = len(freq)
+
+    z = np.zeros((nf, 2, 2), dtype='complex')
+    z_err = np.ones((nf, 2, 2))
+    tipper = None
+    tipper_err = None
+    if 'tzx' in comp_freq or 'tzy' in comp_freq:
+        tipper = np.zeros((nf, 1, 2), dtype='complex')
+        tipper_err = np.ones((nf, 1, 2))
+
+    for ckey, nonzero in comp_freq.items():
+        comp_arr = comp_dict[ckey][nonzero]
+        # index of each frequency of the component on the common axis
+        index = np.clip(np.searchsorted(freq, comp_arr['freq']), 0,
+                        max(nf - 1, 0))
+        found = (nf > 0) & (freq[index] == comp_arr['freq'])
+        index = index[found]
+        comp_arr = comp_arr[found]
+
+        zr, zi = avg_to_complex(comp_arr['z.mag'], comp_arr['z.phz'],
+                                z_coordinate)
+        value = zr + zi*1j
+        ii, jj = avg_comp_index[ckey]
+        if ckey[0] == 'z':
+            if ckey == 'zyx' and z_coordinate == 'up':
+                value = -1*value
+            z[index, ii, jj] = value
+            z_err[index, ii, jj] = comp_arr['ares.%err']*.005
+        else:
+            if z_coordinate == 'up':
+                value = -1*value
+            tipper[index, ii, jj] = value
+            tipper_err[index, ii, jj] = comp_arr['ares.%err']*.05*np.abs(value)
+
+    z = np.nan_to_num(z)
+    z_err = np.nan_to_num(z_err)
+    if tipper is not None:
+        tipper = np.nan_to_num(tipper)
+        tipper_err = np.nan_to_num(tipper_err)
+
+    return freq, z, z_err, tipper, tipper_err
+
+
 #==============================================================================
 # deal with avg files output from mtedit
 #==============================================================================    
@@ -1640,61 +1810,29 @@ class ZongeMTAvg():
         
     def read_avg_file(self, avg_fn):
         """
-        read in average file        
+        read in average file, the components are added to the ones read
+        before, so the .avg files of the electric channels of a station
+        can be read one after the other
         """
         
         if not os.path.isfile(avg_fn):
             raise IOError('{0} does not exist, check file'.format(avg_fn))
         
         self.comp = os.path.basename(avg_fn)[0]
-        with open(avg_fn, 'r') as fid:
-            alines = fid.readlines()
-        self.comp_flag = {'zxx':False, 'zxy':False, 'zyx':False, 'zyy':False,
-                          'tzx':False, 'tzy':False}
-        
+        header_dict, comp_dict = read_avg_components(avg_fn)
+        for akey, avalue in header_dict.items():
+            self.__dict__[akey] = avalue
+
         if not self.comp_dict:
-            # check to see if all 4 components are in the .avg file
-            if len(alines) > 140:  
-                self.comp_dict = dict([(ckey, np.zeros(int(len(alines)/4), 
-                                                       dtype=self.info_dtype))
-                                        for ckey in list(self.comp_flag.keys())])
-            # if there are only 2
-            else:
-                self.comp_dict = dict([(ckey, np.zeros(int(len(alines)/2), 
-                                                       dtype=self.info_dtype))
-                                        for ckey in list(self.comp_flag.keys())])
-        self.comp_lst_z = []
-        self.comp_lst_tip = []
-        ii = 0                        
-        for aline in alines:
-            if aline.find('=') > 0 and aline.find('$') == 0:
-                alst = [aa.strip() for aa in aline.strip().split('=')]
-                if alst[1].lower() in list(self.comp_flag.keys()):
-                    akey = alst[1].lower()
-                    self.comp_flag[akey] = True
-                    if akey[0] == 'z':
-                        self.comp_lst_z.append(akey)
-                    elif akey[0] == 't':
-                        self.comp_lst_tip.append(akey)
-                    ii = 0
-                else:
-                    akey = alst[0][1:].replace('.', '_')
-                    if akey.lower().find('length'):
-                        alst[1] = alst[1][0:-1]
-                    try:
-                        self.__dict__[akey] = float(alst[1])
-                    except ValueError:
-                        self.__dict__[akey] = alst[1]
-                    #self.header_dict[alst[0][1:]] = al            print(aline)st[1]
-            elif aline[0] == 'S':
-                pass
-            # read the data line.
-            elif len(aline) > 2:
-                aline = aline.replace('*', '0.50')
-                alst = [aa.strip() for aa in aline.strip().split(',')]
-                for cc, ckey in enumerate(self.info_keys):
-                    self.comp_dict[akey][ii][ckey.lower()] = alst[cc]
-                ii += 1
+            self.comp_dict = {}
+        self.comp_dict.update(comp_dict)
+
+        self.comp_flag = dict([(ckey, ckey in self.comp_dict)
+                               for ckey in avg_components])
+        self.comp_lst_z = [ckey for ckey in ['zxx', 'zxy', 'zyx', 'zyy']
+                           if ckey in comp_dict]
+        self.comp_lst_tip = [ckey for ckey in ['tzx', 'tzy']
+                             if ckey in comp_dict]
      
         self.fill_Z()
         self.fill_Tipper()
@@ -1708,17 +1846,7 @@ class ZongeMTAvg():
         
         """
         
-        if type(zmag) is np.ndarray:
-            assert len(zmag) == len(zphase)
-        
-        if self.z_coordinate == 'up':
-            zreal = zmag*np.cos((zphase/1000)%np.pi)
-            zimag = zmag*np.sin((zphase/1000)%np.pi)
-        else:
-            zreal = zmag*np.cos((zphase/1000))
-            zimag = zmag*np.sin((zphase/1000))
-        
-        return zreal, zimag
+        return avg_to_complex(zmag, zphase, self.z_coordinate)
         
     def _match_freq(self, freq_list1, freq_list2):
         """
@@ -1726,111 +1854,21 @@ class ZongeMTAvg():
         values are index of where that frequency should be in the array of z
         and tipper
         """
-#        
-#        if set(freq_list1).issubset(freq_list2) == True:
-#            return dict([(freq, ff) for ff, freq in enumerate(freq_list1)])
-#        else:
-        comb_freq_list = list(set(freq_list1).intersection(freq_list2))+\
-                      list(set(freq_list1).symmetric_difference(freq_list2))
-        comb_freq_list.sort()
+        comb_freq_list = np.union1d(freq_list1, freq_list2)
         return dict([(freq, ff) for ff, freq in enumerate(comb_freq_list)])
         
     def fill_Z(self):
         """
-        create Z array with data
+        create Z array with data of all components read so far, on the
+        combined frequencies of the components
         """
-        flst = np.array([len(np.nonzero(self.comp_dict[comp]['freq'])[0])
-                         for comp in self.comp_lst_z])
-        
-        nz = flst.max()
-        freq = self.comp_dict[self.comp_lst_z[np.where(flst==nz)[0][0]]]['freq']
-        freq = freq[np.nonzero(freq)]
-
-        if self.nfreq:
-            self.freq_dict_y = dict([(ff, nn) for nn, ff in enumerate(freq)])
-            #get new frequency dictionary to match index values
-            new_freq_dict = self._match_freq(sorted(self.freq_dict_x.keys()), 
-                                             freq)
-            
-            new_nz = len(list(new_freq_dict.keys()))
-            self.freq_dict = new_freq_dict
-            #fill z according to index values
-            new_Z = mtz.Z()
-            new_Z.freq = sorted(new_freq_dict.keys())
-            new_Z.z = np.zeros((new_nz, 2, 2), dtype='complex')
-            new_Z.z_err = np.ones((new_nz, 2, 2))
-            nzx, nzy, nzz = self.Z.z.shape
-            
-            
-            
-            #need to fill the new array with the old values, but they
-            # need to be stored in the correct position
-            clst = ['zxx', 'zxy', 'zyx', 'zyy']
-            for cc in self.comp_lst_z:
-                clst.remove(cc)
-            for ikey in clst:
-                for kk, zz in enumerate(self.Z.z):
-                    ii, jj = self.comp_index[ikey]
-                    if zz[ii, jj].real != 0.0:
-                        #index for new Z array
-                        ll = self.freq_dict[self.comp_dict[ikey]['freq'][kk]]
-                        
-                        #index for old Z array
-                        try:
-                            mm = self.freq_dict_x[self.comp_dict[ikey]['freq'][kk]]
-
-                            new_Z.z[ll] = self.Z.z[mm]
-                            new_Z.z_err[ll] = self.Z.z_err[mm]
-                        except KeyError:
-                            pass
-                        
-            #fill z with values from comp_dict
-            for ikey in self.comp_lst_z:
-                ii, jj = self.comp_index[ikey]
-
-                zr, zi = self.convert2complex(self.comp_dict[ikey]['z.mag'][:nz].copy(),
-                                              self.comp_dict[ikey]['z.phz'][:nz].copy())
-                for kk, zzr, zzi in zip(list(range(len(zr))), zr, zi):
-                    ll = self.freq_dict[self.comp_dict[ikey]['freq'][kk]]
-                    if ikey.find('yx') > 0 and self.z_coordinate == 'up':
-                        new_Z.z[ll, ii, jj] = -1*(zzr+zzi*1j)
-                    else:
-                        new_Z.z[ll, ii, jj] = zzr+zzi*1j
-                    new_Z.z_err[ll,ii, jj] = \
-                                self.comp_dict[ikey]['ares.%err'][kk]*.005
-                
-            
-            self.Z = new_Z
-        
-        #fill for the first time
-        else:
-            self.nfreq = nz
-            self.freq_dict_x = dict([(ff, nn) for nn, ff in enumerate(freq)])
-            #fill z with values
-            z = np.zeros((nz, 2, 2), dtype='complex')
-            z_err = np.ones((nz, 2, 2))
-            
-            for ikey in self.comp_lst_z:
-                ii, jj = self.comp_index[ikey]
-                    
-                zr, zi = self.convert2complex(self.comp_dict[ikey]['z.mag'][:nz].copy(),
-                                              self.comp_dict[ikey]['z.phz'][:nz].copy())
-                
-                if ikey.find('yx') > 0 and self.z_coordinate == 'up':
-                    z[:, ii, jj] = -1*(zr+zi*1j)
-                else:
-                    z[:, ii, jj] = zr+zi*1j
-
-                z_err[:,ii, jj] = self.comp_dict[ikey]['ares.%err'][:nz]*.005 
+        freq, z, z_err, tipper, tipper_err = align_avg_components(
+                                                     self.comp_dict,
+                                                     self.z_coordinate)
 
-            self.Z.freq = freq
-            self.Z.z = z
-            self.Z.z_err = z_err
-            
-            
-        self.Z.z = np.nan_to_num(self.Z.z)
-        self.Z.z_err = np.nan_to_num(self.Z.z_err)
-                
+        self.nfreq = len(freq)
+        self.freq_dict = dict([(ff, nn) for nn, ff in enumerate(freq)])
+        self.Z = mtz.Z(z_array=z, z_err_array=z_err, freq=freq)
                 
     def fill_Tipper(self):
         """
@@ -1841,92 +1879,15 @@ class ZongeMTAvg():
             print('No Tipper found')
             return
             
-        flst = np.array([len(np.nonzero(self.comp_dict[comp]['freq'])[0])
-                         for comp in self.comp_lst_tip])
-        nz = flst.max()
-        freq = self.comp_dict[self.comp_lst_tip[np.where(flst==nz)[0][0]]]['freq']
-        freq = freq[np.nonzero(freq)]
-        if self.nfreq_tipper and self.Tipper.tipper is not None:
-            #get new frequency dictionary to match index values
-            new_freq_dict = self._match_freq(sorted(self.freq_dict.keys()), 
-                                             freq)
-            
-            new_nz = len(list(new_freq_dict.keys()))
-            #fill z according to index values
-            new_Tipper = mtz.Tipper()
-            new_Tipper.tipper = np.zeros((new_nz, 1, 2), dtype='complex')
-            new_Tipper.tipper_err = np.ones((new_nz, 1, 2))
-            
-            self.freq_dict = new_freq_dict
-            
-            #need to fill the new array with the old values, but they
-            # need to be stored in the correct position
-            for ikey in ['tzx', 'tzy']:
-                for kk, tt in enumerate(self.Tipper.tipper):
-                    ii, jj = self.comp_index[ikey]
-                    if tt[ii, jj].real != 0.0:
-                        #index for new tipper array
-                        ll = self.freq_dict[self.comp_dict[ikey]['freq'][kk]]
-                        
-                        #index for old tipper array
-                        try:
-                            mm = self.freq_dict_x[self.comp_dict[ikey]['freq'][kk]]
+        freq, z, z_err, tipper, tipper_err = align_avg_components(
+                                                     self.comp_dict,
+                                                     self.z_coordinate)
 
-                            new_Tipper.tipper[ll] = self.Tipper.tipper[mm]
-                            new_Tipper.tipper_err[ll] = self.Tipper.tipper_err[mm]
-                        except KeyError:
-                            pass
-
-                        
-            #fill z with values from comp_dict
-            for ikey in self.comp_lst_tip:
-                ii, jj = self.comp_index[ikey]
-
-                tr, ti = self.convert2complex(self.comp_dict[ikey]['z.mag'][:nz],
-                                              self.comp_dict[ikey]['z.phz'][:nz])
-                for kk, tzr, tzi in zip(list(range(len(tr))), tr, ti):
-                    ll = self.freq_dict[self.comp_dict[ikey]['freq'][kk]]
-                    
-                    if self.z_coordinate == 'up':
-                        new_Tipper.tipper[ll, ii, jj] = -1*(tzr+tzi*1j)
-                    else:
-                        new_Tipper.tipper[ll, ii, jj] = tzr+tzi*1j
-                    #error estimation
-                    new_Tipper.tipper_err[ll,ii, jj] += \
-                                self.comp_dict[ikey]['ares.%err'][kk]*\
-                                                .05*np.sqrt(tzr**2+tzi**2)
-                
-            new_Tipper.freq = sorted(self.freq_dict.keys())
-            self.Tipper = new_Tipper
-           
-        else:
-            self.nfreq_tipper = nz
-            self.freq_dict_x = dict([(ff, nn) for nn, ff in enumerate(freq)])
-            #fill z with values
-            tipper = np.zeros((nz, 1, 2), dtype='complex')
-            tipper_err = np.ones((nz, 1, 2))
-            
-            for ikey in self.comp_lst_tip:
-                ii, jj = self.comp_index[ikey]
-                    
-                tzr, tzi = self.convert2complex(self.comp_dict[ikey]['z.mag'][:nz],
-                                              self.comp_dict[ikey]['z.phz'][:nz])
-                
-                if self.z_coordinate == 'up':
-                    tipper[:, ii, jj] = -1*(tzr+tzi*1j)
-                else:
-                    tipper[:, ii, jj] = tzr+tzi*1j
-                tipper_err[:, ii, jj] = self.comp_dict[ikey]['ares.%err'][:nz]*\
-                                                     .05*np.sqrt(tzr**2+tzi**2)
-                    
-            self.Tipper.freq = sorted(self.freq_dict_x.keys())
-            self.Tipper.tipper = tipper
-            self.Tipper.tipper_err = tipper_err
-            
-            
-        self.Tipper.tipper = np.nan_to_num(self.Tipper.tipper)
-        self.Tipper.tipper_err = np.nan_to_num(self.Tipper.tipper_err)
+        self.nfreq_tipper = len(freq)
+        self.Tipper = mtz.Tipper(tipper_array=tipper,
+                                 tipper_err_array=tipper_err, freq=freq)
         
+
     def write_edi(self, avg_fn, station, survey_dict=None, 
                   survey_cfg_file=None,  mtft_cfg_file=None, 
                   mtedit_cfg_file=r"c:\MinGW32-xy\Peacock\zen\bin\mtedit.cfg", 
@@ -1969,58 +1930,23 @@ class ZongeMTAvg():
                       
         """
         
+        save_dir = os.path.dirname(avg_fn)
         if save_path is None:
-            save_dir = os.path.dirname(avg_fn)
             save_path = os.path.join(save_dir, station+'.edi')
         
-        #create an mtedi instance
-        self.edi = mtedi.Edi()
-        self.edi.Z = self.Z
-        self.edi.Tipper = self.Tipper
-
         #read in avg file
         if os.path.isfile(avg_fn) == True:
             self.read_avg_file(avg_fn)
-            self.edi.Z = self.Z
-            self.edi.Tipper = self.Tipper
         else:
             raise NameError('Could not find {0}'.format(avg_fn))
         
         #read in survey file
-        survey_dict = None
+        sdict = {}
         if survey_cfg_file is not None:
             sdict = mtcf.read_survey_configfile(survey_cfg_file)
-            
-        try:
-            survey_dict = sdict[station.upper()]
-        except KeyError:
-            if survey_dict is not None:
-                try:
-                    survey_dict['station']
-                except KeyError:
-                    try:
-                        survey_dict['station_name']
-                    except KeyError:
-                        raise KeyError('Could not find station information in'
-                                       ', check inputs')
-            else:
-                raise KeyError('Could not find {0} in survey file'.format(
-                                station.upper()))
-                                 
-        #get remote reference information if desired
-        if rrstation:
-            try:
-                rrsurvey_dict = sdict[rrstation.upper()]
-                survey_dict['rr_station'] = rrsurvey_dict['station']
-                survey_dict['rr_station_elevation'] = rrsurvey_dict['elevation']
-                survey_dict['rr_station_latitude'] = gis_tools.assert_lat_value(
-                                               rrsurvey_dict.pop('latitude',0.0))
-                survey_dict['rr_station_longitude'] = gis_tools.assert_lon_value(
-                                               rrsurvey_dict.pop('longitude',0.0))
-            except KeyError:
-                print('Could not find station information for remote reference')
-        else:
-            rrsurvey_dict = None
+        survey_dict, rrsurvey_dict = self.get_survey_dicts(station, sdict,
+                                                           survey_dict,
+                                                           rrstation)
             
         #read in mtft24.cfg file
         if mtft_cfg_file is None:
@@ -2043,7 +1969,121 @@ class ZongeMTAvg():
             mtedit_dict = zmtedit.meta_dict
         else:
             mtedit_dict = None
+
+        self.make_edi(station, survey_dict, rrsurvey_dict=rrsurvey_dict,
+                      mtft_dict=mtft_dict, mtedit_dict=mtedit_dict)
+            
+        #============ WRITE EDI FILE ==========================================
+        edi_fn = self.edi.write_edi_file(new_edi_fn=save_path)
+        
+        print('Wrote .edi file to {0}'.format(edi_fn))
+        
+        if copy_path is not None:
+            copy_edi_fn = os.path.join(copy_path, os.path.basename(edi_fn))
+            if not os.path.exists(copy_path):
+                os.mkdir(copy_path)
+            shutil.copy(edi_fn, copy_edi_fn)
+            print('Copied {0} to {1}'.format(edi_fn, copy_edi_fn))
+        
+        return edi_fn
+        
+    def get_survey_dicts(self, station, sdict, survey_dict=None,
+                         rrstation=None):
+        """
+        survey information of a station and its remote reference from the
+        dictionary of a survey configuration file.
+
+        A station not in sdict uses survey_dict, or without that the GPS
+        location of the .avg file.  The returned dictionaries are copies.
+
+        Arguments:
+        ----------
+            **station** : string
+                          station name
+
+            **sdict** : dictionary
+                        stations of a survey file, see
+                        mtpy.utils.configfile.read_survey_configfile
+
+            **survey_dict** : dictionary
+                              survey parameters of the station if it is not
+                              in sdict
+
+            **rrstation** : string
+                            remote reference station name
+
+        Outputs:
+        ---------
+            **survey_dict**, **rrsurvey_dict** : dictionaries, rrsurvey_dict
+                                                 is None without remote
+                                                 reference
+        """
+        if station.upper() in sdict:
+            survey_dict = dict(sdict[station.upper()])
+        elif survey_dict is not None:
+            survey_dict = dict(survey_dict)
+            if 'station' not in survey_dict and \
+               'station_name' not in survey_dict:
+                raise KeyError('Could not find station information in'
+                               ', check inputs')
+        else:
+            survey_dict = {'station': station,
+                           'latitude': gis_tools.assert_lat_value(self.GPS_Lat),
+                           'longitude': gis_tools.assert_lon_value(self.GPS_Lon)}
+                                 
+        #get remote reference information if desired
+        rrsurvey_dict = None
+        if rrstation:
+            try:
+                rrsurvey_dict = dict(sdict[rrstation.upper()])
+                survey_dict['rr_station'] = rrsurvey_dict['station']
+                survey_dict['rr_station_elevation'] = rrsurvey_dict['elevation']
+                survey_dict['rr_station_latitude'] = gis_tools.assert_lat_value(
+                                               rrsurvey_dict.pop('latitude',0.0))
+                survey_dict['rr_station_longitude'] = gis_tools.assert_lon_value(
+                                               rrsurvey_dict.pop('longitude',0.0))
+            except KeyError:
+                print('Could not find station information for remote reference')
             
+        return survey_dict, rrsurvey_dict
+
+    def make_edi(self, station, survey_dict, rrsurvey_dict=None,
+                 mtft_dict=None, mtedit_dict=None):
+        """
+        make an mtpy.core.edi.Edi of Z and Tipper with the survey and
+        processing information, it is set to edi.
+
+        Arguments:
+        ----------
+            **station** : string
+                          station name
+
+            **survey_dict** : dictionary
+                              survey parameters of the station, see
+                              get_survey_dicts
+
+            **rrsurvey_dict** : dictionary
+                                survey parameters of the remote reference
+
+            **mtft_dict** : dictionary
+                            meta data of the mtft24.cfg file
+
+            **mtedit_dict** : dictionary
+                              meta data of the mtedit.cfg file
+
+        Outputs:
+        ---------
+            **edi** : mtpy.core.edi.Edi
+        """
+        survey_dict = dict(survey_dict)
+        if rrsurvey_dict is not None:
+            rrsurvey_dict = dict(rrsurvey_dict)
+
+        #create an mtedi instance
+        self.edi = mtedi.Edi()
+        self.edi.Z = self.Z
+        self.edi.Tipper = self.Tipper
+
         #----------------HEAD BLOCK------------------
         #from survey dict get information
 
@@ -2268,22 +2308,9 @@ class ZongeMTAvg():
         
         #----------------------FREQUENCY BLOCK---------------------------------
         self.edi.freq = self.Z.freq
-        
-            
-        #============ WRITE EDI FILE ==========================================
-        edi_fn = self.edi.write_edi_file(new_edi_fn=save_path)
-        
-        print('Wrote .edi file to {0}'.format(edi_fn))
-        
-        if copy_path is not None:
-            copy_edi_fn = os.path.join(copy_path, os.path.basename(edi_fn))
-            if not os.path.exists(copy_path):
-                os.mkdir(copy_path)
-            shutil.copy(edi_fn, copy_edi_fn)
-            print('Copied {0} to {1}'.format(edi_fn, copy_edi_fn))
-        
-        return edi_fn
-        
+
+        return self.edi
+
     def plot_mt_response(self, avg_fn, **kwargs):
         """
         plot an mtv file
@@ -2308,357 +2335,17 @@ class ZongeMTAvg():
                   save_path=None, rrstation=None, 
                   copy_path=r"d:\Peacock\MTData\EDI_Files", avg_ext='.avg'):
         """
-        write an edi file from the .avg files
+        write an edi file from the .avg files, see write_edi
         
-        Arguments:
-        ----------
-            **fnx** : string (full path to electric north file)
-                      file for Zxx, Zxy
-                      
-            **fny** : string (full path to electric east file)
-                      file for Zyx, Zyy
-            
-            **survey_dict** : dictionary
-                              dictionary containing the survey parameters
-                              such as lat, lon, elevation, date, etc.
-                              
-            **survey_cfg_file** : string (full path to survey file)
-                              file contains all the important information 
-                              about the setup of the station, input file if
-                              survey_dict is None.  This is created by 
-                              mtpy.configfile
-                              
-            **mtft_cfg_file** : string (full path to mtft24.cfg file)
-                               this file contains information on how the
-                               Fourier coefficients were calculated
-                               
-            **mtedit_cfg_file** : string (full path to MTEdit.cfg file)
-                                  this file contains information on how 
-                                  the transfer functions were estimated
-            
-            **save_path** : string (full path or directory to where .edi file 
-                                    will be saved)
-                                    
-        Outputs:
-        ---------
-            **edi_fn** : string (full path to .edi file)
-                      
-                      
-                      
+        To convert many stations use write_edi_files.
         """
         
-        if save_path is None:
-            save_dir = os.path.dirname(avg_fn)
-            save_path = os.path.join(save_dir, station+'.edi')
-        
-        #create an mtedi instance
-        self.edi = mtedi.Edi()
-        self.edi.Z = self.Z
-        self.edi.Tipper = self.Tipper
-        
-        if os.path.isfile(avg_fn) == True:
-            self.read_avg_file(avg_fn)
-            self.edi.Z = self.Z
-            self.edi.Tipper = self.Tipper
-
-        #read in survey file
-        survey_dict = {}
-        survey_dict['latitude'] = gis_tools.assert_lat_value(self.GPS_Lat)
-        survey_dict['longitude'] = gis_tools.assert_lon_value( self.GPS_Lon)
-        survey_dict['elevation'] = gis_tools.assert_elevation_value(self.Rx_Length)
-        survey_dict['station'] = station
-        if survey_cfg_file is not None:
-            sdict = mtcf.read_survey_configfile(survey_cfg_file)
-            
-            try:
-                survey_dict = sdict[station.upper()]
-            except KeyError:
-                if survey_dict is not None:
-                    try:
-                        survey_dict['station']
-                    except KeyError:
-                        try:
-                            survey_dict['station_name']
-                        except KeyError:
-                            print('Could not find station information in'
-                                           ', check inputs')
-                                 
-        #get remote reference information if desired
-        if rrstation:
-            try:
-                rrsurvey_dict = sdict[rrstation.upper()]
-                survey_dict['rr_station'] = rrsurvey_dict['station']
-                survey_dict['rr_station_elevation'] = rrsurvey_dict['elevation']
-                survey_dict['rr_station_latitude'] = gis_tools.assert_lat_value(
-                                               rrsurvey_dict.pop('latitude',0.0))
-                survey_dict['rr_station_longitude'] = gis_tools.assert_lon_value(
-                                               rrsurvey_dict.pop('longitude',0.0))
-            except KeyError:
-                print('Could not find station information for remote reference')
-        else:
-            rrsurvey_dict = None
-            
-        #read in mtft24.cfg file
-        if mtft_cfg_file is None:
-            try:
-                mtft_cfg_file = os.path.join(save_dir, 'mtft24.cfg')
-                zmtft = ZongeMTFT()
-                zmtft.read_cfg(mtft_cfg_file)
-                mtft_dict = zmtft.meta_dict
-            except:
-                mtft_dict = None
-        else:
-            zmtft = ZongeMTFT()
-            zmtft.read_cfg(mtft_cfg_file)
-            mtft_dict = zmtft.meta_dict
-            
-        #read in mtedit.cfg file
-        if mtedit_cfg_file:
-            zmtedit = ZongeMTEdit()
-            zmtedit.read_config(mtedit_cfg_file)
-            mtedit_dict = zmtedit.meta_dict
-        else:
-            mtedit_dict = None
-            
-        #----------------HEAD BLOCK------------------
-        #from survey dict get information
-        head_dict = {}
-
-        #--> data id
-        try:
-            head_dict['dataid'] = survey_dict['station']
-        except KeyError:
-            head_dict['dataid'] = station
-            
-        #--> acquired by
-        head_dict['acqby'] = survey_dict.pop('network','')
-        
-        #--> file by
-        head_dict['fileby'] = survey_dict.pop('network','')
-        
-        #--> acquired date
-        head_dict['acqdate'] = survey_dict.pop('date', 
-                                    time.strftime('%Y-%m-%d',time.localtime()))
-        
-        #--> prospect
-        head_dict['loc'] = survey_dict.pop('location', '')
-        
-        #--> latitude
-        head_dict['lat'] = gis_tools.assert_lat_value(survey_dict.pop('latitude',
-                                                                      0.0))
-        
-        #--> longitude
-        head_dict['long'] = gis_tools.assert_lon_value(survey_dict.pop('longitude',
-                                                                       0.0))
-        
-        #--> elevation
-        head_dict['elev'] = survey_dict.pop('elevation', 0.0)
-        
-        #--> set header dict as attribute of edi
-        self.edi.head = head_dict
-       
-       #-----------------INFO BLOCK---------------------------
-        info_dict = {}
-        info_dict['max lines'] = 1000
-        
-        #--> put the rest of the survey parameters in the info block
-        for skey in list(survey_dict.keys()):
-            info_dict[skey] = survey_dict[skey]
-        
-        #--> put parameters about how fourier coefficients were found
-        if mtft_dict:
-            for mkey in list(mtft_dict.keys()):
-                if mkey == 'setup_lst' or \
-                   mkey.lower() == 'mtft.tsplot.chnrange':
-                    pass
-                else:
-                    info_dict[mkey] = mtft_dict[mkey]
-        
-        #--> put parameters about how transfer function was found
-        if mtedit_dict:
-            for mkey in list(mtedit_dict.keys()):
-                info_dict[mkey] = mtedit_dict[mkey]
-        
-        #--> set info dict as attribute of edi
-        self.edi.info_dict = info_dict
-                
-        #----------------DEFINE MEASUREMENT BLOCK------------------
-        definemeas_dict = {}
-        
-        definemeas_dict['maxchan'] = 5
-        definemeas_dict['maxrun'] = 999
-        definemeas_dict['maxmeas'] = 99999
-        try:
-            definemeas_dict['units'] = mtedit_dict['unit.length']
-        except (TypeError, KeyError):
-            definemeas_dict['units'] = 'm'
-        definemeas_dict['reftypy'] = 'cartesian'
-        definemeas_dict['reflat'] = head_dict['lat']
-        definemeas_dict['reflon'] = head_dict['long']
-        definemeas_dict['refelev'] = head_dict['elev']
-        
-        #--> set definemeas as attribure of edi
-        self.edi.definemeas = definemeas_dict
-        
-        #------------------HMEAS_EMEAS BLOCK--------------------------
-        hemeas_lst = []
-        if mtft_dict:
-            chn_lst = mtft_dict['setup_lst'][0]['Chn.Cmp']
-            chn_id = mtft_dict['setup_lst'][0]['Chn.ID']
-            chn_len_lst = mtft_dict['setup_lst'][0]['Chn.Length']
-            
-        else:
-            chn_lst = ['hx', 'hy', 'hz', 'ex', 'ey']
-            chn_id = [1, 2, 3, 4, 5]
-            chn_len_lst = [100]*5
-            
-        chn_id_dict = dict([(comp.lower(), (comp.lower(), cid, clen)) 
-                            for comp, cid, clen in zip(chn_lst, chn_id, 
-                                                       chn_len_lst)])
-        
-        #--> hx component                
-        try:
-            hxazm = survey_dict['b_xaxis_azimuth']
-        except KeyError:
-            hxazm = 0
-        try:
-            hemeas_lst.append(['HMEAS', 
-                               'ID={0}'.format(chn_id_dict['hx'][1]), 
-                               'CHTYPE={0}'.format(chn_id_dict['hx'][0].upper()), 
-                               'X=0', 
-                               'Y=0', 
-                               'AZM={0}'.format(hxazm),
-                               ''])
-        except KeyError:
-            hemeas_lst.append(['HMEAS', 
-                               'ID={0}'.format(1), 
-                               'CHTYPE={0}'.format('HX'), 
-                               'X=0', 
-                               'Y=0', 
-                               'AZM={0}'.format(hxazm),
-                               ''])
-            
-        #--> hy component
-        try:
-            hyazm = survey_dict['b_yaxis_azimuth']
-        except KeyError:
-            hyazm = 90
-        try:
-            hemeas_lst.append(['HMEAS', 
-                               'ID={0}'.format(chn_id_dict['hy'][1]), 
-                               'CHTYPE={0}'.format(chn_id_dict['hy'][0].upper()), 
-                               'X=0', 
-                               'Y=0', 
-                               'AZM={0}'.format(hxazm),
-                               ''])
-        except KeyError:
-            hemeas_lst.append(['HMEAS', 
-                               'ID={0}'.format(1), 
-                               'CHTYPE={0}'.format('HY'), 
-                               'X=0', 
-                               'Y=0', 
-                               'AZM={0}'.format(hxazm),
-                               ''])
-        #--> ex component
-        try:
-            hemeas_lst.append(['EMEAS', 
-                               'ID={0}'.format(chn_id_dict['ex'][1]), 
-                               'CHTYPE={0}'.format(chn_id_dict['ex'][0].upper()), 
-                               'X=0', 
-                               'Y=0', 
-                               'X2={0}'.format(chn_id_dict['ex'][2]),
-                               'Y2=0'])
-        except KeyError:
-            hemeas_lst.append(['EMEAS', 
-                               'ID={0}'.format(1), 
-                               'CHTYPE={0}'.format('EX'), 
-                               'X=0', 
-                               'Y=0', 
-                               'X2={0}'.format(100),
-                               'Y2=0'])
-                           
-        #--> ey component
-        try:
-            hemeas_lst.append(['EMEAS', 
-                               'ID={0}'.format(chn_id_dict['ey'][1]), 
-                               'CHTYPE={0}'.format(chn_id_dict['ey'][0].upper()), 
-                               'X=0', 
-                               'Y=0', 
-                               'X2=0',
-                               'Y2={0}'.format(chn_id_dict['ey'][2])])
-        except KeyError:
-            hemeas_lst.append(['EMEAS', 
-                               'ID={0}'.format(1), 
-                               'CHTYPE={0}'.format('EY'), 
-                               'X=0', 
-                               'Y=0', 
-                               'X2=0',
-                               'Y2={0}'.format(100)])
-                           
-        #--> remote reference 
-        if rrsurvey_dict:
-            hxid = rrsurvey_dict.pop('hx', 6)
-            hyid = rrsurvey_dict.pop('hy', 7)
-            hxazm = rrsurvey_dict.pop('b_xaxis_azimuth', 0)
-            hyazm = rrsurvey_dict.pop('b_xaxis_azimuth', 90)
-        else:
-            hxid =  6
-            hyid =  7
-            hxazm = 0
-            hyazm = 90
-                
-        #--> rhx component
-        hemeas_lst.append(['HMEAS', 
-                           'ID={0}'.format(hxid), 
-                           'CHTYPE={0}'.format('rhx'.upper()), 
-                           'X=0', 
-                           'Y=0', 
-                           'AZM={0}'.format(hxazm),
-                           ''])
-        #--> rhy component
-        hemeas_lst.append(['HMEAS', 
-                           'ID={0}'.format(hyid), 
-                           'CHTYPE={0}'.format('rhy'.upper()), 
-                           'X=0', 
-                           'Y=0', 
-                           'AZM={0}'.format(hyazm),
-                           ''])
-        hmstring_lst = []
-        for hm in hemeas_lst:
-            hmstring_lst.append(' '.join(hm))
-        #--> set hemeas as attribute of edi
-        self.edi.hmeas_emeas = hmstring_lst
-        
-        #----------------------MTSECT-----------------------------------------
-        mtsect_dict = {}
-        mtsect_dict['sectid'] = station
-        mtsect_dict['nfreq'] = len(self.Z.freq)
-        for chn, chnid in zip(chn_lst, chn_id):
-            mtsect_dict[chn] = chnid
-        
-        #--> set mtsect as attribure of edi
-        self.edi.mtsect = mtsect_dict
-        
-        #----------------------ZROT BLOCK--------------------------------------
-        self.edi.zrot = np.zeros(len(self.edi.Z.z))
-        
-        #----------------------FREQUENCY BLOCK---------------------------------
-        self.edi.freq = self.Z.freq
-        
-            
-        #============ WRITE EDI FILE ==========================================
-        edi_fn = self.edi.write_edi_file(save_path)
-        
-        print('Wrote .edi file to {0}'.format(edi_fn))
-        
-        if copy_path is not None:
-            copy_edi_fn = os.path.join(copy_path, os.path.basename(edi_fn))
-            if not os.path.exists(copy_path):
-                os.mkdir(copy_path)
-            shutil.copy(edi_fn, copy_edi_fn)
-            print('Copied {0} to {1}'.format(edi_fn, copy_edi_fn))
-        
-        return edi_fn
+        return self.write_edi(avg_fn, station, survey_dict=survey_dict,
+                              survey_cfg_file=survey_cfg_file,
+                              mtft_cfg_file=mtft_cfg_file,
+                              mtedit_cfg_file=mtedit_cfg_file,
+                              save_path=save_path, rrstation=rrstation,
+                              copy_path=copy_path, avg_ext=avg_ext)
         
             
             
@@ -2688,3 +2375,230 @@ class ZongeMTAvg():
 
     
     
+
+#==============================================================================
+# read many avg files and write edi files in parallel
+#==============================================================================
+def _read_station_avg(avg_fn_lst):
+    """
+    header and components of the .avg files of one station, components of
+    later files replace the ones of earlier files
+    """
+    header_dict = {}
+    comp_dict = {}
+    for avg_fn in avg_fn_lst:
+        if not os.path.isfile(avg_fn):
+            raise IOError('{0} does not exist, check file'.format(avg_fn))
+        avg_header, avg_comp = read_avg_components(avg_fn)
+        header_dict.update(avg_header)
+        comp_dict.update(avg_comp)
+
+    return header_dict, comp_dict
+
+
+def read_avg_files(avg_dict, z_coordinate='down', num_workers=None):
+    """
+    read the .avg files of many stations into stacked arrays.
+
+    The files are parsed on a pool of processes, the data of all stations
+    are put on the union of their frequencies with align_avg_components.
+
+    Arguments:
+    ----------
+        **avg_dict** : dictionary
+                       keys are station names, values are lists of the .avg
+                       files of the station (e.g. one for ex and one for ey)
+
+        **z_coordinate** : [ 'down' | 'up' ]
+                           see align_avg_components
+
+        **num_workers** : int
+                          number of processes, *default* is the number of
+                          cpus.  With 1 the files are read in this process.
+
+    Outputs:
+    ---------
+        **avg_data** : dictionary with
+
+            ============== ===================================================
+            Key            Description
+            ============== ===================================================
+            station        np.ndarray (ns) of the station names, sorted
+            freq           np.ndarray (nf) of all frequencies, sorted
+            z              np.ndarray (ns, nf, 2, 2) of impedances
+            z_err          np.ndarray (ns, nf, 2, 2) of impedance errors
+            tipper         np.ndarray (ns, nf, 1, 2) of tippers
+            tipper_err     np.ndarray (ns, nf, 1, 2) of tipper errors
+            has_data       np.ndarray (ns, nf) True where a station has data
+            header         list (ns) of the .avg header dictionaries
+            ============== ===================================================
+
+            Entries without data are 0 with an error of 1.
+
+    :Example: ::
+
+        >>> import mtpy.usgs.zonge as zonge
+        >>> avg_data = zonge.read_avg_files({'mt01':[r"/home/mt01/ex.avg",
+        >>>                                          r"/home/mt01/ey.avg"]})
+        >>> avg_data['z'][0]
+    """
+    station_lst = sorted(avg_dict.keys())
+    station_data = parallel.map_tasks(_read_station_avg,
+                                      [(avg_dict[station],)
+                                       for station in station_lst],
+                                      num_workers=num_workers)
+
+    lo_freq = []
+    for header_dict, comp_dict in station_data:
+        lo_freq += [comp_arr['freq'][comp_arr['freq'] != 0]
+                    for comp_arr in comp_dict.values()]
+    freq = np.unique(np.concatenate(lo_freq + [np.zeros(0)]))
+
+    ns = len(station_lst)
+    nf = len(freq)
+    avg_data = {'station': np.array(station_lst),
+                'freq': freq,
+                'z': np.zeros((ns, nf, 2, 2), dtype='complex'),
+                'z_err': np.ones((ns, nf, 2, 2)),
+                'tipper': np.zeros((ns, nf, 1, 2), dtype='complex'),
+                'tipper_err': np.ones((ns, nf, 1, 2)),
+                'has_data': np.zeros((ns, nf), dtype=bool),
+                'header': [header_dict for header_dict, comp_dict
+                           in station_data]}
+
+    for ss, (header_dict, comp_dict) in enumerate(station_data):
+        freq, z, z_err, tipper, tipper_err = align_avg_components(
+                                                     comp_dict, z_coordinate,
+                                                     freq=avg_data['freq'])
+        avg_data['z'][ss] = z
+        avg_data['z_err'][ss] = z_err
+        if tipper is not None:
+            avg_data['tipper'][ss] = tipper
+            avg_data['tipper_err'][ss] = tipper_err
+        station_freq = [comp_arr['freq'] for comp_arr in comp_dict.values()]
+        avg_data['has_data'][ss] = np.isin(freq,
+                                           np.concatenate(station_freq +
+                                                          [np.zeros(0)]))
+
+    return avg_data
+
+
+def _init_edi_export(survey_cfg_file, mtedit_cfg_file, edi_kwargs):
+    """
+    read the files shared by all stations once per process
+    """
+    state = parallel.worker_state(__name__)
+    state['sdict'] = {}
+    if survey_cfg_file is not None:
+        state['sdict'] = mtcf.read_survey_configfile(survey_cfg_file)
+    state['mtedit_dict'] = None
+    if mtedit_cfg_file:
+        zmtedit = ZongeMTEdit()
+        zmtedit.read_config(mtedit_cfg_file)
+        state['mtedit_dict'] = zmtedit.meta_dict
+    state['edi_kwargs'] = edi_kwargs
+
+
+def _write_station_edi(station, avg_fn_lst, rrstation):
+    """
+    read the .avg files of a station and write its .edi file
+    """
+    state = parallel.worker_state(__name__)
+    kwargs = state['edi_kwargs']
+
+    zavg = ZongeMTAvg()
+    zavg.z_coordinate = kwargs['z_coordinate']
+    header_dict, comp_dict = _read_station_avg(avg_fn_lst)
+    zavg.__dict__.update(header_dict)
+    zavg.comp_dict = comp_dict
+    zavg.comp_flag = dict([(ckey, ckey in comp_dict)
+                           for ckey in avg_components])
+    zavg.fill_Z()
+    if zavg.comp_flag['tzx'] or zavg.comp_flag['tzy']:
+        zavg.fill_Tipper()
+
+    survey_dict, rrsurvey_dict = zavg.get_survey_dicts(station,
+                                                       state['sdict'],
+                                                       rrstation=rrstation)
+
+    mtft_cfg_file = kwargs['mtft_cfg_file']
+    mtft_dict = None
+    if mtft_cfg_file is None:
+        mtft_cfg_file = os.path.join(os.path.dirname(avg_fn_lst[0]),
+                                     'mtft24.cfg')
+    if os.path.isfile(mtft_cfg_file):
+        zmtft = ZongeMTFT()
+        zmtft.read_cfg(mtft_cfg_file)
+        mtft_dict = zmtft.meta_dict
+
+    edi_obj = zavg.make_edi(station, survey_dict, rrsurvey_dict=rrsurvey_dict,
+                            mtft_dict=mtft_dict,
+                            mtedit_dict=state['mtedit_dict'])
+
+    return edi_obj.write_edi_file(new_edi_fn=os.path.join(kwargs['save_dir'],
+                                                          station+'.edi'))
+
+
+def write_edi_files(avg_dict, save_dir, survey_cfg_file=None,
+                    mtft_cfg_file=None, mtedit_cfg_file=None,
+                    rrstation_dict=None, z_coordinate='down',
+                    num_workers=None):
+    """
+    write .edi files of many stations from their .avg files, the stations
+    are converted on a pool of processes.
+
+    The survey and MTEdit configuration files are read once per process.
+    Stations that are not in the survey file get their location from the
+    .avg header, see ZongeMTAvg.get_survey_dicts.
+
+    Arguments:
+    ----------
+        **avg_dict** : dictionary
+                       keys are station names, values are lists of the .avg
+                       files of the station
+
+        **save_dir** : string
+                       directory the .edi files are written to as
+                       station.edi
+
+        **survey_cfg_file** : string
+                              survey configuration file of all stations
+
+        **mtft_cfg_file** : string
+                            mtft24.cfg file of all stations, *default* is
+                            the mtft24.cfg next to the .avg files of each
+                            station if it exists
+
+        **mtedit_cfg_file** : string
+                              MTEdit.cfg file of all stations
+
+        **rrstation_dict** : dictionary
+                             remote reference station of each station
+
+        **num_workers** : int
+                          number of processes, *default* is the number of
+                          cpus.  With 1 the stations are converted in this
+                          process.
+
+    Outputs:
+    ---------
+        **edi_fn_lst** : list of the .edi files written, in order of the
+                         sorted station names
+    """
+    if not os.path.isdir(save_dir):
+        os.makedirs(save_dir)
+    if rrstation_dict is None:
+        rrstation_dict = {}
+
+    edi_kwargs = {'save_dir': save_dir,
+                  'mtft_cfg_file': mtft_cfg_file,
+                  'z_coordinate': z_coordinate}
+    lo_args = [(station, avg_dict[station], rrstation_dict.get(station))
+               for station in sorted(avg_dict.keys())]
+
+    return parallel.map_tasks(_write_station_edi, lo_args,
+                              num_workers=num_workers,
+                              initializer=_init_edi_export,
+                              initargs=(survey_cfg_file, mtedit_cfg_file,
+                                        edi_kwargs),
+                              state=__name__)
@@ -1,58 +1,105 @@
-# Check for gdal availability at module level so we don't have to
-# do this every time a function in gis_tools is being called.
-from .mtpy_decorator import gdal_data_check
+# Check for gdal availability once, on first use, so we don't have to do
+# this every time a function in gis_tools is being called and importing
+# mtpy does not probe for GDAL (which can spawn gdal-config).
+#
+# HAS_GDAL, NEW_GDAL and EPSG_DICT are still available as module attributes,
+# they are computed when first accessed.
 import os, re
+import functools
 import numpy as np
 
-HAS_GDAL = gdal_data_check(None)._gdal_data_found
-NEW_GDAL = False
+from .mtpy_decorator import gdal_data_check
+from .mtpylog import MtPyLog
+
+
+@functools.lru_cache(maxsize=None)
+def has_gdal():
+    """
+    True if GDAL and its data files are installed, otherwise pyproj is used.
+
+    :raises RuntimeError: if neither GDAL nor pyproj is installed
+    """
+    if gdal_data_check(None)._gdal_data_found:
+        return True
 
-if (not HAS_GDAL):
     try:
         import pyproj
     except ImportError:
         raise RuntimeError("Either GDAL or PyProj must be installed")
-else:
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def is_new_gdal():
+    """
+    True if GDAL version 3 or newer is used for projections
+    """
+    if not has_gdal():
+        return False
+
     import osgeo
-    if hasattr(osgeo, '__version__') and int(osgeo.__version__[0]) >= 3:
-        NEW_GDAL = True
+    new_gdal = hasattr(osgeo, '__version__') and int(osgeo.__version__[0]) >= 3
+    if new_gdal:
+        MtPyLog.get_mtpy_logger(__name__).info('INFO: GDAL version 3 detected')
+    return new_gdal
 
-EPSG_DICT = {}
-try:
-    import pyproj
 
-    epsgfn = os.path.join(pyproj.pyproj_datadir, 'epsg')
+@functools.lru_cache(maxsize=None)
+def get_epsg_dict():
+    """
+    dictionary of EPSG code to proj4 projection string
+    """
+    epsg_dict = {}
+    try:
+        import pyproj
+
+        epsgfn = os.path.join(pyproj.pyproj_datadir, 'epsg')
+
+        f = open(epsgfn, 'r')
+        lines = f.readlines()
+
+        for line in lines:
+            if ('#' in line): continue
 
-    f = open(epsgfn, 'r')
-    lines = f.readlines()
+            epsg_code_val = re.compile('<(\d+)>').findall(line)
 
-    for line in lines:
-        if ('#' in line): continue
+            # print( "epsg_code_val", epsg_code_val)
 
-        epsg_code_val = re.compile('<(\d+)>').findall(line)
+            if epsg_code_val is not None and len(epsg_code_val) > 0 and \
+                epsg_code_val[0].isdigit():
+                epsg_code = int(epsg_code_val[0])
+                epsg_string = re.compile('>(.*)<').findall(line)[0].strip()
 
-        # print( "epsg_code_val", epsg_code_val)
+                epsg_dict[epsg_code] = epsg_string
+            else:
+                pass  #print("epsg_code_val NOT found for this line ", line, epsg_code_val)
+        #end for
+    except Exception:
+        # Failed to load EPSG codes and corresponding proj4 projections strings
+        # from pyproj.
+        # Since version 1.9.5 the epsg file stored in pyproj_datadir has been
+        #removed and replaced by 'proj.db', which is stored in a different folder.
+        # Since the underlying proj4 projection strings haven't changed, we
+        # simply load a local copy of these mappings to ensure backward
+        # compatibility.
 
-        if epsg_code_val is not None and len(epsg_code_val) > 0 and \
-            epsg_code_val[0].isdigit():
-            epsg_code = int(epsg_code_val[0])
-            epsg_string = re.compile('>(.*)<').findall(line)[0].strip()
+        path = os.path.dirname(os.path.abspath(__file__))
+        epsg_dict_fn = os.path.join(path, 'epsg.npy')
 
-            EPSG_DICT[epsg_code] = epsg_string
-        else:
-            pass  #print("epsg_code_val NOT found for this line ", line, epsg_code_val)
-    #end for
-except Exception:
-    # Failed to load EPSG codes and corresponding proj4 projections strings
-    # from pyproj.
-    # Since version 1.9.5 the epsg file stored in pyproj_datadir has been
-    #removed and replaced by 'proj.db', which is stored in a different folder.
-    # Since the underlying proj4 projection strings haven't changed, we 
-    # simply load a local copy of these mappings to ensure backward
-    # compatibility.
+        epsg_dict = np.load(epsg_dict_fn, allow_pickle=True).item()
+    # end try
 
-    path = os.path.dirname(os.path.abspath(__file__))
-    epsg_dict_fn = os.path.join(path, 'epsg.npy')
+    return epsg_dict
 
-    EPSG_DICT = np.load(epsg_dict_fn, allow_pickle=True).item()
-# end try
+
+_lazy_attributes = {'HAS_GDAL': has_gdal,
+                    'NEW_GDAL': is_new_gdal,
+                    'EPSG_DICT': get_epsg_dict}
+
+
+def __getattr__(name):
+    try:
+        return _lazy_attributes[name]()
+    except KeyError:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(
+            __name__, name))
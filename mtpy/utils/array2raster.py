@@ -15,8 +15,8 @@ import numpy as np
 import mtpy.modeling.modem as modem
 import mtpy.modeling.ws3dinv as ws
 import os
-import scipy.interpolate as interpolate
 import mtpy.utils.gis_tools as gis_tools
+import mtpy.utils.resampling as resampling
 
 ogr.UseExceptions()
 
@@ -158,20 +158,15 @@ class ModEM_to_Raster(object):
 
 
 
-        new_res_arr = np.zeros((new_north.size,
-                                new_east.size,
-                                model_obj.nodes_z.size))
-                                
-        for z_index in range(model_obj.grid_z.shape[0]-1):
-            res = model_obj.res_model[:, :, z_index]
-            new_res_arr[:, :, z_index] = interpolate.griddata(
-                                         (model_n.ravel(), model_e.ravel()),
-                                         res.ravel(), 
-                                         (new_north[:, None],
-                                          new_east[None, :]))
-            
+        # triangulate once and interpolate all layers with the same weights,
+        # same as griddata on each layer
+        weights = resampling.delaunay_weights((model_n.ravel(), model_e.ravel()),
+                                              (new_north[:, None],
+                                               new_east[None, :]))
+        new_res_arr = resampling.resample_cube(
+                         weights, np.transpose(model_obj.res_model, (2, 0, 1)))
 
-        self.res_array = new_res_arr
+        self.res_array = np.transpose(new_res_arr, (1, 2, 0))
         
     def write_raster_files(self, save_path=None, pad_east=None, 
                            pad_north=None, cell_size=None,
@@ -297,23 +292,19 @@ class WS3D_to_Raster(object):
                              model_obj.grid_north[-self.pad_north-1],
                              self.cell_size_north)
             
-        model_n, model_e = np.broadcast_arrays(model_obj.grid_north[:, None], 
-                                                      model_obj.grid_east[None, :])
+        # the grid is n+1 as it is the edges of the nodes, as in ModEM_to_Raster
+        model_n, model_e = np.broadcast_arrays(model_obj.grid_north[:-1, None],
+                                               model_obj.grid_east[None, :-1])
 
-                                             
-        new_res_arr = np.zeros((new_north.shape[0],
-                                new_east.shape[0],
-                                model_obj.grid_z.shape[0]))
-                                
-        for z_index in range(model_obj.grid_z.shape[0]):
-            res = model_obj.res_model[:, :, z_index]
-            new_res_arr[:, :, z_index] = interpolate.griddata(
-                                         (model_n.ravel(), model_e.ravel()),
-                                         res.ravel(), 
-                                         (new_north[:, None], new_east[None, :]))
-            
+        # triangulate once and interpolate all layers with the same weights,
+        # same as griddata on each layer
+        weights = resampling.delaunay_weights((model_n.ravel(), model_e.ravel()),
+                                              (new_north[:, None],
+                                               new_east[None, :]))
+        new_res_arr = resampling.resample_cube(
+                         weights, np.transpose(model_obj.res_model, (2, 0, 1)))
 
-        self.res_array = new_res_arr
+        self.res_array = np.transpose(new_res_arr, (1, 2, 0))
         
     def write_raster_files(self, save_path=None, pad_east=None, 
                            pad_north=None, cell_size=None, rotation_angle=None):
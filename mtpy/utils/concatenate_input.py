@@ -129,6 +129,26 @@ class Data():
                 return result
             #end func
 
+            def readColumns(fileName, skip_header):
+                """
+                Parses all numeric lines at once; lines with another number of
+                columns than the first are dropped as by genfromtxt, which is
+                used for files with non-numeric entries.
+                """
+                with open(fileName, 'rb') as f:
+                    lines = f.read().splitlines()[skip_header:]
+                lines = [line for line in lines if len(line.strip())]
+                if(len(lines) == 0): return np.zeros((0, 0))
+
+                ncols = len(lines[0].split())
+                lines = [line for line in lines if len(line.split()) == ncols]
+                try:
+                    return np.array(b' '.join(lines).split(), dtype=float).reshape(-1, ncols)
+                except ValueError:
+                    return np.genfromtxt(fileName, invalid_raise=False, skip_header=skip_header)
+                # end try
+            # end func
+
             # Check for headers
             nhl = numHeaderLines(fileName)
 
@@ -137,13 +157,13 @@ class Data():
             if(nhl==0):
                 # File variant 1
 
-                d = np.genfromtxt(fileName, invalid_raise=False)
+                d = readColumns(fileName, 0)
                 b = d[:, 6:9]
                 e = d[:, 11:14]
             elif(nhl==13):
                 # File variant 2
 
-                d = np.genfromtxt(fileName, invalid_raise=False, skip_header=nhl)
+                d = readColumns(fileName, nhl)
                 b = d[:, 3:6]
             else:
                 # Unknown file variant
@@ -160,31 +180,30 @@ class Data():
         if(len(list(self._filesDict.keys()))==0): return
 
         print('\nReading data files..')
-        bxyz = None
-        exyz = None
-        for i, k in enumerate(self._filesDict.keys()):
-            b, e = readData(self._filesDict[k])
-            if(i == 0):
-                if (b is not None): bxyz = b
-                if (e is not None): exyz = e
-            else:
-                if(b is not None): bxyz = np.concatenate((bxyz, b), axis=0)
-                if(e is not None): exyz = np.concatenate((exyz, e), axis=0)
-            #end if
-        #end for
-
-        print('\nWriting output data files..')
-        if(bxyz is not None):
-            np.savetxt(os.path.join(outputPath, '%s.BX'%prefix), bxyz[:, 0], fmt='%.3f')
-            np.savetxt(os.path.join(outputPath, '%s.BY' % prefix), bxyz[:, 1], fmt='%.3f')
-            np.savetxt(os.path.join(outputPath, '%s.BZ' % prefix), bxyz[:, 2], fmt='%.3f')
-        # end if
-
-        if (exyz is not None):
-            np.savetxt(os.path.join(outputPath, '%s.EX' % prefix), exyz[:, 0], fmt='%.3f')
-            np.savetxt(os.path.join(outputPath, '%s.EY' % prefix), exyz[:, 1], fmt='%.3f')
-            np.savetxt(os.path.join(outputPath, '%s.EZ' % prefix), exyz[:, 2], fmt='%.3f')
-        # end if
+        # data are appended to the output files one input file at a time, in
+        # chronological order
+        names = {'b': ['BX', 'BY', 'BZ'], 'e': ['EX', 'EY', 'EZ']}
+        outFiles = {}
+        try:
+            for k in sorted(self._filesDict.keys()):
+                b, e = readData(self._filesDict[k])
+                for key, d in (('b', b), ('e', e)):
+                    if(d is None): continue
+                    if(key not in outFiles):
+                        outFiles[key] = [open(os.path.join(outputPath, '%s.%s' % (prefix, name)), 'w')
+                                         for name in names[key]]
+                    # end if
+                    for i, f in enumerate(outFiles[key]):
+                        np.savetxt(f, d[:, i], fmt='%.3f')
+                    # end for
+                # end for
+            #end for
+        finally:
+            for fl in outFiles.values():
+                for f in fl: f.close()
+            # end for
+        # end try
+        print('\nWrote output data files..')
     #end func
 #end class
 
@@ -24,10 +24,9 @@ import math
 import gdal
 import osr
 import numpy as np
-from scipy.interpolate import RegularGridInterpolator
 
 from mtpy.modeling.modem import Model, Data
-from mtpy.utils import gis_tools
+from mtpy.utils import gis_tools, resampling
 from mtpy.utils.mtpylog import MtPyLog
 
 _logger = MtPyLog.get_mtpy_logger(__name__)
@@ -225,7 +224,25 @@ def _get_depth_indicies(centers_z, depths):
         return set(range(len(centers_z)))
 
 
-def _interpolate_slice(ce, cn, resgrid, depth_index, target_gridx, target_gridy, log_scale):
+def _interpolation_weights(ce, cn, target_gridx, target_gridy):
+    """Bilinear weights of the target grid on the model grid, shared by
+    all depth slices.
+
+    Args:
+        ce, cn (np.ndarray): Grid centers in east and north directions.
+        target_gridx, target_gridy (np.ndarray): Grid to interpolate
+            over.
+
+    Returns:
+        resampling.GridWeights: Weights to apply to (north, east)
+            slices of the model.
+    """
+    return resampling.rectilinear_weights((cn, ce), (target_gridy, target_gridx),
+                                          bounds_error=True)
+
+
+def _interpolate_slice(ce, cn, resgrid, depth_index, target_gridx, target_gridy, log_scale,
+                       weights=None):
     """Interpolates the reisistivty model in log10 space across a grid.
 
     Args:
@@ -237,16 +254,19 @@ def _interpolate_slice(ce, cn, resgrid, depth_index, target_gridx, target_gridy,
             over.
         log_scale (bool): If True, results will be left in log10 form.
             If False, log10 is reversed.
+        weights (resampling.GridWeights, optional): Precomputed
+            weights from `_interpolation_weights`. If None, they are
+            computed for this slice.
 
     Returns:
         np.ndarray: A 2D slice of the resistivity model interpolated
             over a grid.
     """
-    interp_func = RegularGridInterpolator((ce, cn), np.log10(resgrid[:, :, depth_index].T))
-    res_slice = interp_func(np.vstack(
-        [target_gridx.flatten(), target_gridy.flatten()]).T).reshape(target_gridx.shape)
+    if weights is None:
+        weights = _interpolation_weights(ce, cn, target_gridx, target_gridy)
+    res_slice = weights.apply(np.log10(resgrid[:, :, depth_index]))
     if not log_scale:
-        res_slice **= 10
+        res_slice = 10 ** res_slice
     return res_slice
 
 
@@ -374,10 +394,15 @@ def create_geogrid(data_file, model_file, out_dir, x_pad=None, y_pad=None, z_pad
 
     indicies = _get_depth_indicies(cz, depths)
 
-    for di in indicies:
+    # The target grid is the same for every slice, so the interpolation
+    #  weights are computed once and slices are interpolated in chunks.
+    weights = _interpolation_weights(ce, cn, target_gridx, target_gridy)
+    log_resgrid = np.log10(np.transpose(resgrid_nopad, (2, 0, 1)))
+
+    for di, data in resampling.resample_slices(weights, log_resgrid, sorted(indicies)):
         print("Writing out slice {:.0f}m...".format(cz[di]))
-        data = _interpolate_slice(ce, cn, resgrid_nopad, di,
-                                  target_gridx, target_gridy, log_scale)
+        if not log_scale:
+            data = 10 ** data
         if log_scale:
             output_file = 'DepthSlice{:.0f}m_log10.tif'.format(cz[di])
         else:
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+DEM_TOOLS
+==================
+
+Tiled, memory-mapped access to large ESRI ASCII elevation grids.
+
+An ASCII grid is parsed once, in buffered blocks, into a binary tile cache
+next to the source file:
+
+    * <name>.tiles.npy   float32 array of shape (ny_tiles, nx_tiles, ts, ts),
+                         rows ordered S -> N, nodata stored as NaN
+    * <name>.tiles.json  grid header plus size and mtime of the source file
+
+The cache is rebuilt automatically if the source file changes.  Windows of
+the grid are then read through a memory map, so only the tiles overlapping
+the requested bounds are touched, and elevations are interpolated with a
+regular grid interpolator instead of scattered griddata.
+
+:Example: ::
+
+    >>> from mtpy.utils.dem_tools import TiledDEM
+    >>> dem = TiledDEM('AussieContinent_etopo1.asc')
+    >>> lon, lat, elev = dem.read_window(148., 150., -36., -34.)
+    >>> elev_pts = dem.interpolate([149.1, 149.2], [-35.3, -35.2])
+
+"""
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+import json
+import os
+import tempfile
+
+import numpy as np
+from scipy import ndimage
+from scipy.interpolate import RegularGridInterpolator
+
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+# version of the cache layout, bump to invalidate existing caches
+CACHE_VERSION = 1
+
+
+def read_surface_ascii_header(ascii_fn):
+    """
+    read the 6 line header of an ESRI ascii grid
+
+    :param ascii_fn: full path to ascii grid
+    :return: (header dictionary with lower case keys, number of header lines)
+    """
+    header = {}
+    skiprows = 0
+    with open(ascii_fn, 'r') as dfid:
+        for ii in range(6):
+            dline = dfid.readline().strip().split()
+            key = dline[0].strip().lower()
+            # check if key is an integer, then the header is finished
+            try:
+                int(key)
+                break
+            except ValueError:
+                header[key] = float(dline[1].strip())
+                skiprows += 1
+
+    return header, skiprows
+
+
+def fill_nodata(elev):
+    """
+    fill nodata (NaN) cells of an elevation grid with the value of the
+    nearest valid cell, so they do not spread NaN through an interpolation.
+
+    :param elev: elevation grid (ny, nx)
+    :return: filled copy of elev
+    """
+    nodata = np.isnan(elev)
+    if not nodata.any():
+        return elev
+    if nodata.all():
+        raise ValueError('DEM has no valid elevation in the requested area')
+
+    index = ndimage.distance_transform_edt(nodata, return_distances=False,
+                                           return_indices=True)
+    return elev[tuple(index)]
+
+
+class TiledDEM(object):
+    """
+    Memory-mapped tile cache of an ESRI ascii elevation grid.
+
+    :param ascii_fn: full path to ascii grid
+    :param cache_dir: directory for the tile cache, default is the directory
+                      of ascii_fn, or the system temp directory if that is not
+                      writable
+    :param tile_size: number of cells along each side of a tile
+    :param block_bytes: number of bytes of text parsed at a time when
+                        converting the ascii grid
+    """
+
+    def __init__(self, ascii_fn, cache_dir=None, tile_size=512,
+                 block_bytes=2 ** 24):
+        self.ascii_fn = os.path.abspath(ascii_fn)
+        self.tile_size = int(tile_size)
+        self.block_bytes = int(block_bytes)
+
+        if cache_dir is None:
+            cache_dir = os.path.dirname(self.ascii_fn)
+            if not os.access(cache_dir, os.W_OK):
+                cache_dir = tempfile.gettempdir()
+        self.cache_dir = cache_dir
+
+        basename = os.path.basename(self.ascii_fn)
+        self.tiles_fn = os.path.join(self.cache_dir,
+                                     '{0}.tiles.npy'.format(basename))
+        self.header_fn = os.path.join(self.cache_dir,
+                                      '{0}.tiles.json'.format(basename))
+
+        self.header = None
+        self._tiles = None
+
+        self._load_cache()
+
+    @property
+    def nx(self):
+        return int(self.header['ncols'])
+
+    @property
+    def ny(self):
+        return int(self.header['nrows'])
+
+    @property
+    def cellsize(self):
+        return self.header['cellsize']
+
+    @property
+    def lon(self):
+        """ longitude of all columns, W -> E """
+        x0 = self.header['xllcorner']
+        return np.linspace(x0, x0 + self.cellsize * (self.nx - 1), self.nx)
+
+    @property
+    def lat(self):
+        """ latitude of all rows, S -> N """
+        y0 = self.header['yllcorner']
+        return np.linspace(y0, y0 + self.cellsize * (self.ny - 1), self.ny)
+
+    def _source_stamp(self):
+        stat = os.stat(self.ascii_fn)
+        return {'source_size': stat.st_size, 'source_mtime': stat.st_mtime,
+                'tile_size': self.tile_size, 'version': CACHE_VERSION}
+
+    def _load_cache(self):
+        """
+        open the tile cache, converting the ascii grid first if the cache is
+        missing or out of date
+        """
+        stamp = self._source_stamp()
+        header = None
+        if os.path.isfile(self.header_fn) and os.path.isfile(self.tiles_fn):
+            with open(self.header_fn, 'r') as fid:
+                header = json.load(fid)
+            if any(header.get(key) != value for key, value in stamp.items()):
+                _logger.info("DEM cache %s is out of date", self.tiles_fn)
+                header = None
+
+        if header is None:
+            header = self.convert()
+
+        self.header = header
+        self._tiles = np.load(self.tiles_fn, mmap_mode='r')
+
+    def convert(self):
+        """
+        convert the ascii grid to the binary tile cache.  The ascii file is
+        parsed in blocks of self.block_bytes so it never has to fit in memory.
+
+        :return: header dictionary written next to the tile cache
+        """
+        header, skiprows = read_surface_ascii_header(self.ascii_fn)
+        nx, ny = int(header['ncols']), int(header['nrows'])
+        ts = self.tile_size
+        nty, ntx = -(-ny // ts), -(-nx // ts)
+        nodata = header.get('nodata_value')
+
+        _logger.info("Converting %s (%i x %i) to tile cache %s",
+                     self.ascii_fn, ny, nx, self.tiles_fn)
+
+        tiles = np.lib.format.open_memmap(self.tiles_fn, mode='w+',
+                                          dtype=np.float32,
+                                          shape=(nty, ntx, ts, ts))
+        tiles[:] = np.nan
+
+        # rows in the file go N -> S, store them S -> N
+        row_buffer = np.full((ts, ntx * ts), np.nan, dtype=np.float32)
+        values = np.zeros(0, dtype=np.float32)
+        row = 0
+        with open(self.ascii_fn, 'r') as dfid:
+            for ii in range(skiprows):
+                dfid.readline()
+
+            while row < ny:
+                text = dfid.read(self.block_bytes)
+                if text:
+                    # complete the last number of the block
+                    text += dfid.readline()
+                block = np.fromstring(text, dtype=np.float32, sep=' ')
+                if block.size == 0 and not text:
+                    raise ValueError('{0} ended after {1} of {2} rows'.format(
+                        self.ascii_fn, row, ny))
+                values = np.append(values, block)
+
+                n_rows = min(values.size // nx, ny - row)
+                if n_rows == 0:
+                    continue
+                data = values[:n_rows * nx].reshape(n_rows, nx)
+                values = values[n_rows * nx:]
+                if nodata is not None:
+                    data[data == nodata] = np.nan
+
+                for line in data:
+                    south_row = ny - 1 - row
+                    row_buffer[south_row % ts, :nx] = line
+                    # flush a tile row once its southern-most row is written
+                    if south_row % ts == 0:
+                        ity = south_row // ts
+                        tiles[ity] = row_buffer.reshape(
+                            ts, ntx, ts).transpose(1, 0, 2)
+                        row_buffer[:] = np.nan
+                    row += 1
+
+        tiles.flush()
+        del tiles
+
+        header.update(self._source_stamp())
+        with open(self.header_fn, 'w') as fid:
+            json.dump(header, fid)
+
+        return header
+
+    def _index_range(self, coord, vmin, vmax, n):
+        """ index range [i0, i1) of cells covering [vmin, vmax] """
+        i0 = int(np.floor((vmin - coord) / self.cellsize))
+        i1 = int(np.ceil((vmax - coord) / self.cellsize)) + 1
+        return max(i0, 0), min(i1, n)
+
+    def read_window(self, lon_min, lon_max, lat_min, lat_max, buffer=0):
+        """
+        read the part of the grid covering the given bounds.  Only the tiles
+        overlapping the bounds are read from disk.
+
+        :param lon_min, lon_max, lat_min, lat_max: bounds in decimal degrees
+        :param buffer: extra number of cells to read on each side
+        :return: lon (nx,), lat (ny,), elevation (ny, nx) with rows S -> N
+        """
+        c0, c1 = self._index_range(self.header['xllcorner'], lon_min, lon_max,
+                                   self.nx)
+        r0, r1 = self._index_range(self.header['yllcorner'], lat_min, lat_max,
+                                   self.ny)
+        c0, r0 = max(c0 - buffer, 0), max(r0 - buffer, 0)
+        c1, r1 = min(c1 + buffer, self.nx), min(r1 + buffer, self.ny)
+
+        if c1 <= c0 or r1 <= r0:
+            return np.zeros(0), np.zeros(0), np.zeros((0, 0))
+
+        ts = self.tile_size
+        ty0, ty1 = r0 // ts, (r1 - 1) // ts + 1
+        tx0, tx1 = c0 // ts, (c1 - 1) // ts + 1
+        window = np.asarray(self._tiles[ty0:ty1, tx0:tx1])
+        window = window.transpose(0, 2, 1, 3).reshape((ty1 - ty0) * ts,
+                                                      (tx1 - tx0) * ts)
+        elev = window[r0 - ty0 * ts:r1 - ty0 * ts,
+                      c0 - tx0 * ts:c1 - tx0 * ts].astype(float)
+
+        return self.lon[c0:c1], self.lat[r0:r1], elev
+
+    def interpolate(self, lon, lat, method='linear'):
+        """
+        interpolate elevation at the given points on the regular grid.
+
+        :param lon: longitudes in decimal degrees, any shape
+        :param lat: latitudes in decimal degrees, same shape as lon
+        :param method: 'linear' (bilinear) or 'nearest'
+        :return: elevation with the shape of lon.  Outside the grid 'linear'
+                 gives NaN and 'nearest' the nearest edge value, as
+                 scipy.interpolate.griddata would.  Nodata cells are filled
+                 from the nearest valid cell before interpolating.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        if lon.size == 0:
+            return np.zeros(lon.shape)
+
+        w_lon, w_lat, elev = self.read_window(lon.min(), lon.max(),
+                                              lat.min(), lat.max(), buffer=1)
+        if w_lon.size < 2 or w_lat.size < 2:
+            return np.full(lon.shape, np.nan)
+
+        fill_value = None if method == 'nearest' else np.nan
+        interp = RegularGridInterpolator((w_lat, w_lon), fill_nodata(elev),
+                                         method=method,
+                                         bounds_error=False,
+                                         fill_value=fill_value)
+        points = np.column_stack([lat.ravel(), lon.ravel()])
+
+        return interp(points).reshape(lon.shape)
@@ -28,6 +28,7 @@ import shutil
 import mtpy.utils.calculator as MTcc
 import mtpy.utils.exceptions as MTex
 import mtpy.utils.configfile as MTcf
+from mtpy.utils import parallel
 
 #=================================================================
 
@@ -322,441 +323,257 @@ def get_sampling_interval_fromdatafile(filename, length = 3600):
     return sampling_interval
 
 
-def EDL_make_Nhour_files(n_hours,inputdir, sampling , stationname = None, outputdir = None):
+def read_EDL_file(filename):
+    """
+    Read the samples of an EDL ascii file in one pass.
+
+    The file holds a single column of values or two columns of time and
+    value, lines beginning with # are ignored. The whole file is parsed at
+    once instead of line by line, values are truncated to integers as in
+    the EDL output.
 
+    :param filename: EDL ascii file
+    :returns: samples as 1-D integer array
     """
-    See 'EDL_make_dayfiles' for description and syntax.
+    with open(filename, 'rb') as F:
+        content = F.read()
 
-    Only difference: output files are blocks of (max) N hours, starting to count 
-    at midnight (00:00h) each day.
+    if b'#' in content:
+        content = b'\n'.join([line for line in content.splitlines()
+                              if not line.lstrip().startswith(b'#')])
+    content = content.strip()
+    if len(content) == 0:
+        return np.zeros(0, dtype=np.int64)
 
-    Conditions:
-    
-    1.   24%%N = 0
-    2.   input data files start on the hour marks
+    n_columns = len(content.split(b'\n', 1)[0].split())
+    values = np.array(content.split(), dtype=float)
+    if n_columns > 1:
+        # first column is time, so just take the second one
+        values = values.reshape(-1, n_columns)[:, 1]
 
-    Not working yet!!
+    return values.astype(np.int64)
 
-    """
-    #print '\n\tnot working yet - code under development !!\n'
-    #return
 
-    try:
-        if 24%n_hours != 0:
-            raise Exception("problem!!!")
-    except:
-        sys.exit('ERROR - File block length must be on of: 1,2,3,4,6,8,12 \n')
-    
-    n_hours = int(n_hours)
-    #list of starting hours for the data blocks:
-    lo_hours = [int(i) for i in np.arange(int(24/n_hours))*n_hours ]
-    no_blocks = len(lo_hours)
-    
-    #build a list that contains the respective groups of starting hours belonging
-    # to the same block
-    lo_blockhours = []
-    counter = 0 
-    dummylist = []
-    for i in range(24):
-        dummylist.append(i)
-        counter += 1
-        if counter == n_hours:
-            lo_blockhours.append(dummylist)
-            dummylist = []
-            counter = 0 
-
-    # most of the following code is redundant/taken from the 
-    # 'EDL_make_dayfiles' function
-    # This can be cleaned up later
+def EDL_find_files(inputdir, stationname=None):
+    """
+    Find the EDL ascii files in a directory or a list of directories.
 
-    try:
-        if type(inputdir)==str:
-            raise Exception("problem!!!")
-        lo_foldernames = [i for i in inputdir]
-    except TypeError:
+    :param inputdir: directory or list of directories
+    :param stationname: only files of this station, all files if None
+    :returns: list of absolute file names
+    """
+    if isinstance(inputdir, str):
         lo_foldernames = [inputdir]
+    else:
+        lo_foldernames = list(inputdir)
 
-    #typical suffixes for EDL output file names
-    components = ['ex', 'ey', 'bx', 'by', 'bz']
-
-    lo_allfiles = []
     pattern = '*.[ebEB][xyzXYZ]'
     if stationname is not None:
         pattern = '*{0}*.[ebEB][xyzXYZ]'.format(stationname.lower())
     print('\nSearching for files with pattern: ',pattern)
 
+    lo_allfiles = []
     for folder in lo_foldernames:
-        wd = op.abspath(op.realpath(folder)) 
+        wd = op.abspath(op.realpath(folder))
         if not op.isdir(wd):
-            #print 'Directory not existing: %s' % (wd)
-            lo_foldernames.remove(wd)
-            continue    
-
-        lo_dirfiles = [op.abspath(op.join(wd,i))  for i in os.listdir(wd) 
-                        if fnmatch.fnmatch(i.lower(),pattern.lower()) is True]
-        lo_allfiles.extend(lo_dirfiles)   
-
-    #check, if list of files is empty
-    if len(lo_allfiles) == 0:
-        if stationname is not None:
-            raise MTex.MTpyError_inputarguments('Directory(ies) do(es) not contain'\
-            ' files to combine for station {0}:\n {1}'.format(stationname, inputdir))
-
-        raise MTex.MTpyError_inputarguments('Directory does not contain files'\
-                                            ' to combine:\n {0}'.format(inputdir))
-
-    #define subfolder for storing dayfiles
-    outpath = op.join(os.curdir,'{0}hourfiles'.format(int(n_hours)))    
-    if outputdir is not None:
-        try:
-            outpath = op.abspath(op.join(os.curdir,outputdir))
-            if not op.exists(outpath):
-                try:
-                    os.makedirs(outpath)
-                except:
-                    raise Exception("problem!!!")
-            if not os.access(outpath, os.W_OK):
-                raise Exception("problem!!!")
-        except:
-            print('Cannot generate writable output directory {0} - using'\
-                    ' generic location "dayfiles" instead'.format(outpath))
-            outpath = op.join(wd,'{0}hourfiles'.format(int(n_hours)))    
-            pass
-
-    #generate subfolder, if not existing
-    if not op.exists(outpath):
-        try:
-            os.makedirs(outpath)
-        except:
-            MTex.MTpyError_inputarguments('Cannot generate output'\
-                                ' directory {0} '.format(outpath))
-
-    #outer loop over all components
-    for comp in components:
-
-        #make list of files for the current component
-        lo_files = np.array([op.join(wd,i) for i in lo_allfiles 
-                            if (i.lower()[-2:] == comp)])
-
-        #make list of starting times for the respective files
-        lo_starttimes = np.array([EDL_get_starttime_fromfilename(f) 
-                                    for f in lo_files])
-        
-        #sort the files by their starting times
-        idx_chronologic = np.argsort(lo_starttimes)
-        
-        #obtain sorted lists of files and starting times
-        lo_sorted_files = list(lo_files[idx_chronologic])
-        lo_sorted_starttimes = list(lo_starttimes[idx_chronologic])
-        idx = 0
-        while idx < len(lo_sorted_starttimes):
-            try:
-                val = lo_sorted_starttimes[idx]
-            except:
-                break
-            if val is None:
-                dummy = lo_sorted_files.pop(idx)
-                dummy = lo_sorted_starttimes.pop(idx)
-            else:
-                idx += 1
-
-
-        #set stationname, either from arguments or from filename
-        if stationname is None:
-            stationname = EDL_get_stationname_fromfilename(lo_sorted_files[0]).upper()
-
-        #set counting variables - needed for handling of consecutive files
-
-        #flags, checking, if data has to written to file
-        sameday = True
-        sameblock = True
-        fileopen = False
-        complete = False
-        #numerical index of files for same combination of date and hour
-        fileindex = 0
-        #current file's daily block number 
-        blockindex = 0 
-
-        #allocate a data array to fill
-        # this is more memory efficient than extending lists!!
-        #cater for potential rounding errors:
-        if sampling < 1:
-            max_n_data = 3600*int(n_hours) * (int(1./sampling)+1)
-        else:
-            max_n_data = int(3600.*int(n_hours)/sampling) + 1
-
-        block_data = np.zeros(max_n_data,'int')
+            continue
+        lo_allfiles.extend([op.join(wd, i) for i in sorted(os.listdir(wd))
+                            if fnmatch.fnmatch(i.lower(), pattern.lower())])
 
+    return lo_allfiles
 
-        #loop over all (sorted) files for the current component
-        for idx_f,f in enumerate(lo_sorted_files):
 
-            try:
+class _EDLSplitter(object):
+    """
+    Route the samples of one station component into time aligned windows
+    and write each window when the data move past it. Only the current
+    window is held in memory.
 
-                print('Reading file %s' %(f))
-                #starting time of current file
-                file_start_time = lo_sorted_starttimes[idx_f]
+    Samples are placed on a grid of sample indices counted from 'origin'.
+    Later files overwrite overlapping samples of the current window,
+    samples before the current window are dropped.
+    """
 
-                #get tuple with the starting time of the current file
-                file_start = time.gmtime(file_start_time)
-            
-                #read in raw data
-                data_in = []
-                Fin = open(f)
-                for line in Fin:#.readlines():
-                #    try:
-                    data_in.append(int(float(line.strip())))
-                 #   except:
-                  #      pass
-                data_in = np.array(data_in)
-                Fin.close()
-                #data_in = np.loadtxt(f)
-            except:
-                print('WARNING - could not read file - skipping...')
+    def __init__(self, stationname, comp, sampling, n_hours, origin, outpath,
+                 fill_value=None):
+        self.stationname = stationname
+        self.comp = comp
+        self.sampling = sampling
+        self.n_hours = n_hours
+        self.origin = origin
+        self.outpath = outpath
+        self.fill_value = fill_value
+
+        self.window = int(round(n_hours * 3600. / sampling))
+        self.data = np.zeros(self.window, dtype=np.int64)
+        self.filled = np.zeros(self.window, dtype=bool)
+        self.current = None
+        self.started = False
+        self.written = []
+
+    def add(self, first, data):
+        """
+        Add samples starting at sample index 'first'.
+        """
+        pos = 0
+        while pos < len(data):
+            sample = first + pos
+            index = sample // self.window
+            if self.current is not None and index < self.current:
+                pos += self.current * self.window - sample
                 continue
-            no_samples = len(data_in)
-
-            #time axis of the file read in :
-            tmp_file_time_axis = np.arange(no_samples)*sampling+file_start_time
-
-            #end: time of the last sample + 1x sampling-interval
-            file_end_time =  tmp_file_time_axis[-1] + sampling
-         
-            #set the current file's starting time as starting time for output file, 
-            #if no output file is open already
-
-            
-            if fileopen is False:
-                #starttime of output file
-                outfile_starttime =  file_start_time
-                #output data sample index:                
-                arrayindex = 0
-
-                #if it's a single column of data
-                if np.size(data_in.shape) == 1:
-                    block_data[:len(data_in)] = data_in                    
-                    
-                #otherwise assuming that the first column is time, so just take the second one
-                else:
-                    block_data[:len(data_in)] = data_in[:,1]
-                
-                #jump with index to current point on time axis 
-                arrayindex += len(data_in)
-
-                #current (virtual) end time of open file
-                outfile_endtime = file_end_time
-
-                #find the date code of the outputfile
-                file_date = '{0}{1:02}{2:02}'.format(file_start[0],
-                                                 file_start[1], file_start[2])
-                
-                #...aaaand the hour code as well
-                data_hour = file_start[3]
-
-                #determine, which of the daily data blocks we are currently 
-                #processing/writing
-                blockindex = no_blocks-1
-                
-                file_hour = lo_hours[-1]
-                for t in range(len(lo_hours)-1):
-                    if lo_hours[t+1]>data_hour:
-                        blockindex = t
-                        file_hour = lo_hours[blockindex]
-                        break
-
-
-                #define output filename
-                new_fn = '{0}_{5}hours_{1}_{2:02d}_{3}.{4}'.format(stationname,
-                                                 file_date, file_hour,fileindex, comp,n_hours)
-                #absolute filename:
-                new_file = op.abspath(op.join(outpath,new_fn))
-                
-                #open output file 
-                F = open(new_file,'w')
-                
-                #set flag for further loop steps
-                fileopen = True
-
-            
+            if index != self.current:
+                self.flush(index)
+
+            offset = sample - index * self.window
+            n = min(len(data) - pos, self.window - offset)
+            self.data[offset:offset + n] = data[pos:pos + n]
+            self.filled[offset:offset + n] = True
+            pos += n
+
+    def flush(self, next_index=None):
+        """
+        Write the current window and move on to window 'next_index', None
+        for the end of the data.
+        """
+        if self.current is not None:
+            if self.fill_value is None:
+                # a new file after every gap, counted by the file index
+                edges = np.flatnonzero(np.diff(np.concatenate(
+                    ([0], self.filled.astype(np.int8), [0]))))
+                for fileindex, (start, end) in enumerate(zip(edges[0::2],
+                                                             edges[1::2])):
+                    self.write(self.current, fileindex, start,
+                               self.data[start:end])
             else:
-                #check, if the new file ends earlier than data in buffer.
-                #if yes, just skip this file:
-                if file_end_time < outfile_endtime:
-                    continue 
-
-                #if current file starts earlier than the endtime of data in buffer, but extends the time span
-                #then delete ambiguous  parts of the buffer:
-                elif (outfile_endtime - file_start_time) > epsilon:
-
-                    #find point on the outfile time axis for the beginning of current file:
-                    overlap_idx = arrayindex - int((outfile_endtime - file_start_time)/sampling)
-
-                    #set the array index back to the appropriate value corresponding to the 
-                    #start of the new file
-                    arrayindex = overlap_idx
-                   
-  
-                #append current data                  
-                #if it's a single column of data
-                if np.size(data_in.shape) == 1:
-                    block_data[arrayindex:arrayindex+len(data_in)] = data_in                    
-                    #outfile_data.extend(data_in.tolist())
-                #otherwise assuming that the first column is time, so just take the second one
-                else:
-                    block_data[arrayindex:arrayindex+len(data_in)] = data_in[:,1]                    
-                    #outfile_data.extend(data_in[:,1].tolist())
-
-                #update position in time
-                arrayindex += len(data_in)
-
-                #update (virtual) end of outfile data
-                outfile_endtime = (arrayindex+1)*sampling + outfile_starttime
-
-
-            #-----------
-            # current file has been read in, data in buffer have been updated
-            # now check, if it has to be written to file....
-
-            #check, if there is a next file at all:
-            try:
-                next_file_start_time = lo_sorted_starttimes[idx_f + 1]
-            except:
-                complete = True
-
-            #if there is a next file, 
-            # - check, if it's the same day
-            # - check, if it' the same block
-            # - check, if it continues at the end of the current one:
-
-            if complete is False:
-                next_file_start_time = lo_sorted_starttimes[idx_f + 1]
-                next_file_start = time.gmtime(next_file_start_time)
-                
-                nextfile_hour = next_file_start[3]
-
-                nextfile_blockindex  = no_blocks-1
-                for t in range(len(lo_hours)-1):
-                    if lo_hours[t+1]>nextfile_hour:
-                        nextfile_blockindex = t
-                        break
-
-
-                nextfile_day = '{0}{1:02}{2:02}'.format(next_file_start[0],
-                                                 next_file_start[1], next_file_start[2])
-                if  nextfile_day != file_date: 
-                    complete = True
-                    sameday = False                    
-                if  nextfile_blockindex != blockindex:
-                    complete = True
-                    sameblock = False
-
-            if complete is False:
-                if next_file_start_time - file_end_time > epsilon: 
-                    complete = True
-                    sameblock = True
-                    sameday = True
-
-         
-            #ipdb.set_trace()
-
-            #check, if the file has to be closed and written now
-            if complete is True :
-
-                #define header info
-                if outfile_starttime%1==0:
-                    outfile_starttime = int(outfile_starttime)
-
-                    headerline = '# {0} {1} {2:.1f} {3} {4} \n'.format(
-                                    stationname, comp.lower(), 1./sampling, 
-                                    outfile_starttime, arrayindex)
-                else:
-                    headerline = '# {0} {1} {2:.1f} {3:f} {4} \n'.format(
-                                    stationname, comp.lower(), 1./sampling, 
-                                    outfile_starttime, arrayindex)
-
-                F.write(headerline)
-
-                #outfile_array = np.zeros((len(outfile_timeaxis),2))
-                #outfile_array[:,0] = outfile_timeaxis
-                #outfile_array[:,1] = outfile_data
-                for i in range(arrayindex):
-                    F.write('{0}\n'.format(int(block_data[i])))
-                #outstring = '\n'.join(['{0:d}'.format(i) for i in day_data[:arrayindex]])
-                #F.write(outstring)
-                #np.savetxt(F,day_data[:arrayindex],fmt='%d')
-                #np.savetxt(F, np.array(outfile_data))
-                arrayindex = 0
-                
-                F.close()
-                print('\t wrote file %s'%(new_file))
-
-                fileopen = False
-                complete = False
-                #blockindex = (blockindex+1)%no_blocks
-    
-                if sameday is True and sameblock is True : 
-                    fileindex +=1        
-                else:
-                    fileindex = 0
+                # one file per window from the first to the last sample,
+                # gaps and windows without data are filled
+                start = 0
+                if not self.started:
+                    start = np.flatnonzero(self.filled)[0]
+                    self.started = True
+                end = self.window
+                if next_index is None:
+                    end = np.flatnonzero(self.filled)[-1] + 1
+                values = np.where(self.filled[start:end],
+                                  self.data[start:end],
+                                  int(self.fill_value))
+                self.write(self.current, 0, start, values)
+
+                if next_index is not None:
+                    for index in range(self.current + 1, next_index):
+                        self.write(index, 0, 0,
+                                   np.full(self.window, int(self.fill_value),
+                                           dtype=np.int64))
+
+        self.current = next_index
+        self.data[:] = 0
+        self.filled[:] = False
+
+    def write(self, index, fileindex, offset, values):
+        window_starttime = self.origin + index * self.window * self.sampling
+        outfile_starttime = window_starttime + offset * self.sampling
+        window_start = time.gmtime(window_starttime)
+
+        file_date = '{0}{1:02}{2:02}'.format(window_start[0],
+                                            window_start[1], window_start[2])
+        if self.n_hours == 24:
+            new_fn = '{0}_1day_{1}_{2}.{3}'.format(self.stationname,
+                                                   file_date, fileindex,
+                                                   self.comp)
+        else:
+            new_fn = '{0}_{5}hours_{1}_{2:02d}_{3}.{4}'.format(
+                self.stationname, file_date, window_start[3], fileindex,
+                self.comp, self.n_hours)
+        new_file = op.abspath(op.join(self.outpath, new_fn))
+
+        if outfile_starttime % 1 == 0:
+            headerline = '# {0} {1} {2:.1f} {3} {4} \n'.format(
+                self.stationname, self.comp.lower(), 1. / self.sampling,
+                int(outfile_starttime), len(values))
+        else:
+            headerline = '# {0} {1} {2:.1f} {3:f} {4} \n'.format(
+                self.stationname, self.comp.lower(), 1. / self.sampling,
+                outfile_starttime, len(values))
 
- 
+        with open(new_file, 'w') as F:
+            F.write(headerline)
+            F.write('\n'.join(map(str, values.tolist())))
+            F.write('\n')
+        print('\t wrote file %s' % (new_file))
+        self.written.append(new_file)
 
 
-def EDL_make_dayfiles(inputdir, sampling , stationname = None, outputdir = None):
+def _EDL_split_component(stationname, comp, lo_files, sampling, n_hours,
+                         outpath, fill_value):
     """
-
-    Concatenate ascii time series to dayfiles (calendar day, UTC reference).
-
-    Data can be within a single directory or a list of directories. 
-    However, the files in the directory(ies) 'inputdir' have to be for 
-    one station only, and named with a 2 character suffix, defining the channel! 
-
-    If the time series are interrupted/discontinuous at some point, a new file 
-    will be started after that point, where the file index 'idx' is increased by 1.
-    If no stationname is given, the leading non-datetime characters in the first 
-    filename are used.
-
-
-    Files are named as 'stationname_samplingrate_date_idx.channel'
-    Stationname, channel, and sampling are written to a header line.
-
-    Output data consists of a single column float data array. The data are 
-    stored into one directory. If 'outputdir' is not specified, a subdirectory 
-    'dayfiles' will be created witihn the current working directory. 
-
-    Note: 
-    Midnight cannot be in the middle of a file, because only file starts are 
-    checked for a new day!!
-
+    Split the files of one station component, see 'EDL_split_files'.
     """
-    try:
-        if type(inputdir)==str:
-            raise Exception("problem!!!")
-        lo_foldernames = [i for i in inputdir]
-    except TypeError:
-        lo_foldernames = [inputdir]
-
-    #typical suffixes for EDL output file names
-    components = ['ex', 'ey', 'bx', 'by', 'bz']
+    lo_starttimes = [EDL_get_starttime_fromfilename(f) for f in lo_files]
+    lo_sorted = sorted([(t, f) for t, f in zip(lo_starttimes, lo_files)
+                        if t is not None])
+    if len(lo_sorted) == 0:
+        return []
+
+    # windows are counted from midnight of the first day
+    origin = lo_sorted[0][0] - lo_sorted[0][0] % 86400
+    splitter = _EDLSplitter(stationname, comp, sampling, n_hours, origin,
+                            outpath, fill_value)
+    for file_start_time, f in lo_sorted:
+        print('Reading file %s' % (f))
+        try:
+            data_in = read_EDL_file(f)
+        except (IOError, OSError, ValueError):
+            print('WARNING - could not read file - skipping...')
+            continue
+        splitter.add(int(round((file_start_time - origin) / sampling)),
+                     data_in)
+    splitter.flush()
 
-    lo_allfiles = []
-    pattern = '*.[ebEB][xyzXYZ]'
-    if stationname is not None:
-        pattern = '*{0}*.[ebEB][xyzXYZ]'.format(stationname.lower())
-    print('\nSearching for files with pattern: ',pattern)
+    return splitter.written
 
-    for folder in lo_foldernames:
-        wd = op.abspath(op.realpath(folder)) 
-        if not op.isdir(wd):
-            #print 'Directory not existing: %s' % (wd)
-            lo_foldernames.remove(wd)
-            continue    
 
-        lo_dirfiles = [op.abspath(op.join(wd,i))  for i in os.listdir(wd) 
-                        if fnmatch.fnmatch(i.lower(),pattern.lower()) is True]
-        lo_allfiles.extend(lo_dirfiles)   
+def EDL_split_files(inputdir, sampling, n_hours=24, stationname=None,
+                    outputdir=None, fill_value=None, num_workers=None):
+    """
+    Cut EDL ascii time series into files of (max) N hours, starting to
+    count at midnight (00:00h, UTC) each day.
+
+    The files in the directory(ies) 'inputdir' have to be named with the
+    station, starting time and a 2 character suffix defining the channel.
+    Each file is read once and its samples are routed into the time aligned
+    output windows, so a file may be split across windows. Only one window
+    per channel is held in memory. The components of all stations are
+    processed in parallel.
+
+    If the time series are interrupted/discontinuous at some point, a new
+    file is started after that point, where the file index 'idx' is
+    increased by 1. With a 'fill_value' the gaps are filled instead and each
+    window is written to one file.
+
+    Files are named as 'stationname_1day_date_idx.channel' for N = 24 and
+    'stationname_Nhours_date_hour_idx.channel' otherwise. Stationname,
+    channel, sampling, starting time and number of samples are written to a
+    header line, followed by a single column of integer data.
+
+    :param inputdir: directory or list of directories with the files
+    :param sampling: sampling interval in seconds
+    :param n_hours: file length in hours, one of 1,2,3,4,6,8,12,24
+    :param stationname: only this station, all stations found in the file
+                        names if None
+    :param outputdir: output directory, *default* is a subdirectory
+                      'dayfiles' or 'Nhourfiles' of the current directory
+    :param fill_value: integer to fill gaps with, None to start a new file
+    :param num_workers: number of processes, *default* is the number of
+                        cpus. With 1 the files are split in this process.
+    :returns: list of the written files
+    """
+    n_hours = int(n_hours)
+    if n_hours < 1 or 24 % n_hours != 0:
+        raise MTex.MTpyError_inputarguments('File block length must be one '
+                                            'of: 1,2,3,4,6,8,12,24')
 
-    #check, if list of files is empty
+    lo_allfiles = EDL_find_files(inputdir, stationname)
     if len(lo_allfiles) == 0:
         if stationname is not None:
             raise MTex.MTpyError_inputarguments('Directory(ies) do(es) not contain'\
@@ -765,289 +582,94 @@ def EDL_make_dayfiles(inputdir, sampling , stationname = None, outputdir = None)
         raise MTex.MTpyError_inputarguments('Directory does not contain files'\
                                             ' to combine:\n {0}'.format(inputdir))
 
-    #define subfolder for storing dayfiles
-    outpath = op.join(os.curdir,'dayfiles')    
-    if outputdir is not None:
-        try:
-            outpath = op.abspath(op.join(os.curdir,outputdir))
-            if not op.exists(outpath):
-                try:
-                    os.makedirs(outpath)
-                except:
-                    raise Exception("problem!!!")
-            if not os.access(outpath, os.W_OK):
-                raise Exception("problem!!!")
-        except:
-            print('Cannot generate writable output directory {0} - using'\
-                    ' generic location "dayfiles" instead'.format(outpath))
-            outpath = op.join(wd,'dayfiles')    
-            pass
-
-    #generate subfolder, if not existing
+    if outputdir is None:
+        if n_hours == 24:
+            outpath = op.abspath(op.join(os.curdir, 'dayfiles'))
+        else:
+            outpath = op.abspath(op.join(os.curdir,
+                                         '{0}hourfiles'.format(n_hours)))
+    else:
+        outpath = op.abspath(op.join(os.curdir, outputdir))
     if not op.exists(outpath):
         try:
             os.makedirs(outpath)
-        except:
-            MTex.MTpyError_inputarguments('Cannot generate output'\
+        except OSError:
+            raise MTex.MTpyError_inputarguments('Cannot generate output'\
                                 ' directory {0} '.format(outpath))
 
-    #outer loop over all components
-    for comp in components:
-
-        #make list of files for the current component
-        lo_files = np.array([op.join(wd,i) for i in lo_allfiles 
-                            if (i.lower()[-2:] == comp)])
-
-        #make list of starting times for the respective files
-        lo_starttimes = np.array([EDL_get_starttime_fromfilename(f) 
-                                    for f in lo_files])
-        
-        #sort the files by their starting times
-        idx_chronologic = np.argsort(lo_starttimes)
-        
-        #obtain sorted lists of files and starting times
-        lo_sorted_files = list(lo_files[idx_chronologic])
-        lo_sorted_starttimes = list(lo_starttimes[idx_chronologic])
-        idx = 0
-        while idx < len(lo_sorted_starttimes):
-            try:
-                val = lo_sorted_starttimes[idx]
-            except:
-                break
-            if val is None:
-                dummy = lo_sorted_files.pop(idx)
-                dummy = lo_sorted_starttimes.pop(idx)
-            else:
-                idx += 1
-
-
-        #set stationname, either from arguments or from filename
+    # one task per station and component
+    tasks = {}
+    for f in lo_allfiles:
         if stationname is None:
-            stationname = EDL_get_stationname_fromfilename(lo_sorted_files[0]).upper()
-
-        #set counting variables - needed for handling of consecutive files
-
-        sameday = 0
-        fileopen = 0
-        incomplete = 0
-        fileindex = 0
-
-        #allocate a data array to fill
-        # this is more memory efficient than extending lists!!
-        #cater for potential rounding errors:
-        if sampling < 1:
-            max_n_data = 86400 * (int(1./sampling)+1)
+            station = EDL_get_stationname_fromfilename(f).upper()
         else:
-            max_n_data = int(86400./sampling) + 1
-
-        day_data = np.zeros(max_n_data,'int')
-
-
-
-        #loop over all (sorted) files for the current component
-        for idx_f,f in enumerate(lo_sorted_files):
-
-            try:
-
-                print('Reading file %s' %(f))
-                #starting time of current file
-                file_start_time = lo_sorted_starttimes[idx_f]
-
-
-                #get tuple with the starting time of the current file
-                file_start = time.gmtime(file_start_time)
-            
-                #read in raw data
-                data_in = []
-                Fin = open(f)
-                for line in Fin:#.readlines():
-                #    try:
-                    data_in.append(int(float(line.strip())))
-                 #   except:
-                  #      pass
-                data_in = np.array(data_in)
-                Fin.close()
-                #data_in = np.loadtxt(f)
-            except:
-                print('WARNING - could not read file - skipping...')
-                continue
-            no_samples = len(data_in)
-
-            tmp_file_time_axis = np.arange(no_samples)*sampling+file_start_time
-            #file_time_axis = (np.arange(no_samples)*sampling +
-            #                 file_start_time).tolist()
+            station = stationname.upper()
+        comp = f.lower()[-2:]
+        tasks.setdefault((station, comp), []).append(f)
+    tasks = [(station, comp, lo_files, sampling, n_hours, outpath, fill_value)
+             for (station, comp), lo_files in sorted(tasks.items())]
 
+    lo_written = parallel.map_tasks(_EDL_split_component, tasks,
+                                    num_workers=num_workers)
 
-            #time of the last sample + 1x sampling-interval
-            #file_end_time =  file_time_axis[-1] + sampling
-            file_end_time =  tmp_file_time_axis[-1] + sampling
-         
+    return [f for written in lo_written for f in written]
 
 
+def EDL_make_Nhour_files(n_hours,inputdir, sampling , stationname = None,
+                         outputdir = None, fill_value = None,
+                         num_workers = None):
 
-            #set the time as starting time for output file, if no output file is open already
-            if fileopen == 0:
-                outfile_starttime =  file_start_time
-
-                #outfile_timeaxis = file_time_axis
-                old_time_axis = tmp_file_time_axis[:]
-                
-
-                arrayindex = 0
-
-                #if it's a single column of data
-                if np.size(data_in.shape) == 1:
-                    day_data[arrayindex:arrayindex+len(data_in)] = data_in                    
-                    #outfile_data = data_in.tolist()
-                #otherwise assuming that the first column is time, so just take the second one
-                else:
-                    day_data[arrayindex:arrayindex+len(data_in)] = data_in[:,1]
-                    #outfile_data = data_in[:,1].tolist()
-                
-                #jump with index to current point on time axis 
-                arrayindex += len(data_in)
-                outfile_endtime = file_end_time
-
-
-                file_date = '{0}{1:02}{2:02}'.format(file_start[0],
-                                                 file_start[1], file_start[2]) 
-
-
-                #define output filename
-                new_fn = '{0}_1day_{1}_{2}.{3}'.format(stationname,
-                                                 file_date, fileindex, comp)
-                
-                new_file = op.abspath(op.join(outpath,new_fn))
-                
-                #open output file 
-                F = open(new_file,'w')
-                
-                fileopen = 1
-
-
-            
-            else:
-                #check, if the new file ends earlier than data in buffer.
-                #if yes, just skip this file:
-                if file_end_time < outfile_endtime:
-                    continue 
-
-                #if current file starts earlier than the endtime of data in buffer then delete ambiguous  parts of the buffer:
-                #elif (outfile_timeaxis[-1] - file_start_time) > epsilon:
-                elif (outfile_endtime - file_start_time) > epsilon:
-
-                    #find point on the outfile time axis for the beginning of current file:
-                    overlap_idx = arrayindex - int((outfile_endtime - file_start_time)/sampling)
-
-                    #set the array index back
-                    arrayindex = overlap_idx
-                   
-                    #re-define outfile time axis and data
-                    # outfile_timeaxis = np.delete(outfile_timeaxis,
-                    #                              np.arange(len(outfile_timeaxis) - 
-                    #                              overlap_idx) + 
-                    #                              overlap_idx).tolist()
-
-
-                    # outfile_data = np.delete(outfile_data, 
-                    #                             np.arange(len(outfile_data) - 
-                    #                             overlap_idx) + 
-                    #                             overlap_idx).tolist()
-                
-
-                #old_time_axis = tmp_file_time_axis[:]
-                #append current file's time axis
-                #outfile_timeaxis.extend(file_time_axis)
-                    
-                #append current data                  
-                #if it's a single column of data
-                if np.size(data_in.shape) == 1:
-                    day_data[arrayindex:arrayindex+len(data_in)] = data_in                    
-                    #outfile_data.extend(data_in.tolist())
-                #otherwise assuming that the first column is time, so just take the second one
-                else:
-                    day_data[arrayindex:arrayindex+len(data_in)] = data_in[:,1]                    
-                    #outfile_data.extend(data_in[:,1].tolist())
-
-                arrayindex += len(data_in)
-                print(len(data_in),arrayindex)
-
-                arrayindex += len(data_in)
-                outfile_endtime = (arrayindex+1)*sampling + outfile_starttime
-
-
+    """
+    See 'EDL_make_dayfiles' for description and syntax.
 
-            #-----------
+    Only difference: output files are blocks of (max) N hours, starting to count 
+    at midnight (00:00h) each day.
 
-            #check, if there is a next file:
-            try:
-                next_file_start_time = lo_sorted_starttimes[idx_f + 1]
-            except:
-                incomplete = 1
-
-            #if there is a next file, 
-            # - check, if it's the same day
-            # - check, if it continues at the end of the current one:
-            if incomplete == 0:
-                next_file_start_time = lo_sorted_starttimes[idx_f + 1]
-                next_file_start = time.gmtime(next_file_start_time)
-                
-                if next_file_start[2] == file_start[2] :
-                    #print 'sameday',file_start[:]
-                    sameday = 1
-                else:
-                    incomplete = 1
-                    sameday = 0
-                    fileindex = 0
-                    #print '\t NOT sameday', fileindex
+    Conditions:
+    
+    1.   24%%N = 0
 
+    """
+    try:
+        if 24%n_hours != 0:
+            raise Exception("problem!!!")
+    except:
+        sys.exit('ERROR - File block length must be on of: 1,2,3,4,6,8,12 \n')
 
-                if next_file_start_time - file_end_time > epsilon: 
-                    incomplete = 1
+    return EDL_split_files(inputdir, sampling, n_hours=n_hours,
+                           stationname=stationname, outputdir=outputdir,
+                           fill_value=fill_value, num_workers=num_workers)
 
-            if incomplete == 1 and sameday == 1 : 
-                fileindex +=1        
 
-           
+def EDL_make_dayfiles(inputdir, sampling , stationname = None, outputdir = None,
+                      fill_value = None, num_workers = None):
+    """
 
-            #check, if the file has to be closed and written now
-            if incomplete == 1 :
+    Concatenate ascii time series to dayfiles (calendar day, UTC reference).
 
-                #define header info
-                if outfile_starttime%1==0:
-                    outfile_starttime = int(outfile_starttime)
+    Data can be within a single directory or a list of directories. 
+    The files in the directory(ies) 'inputdir' have to be named with a 2
+    character suffix, defining the channel! Without a stationname all
+    stations found in the file names are processed.
 
-                    headerline = '# {0} {1} {2:.1f} {3} {4} \n'.format(
-                                    stationname, comp.lower(), 1./sampling, 
-                                    outfile_starttime, arrayindex)
-                else:
-                    headerline = '# {0} {1} {2:.1f} {3:f} {4} \n'.format(
-                                    stationname, comp.lower(), 1./sampling, 
-                                    outfile_starttime, arrayindex)
-
-
-                F.write(headerline)
-
-                #outfile_array = np.zeros((len(outfile_timeaxis),2))
-                #outfile_array[:,0] = outfile_timeaxis
-                #outfile_array[:,1] = outfile_data
-                for i in range(arrayindex):
-                    F.write('{0}\n'.format(int(day_data[i])))
-                #outstring = '\n'.join(['{0:d}'.format(i) for i in day_data[:arrayindex]])
-                #F.write(outstring)
-                #np.savetxt(F,day_data[:arrayindex],fmt='%d')
-                #np.savetxt(F, np.array(outfile_data))
-                arrayindex = 0
-                
+    If the time series are interrupted/discontinuous at some point, a new file 
+    will be started after that point, where the file index 'idx' is increased by 1.
+    With a 'fill_value' the gaps are filled instead.
 
-                F.close()
-                print('\t wrote file %s'%(new_file))
+    Files are named as 'stationname_1day_date_idx.channel'
+    Stationname, channel, and sampling are written to a header line.
 
-                fileopen = 0
-                incomplete = 0
-    
+    Output data consists of a single column integer data array. The data are 
+    stored into one directory. If 'outputdir' is not specified, a subdirectory 
+    'dayfiles' will be created witihn the current working directory. 
 
+    Files are cut at midnight, also in the middle of an input file. See
+    'EDL_split_files' for the other arguments.
 
+    """
+    return EDL_split_files(inputdir, sampling, n_hours=24,
+                           stationname=stationname, outputdir=outputdir,
+                           fill_value=fill_value, num_workers=num_workers)
 
 
 def EDL_get_starttime_fromfilename(filename): 
@@ -16,6 +16,13 @@ Main functions are:
     
 These can take in a point or an array or list of points to project.
 
+For large numbers of points use the bulk versions, which transform whole
+arrays in one call per UTM zone with cached transformers and return plain
+numpy arrays:
+
+    * project_points_ll2utm
+    * project_points_utm2ll
+
 latitude and longitude can be input as:
     * 'DD:mm:ss.ms'
     * 'DD.decimal_degrees'
@@ -30,20 +37,26 @@ Revised: 5/2020 JP
 # ==============================================================================
 # Imports
 # ==============================================================================
+import functools
+
 import numpy as np
 from mtpy.utils.mtpylog import MtPyLog
-from mtpy.utils import HAS_GDAL, EPSG_DICT, NEW_GDAL
-
-if HAS_GDAL:
-    from osgeo import osr
-    from osgeo.ogr import OGRERR_NONE
+from mtpy.utils import has_gdal, is_new_gdal, get_epsg_dict
 
-else:
-    import pyproj
+# GDAL (osgeo) or pyproj are imported on first use of a projection
 
 _logger = MtPyLog.get_mtpy_logger(__name__)
-if NEW_GDAL:
-    _logger.info('INFO: GDAL version 3 detected')
+
+
+def __getattr__(name):
+    # HAS_GDAL, NEW_GDAL and EPSG_DICT are evaluated on first access
+    lazy_attributes = {'HAS_GDAL': has_gdal,
+                       'NEW_GDAL': is_new_gdal,
+                       'EPSG_DICT': get_epsg_dict}
+    if name in lazy_attributes:
+        return lazy_attributes[name]()
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(
+        __name__, name))
 
 # =============================================================================
 # GIS Error container
@@ -349,8 +362,9 @@ def utm_zone_to_epsg(zone_number, is_northern):
         32755
 
     """
-    for key in list(EPSG_DICT.keys()):
-        val = EPSG_DICT[key]
+    epsg_dict = get_epsg_dict()
+    for key in list(epsg_dict.keys()):
+        val = epsg_dict[key]
         if ('+zone={:<2}'.format(zone_number) in val) and \
                 ('+datum=WGS84' in val):
             if is_northern:
@@ -397,6 +411,9 @@ def _get_gdal_coordinate_system(datum):
     :rtype: osr.SpatialReference
 
     """
+    from osgeo import osr
+    from osgeo.ogr import OGRERR_NONE
+
     # set lat lon coordinate system
     cs = osr.SpatialReference()
     if isinstance(datum, int):
@@ -551,6 +568,7 @@ def _get_gdal_projection_ll2utm(datum, utm_zone, epsg):
         zone_number, is_northern = split_utm_zone(utm_zone)
         utm_cs.SetUTM(zone_number, is_northern)
 
+    from osgeo import osr
     return osr.CoordinateTransformation(ll_cs, utm_cs).TransformPoint
 
 
@@ -587,6 +605,7 @@ def _get_gdal_projection_utm2ll(datum, utm_zone, epsg):
         utm_cs.SetUTM(zone_number, is_northern)
 
     ll_cs = utm_cs.CloneGeogCS()
+    from osgeo import osr
     return osr.CoordinateTransformation(utm_cs, ll_cs).TransformPoint
 
 
@@ -615,6 +634,8 @@ def _get_pyproj_projection(datum, utm_zone, epsg):
     if utm_zone is None and epsg is None:
         raise GISError('Need to input either UTM zone or EPSG number')
 
+    import pyproj
+
     if isinstance(epsg, int):
         pp = pyproj.Proj('+init=EPSG:%d' % (epsg))
 
@@ -628,6 +649,268 @@ def _get_pyproj_projection(datum, utm_zone, epsg):
     return pp
 
 
+def get_utm_zones(latitude, longitude):
+    """
+    Get utm zones for arrays of latitude and longitude in decimal degrees,
+    vectorised version of get_utm_zone
+
+    :param latitude: latitudes in decimal degrees
+    :type latitude: np.ndarray
+
+    :param longitude: longitudes in decimal degrees
+    :type longitude: np.ndarray
+
+    :return: UTM zones as {0-9}{0-9}{C-X}
+    :rtype: np.ndarray(dtype='U3')
+
+    :Example: ::
+
+        >>> gis_tools.get_utm_zones([-34.3, 40.0], [149.2, -115.0])
+        array(['55H', '11S'], dtype='<U3')
+    """
+    latitude = np.asarray(latitude, dtype=float)
+    longitude = np.asarray(longitude, dtype=float)
+
+    zone_number = (1 + (longitude + 180.0) / 6.0).astype(int)
+
+    # same bands as utm_letter_designator, boundaries go to the lower band
+    letters = np.array(list('CDEFGHJKLMNPQRSTUVWX'))
+    band = np.clip(np.ceil((latitude + 80) / 8.).astype(int) - 1, 0,
+                   letters.size - 1)
+    band_letter = np.where((latitude >= -80) & (latitude <= 84),
+                           letters[band], 'Z')
+
+    return np.char.add(np.char.zfill(zone_number.astype(str), 2),
+                       band_letter).astype('U3')
+
+
+def _validate_bulk_values(values, location_type=None):
+    """
+    fast path of validate_input_values for numeric input, falls back to
+    validate_input_values for strings in 'DD:mm:ss.ms' format
+    """
+    try:
+        values = np.asarray(values, dtype=float).flatten()
+    except (TypeError, ValueError):
+        return validate_input_values(values, location_type=location_type)
+
+    if location_type in ['lat', 'latitude']:
+        limit, name = 90, 'Latitude'
+    elif location_type in ['lon', 'longitude']:
+        limit, name = 180, 'Longitude'
+    else:
+        return values
+
+    bad = np.nonzero(np.abs(values) >= limit)[0]
+    if bad.size > 0:
+        raise GISError('|{0} = {1:.5f}| > {2}, unacceptable!\n Bad input '
+                       'value at index {3}'.format(name, values[bad[0]],
+                                                   limit, bad[0]))
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def _get_transformer(datum, zone_number, is_northern, epsg, inverse):
+    """
+    Get a cached transformer for (datum, zone, epsg).  The transformer is a
+    function taking two coordinate arrays and returning two coordinate arrays,
+    (lat, lon) -> (easting, northing), or the inverse.
+    """
+    utm_zone = None
+    if zone_number is not None:
+        utm_zone = zone_number if is_northern else -zone_number
+
+    if has_gdal():
+        new_gdal = is_new_gdal()
+        if inverse:
+            transform = _get_gdal_projection_utm2ll(datum, utm_zone, epsg)
+        else:
+            transform = _get_gdal_projection_ll2utm(datum, utm_zone, epsg)
+        # TransformPoints of the same osr.CoordinateTransformation
+        transform_points = transform.__self__.TransformPoints
+
+        def transformer(xx, yy):
+            if xx.size == 0:
+                return xx.copy(), yy.copy()
+            if inverse or new_gdal:
+                points = np.column_stack([xx, yy])
+            else:
+                points = np.column_stack([yy, xx])
+            points = np.array(transform_points(points.tolist()))
+            if inverse:
+                # the axis order of the returned lat, lon depends on the
+                # version of GDAL, same test as in project_point_utm2ll
+                is_lat = np.abs(points[:, 0]) < 90
+                return (np.where(is_lat, points[:, 0], points[:, 1]),
+                        np.where(is_lat, points[:, 1], points[:, 0]))
+            return points[:, 0], points[:, 1]
+
+    else:
+        pp = _get_pyproj_projection(datum, utm_zone, epsg)
+
+        def transformer(xx, yy):
+            if inverse:
+                lon, lat = pp(xx, yy, inverse=True)
+                return np.asarray(lat), np.asarray(lon)
+            easting, northing = pp(yy, xx)
+            return np.asarray(easting), np.asarray(northing)
+
+    return transformer
+
+
+def _split_utm_zones(utm_zone, n_points):
+    """
+    split a single utm zone or an array of utm zones into zone numbers and
+    hemispheres for n_points
+    """
+    utm_zone = np.asarray(utm_zone)
+    if utm_zone.ndim == 0:
+        zone_number, is_northern = split_utm_zone(utm_zone.item())
+        return (np.full(n_points, zone_number, dtype=int),
+                np.full(n_points, is_northern, dtype=bool))
+
+    utm_zone = utm_zone.flatten()
+    if utm_zone.size != n_points:
+        raise GISError('Number of UTM zones {0} does not match number of '
+                       'points {1}'.format(utm_zone.size, n_points))
+    zones = [split_utm_zone(zone) for zone in np.unique(utm_zone)]
+    index = np.unique(utm_zone, return_inverse=True)[1]
+    zone_number = np.array([zone[0] for zone in zones], dtype=int)[index]
+    is_northern = np.array([zone[1] for zone in zones], dtype=bool)[index]
+
+    return zone_number, is_northern
+
+
+def _project_by_zone(xx, yy, datum, zone_number, is_northern, epsg, inverse):
+    """
+    project arrays of points with one transformer call for each distinct
+    (zone, hemisphere) pair
+    """
+    out_x = np.zeros(xx.size, dtype=float)
+    out_y = np.zeros(xx.size, dtype=float)
+
+    if epsg is not None:
+        out_x[:], out_y[:] = _get_transformer(datum, None, None, epsg,
+                                              inverse)(xx, yy)
+        return out_x, out_y
+
+    # one group per zone, with the sign carrying the hemisphere
+    zone_key = np.where(is_northern, zone_number, -zone_number)
+    for key in np.unique(zone_key):
+        index = np.nonzero(zone_key == key)[0]
+        transformer = _get_transformer(datum, int(abs(key)), bool(key > 0),
+                                       None, inverse)
+        out_x[index], out_y[index] = transformer(xx[index], yy[index])
+
+    return out_x, out_y
+
+
+def project_points_ll2utm(lat, lon, datum='WGS84', utm_zone=None, epsg=None):
+    """
+    Project arrays of latitude and longitude to UTM coordinates in bulk.
+
+    Unlike project_point_ll2utm, if neither utm_zone nor epsg is given each
+    point is projected into its own UTM zone, so surveys spanning several
+    zones are handled in one call.  Transformers are cached per
+    (datum, zone, epsg).
+
+    :param lat: latitudes in [ 'DD:mm:ss.ms' | 'DD.decimal' | float ]
+    :type lat: [ float | list | numpy.ndarray ]
+
+    :param lon: longitudes in [ 'DD:mm:ss.ms' | 'DD.decimal' | float ]
+    :type lon: [ float | list | numpy.ndarray ]
+
+    :param datum: well known datum
+    :type datum: string
+
+    :param utm_zone: utm_zone {0-9}{0-9}{C-X} or {+, -}{0-9}{0-9}, a single
+                     zone for all points or one zone per point
+    :type utm_zone: [ string | int | numpy.ndarray ]
+
+    :param epsg: EPSG number defining projection, overrides utm_zone
+    :type epsg: [ int | string ]
+
+    :return: easting, northing, utm_zone as flat arrays, utm_zone is None
+             if epsg is given
+    :rtype: tuple of numpy.ndarray
+
+    :Example: ::
+
+        >>> gis_tools.project_points_ll2utm([-34.299442, 40.0],
+        ...                                 [149.2010301, -115.0])
+        (array([702562.69028473, 670725.49427111]),
+         array([6202448.52774675, 4429672.97311553]),
+         array(['55H', '11S'], dtype='<U3'))
+    """
+    lat = _validate_bulk_values(lat, location_type='lat')
+    lon = _validate_bulk_values(lon, location_type='lon')
+    if lat.size != lon.size:
+        raise GISError('lat and lon must have the same number of points')
+    epsg = validate_epsg(epsg)
+
+    zone_number = is_northern = None
+    if epsg is None:
+        if np.ndim(utm_zone) > 0:
+            utm_zone = np.asarray(utm_zone)
+        elif utm_zone in [None, 'none', 'None']:
+            utm_zone = get_utm_zones(lat, lon)
+        else:
+            utm_zone = validate_utm_zone(utm_zone)
+        zone_number, is_northern = _split_utm_zones(utm_zone, lat.size)
+        utm_zone = np.broadcast_to(np.asarray(utm_zone, dtype='U3'),
+                                   lat.shape).copy()
+    else:
+        utm_zone = None
+
+    easting, northing = _project_by_zone(lat, lon, datum, zone_number,
+                                         is_northern, epsg, False)
+
+    return easting, northing, utm_zone
+
+
+def project_points_utm2ll(easting, northing, utm_zone, datum='WGS84',
+                          epsg=None):
+    """
+    Project arrays of UTM coordinates to latitude and longitude in bulk.
+
+    :param easting: easting in meters
+    :type easting: [ float | list | numpy.ndarray ]
+
+    :param northing: northing in meters
+    :type northing: [ float | list | numpy.ndarray ]
+
+    :param utm_zone: utm_zone {0-9}{0-9}{C-X} or {+, -}{0-9}{0-9}, a single
+                     zone for all points or one zone per point
+    :type utm_zone: [ string | int | numpy.ndarray ]
+
+    :param datum: well known datum
+    :type datum: string
+
+    :param epsg: EPSG number defining projection, overrides utm_zone
+    :type epsg: [ int | string ]
+
+    :return: latitude, longitude in decimal degrees as flat arrays
+    :rtype: tuple of numpy.ndarray
+    """
+    easting = _validate_bulk_values(easting)
+    northing = _validate_bulk_values(northing)
+    if easting.size != northing.size:
+        raise GISError('easting and northing must have the same number of '
+                       'points')
+    epsg = validate_epsg(epsg)
+
+    zone_number = is_northern = None
+    if epsg is None:
+        if utm_zone is None:
+            raise GISError('Need to input either UTM zone or EPSG number')
+        if np.ndim(utm_zone) == 0:
+            utm_zone = validate_utm_zone(utm_zone)
+        zone_number, is_northern = _split_utm_zones(utm_zone, easting.size)
+
+    return _project_by_zone(easting, northing, datum, zone_number,
+                            is_northern, epsg, True)
+
+
 def project_point_ll2utm(lat, lon, datum='WGS84', utm_zone=None, epsg=None):
     """
     Project a point that is in latitude and longitude to the specified
@@ -678,37 +961,26 @@ def project_point_ll2utm(lat, lon, datum='WGS84', utm_zone=None, epsg=None):
         return None, None, None
 
     # make sure the lat and lon are in decimal degrees
-    lat = validate_input_values(lat, location_type='lat')
-    lon = validate_input_values(lon, location_type='lon')
+    lat = _validate_bulk_values(lat, location_type='lat')
+    lon = _validate_bulk_values(lon, location_type='lon')
 
     if utm_zone in [None, 'none', 'None']:
         # get the UTM zone in the datum coordinate system, otherwise
         zone_number, is_northern, utm_zone = get_utm_zone(lat.mean(),
                                                           lon.mean())
-    epsg = validate_epsg(epsg)
-    if HAS_GDAL:
-        ll2utm = _get_gdal_projection_ll2utm(datum, utm_zone, epsg)
-    else:
-        ll2utm = _get_pyproj_projection(datum, utm_zone, epsg)
+    utm_zone = validate_utm_zone(utm_zone)
 
     # return different results depending on if lat/lon are iterable
-    projected_point = np.zeros_like(lat, dtype=[('easting', np.float),
-                                                ('northing', np.float),
-                                                ('elev', np.float),
+    projected_point = np.zeros_like(lat, dtype=[('easting', float),
+                                                ('northing', float),
+                                                ('elev', float),
                                                 ('utm_zone', 'U3')])
 
-    for ii in range(lat.size):
-        if NEW_GDAL:
-            point = ll2utm(lat[ii], lon[ii])
-        else:
-            point = ll2utm(lon[ii], lat[ii])
-
-        projected_point['easting'][ii] = point[0]
-        projected_point['northing'][ii] = point[1]
-        if HAS_GDAL:
-            projected_point['elev'][ii] = point[2]
-
-        projected_point['utm_zone'][ii] = utm_zone
+    easting, northing, _ = project_points_ll2utm(lat, lon, datum=datum,
+                                                 utm_zone=utm_zone, epsg=epsg)
+    projected_point['easting'] = easting
+    projected_point['northing'] = northing
+    projected_point['utm_zone'] = utm_zone
 
     # if just projecting one point, then return as a tuple so as not to break
     # anything.  In the future we should adapt to just return a record array
@@ -766,35 +1038,18 @@ def project_point_utm2ll(easting, northing, utm_zone, datum='WGS84', epsg=None):
                   dtype=[('latitude', '<f8'), ('longitude', '<f8')])
 
     """
-    easting = validate_input_values(easting)
-    northing = validate_input_values(northing)
-    epsg = validate_epsg(epsg)
-
-    if HAS_GDAL:
-        utm2ll = _get_gdal_projection_utm2ll(datum, utm_zone, epsg)
-    else:
-        utm2ll = _get_pyproj_projection(datum, utm_zone, epsg)
+    easting = _validate_bulk_values(easting)
+    northing = _validate_bulk_values(northing)
 
     # return different results depending on if lat/lon are iterable
     projected_point = np.zeros_like(easting,
-                                    dtype=[('latitude', np.float),
-                                           ('longitude', np.float)])
-    for ii in range(easting.size):
-        if HAS_GDAL:
-            point = utm2ll(easting[ii], northing[ii], 0.0)
+                                    dtype=[('latitude', float),
+                                           ('longitude', float)])
 
-            try:
-                assert_lat_value(point[0])
-                projected_point['latitude'][ii] = round(point[0], 6)
-                projected_point['longitude'][ii] = round(point[1], 6)
-            except GISError:
-                projected_point['latitude'][ii] = round(point[1], 6)
-                projected_point['longitude'][ii] = round(point[0], 6)
-
-        else:
-            point = utm2ll(easting[ii], northing[ii], inverse=True)
-            projected_point['latitude'][ii] = round(point[1], 6)
-            projected_point['longitude'][ii] = round(point[0], 6)
+    lat, lon = project_points_utm2ll(easting, northing, utm_zone,
+                                     datum=datum, epsg=epsg)
+    projected_point['latitude'] = np.round(lat, 6)
+    projected_point['longitude'] = np.round(lon, 6)
 
     # if just projecting one point, then return as a tuple so as not to break
     # anything.  In the future we should adapt to just return a record array
@@ -817,8 +1072,8 @@ def epsg_project(x, y, epsg_from, epsg_to):
         return
     if epsg_from is not None:
         try:
-            p1 = pyproj.Proj(EPSG_DICT[epsg_from])
-            p2 = pyproj.Proj(EPSG_DICT[epsg_to])
+            p1 = pyproj.Proj(get_epsg_dict()[epsg_from])
+            p2 = pyproj.Proj(get_epsg_dict()[epsg_to])
         except KeyError:
             print("Surface or data epsg either not in dictionary or None")
             return
@@ -0,0 +1,341 @@
+"""
+Timing and profiling instrumentation for MTpy.
+
+Named stages record wall time, CPU time, bytes read and peak memory.  The
+readers, writers, interpolation, ModEM file builders and plotting functions
+of mtpy are instrumented, a summary per stage shows where a run spends its
+time.  Instrumentation is off by default and costs a flag check when off.
+
+Turn it on with the environment variable MTPY_INSTRUMENT::
+
+    MTPY_INSTRUMENT=1 python my_script.py          # times only
+    MTPY_INSTRUMENT=memory python my_script.py     # times and peak memory
+
+or in a logging configuration loaded with MtPyLog.load_configure::
+
+    instrumentation:
+        enabled: true
+        memory: false
+
+or in code::
+
+    >>> from mtpy.utils import instrumentation
+    >>> instrumentation.enable(memory=True)
+    >>> mt_obj = MT(edi_fn)
+    >>> instrumentation.write_csv('stages.csv')
+
+Instrument code with the stage context manager or the instrument decorator::
+
+    >>> with instrumentation.stage('read_big_file') as st:
+    ...     data = fid.read()
+    ...     st.add_bytes(len(data))
+    >>> @instrumentation.instrument('mt.interpolate')
+    ... def interpolate(self, new_freq_array):
+
+Memory is tracked with tracemalloc, so it only sees allocations made through
+Python and numpy, and it slows down allocation heavy code.
+"""
+import csv
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+ENV_VARIABLE = 'MTPY_INSTRUMENT'
+
+SUMMARY_KEYS = ['stage', 'count', 'wall_time', 'wall_time_min',
+                'wall_time_max', 'cpu_time', 'bytes_read', 'peak_memory']
+
+
+class _State(object):
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.summary = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+
+_state = _State()
+
+
+class _NullStage(object):
+    """
+    stage used when instrumentation is off, does nothing
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def add_bytes(self, n_bytes):
+        pass
+
+
+_null_stage = _NullStage()
+
+
+class Stage(object):
+    """
+    a named stage that is timed when used as a context manager
+
+    :param name: name of the stage, stages with the same name are summed
+    :type name: string
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.
+        self.cpu_time = 0.
+        self.bytes_read = 0
+        self.peak_memory = 0
+        self._memory = False
+        self._memory_start = 0
+        self._child_peak = 0
+
+    def add_bytes(self, n_bytes):
+        """
+        add to the number of bytes read in this stage
+        """
+        self.bytes_read += int(n_bytes)
+
+    def __enter__(self):
+        stack = _get_stack()
+        self._memory = _state.memory and tracemalloc.is_tracing()
+        if self._memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # keep the peak of the enclosing stage before resetting it
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self._memory_start = current
+            self._child_peak = current
+        stack.append(self)
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_time = time.perf_counter() - self._wall_start
+        self.cpu_time = time.process_time() - self._cpu_start
+        stack = _get_stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if self._memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self._child_peak)
+            self.peak_memory = max(peak - self._memory_start, 0)
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        _add_to_summary(self)
+        _logger.debug('%s took %.3f s (cpu %.3f s)', self.name,
+                      self.wall_time, self.cpu_time)
+        return False
+
+
+def _get_stack():
+    try:
+        return _state.local.stack
+    except AttributeError:
+        _state.local.stack = []
+        return _state.local.stack
+
+
+def _add_to_summary(stage_obj):
+    with _state.lock:
+        entry = _state.summary.get(stage_obj.name)
+        if entry is None:
+            entry = dict([(key, 0) for key in SUMMARY_KEYS])
+            entry['stage'] = stage_obj.name
+            entry['wall_time_min'] = stage_obj.wall_time
+            _state.summary[stage_obj.name] = entry
+        entry['count'] += 1
+        entry['wall_time'] += stage_obj.wall_time
+        entry['wall_time_min'] = min(entry['wall_time_min'],
+                                     stage_obj.wall_time)
+        entry['wall_time_max'] = max(entry['wall_time_max'],
+                                     stage_obj.wall_time)
+        entry['cpu_time'] += stage_obj.cpu_time
+        entry['bytes_read'] += stage_obj.bytes_read
+        entry['peak_memory'] = max(entry['peak_memory'],
+                                   stage_obj.peak_memory)
+
+
+def is_enabled():
+    """
+    True if instrumentation is on
+    """
+    return _state.enabled
+
+
+def enable(memory=False):
+    """
+    turn instrumentation on
+
+    :param memory: track peak memory of each stage with tracemalloc
+    :type memory: [ True | False ]
+    """
+    _state.enabled = True
+    _state.memory = bool(memory)
+    if _state.memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """
+    turn instrumentation off, the summary is kept
+    """
+    _state.enabled = False
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.memory = False
+
+
+def configure(config=None):
+    """
+    turn instrumentation on or off from a configuration dictionary, as
+    found under the key instrumentation of a logging configuration
+
+    :param config: dictionary with keys enabled and memory
+    :type config: dict
+    """
+    if not config:
+        return
+    if config.get('enabled', True):
+        enable(memory=config.get('memory', False))
+    else:
+        disable()
+
+
+def configure_from_environment():
+    """
+    turn instrumentation on if the environment variable MTPY_INSTRUMENT is
+    set to 1, true, yes, on or memory
+    """
+    value = os.environ.get(ENV_VARIABLE, '').strip().lower()
+    if value in ['1', 'true', 'yes', 'on']:
+        enable()
+    elif value == 'memory':
+        enable(memory=True)
+
+
+def stage(name):
+    """
+    context manager that records a named stage
+
+    :param name: name of the stage
+    :type name: string
+
+    :returns: Stage object, or a stage that does nothing when
+              instrumentation is off
+    """
+    if not _state.enabled:
+        return _null_stage
+    return Stage(name)
+
+
+def add_bytes(n_bytes):
+    """
+    add to the number of bytes read of the current stage
+    """
+    if not _state.enabled:
+        return
+    stack = _get_stack()
+    if stack:
+        stack[-1].add_bytes(n_bytes)
+
+
+def instrument(name=None):
+    """
+    decorator that records each call of a function as a stage
+
+    :param name: name of the stage, default is module.qualified_name of the
+                 function
+    :type name: string
+    """
+
+    def decorator(func):
+        stage_name = name
+        if stage_name is None:
+            stage_name = '{0}.{1}'.format(func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            with Stage(stage_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_summary():
+    """
+    summary of all stages, sorted by total wall time
+
+    :returns: list of dictionaries with keys SUMMARY_KEYS, times are in
+              seconds and memory in bytes
+    """
+    with _state.lock:
+        summary = [dict(entry) for entry in _state.summary.values()]
+    return sorted(summary, key=lambda entry: entry['wall_time'], reverse=True)
+
+
+def reset():
+    """
+    clear the summary
+    """
+    with _state.lock:
+        _state.summary = {}
+
+
+def write_json(fn):
+    """
+    write the stage summary to a json file
+
+    :returns: fn
+    """
+    with open(fn, 'w') as fid:
+        json.dump(get_summary(), fid, indent=2)
+    return fn
+
+
+def write_csv(fn):
+    """
+    write the stage summary to a csv file
+
+    :returns: fn
+    """
+    with open(fn, 'w', newline='') as fid:
+        writer = csv.DictWriter(fid, fieldnames=SUMMARY_KEYS)
+        writer.writeheader()
+        writer.writerows(get_summary())
+    return fn
+
+
+def log_summary(logger=None):
+    """
+    log the stage summary as a table
+    """
+    if logger is None:
+        logger = _logger
+    lines = ['{0:<50} {1:>6} {2:>10} {3:>10} {4:>12} {5:>12}'.format(
+        'stage', 'count', 'wall (s)', 'cpu (s)', 'bytes read', 'peak mem')]
+    for entry in get_summary():
+        lines.append('{0:<50} {1:>6} {2:>10.3f} {3:>10.3f} {4:>12} {5:>12}'.format(
+            entry['stage'], entry['count'], entry['wall_time'],
+            entry['cpu_time'], entry['bytes_read'], entry['peak_memory']))
+    logger.info('\n'.join(lines))
+
+
+configure_from_environment()
@@ -10,7 +10,7 @@ functions to assist with mesh generation
 
 import numpy as np
 import mtpy.utils.filehandling as mtfh
-from mtpy.utils import gis_tools
+from mtpy.utils import dem_tools, gis_tools
 import scipy.interpolate as spi
 
 
@@ -87,6 +87,9 @@ def interpolate_elevation_to_grid(grid_east, grid_north, epsg=None, utm_zone=Non
     The 'fast' method extracts a subset of the elevation data that falls within the
     mesh-bounds and interpolates them onto mesh nodes. This approach significantly
     speeds up (~ x5) the interpolation procedure.
+    If a surfacefile is given with method 'nearest' or 'linear' and the grid
+    projection is known, the DEM is read through a memory-mapped tile cache
+    instead, see interpolate_elevation_from_dem.
 
     **returns**
     nothing returned, but surface data are added to surface_dict under
@@ -125,6 +128,15 @@ def interpolate_elevation_to_grid(grid_east, grid_north, epsg=None, utm_zone=Non
     method = interpolation method. Default is 'nearest', if model grid is
     dense compared to surface points then choose 'linear' or 'cubic'
     """
+    if surfacefile and method in ('nearest', 'linear') and \
+            (epsg is not None or utm_zone is not None):
+        # regular grid: project the model grid to lat/lon and interpolate
+        # from the tiles of the DEM overlapping the model only
+        return interpolate_elevation_from_dem(grid_east, grid_north,
+                                              surfacefile, epsg=epsg,
+                                              utm_zone=utm_zone,
+                                              method=method)
+
     # read the surface data in from ascii if surface not provided
     if surfacefile:
         lon, lat, elev = mtfh.read_surface_ascii(surfacefile)
@@ -171,12 +183,15 @@ def interpolate_elevation_to_grid(grid_east, grid_north, epsg=None, utm_zone=Non
         elev = elev[subsetIndices]
 
     # end if
-    projected_points = gis_tools.project_point_ll2utm(lat, lon, epsg=epsg,
-                                                      utm_zone=utm_zone)
+    if utm_zone is None and epsg is None:
+        # same zone for all points, as in project_point_ll2utm
+        utm_zone = gis_tools.get_utm_zone(np.mean(lat), np.mean(lon))[2]
+    easting, northing, _ = gis_tools.project_points_ll2utm(lat, lon,
+                                                           epsg=epsg,
+                                                           utm_zone=utm_zone)
     # elevation in model grid
     # first, get lat,lon points of surface grid
-    points = np.vstack([arr.flatten() for arr in [projected_points.easting,
-                                                  projected_points.northing]]).T
+    points = np.vstack([easting, northing]).T
     # corresponding surface elevation points
     values = elev.flatten()
     # xi, the model grid points to interpolate to
@@ -188,6 +203,34 @@ def interpolate_elevation_to_grid(grid_east, grid_north, epsg=None, utm_zone=Non
     return elev_mg
 
 
+def interpolate_elevation_from_dem(grid_east, grid_north, surfacefile,
+                                   epsg=None, utm_zone=None, method='linear'):
+    """
+    interpolate elevation from an ESRI ascii grid onto model grid points.
+
+    The ascii grid is converted once to a memory-mapped tile cache (see
+    mtpy.utils.dem_tools.TiledDEM), the model grid points are projected to
+    lat/lon in bulk and only the part of the DEM overlapping the model is
+    read and interpolated with a regular grid interpolator.
+
+    :param grid_east: easting of grid points, 1D (nx) or 2D (ny, nx)
+    :param grid_north: northing of grid points, 1D (ny) or 2D (ny, nx)
+    :param surfacefile: full path to ascii grid in lat/lon (wgs84)
+    :param epsg: epsg number of the model grid
+    :param utm_zone: utm zone of the model grid, used if epsg is None
+    :param method: 'linear' (bilinear) or 'nearest'
+    :returns: elevation on the grid points, shape (ny, nx)
+    """
+    if len(grid_east.shape) == 1:
+        grid_east, grid_north = np.meshgrid(grid_east, grid_north)
+
+    lat, lon = gis_tools.project_points_utm2ll(grid_east, grid_north,
+                                               utm_zone, epsg=epsg)
+    dem = dem_tools.TiledDEM(surfacefile)
+
+    return dem.interpolate(lon, lat, method=method).reshape(grid_north.shape)
+
+
 def get_nearest_index(array, value):
     """
     Return the index of the nearest value to the provided value in an array:
@@ -0,0 +1,1106 @@
+#!/usr/bin/env python
+
+"""
+mtpy/utils/mseed.py
+
+Conversion of MT time series between miniSEED and MTpy time series (ts)
+files.
+
+Data are streamed in both directions: miniSEED files are decoded a block
+of records at a time and ts files are read and written a chunk of samples
+at a time, so a trace is never held in memory as a whole.  Traces are
+merged across record blocks and files; gaps are either filled or start a
+new output file.
+
+The miniSEED trace header (obspy 'Stats') is mapped onto the metadata of
+'mtpy.core.ts.MTTS' in one place, see 'stats_to_header' and
+'header_to_stats'.  ts files are written with the MTTS header, or with the
+single line header of the older MTpy ts files ('legacy_header').
+
+Reading and writing miniSEED needs the "obspy" package.
+
+@UofA, 2013
+(LK)
+
+"""
+
+#=================================================================
+import datetime
+import io
+import itertools
+import os.path as op
+
+import dateutil.parser
+import numpy as np
+
+import mtpy.utils.exceptions as MTex
+import mtpy.utils.filehandling as MTfh
+from mtpy.utils import parallel
+
+try:
+    import obspy
+    from obspy.io.mseed.util import get_record_information
+except ImportError:
+    obspy = None
+
+#=================================================================
+
+# SEED band codes by the lowest sampling rate of the band
+seed_band_codes = [(1000., 'F'), (250., 'C'), (80., 'H'), (10., 'B'),
+                   (1.5, 'M'), (0.5, 'L'), (0.05, 'V'), (0.005, 'U')]
+
+# SEED instrument codes of the MT field types
+seed_instrument_codes = {'e': 'Q', 'h': 'F'}
+
+# SEED orientation codes of the MT components
+seed_orientation_codes = {'x': 'N', 'y': 'E', 'z': 'Z'}
+
+# header elements of the older MTpy ts files and their MTTS names
+legacy_header_map = {'station': 'station',
+                     'channel': 'component',
+                     'samplingrate': 'sampling_rate',
+                     'nsamples': 'n_samples',
+                     'unit': 'units',
+                     'lat': 'lat',
+                     'lon': 'lon',
+                     'elev': 'elev'}
+
+# MTTS header values that are kept as text
+_text_keys = ['station', 'component', 'units', 'start_time_utc',
+              'stop_time_utc', 'coordinate_system', 'datum', 'data_logger',
+              'instrument_id', 'calibration_fn']
+
+_time_format = '%Y-%m-%dT%H:%M:%S.%f'
+_epoch = datetime.datetime(1970, 1, 1)
+
+# the number of samples is padded, so the header can be rewritten in place
+# once the number of samples of a file is known
+_nsamples_width = 20
+
+#=================================================================
+
+
+def _check_obspy():
+    if obspy is None:
+        raise MTex.MTpyError_module_import('Could not find Obspy, needed for '
+                                           'reading and writing miniSEED')
+
+
+def epoch_to_utc(epoch_sec):
+    """
+    UTC time string of the MTTS header from epoch seconds.
+    """
+    dt = _epoch + datetime.timedelta(seconds=float(epoch_sec))
+    return dt.strftime(_time_format)
+
+
+def utc_to_epoch(utc_time):
+    """
+    Epoch seconds from a time string of the MTTS header.
+    """
+    dt = dateutil.parser.parse(str(utc_time))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (dt - _epoch).total_seconds()
+
+
+def component_to_channel(component, sampling_rate):
+    """
+    SEED channel code of an MT component, e.g. 'ex' sampled at 500 Hz is
+    'CQN'.  Components other than e/h and x/y/z are returned in upper case.
+    """
+    component = str(component).lower()
+    if len(component) != 2 or component[0] not in seed_instrument_codes or \
+            component[1] not in seed_orientation_codes:
+        return component.upper()
+
+    band = 'R'
+    for rate, code in seed_band_codes:
+        if float(sampling_rate) >= rate:
+            band = code
+            break
+
+    return band + seed_instrument_codes[component[0]] + \
+        seed_orientation_codes[component[1]]
+
+
+def channel_to_component(channel):
+    """
+    MT component of a SEED channel code, inverse of 'component_to_channel'.
+
+    Other codes are returned in lower case with a trailing orientation
+    'n' or 'e' renamed to 'x' or 'y', as the MTpy ts files always had it.
+    """
+    channel = str(channel).upper()
+    orientations = {'N': 'x', '1': 'x', 'E': 'y', '2': 'y', 'Z': 'z', '3': 'z'}
+    fields = dict((code, field)
+                  for field, code in seed_instrument_codes.items())
+    if len(channel) == 3 and channel[1] in fields and \
+            channel[2] in orientations:
+        return fields[channel[1]] + orientations[channel[2]]
+
+    component = channel.lower()
+    if component.endswith('e'):
+        component = component[:-1] + 'y'
+    elif component.endswith('n'):
+        component = component[:-1] + 'x'
+    return component
+
+
+def stats_to_header(stats, **kwargs):
+    """
+    MTTS metadata of a miniSEED trace header.
+
+    :param stats: obspy trace header (Stats) or a dictionary with station,
+                  channel, sampling_rate, starttime (UTCDateTime or epoch
+                  seconds) and npts
+    :param kwargs: further MTTS metadata (units, lat, lon, elev, ...),
+                   None values are left out
+    :returns: dictionary of MTTS attribute names and values
+    """
+    sampling_rate = float(stats['sampling_rate'])
+    starttime = float(stats['starttime'])
+    npts = int(stats['npts'])
+
+    header = {'station': str(stats['station']).upper(),
+              'component': channel_to_component(stats['channel']),
+              'sampling_rate': sampling_rate,
+              'start_time_utc': epoch_to_utc(starttime),
+              'stop_time_utc': epoch_to_utc(starttime +
+                                            (max(npts, 1) - 1) / sampling_rate),
+              'n_samples': npts}
+
+    # obspy convention for station coordinates
+    coordinates = stats.get('coordinates')
+    if coordinates is not None:
+        for key, name in [('latitude', 'lat'), ('longitude', 'lon'),
+                          ('elevation', 'elev')]:
+            if coordinates.get(key) is not None:
+                header[name] = float(coordinates[key])
+
+    for key, value in kwargs.items():
+        if value is not None:
+            header[key] = value
+
+    return header
+
+
+def header_to_stats(header, network='', location='', channel=None):
+    """
+    miniSEED trace header of MTTS metadata, inverse of 'stats_to_header'.
+
+    :param header: dictionary of MTTS metadata with at least station,
+                   component, sampling_rate and start_time_utc
+    :param channel: channel code, *default* is the SEED code of the
+                    component (see 'component_to_channel')
+    :returns: dictionary to be used as header of an obspy Trace, the start
+              time is given in epoch seconds
+    """
+    sampling_rate = float(header['sampling_rate'])
+    if channel is None:
+        channel = component_to_channel(header['component'], sampling_rate)
+
+    stats = {'network': str(network).upper(),
+             'station': str(header['station']).upper(),
+             'location': str(location).upper(),
+             'channel': str(channel).upper(),
+             'sampling_rate': sampling_rate,
+             'starttime': utc_to_epoch(header['start_time_utc'])}
+    if header.get('n_samples') is not None:
+        stats['npts'] = int(header['n_samples'])
+
+    return stats
+
+
+def get_ts_header_string(header, legacy_header=False):
+    """
+    Header of an MTpy ts file from a dictionary of MTTS metadata.
+
+    The number of samples is padded to a fixed width, so the header of a
+    file written chunk by chunk can be rewritten at the end.
+
+    :param legacy_header: single line header of the older MTpy ts files
+                          instead of the MTTS header
+    """
+    nsamples = str(int(header.get('n_samples', 0))).ljust(_nsamples_width)
+
+    if legacy_header:
+        legacy = {'t_min': utc_to_epoch(header['start_time_utc']),
+                  'nsamples': nsamples}
+        for element, key in legacy_header_map.items():
+            if element != 'nsamples' and header.get(key) is not None:
+                legacy[element] = header[key]
+        return MTfh.get_ts_header_string(legacy)
+
+    header = dict(header, n_samples=nsamples)
+    header_lines = ['# *** MT time series text file for {0} ***'.format(
+        header.get('station'))]
+    header_lines += ['# {0} = {1}'.format(key, header[key])
+                     for key in sorted(header)]
+    header_lines += ['# *** time_series ***']
+    return '\n'.join(header_lines) + '\n'
+
+
+def read_ts_header(tsfile):
+    """
+    Read the header of an MTpy ts file, either the MTTS header or the
+    single line header of the older files.
+
+    :returns: dictionary of MTTS metadata and the number of header lines
+    """
+    header_lines = []
+    with open(tsfile, 'r') as F:
+        for line in F:
+            if line.strip() != '' and not line.lstrip().startswith('#'):
+                break
+            header_lines.append(line)
+
+    if len(header_lines) == 0:
+        raise MTex.MTpyError_ts_data('No header line found - check file: '
+                                     '{0}'.format(tsfile))
+
+    header = {}
+    for line in header_lines:
+        line_list = line.strip()[1:].split('=')
+        if len(line_list) != 2:
+            continue
+        key = line_list[0].strip()
+        value = line_list[1].strip()
+        if value == 'None':
+            value = None
+        elif key not in _text_keys:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        header[key] = value
+
+    if len(header) == 0:
+        legacy = MTfh.read_ts_header(tsfile)
+        for element, key in legacy_header_map.items():
+            if legacy.get(element) is not None:
+                header[key] = legacy[element]
+        if legacy.get('t_min') is not None:
+            header['start_time_utc'] = epoch_to_utc(legacy['t_min'])
+        for key in ['station', 'component', 'units']:
+            if header.get(key) is not None:
+                header[key] = str(header[key])
+
+    for key in ['station', 'component', 'sampling_rate', 'start_time_utc']:
+        if header.get(key) is None:
+            raise MTex.MTpyError_ts_data('Header has no {0} - check file: '
+                                         '{1}'.format(key, tsfile))
+    if header.get('n_samples') is not None:
+        header['n_samples'] = int(header['n_samples'])
+
+    return header, len(header_lines)
+
+
+def iter_ts_data(tsfile, chunk_size=2**16):
+    """
+    Read the data of an MTpy ts file chunk by chunk.
+
+    :param chunk_size: number of lines (samples) per chunk
+    :returns: generator of numpy arrays
+    """
+    n_header = read_ts_header(tsfile)[1]
+    with open(tsfile, 'r') as F:
+        for line in itertools.islice(F, n_header):
+            pass
+        while True:
+            lines = list(itertools.islice(F, chunk_size))
+            if len(lines) == 0:
+                break
+            lines = [line for line in lines
+                     if not line.lstrip().startswith('#')]
+            data = np.array(''.join(lines).split(), dtype=float)
+            if len(data) > 0:
+                yield data
+
+
+class TSWriter(object):
+    """
+    Write the data of one channel to MTpy ts files chunk by chunk.
+
+    Chunks are appended to the current file as long as they continue it,
+    a gap (or a change of sampling rate) starts a new file.  The header of
+    a file is completed when the file is closed.  Existing files are not
+    overwritten, the file names are made unique instead.
+
+    :Example: ::
+
+        >>> with TSWriter('/home/ts/mt01.ex') as writer:
+        >>>     for trace in iter_mseed_traces(['/home/mseed/mt01.mseed']):
+        >>>         writer.write(trace.stats, trace.data)
+        >>> writer.lo_files
+
+    """
+
+    def __init__(self, outfile, fmt='%.10g', legacy_header=False, **kwargs):
+        """
+        :param outfile: name of the (first) output file
+        :param fmt: number format of the samples
+        :param legacy_header: write the single line header of the older
+                              MTpy ts files
+        :param kwargs: further MTTS metadata for the header, see
+                       'stats_to_header'
+        """
+        self.outfile = op.abspath(outfile)
+        self.fmt = fmt
+        self.legacy_header = legacy_header
+        self.kwargs = kwargs
+        self.lo_files = []
+
+        self._fid = None
+        self._header = None
+        self._starttime = None
+        self._npts = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, stats, data):
+        """
+        Append a chunk of data.
+
+        :param stats: header of the chunk, see 'stats_to_header'
+        :param data: samples of the chunk
+        """
+        if len(data) == 0:
+            return
+        starttime = float(stats['starttime'])
+        sampling_rate = float(stats['sampling_rate'])
+
+        if self._fid is not None:
+            expected = self._starttime + self._npts / sampling_rate
+            if sampling_rate != self._header['sampling_rate'] or \
+                    abs(starttime - expected) > 0.5 / sampling_rate:
+                self.close()
+
+        if self._fid is None:
+            self._header = stats_to_header(dict(stats, npts=len(data)),
+                                           **self.kwargs)
+            self._header['n_samples'] = 0
+            self._starttime = starttime
+            self._npts = 0
+
+            outfilename = MTfh.make_unique_filename(self.outfile)
+            self._fid = open(outfilename, 'w')
+            self._fid.write(get_ts_header_string(self._header,
+                                                 self.legacy_header))
+            self.lo_files.append(outfilename)
+
+        self._fid.write('\n'.join(map(self.fmt.__mod__,
+                                      np.asarray(data).tolist())))
+        self._fid.write('\n')
+        self._npts += len(data)
+
+    def close(self):
+        """
+        Complete the header of the current file and close it.
+        """
+        if self._fid is None:
+            return
+
+        header_string = get_ts_header_string(self._header, self.legacy_header)
+        self._header['n_samples'] = self._npts
+        self._header['stop_time_utc'] = epoch_to_utc(
+            self._starttime + (self._npts - 1) / self._header['sampling_rate'])
+        new_header_string = get_ts_header_string(self._header,
+                                                 self.legacy_header)
+        if len(new_header_string) != len(header_string):
+            self._fid.close()
+            self._fid = None
+            raise MTex.MTpyError_file_handling('ERROR - cannot complete header '
+                                               'of file {0}'.format(
+                                                   self.lo_files[-1]))
+
+        self._fid.seek(0)
+        self._fid.write(new_header_string)
+        self._fid.close()
+        self._fid = None
+
+
+#=================================================================
+# miniSEED streams
+
+
+def iter_mseed_records(mseedfile, starttime=None, endtime=None,
+                       records_per_chunk=256):
+    """
+    Decode a miniSEED file a block of records at a time.
+
+    The records of a file are expected to have the same length and to be
+    in time order.
+
+    :param starttime: records ending before are skipped, data are trimmed
+    :param endtime: records starting after are skipped, data are trimmed
+    :param records_per_chunk: number of records decoded at a time
+    :returns: generator of obspy Streams
+    """
+    _check_obspy()
+    if starttime is not None:
+        starttime = obspy.UTCDateTime(starttime)
+    if endtime is not None:
+        endtime = obspy.UTCDateTime(endtime)
+
+    filesize = op.getsize(mseedfile)
+    offset = 0
+    with open(mseedfile, 'rb') as F:
+        while offset < filesize:
+            info = get_record_information(F, offset)
+            if endtime is not None and info['starttime'] > endtime:
+                break
+            F.seek(offset)
+            block = F.read(info['record_length'] * records_per_chunk)
+            offset += len(block)
+
+            stream = obspy.read(io.BytesIO(block), format='MSEED',
+                                starttime=starttime, endtime=endtime,
+                                nearest_sample=False)
+            stream.traces = [trace for trace in stream
+                             if trace.stats.npts > 0]
+            if len(stream) > 0:
+                yield stream
+
+
+def _cut_trace(trace, npts):
+    """
+    Split a trace after npts samples, the data are not copied.
+    """
+    stats = trace.stats
+    header = {'network': stats.network,
+              'station': stats.station,
+              'location': stats.location,
+              'channel': stats.channel,
+              'sampling_rate': stats.sampling_rate}
+    head = obspy.Trace(data=trace.data[:npts],
+                       header=dict(header, starttime=stats.starttime))
+    tail = obspy.Trace(data=trace.data[npts:],
+                       header=dict(header, starttime=stats.starttime +
+                                   npts * stats.delta))
+    return head, tail
+
+
+def _iter_chunks(trace, chunk_size):
+    while trace.stats.npts > chunk_size:
+        head, trace = _cut_trace(trace, chunk_size)
+        yield head
+    yield trace
+
+
+def iter_mseed_traces(lo_files, starttime=None, endtime=None, fill_value=None,
+                      chunk_size=2**16, records_per_chunk=256):
+    """
+    Stream the traces of miniSEED files, merged across record blocks and
+    files.
+
+    Consecutive chunks of a trace follow each other without gap.  Gaps are
+    filled with fill_value, or, with fill_value None, the trace continues
+    after the gap with a new chunk.  Overlaps are resolved in favour of the
+    later data, as long as the overlapped samples have not been yielded
+    yet.
+
+    :param lo_files: miniSEED file name or list of file names in time order
+    :param starttime: start of the data read (UTCDateTime or epoch seconds)
+    :param endtime: end of the data read (UTCDateTime or epoch seconds)
+    :param fill_value: see 'obspy.core.stream.Stream.merge', method 1
+    :param chunk_size: maximum number of samples of the yielded traces
+    :param records_per_chunk: number of miniSEED records decoded at a time
+    :returns: generator of obspy Traces in order of starting time
+    """
+    _check_obspy()
+    if isinstance(lo_files, str):
+        lo_files = [lo_files]
+
+    pending = obspy.Stream()
+    for mseedfile in lo_files:
+        for block in iter_mseed_records(mseedfile, starttime, endtime,
+                                        records_per_chunk):
+            pending += block
+            pending.merge(method=1, fill_value=fill_value)
+            pending = pending.split()
+            pending.sort(['starttime'])
+
+            # the last trace of each id may still be continued
+            held = {}
+            for trace in pending:
+                held[trace.id] = trace
+
+            complete = []
+            for trace in pending:
+                if held[trace.id] is trace:
+                    complete.extend(_iter_chunks(trace, chunk_size))
+                    held[trace.id] = complete.pop()
+                else:
+                    complete.extend(_iter_chunks(trace, chunk_size))
+            pending = obspy.Stream(list(held.values()))
+
+            complete.sort(key=lambda trace: trace.stats.starttime)
+            for trace in complete:
+                yield trace
+
+    pending.sort(['starttime'])
+    for trace in pending:
+        for chunk in _iter_chunks(trace, chunk_size):
+            yield chunk
+
+
+def _first_record(mseedfile):
+    """
+    Trace id and starting time of the first record of a miniSEED file.
+    """
+    info = get_record_information(mseedfile)
+    with open(mseedfile, 'rb') as F:
+        record = F.read(info['record_length'])
+    stats = obspy.read(io.BytesIO(record), format='MSEED',
+                       headonly=True)[0].stats
+    return '{0}.{1}.{2}.{3}'.format(stats.network, stats.station,
+                                    stats.location, stats.channel), \
+        float(stats.starttime)
+
+
+def group_mseed_files(lo_files, lo_keys=None):
+    """
+    Group miniSEED files by the trace id of their first record and sort
+    each group by starting time, so the files of a group can be streamed
+    as one (see 'iter_mseed_traces').  Files that are not miniSEED are left
+    out.
+
+    :param lo_keys: further key per file, files are only grouped with the
+                    same key
+    :returns: list of lists of file names
+    """
+    _check_obspy()
+    if lo_keys is None:
+        lo_keys = [None] * len(lo_files)
+
+    groups = {}
+    for mseedfile, key in zip(lo_files, lo_keys):
+        try:
+            trace_id, starttime = _first_record(mseedfile)
+        except Exception:
+            print('Warning - file {0} is not in valid miniseed  format!!!'.format(
+                mseedfile))
+            continue
+        groups.setdefault((str(key), trace_id), []).append(
+            (starttime, mseedfile))
+
+    return [[mseedfile for starttime, mseedfile in sorted(groups[key])]
+            for key in sorted(groups)]
+
+
+class _TraceBuffer(object):
+    """
+    Traces of one stream of miniSEED files, read ahead until a given time.
+    """
+
+    def __init__(self, traces):
+        self.traces = traces
+        self.stream = obspy.Stream()
+        self.endtimes = {}
+        self.exhausted = False
+
+    def fill(self, endtime=None):
+        """
+        Read until every trace id has data to endtime, at least one trace
+        with endtime None.
+        """
+        while not self.exhausted:
+            if len(self.endtimes) > 0:
+                if endtime is None and len(self.stream) > 0:
+                    break
+                if endtime is not None and \
+                        min(self.endtimes.values()) >= endtime:
+                    break
+            try:
+                trace = next(self.traces)
+            except StopIteration:
+                self.exhausted = True
+                break
+            self.stream.append(trace)
+            self.endtimes[trace.id] = trace.stats.endtime
+
+    def first(self):
+        if len(self.stream) == 0:
+            return None
+        return min(trace.stats.starttime for trace in self.stream)
+
+    def cut(self, starttime, endtime):
+        """
+        Data from starttime to before endtime.
+        """
+        window = obspy.Stream()
+        for trace in self.stream:
+            piece = trace.slice(starttime, endtime - 0.5 * trace.stats.delta,
+                                nearest_sample=False)
+            if piece.stats.npts > 0:
+                window.append(piece)
+        return window
+
+    def drop(self, starttime):
+        """
+        Discard the data before starttime.
+        """
+        stream = obspy.Stream()
+        for trace in self.stream:
+            if trace.stats.endtime >= starttime:
+                stream.append(trace.slice(starttime, None,
+                                          nearest_sample=False))
+        self.stream = stream
+
+
+def iter_mseed_windows(lo_files, window_length, step=None, starttime=None,
+                       endtime=None, fill_value=None, chunk_size=2**16,
+                       records_per_chunk=256):
+    """
+    Cut time windows from miniSEED files, e.g. the processing windows of MT
+    time series, without reading more than a window ahead.
+
+    The files are grouped into streams of one trace id each (see
+    'group_mseed_files'), which are read in parallel.  Windows without data
+    are skipped.
+
+    :param lo_files: list of miniSEED file names
+    :param window_length: length of a window in seconds
+    :param step: time between the starts of two windows in seconds,
+                 *default* is window_length
+    :param starttime: start of the first window, *default* is the start of
+                      the data
+    :param endtime: end of the data read
+    :param fill_value: gaps in a window are filled (or masked with None),
+                       see 'obspy.core.stream.Stream.merge', method 1
+    :returns: generator of the start (UTCDateTime) and the data (obspy
+              Stream, one trace per id) of each window
+    """
+    _check_obspy()
+    if isinstance(lo_files, str):
+        lo_files = [lo_files]
+    window_length = float(window_length)
+    if step is None:
+        step = window_length
+    step = float(step)
+    if window_length <= 0 or step <= 0:
+        raise MTex.MTpyError_inputarguments('Window length and step must be '
+                                            'positive')
+    if endtime is not None:
+        endtime = obspy.UTCDateTime(endtime)
+
+    buffers = [_TraceBuffer(iter_mseed_traces(group, starttime, endtime,
+                                              fill_value, chunk_size,
+                                              records_per_chunk))
+               for group in group_mseed_files(lo_files)]
+
+    for buffer in buffers:
+        buffer.fill()
+    if starttime is None:
+        lo_first = [buffer.first() for buffer in buffers
+                    if buffer.first() is not None]
+        if len(lo_first) == 0:
+            return
+        starttime = min(lo_first)
+    windowstart = obspy.UTCDateTime(starttime)
+
+    while endtime is None or windowstart <= endtime:
+        windowend = windowstart + window_length
+        for buffer in buffers:
+            buffer.fill(windowend)
+
+        window = obspy.Stream()
+        for buffer in buffers:
+            window += buffer.cut(windowstart, windowend)
+        if len(window) > 0:
+            window.merge(method=1, fill_value=fill_value)
+            yield windowstart, window
+
+        for buffer in buffers:
+            buffer.drop(windowstart + step)
+            buffer.fill()
+        lo_first = [buffer.first() for buffer in buffers
+                    if buffer.first() is not None]
+        if len(lo_first) == 0:
+            break
+        # skip windows without data
+        n_steps = max(1, int((min(lo_first) - windowstart - window_length) //
+                             step) + 1)
+        windowstart += n_steps * step
+
+
+def trace_to_mtts(trace, **kwargs):
+    """
+    MTTS object of an obspy Trace, masked samples are set to NaN.
+
+    :param kwargs: further MTTS metadata, see 'stats_to_header'
+    """
+    from mtpy.core.ts import MTTS
+
+    header = stats_to_header(trace.stats, **kwargs)
+    ts_obj = MTTS()
+    ts_obj.sampling_rate = header.pop('sampling_rate')
+    ts_obj.ts = np.ma.filled(np.ma.asarray(trace.data, dtype=float), np.nan)
+    ts_obj.start_time_utc = header.pop('start_time_utc')
+    for key in ['n_samples', 'stop_time_utc']:
+        header.pop(key)
+    for key, value in header.items():
+        setattr(ts_obj, key, value)
+
+    return ts_obj
+
+
+def mtts_to_trace(ts_obj, network='', location='', channel=None):
+    """
+    obspy Trace of an MTTS object, see 'header_to_stats'.
+    """
+    _check_obspy()
+    header = {'station': ts_obj.station,
+              'component': ts_obj.component,
+              'sampling_rate': ts_obj.sampling_rate,
+              'start_time_utc': epoch_to_utc(ts_obj.start_time_epoch_sec)}
+    stats = header_to_stats(header, network, location, channel)
+    stats.pop('npts', None)
+
+    return obspy.Trace(data=np.asarray(ts_obj.ts.data.values), header=stats)
+
+
+def read_window(lo_files, starttime, endtime, fill_value=None, **kwargs):
+    """
+    Read a time window of miniSEED files as MTTS objects, only the records
+    of the window are decoded.
+
+    :param lo_files: miniSEED file name or list of file names
+    :param starttime: start of the window (UTCDateTime or epoch seconds)
+    :param endtime: end of the window (UTCDateTime or epoch seconds)
+    :param fill_value: gaps are filled, with None they are NaN
+    :param kwargs: further MTTS metadata, see 'stats_to_header'
+    :returns: list of MTTS objects, one per trace id
+    """
+    _check_obspy()
+    if isinstance(lo_files, str):
+        lo_files = [lo_files]
+
+    stream = obspy.Stream()
+    for group in group_mseed_files(lo_files):
+        stream += obspy.Stream(list(iter_mseed_traces(group, starttime,
+                                                      endtime, fill_value)))
+    stream.merge(method=1, fill_value=fill_value)
+
+    return [trace_to_mtts(trace, **kwargs) for trace in stream]
+
+
+#=================================================================
+# conversion
+
+
+def _mseed_data(data):
+    """
+    Integer samples as int32, which are compressed (STEIM2) in miniSEED.
+    """
+    data = np.asarray(data)
+    if data.dtype.kind == 'f' and np.all(np.mod(data, 1) == 0) and \
+            np.all(np.abs(data) < 2**31):
+        return data.astype(np.int32)
+    return data
+
+
+def write_miniseed(outfile, stats, chunks, encoding=None, reclen=4096):
+    """
+    Write a miniSEED file chunk by chunk.
+
+    :param outfile: output file name
+    :param stats: trace header, see 'header_to_stats'
+    :param chunks: iterable of continuous chunks of data
+    :param encoding: miniSEED encoding, *default* is STEIM2 for integer
+                     data and FLOAT64 otherwise
+    :param reclen: miniSEED record length
+    :returns: number of samples written
+    """
+    _check_obspy()
+    stats = dict(stats)
+    stats.pop('npts', None)
+    starttime = obspy.UTCDateTime(stats.pop('starttime'))
+    sampling_rate = float(stats['sampling_rate'])
+
+    npts = 0
+    with open(outfile, 'wb') as F:
+        for data in chunks:
+            if len(data) == 0:
+                continue
+            if encoding is None:
+                data = _mseed_data(data)
+            trace = obspy.Trace(data=data, header=dict(
+                stats, starttime=starttime + npts / sampling_rate))
+            trace.write(F, format='MSEED', encoding=encoding, reclen=reclen)
+            npts += len(data)
+
+    return npts
+
+
+def ts2miniseed(tsfile, outfile, network='', location='', channel=None,
+                station=None, chunk_size=2**16, encoding=None):
+    """
+    Convert an MTpy ts file into a miniSEED file chunk by chunk.
+
+    :param channel: channel code, *default* is the SEED code of the
+                    component (see 'component_to_channel')
+    :param station: station name, *default* is the one of the ts file
+    :returns: name of the miniSEED file, '.mseed' is appended if missing
+              and the name is made unique
+    """
+    header = read_ts_header(tsfile)[0]
+    if station is not None:
+        header['station'] = station
+    stats = header_to_stats(header, network, location, channel)
+
+    outfilename = op.abspath(outfile)
+    if not outfilename.lower().endswith('.mseed'):
+        outfilename += '.mseed'
+    outfilename = MTfh.make_unique_filename(outfilename)
+
+    npts = write_miniseed(outfilename, stats,
+                          iter_ts_data(tsfile, chunk_size), encoding)
+    if stats.get('npts') is not None and npts != stats['npts']:
+        print('Warning - ts file {0} has {1} samples instead of {2}'.format(
+            tsfile, npts, stats['npts']))
+
+    return outfilename
+
+
+def miniseed2ts(lo_files, outfile, fill_value=None, chunk_size=2**16,
+                fmt='%.10g', legacy_header=False, **kwargs):
+    """
+    Convert miniSEED files into MTpy ts files chunk by chunk.
+
+    The files are streamed as one, so the data of files following each
+    other are merged.  There is one ts file per component and continuous
+    segment, named after outfile with the component as extension.
+
+    :param lo_files: miniSEED file name or list of file names in time order
+    :param outfile: base name of the ts files, an extension '.mseed' is
+                    replaced
+    :param fill_value: gaps are filled, with None a gap starts a new file
+    :param legacy_header: write the single line header of the older MTpy ts
+                          files
+    :param kwargs: further MTTS metadata (units, lat, lon, elev, ...)
+    :returns: list of the written files
+    """
+    outfilebase = op.abspath(outfile)
+    if outfilebase.lower().endswith('.mseed'):
+        outfilebase = op.splitext(outfilebase)[0]
+
+    writers = {}
+    try:
+        for trace in iter_mseed_traces(lo_files, fill_value=fill_value,
+                                       chunk_size=chunk_size):
+            component = channel_to_component(trace.stats.channel)
+            if trace.id not in writers:
+                writers[trace.id] = TSWriter(
+                    '{0}.{1}'.format(outfilebase, component), fmt=fmt,
+                    legacy_header=legacy_header, **kwargs)
+            writers[trace.id].write(trace.stats, trace.data)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return [fn for trace_id in sorted(writers)
+            for fn in writers[trace_id].lo_files]
+
+
+def _combine_traces(first, second, invert):
+    """
+    Mean (or half difference) of two traces over their common time span.
+    """
+    starttime = max(first.stats.starttime, second.stats.starttime)
+    endtime = min(first.stats.endtime, second.stats.endtime)
+    if starttime > endtime:
+        return None
+    first = first.slice(starttime, endtime)
+    second = second.slice(starttime, endtime)
+    npts = min(first.stats.npts, second.stats.npts)
+    if invert is True:
+        data = 0.5 * (first.data[:npts] - second.data[:npts])
+    else:
+        data = 0.5 * (first.data[:npts] + second.data[:npts])
+    return obspy.Trace(data=data, header={'station': first.stats.station,
+                                          'channel': first.stats.channel,
+                                          'sampling_rate':
+                                              first.stats.sampling_rate,
+                                          'starttime': starttime})
+
+
+def quadrupol_miniseed2ts(mseedfile, outfile, combine=True, invert=False,
+                          window_length=3600., fmt='%.10g',
+                          legacy_header=False, **kwargs):
+    """
+    Convert a miniSEED file of a quadrupol (north, east, south and west
+    dipoles, channel codes ending in n, e, s, w) into MTpy ts files,
+    streamed a window at a time.
+
+    :param combine: combine north and south into 'ex', east and west into
+                    'ey'
+    :param invert: the south and west dipoles have inverted polarity
+    :param window_length: seconds of data held in memory
+    :returns: list of the written files
+    """
+    outfilebase = op.splitext(op.abspath(outfile))[0]
+
+    writers = {}
+    try:
+        for windowstart, window in iter_mseed_windows([mseedfile],
+                                                      window_length):
+            lo_traces = {}
+            for trace in window:
+                lo_traces[trace.stats.channel.lower()] = trace
+
+            lo_out = []
+            if combine is True:
+                for component, pair in [('ex', 'ns'), ('ey', 'ew')]:
+                    first = [trace for channel, trace in lo_traces.items()
+                             if channel.endswith(pair[0])]
+                    second = [trace for channel, trace in lo_traces.items()
+                              if channel.endswith(pair[1])]
+                    if len(first) > 0 and len(second) > 0:
+                        combined = _combine_traces(first[0], second[0], invert)
+                        if combined is not None:
+                            lo_out.append((component, combined))
+                    elif len(first) > 0 or len(second) > 0:
+                        trace = (first + second)[0]
+                        lo_out.append((trace.stats.channel.lower(), trace))
+            else:
+                for channel, trace in lo_traces.items():
+                    if invert is True and channel[-1] in ['s', 'w']:
+                        trace = trace.copy()
+                        trace.data = -trace.data
+                    lo_out.append((channel, trace))
+
+            for component, trace in lo_out:
+                if component not in writers:
+                    writers[component] = TSWriter(
+                        '{0}.{1}'.format(outfilebase, component), fmt=fmt,
+                        legacy_header=legacy_header, component=component,
+                        **kwargs)
+                # masked samples of gaps start a new file
+                for piece in obspy.Stream([trace]).split():
+                    writers[component].write(piece.stats, piece.data)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return [fn for component in sorted(writers)
+            for fn in writers[component].lo_files]
+
+
+#=================================================================
+# batch conversion
+
+
+def _convert_task(function, args, kwargs):
+    """
+    Run one conversion, a failing file only gives a warning.
+    """
+    try:
+        return function(*args, **kwargs)
+    except Exception as error:
+        print('Warning - could not convert {0}: {1}'.format(args[0], error))
+        return []
+
+
+def _run_tasks(function, lo_args, num_workers=None, **kwargs):
+    """
+    Run conversions on a pool of processes.
+    """
+    return parallel.map_tasks(_convert_task,
+                              [(function, args, kwargs) for args in lo_args],
+                              num_workers=num_workers)
+
+
+def convert_miniseed_files(lo_files, lo_outfiles, num_workers=None, **kwargs):
+    """
+    Convert miniSEED files into MTpy ts files on a pool of processes.
+
+    Files of the same trace id and output directory are merged (see
+    'group_mseed_files') and written to the output name of the first file
+    of their group.
+
+    :param lo_files: list of miniSEED file names
+    :param lo_outfiles: list of output base names, one per file
+    :param num_workers: number of processes, *default* is the number of
+                        cpus.  With 1 the files are converted in this
+                        process.
+    :param kwargs: see 'miniseed2ts'
+    :returns: list of lists of the written files, one per group
+    """
+    lo_outfiles = [op.abspath(i) for i in lo_outfiles]
+    outfiles = dict(zip(lo_files, lo_outfiles))
+    groups = group_mseed_files(lo_files,
+                               [op.dirname(i) for i in lo_outfiles])
+
+    return _run_tasks(miniseed2ts, [(group, outfiles[group[0]])
+                                    for group in groups],
+                      num_workers, **kwargs)
+
+
+def convert_ts_files(lo_files, lo_outfiles, num_workers=None, **kwargs):
+    """
+    Convert MTpy ts files into miniSEED files on a pool of processes.
+
+    :param lo_files: list of ts file names
+    :param lo_outfiles: list of miniSEED file names, one per file
+    :param num_workers: number of processes, *default* is the number of
+                        cpus.  With 1 the files are converted in this
+                        process.
+    :param kwargs: see 'ts2miniseed'
+    :returns: list of the written files, [] for files that failed
+    """
+    return _run_tasks(ts2miniseed, list(zip(lo_files, lo_outfiles)),
+                      num_workers, **kwargs)
+
+
+def convert_quadrupol_files(lo_files, lo_outfiles, num_workers=None,
+                            **kwargs):
+    """
+    Convert quadrupol miniSEED files into MTpy ts files on a pool of
+    processes, see 'quadrupol_miniseed2ts'.
+
+    :returns: list of lists of the written files, one per file
+    """
+    return _run_tasks(quadrupol_miniseed2ts, list(zip(lo_files, lo_outfiles)),
+                      num_workers, **kwargs)
+
+
+#=================================================================
+# interface of the former single file conversion
+
+
+def convertfile_ts2miniseed(infile, outfile, channel=None, station=None,
+                            location=None, network=None):
+    """
+    Convert an MTpy ts file into a miniSEED file, the channel code is the
+    component in upper case if not given.
+    """
+    if channel is None:
+        channel = read_ts_header(infile)[0]['component'].upper()
+
+    return ts2miniseed(infile, outfile, network=network or '',
+                       location=location or '', channel=channel,
+                       station=station)
+
+
+def convertfile_miniseed2ts(infile, outfile, unit=None, lat=None, lon=None,
+                            elev=None):
+    """
+    Convert a miniSEED file into MTpy ts files with the single line header.
+    """
+    return miniseed2ts([infile], outfile, legacy_header=True, units=unit,
+                       lat=lat, lon=lon, elev=elev)
+
+
+def quadrupol_convertfile_miniseed2ts(infile, outfile, combine, invert):
+    """
+    Convert a quadrupol miniSEED file into MTpy ts files with the single
+    line header, see 'quadrupol_miniseed2ts'.
+    """
+    return quadrupol_miniseed2ts(infile, outfile, combine, invert,
+                                 legacy_header=True)
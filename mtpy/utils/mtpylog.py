@@ -8,7 +8,6 @@ see also: http://www.cdotson.com/2015/11/python-logging-best-practices/
 
 import os
 # import json
-import yaml
 import logging
 import logging.config
 import inspect
@@ -46,8 +45,11 @@ class MtPyLog(object):
             logging.info('Effective yaml configuration file %s', yaml_path)
 
             if os.path.exists(yaml_path):
+                import yaml
                 with open(yaml_path, 'rt') as f:
                     config = yaml.safe_load(f.read())
+                MtPyLog._configure_instrumentation(
+                    config.pop('instrumentation', None))
                 logging.config.dictConfig(config)
             else:
                 logging.exception(
@@ -65,6 +67,16 @@ class MtPyLog(object):
                 "logging configuration file %s is not supported" %
                 configfile)
 
+    @staticmethod
+    def _configure_instrumentation(config):
+        """
+        turn timing instrumentation on or off from the instrumentation
+        section of a logging configuration, see mtpy.utils.instrumentation
+        """
+        if config:
+            from mtpy.utils import instrumentation
+            instrumentation.configure(config)
+
     @staticmethod
     def get_mtpy_logger(loggername=''):
         """
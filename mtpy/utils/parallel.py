@@ -0,0 +1,107 @@
+"""
+Process pools for the batch functions of MTpy.
+
+Batch functions (writing many EDI files, exporting figures, converting
+time series files, ...) run one task per file or station on a pool of
+processes with map_tasks.  Data shared by all tasks of a batch are set up
+once per process by an initializer, which stores them in the worker state
+of the batch::
+
+    >>> from mtpy.utils import parallel
+    >>> def _init_batch(cfg_file):
+    ...     parallel.worker_state(__name__)['cfg'] = read_cfg(cfg_file)
+    >>> def _convert(fn):
+    ...     return convert(fn, parallel.worker_state(__name__)['cfg'])
+    >>> lo_written = parallel.map_tasks(_convert, [(fn,) for fn in lo_files],
+    ...                                 num_workers=8, initializer=_init_batch,
+    ...                                 initargs=(cfg_file,), state=__name__)
+
+With one worker the tasks run in the calling process and the worker state
+is cleared afterwards.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# worker state of each batch, by name
+_worker_state = {}
+
+
+def get_num_workers(num_workers=None, n_tasks=None):
+    """
+    number of worker processes to use
+
+    :param num_workers: requested number, default is the number of cpus
+    :param n_tasks: number of tasks, no more workers than tasks are used
+    :return: number of workers, at least 1
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    num_workers = int(num_workers)
+    if n_tasks is not None:
+        num_workers = min(num_workers, n_tasks)
+    return max(1, num_workers)
+
+
+def get_mp_context(fork=False):
+    """
+    multiprocessing context of a pool.  With fork=True the fork start
+    method is used where it is available, so the workers inherit the data of
+    the calling process without pickling them.
+    """
+    if fork and 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def worker_state(name):
+    """
+    state of the batch name in this process, a dictionary filled by the
+    initializer of the batch.  In the calling process, when the tasks are
+    not run on a pool, it holds 'in_process': True.
+    """
+    return _worker_state.setdefault(name, {})
+
+
+def map_tasks(function, lo_args, num_workers=None, initializer=None,
+              initargs=(), state=None, fork=False, chunksize=1):
+    """
+    call function(*args) for each args of lo_args on a pool of processes
+
+    :param function: module level function run for each task
+    :param lo_args: list of argument tuples, one per task
+    :param num_workers: number of processes, default is the number of cpus.
+                        With 1 the tasks run in the calling process.
+    :param initializer: called as initializer(*initargs) once in each
+                        process before its first task
+    :param state: name of the worker state the initializer fills, cleared
+                  when the tasks ran in the calling process
+    :param fork: if True use the fork start method where available
+    :param chunksize: number of tasks sent to a process at a time, None
+                      for about 4 chunks per process
+    :return: list of the results, in the order of lo_args
+    """
+    lo_args = list(lo_args)
+    if len(lo_args) == 0:
+        return []
+    num_workers = get_num_workers(num_workers, len(lo_args))
+
+    if num_workers == 1:
+        if state is not None:
+            worker_state(state)['in_process'] = True
+        try:
+            if initializer is not None:
+                initializer(*initargs)
+            return [function(*args) for args in lo_args]
+        finally:
+            if state is not None:
+                _worker_state.pop(state, None)
+
+    if chunksize is None:
+        chunksize = max(1, len(lo_args) // (4 * num_workers))
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             mp_context=get_mp_context(fork),
+                             initializer=initializer,
+                             initargs=initargs) as executor:
+        return list(executor.map(function, *zip(*lo_args),
+                                 chunksize=chunksize))
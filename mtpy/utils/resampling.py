@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+RESAMPLING
+==================
+
+Shared engine for resampling 3D resistivity models onto regular output grids
+(netCDF, GeoTIFF and raster exports).
+
+The interpolation weights of every output grid node are computed once, from
+the (bulk projected) target grid, and stored in a GridWeights object.  The
+same weights are then applied to all depth slices of a model with a single
+gather, in chunks of slices so memory stays bounded and slices can be
+streamed to the output file as they are produced.
+
+Three ways to build the weights are provided:
+
+    * rectilinear_weights  bilinear interpolation on a rectilinear grid,
+                           as RegularGridInterpolator / interp2d
+    * delaunay_weights     linear interpolation on a triangulation of
+                           scattered points, as scipy.interpolate.griddata
+    * idw_weights          inverse distance weighting of the k nearest
+                           neighbours
+
+:Example: ::
+
+    >>> from mtpy.utils import resampling
+    >>> weights = resampling.rectilinear_weights((grid_north, grid_east),
+    ...                                          (target_north, target_east))
+    >>> for z_index, layer in resampling.resample_slices(weights, res_cube):
+    ...     out_var[z_index] = layer
+
+"""
+
+# ==============================================================================
+# Imports
+# ==============================================================================
+import numpy as np
+from scipy import spatial
+
+from mtpy.utils.mtpylog import MtPyLog
+
+_logger = MtPyLog.get_mtpy_logger(__name__)
+
+
+class GridWeights(object):
+    """
+    Interpolation weights of a set of query points.
+
+    Every query point is a weighted sum of a few source values.
+
+    :param indices: (n_query, n_vertices) flat indices into the source values
+    :param weights: (n_query, n_vertices) weights of the source values
+    :param shape: shape of the query points, used to shape the output
+    :param n_source: number of source values
+    :param outside: (n_query,) boolean mask of query points outside of the
+                    source grid, these get fill_value
+    :param fill_value: value for query points outside of the source grid
+    """
+
+    def __init__(self, indices, weights, shape, n_source, outside=None,
+                 fill_value=np.nan):
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.weights = np.asarray(weights, dtype=float)
+        self.shape = tuple(shape)
+        self.n_source = int(n_source)
+        if outside is None:
+            outside = np.zeros(self.indices.shape[0], dtype=bool)
+        self.outside = np.asarray(outside, dtype=bool)
+        self.fill_value = fill_value
+
+    @property
+    def size(self):
+        return self.indices.shape[0]
+
+    def apply(self, values):
+        """
+        interpolate source values at the query points.
+
+        :param values: source values (..., n_source) or, for gridded sources,
+                       (..., ny, nx) where n_source = ny * nx.  All leading
+                       axes (e.g. depth) are interpolated at once.
+        :return: interpolated values of shape leading axes + self.shape
+        """
+        values = np.asarray(values)
+        lead_shape = values.shape[:values.ndim - _trailing_ndim(values.shape,
+                                                                self.n_source)]
+        values = values.reshape(lead_shape + (self.n_source,))
+
+        result = (values[..., self.indices] * self.weights).sum(axis=-1)
+        if self.outside.any():
+            result[..., self.outside] = self.fill_value
+
+        return result.reshape(lead_shape + self.shape)
+
+
+def _trailing_ndim(shape, n_source):
+    """ number of trailing axes of shape that hold n_source values """
+    size = 1
+    for ndim, length in enumerate(shape[::-1], 1):
+        size *= length
+        if size == n_source:
+            return ndim
+    raise ValueError('values of shape {0} do not end in {1} source '
+                     'values'.format(shape, n_source))
+
+
+def _axis_weights(axis, values, clamp):
+    """
+    index of the lower bracketing node and fractional distance to it
+    along a monotonically increasing axis
+    """
+    axis = np.asarray(axis, dtype=float)
+    index = np.clip(np.searchsorted(axis, values) - 1, 0, axis.size - 2)
+    fraction = (values - axis[index]) / (axis[index + 1] - axis[index])
+    outside = (values < axis[0]) | (values > axis[-1])
+    if clamp:
+        fraction = np.clip(fraction, 0, 1)
+
+    return index, fraction, outside
+
+
+def rectilinear_weights(axes, points, bounds_error=False, fill_value=np.nan,
+                        clamp=False):
+    """
+    bilinear weights of query points on a rectilinear grid, the same
+    interpolation as scipy.interpolate.RegularGridInterpolator.
+
+    :param axes: (y_axis, x_axis) strictly increasing node coordinates of the
+                 source grid, ordered as the last two axes of the values
+    :param points: (y, x) query coordinates, arrays broadcastable to the
+                   shape of the target grid
+    :param bounds_error: raise a ValueError if a point is outside the grid
+    :param fill_value: value for points outside the grid
+    :param clamp: if True points outside the grid get the value of the
+                  nearest edge of the grid instead of fill_value, as
+                  scipy.interpolate.interp2d does
+    :return: GridWeights
+    """
+    y_axis, x_axis = [np.asarray(axis, dtype=float) for axis in axes]
+    y, x = np.broadcast_arrays(*[np.asarray(pp, dtype=float) for pp in points])
+    shape = y.shape
+    y, x = y.ravel(), x.ravel()
+
+    iy, fy, out_y = _axis_weights(y_axis, y, clamp)
+    ix, fx, out_x = _axis_weights(x_axis, x, clamp)
+    outside = out_y | out_x
+    if bounds_error and outside.any():
+        raise ValueError('{0} points are out of the bounds of the grid'.format(
+            outside.sum()))
+    if clamp:
+        outside[:] = False
+
+    nx = x_axis.size
+    corner = iy * nx + ix
+    indices = np.column_stack([corner, corner + 1, corner + nx,
+                               corner + nx + 1])
+    weights = np.column_stack([(1 - fy) * (1 - fx), (1 - fy) * fx,
+                               fy * (1 - fx), fy * fx])
+
+    return GridWeights(indices, weights, shape, y_axis.size * nx,
+                       outside=outside, fill_value=fill_value)
+
+
+def delaunay_weights(source_points, query_points, fill_value=np.nan):
+    """
+    linear barycentric weights of query points on a Delaunay triangulation of
+    scattered source points, the same interpolation as
+    scipy.interpolate.griddata(method='linear').
+
+    :param source_points: (n_source, ndim) source coordinates, or a tuple of
+                          ndim coordinate arrays
+    :param query_points: (..., ndim) query coordinates, or a tuple of ndim
+                         broadcastable coordinate arrays
+    :param fill_value: value for points outside the convex hull
+    :return: GridWeights
+    """
+    source_points = _as_points(source_points)
+    query_points = _as_points(query_points, keep_shape=True)
+    shape = query_points.shape[:-1]
+    ndim = source_points.shape[-1]
+    query_points = query_points.reshape(-1, ndim)
+
+    tri = spatial.Delaunay(source_points)
+    simplex = tri.find_simplex(query_points)
+    outside = simplex == -1
+
+    transform = tri.transform[simplex]
+    bary = np.einsum('ijk,ik->ij', transform[:, :ndim],
+                     query_points - transform[:, ndim])
+    weights = np.column_stack([bary, 1 - bary.sum(axis=1)])
+    indices = tri.simplices[simplex]
+    weights[outside] = 0
+
+    return GridWeights(indices, weights, shape, source_points.shape[0],
+                       outside=outside, fill_value=fill_value)
+
+
+def idw_weights(source_points, query_points, k=6, p=5, tree=None):
+    """
+    inverse distance weights of the k nearest source points.
+
+    :param source_points: (n_source, ndim) source coordinates
+    :param query_points: (..., ndim) query coordinates
+    :param k: number of nearest neighbours
+    :param p: power of the inverse distance
+    :param tree: optional prebuilt scipy.spatial.cKDTree of source_points,
+                 to reuse for several sets of query points
+    :return: GridWeights
+    """
+    query_points = np.asarray(query_points, dtype=float)
+    shape = query_points.shape[:-1]
+    if tree is None:
+        tree = spatial.cKDTree(source_points, k)
+    distances, indices = tree.query(query_points.reshape(-1, tree.m), k=k)
+    inv_dist = 1. / np.power(distances, p)
+    weights = inv_dist / inv_dist.sum(axis=1)[:, np.newaxis]
+
+    return GridWeights(indices.reshape(-1, k), weights.reshape(-1, k), shape,
+                       tree.n)
+
+
+def _as_points(points, keep_shape=False):
+    """ (..., ndim) float array from an array or a tuple of coordinates """
+    if isinstance(points, (tuple, list)):
+        points = np.stack(np.broadcast_arrays(
+            *[np.asarray(pp, dtype=float) for pp in points]), axis=-1)
+    points = np.asarray(points, dtype=float)
+    if keep_shape:
+        return points
+    return points.reshape(-1, points.shape[-1])
+
+
+def resample_slices(weights, cube, slice_indices=None, chunk_size=16,
+                    log_scale=False):
+    """
+    resample the slices of a cube onto the target grid of weights, one chunk
+    of slices at a time.
+
+    :param weights: GridWeights of the target grid
+    :param cube: (n_slices, ...) source values, each slice holds the source
+                 values of the weights
+    :param slice_indices: indices of the slices to resample, default all
+    :param chunk_size: number of slices interpolated together, bounds the
+                       memory used to chunk_size * weights.size * n_vertices
+    :param log_scale: if True the slices are interpolated in log10 space and
+                      returned in linear scale
+    :return: generator of (slice index, resampled slice)
+    """
+    if slice_indices is None:
+        slice_indices = range(cube.shape[0])
+    slice_indices = list(slice_indices)
+
+    for start in range(0, len(slice_indices), chunk_size):
+        chunk = slice_indices[start:start + chunk_size]
+        values = cube[chunk]
+        if log_scale:
+            values = np.log10(values)
+        layers = weights.apply(values)
+        if log_scale:
+            layers = 10 ** layers
+        for index, layer in zip(chunk, layers):
+            yield index, layer
+
+
+def resample_cube(weights, cube, chunk_size=16, log_scale=False):
+    """
+    resample all slices of a cube onto the target grid of weights.
+
+    :return: array of shape (n_slices,) + weights.shape
+    """
+    result = np.zeros((cube.shape[0],) + weights.shape)
+    for index, layer in resample_slices(weights, cube, chunk_size=chunk_size,
+                                        log_scale=log_scale):
+        result[index] = layer
+
+    return result
@@ -0,0 +1,56 @@
+"""
+TEST mtpy.analysis.penetration_depth
+"""
+import glob
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.core.mt import MT
+from mtpy.analysis.doi import bostick_depth
+import mtpy.analysis.penetration_depth as pendep
+from tests import EDI_DATA_DIR
+
+
+class Test_PenetrationDepth(TestCase):
+    def setUp(self):
+        self.mt_objs = [MT(fn) for fn in sorted(glob.glob(os.path.join(EDI_DATA_DIR, "*.edi")))[:4]]
+
+    def test_depth_cube_matches_pointwise(self):
+        stack, depth = pendep.get_penetration_depths(self.mt_objs)
+        self.assertEqual(depth.shape, (len(self.mt_objs), self.mt_objs[0].Z.freq.size, 3))
+
+        for ii, mt_obj in enumerate(self.mt_objs):
+            zeta = mt_obj.Z
+            np.testing.assert_allclose(depth[ii, :, pendep.COMPONENTS.index('zxy')],
+                                       bostick_depth(zeta.freq, zeta.resistivity[:, 0, 1]))
+            np.testing.assert_allclose(depth[ii, :, pendep.COMPONENTS.index('zyx')],
+                                       bostick_depth(zeta.freq, zeta.resistivity[:, 1, 0]))
+            np.testing.assert_allclose(depth[ii, :, pendep.COMPONENTS.index('det')],
+                                       bostick_depth(zeta.freq, 0.2 * np.abs(zeta.det) / zeta.freq))
+
+    def test_period_tolerance(self):
+        periods = 1.0 / self.mt_objs[0].Z.freq[[0, 5]]
+        periods = np.append(periods, 1e6)
+        stack, depth = pendep.get_penetration_depths(self.mt_objs, periods=periods, ptol=0.1)
+
+        self.assertTrue(np.isnan(depth[:, -1]).all())
+        np.testing.assert_allclose(stack['periods'][:, -1], 1e6)
+        self.assertFalse(np.isnan(depth[:, :-1]).any())
+
+    def test_period_index(self):
+        stack, depth = pendep.get_penetration_depths(self.mt_objs, period_index=[2])
+        for ii, mt_obj in enumerate(self.mt_objs):
+            self.assertAlmostEqual(stack['periods'][ii, 0], 1.0 / mt_obj.Z.freq[2])
+
+    def test_niblett_bostick(self):
+        stack = pendep.stack_impedance(self.mt_objs)
+        res, phase = pendep.get_resistivity_phase_cube(stack['z'], stack['periods'])
+        rho_nb, depth = pendep.get_niblett_bostick_cube(res, phase, stack['periods'])
+
+        zeta = self.mt_objs[0].Z
+        np.testing.assert_allclose(phase[0, :, pendep.COMPONENTS.index('zxy')], zeta.phase[:, 0, 1])
+        np.testing.assert_allclose(rho_nb[0, :, pendep.COMPONENTS.index('zxy')],
+                                   zeta.resistivity[:, 0, 1] *
+                                   (np.pi / 2 / np.deg2rad(zeta.phase[:, 0, 1] % 90) - 1))
@@ -0,0 +1,121 @@
+"""
+TEST mtpy.analysis.pt.compute_residual_pt_array against the matrix by matrix
+calculation of the residual phase tensor
+"""
+import glob
+import os
+from unittest import TestCase
+
+import numpy as np
+
+import mtpy.analysis.pt as mtpt
+import mtpy.utils.calculator as MTcc
+from mtpy.core.mt import MT
+from tests import EDI_DATA_DIR
+
+
+def _heise_residual(pt1, pt2, pt1_err, pt2_err):
+    """ residual phase tensor of single matrices as computed before """
+    try:
+        inv1 = np.linalg.inv(pt1)
+        rpt = np.eye(2) - 0.5 * (np.dot(inv1, pt2) + np.dot(pt2, inv1))
+    except np.linalg.LinAlgError:
+        rpt = np.zeros((2, 2))
+    try:
+        inv2, inv2_err = MTcc.invertmatrix_incl_errors(pt2, inmatrix_err=pt2_err)
+        err1 = MTcc.multiplymatrices_incl_errors(inv2, pt1, inv2_err, pt1_err)[1]
+        err2 = MTcc.multiplymatrices_incl_errors(pt1, inv2, pt1_err, inv2_err)[1]
+        rpt_err = np.sqrt(0.25 * err1 ** 2 + 0.25 * err2 ** 2)
+    except Exception:
+        rpt_err = np.zeros((2, 2)) + 1e10
+    return rpt, rpt_err
+
+
+class TestResidualPTArray(TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        shape = (4, 6, 2, 2)
+        self.pt1 = np.random.normal(size=shape)
+        self.pt2 = self.pt1 + 0.1 * np.random.normal(size=shape)
+        self.pt1_err = 0.1 * np.abs(np.random.normal(size=shape))
+        self.pt2_err = 0.1 * np.abs(np.random.normal(size=shape))
+        # singular phase tensors in either data set
+        self.pt1[1, 2] = 0
+        self.pt2[2, 3] = [[1, 2], [2, 4]]
+
+    def test_heise(self):
+        rpt, rpt_err = mtpt.compute_residual_pt_array(
+            self.pt1, self.pt2, self.pt1_err, self.pt2_err)
+        self.assertEqual(rpt.shape, self.pt1.shape)
+        for index in np.ndindex(self.pt1.shape[:2]):
+            expected, expected_err = _heise_residual(
+                self.pt1[index], self.pt2[index],
+                self.pt1_err[index], self.pt2_err[index])
+            self.assertTrue(np.allclose(rpt[index], expected), index)
+            self.assertTrue(np.allclose(rpt_err[index], expected_err), index)
+        self.assertTrue(np.all(rpt[1, 2] == 0))
+        self.assertTrue(np.all(rpt_err[2, 3] == 1e10))
+
+    def test_booker(self):
+        rpt, rpt_err = mtpt.compute_residual_pt_array(
+            self.pt1, self.pt2, self.pt1_err, self.pt2_err,
+            residualtype='booker')
+        self.assertTrue(np.allclose(rpt, self.pt1 - self.pt2))
+        self.assertTrue(np.allclose(rpt_err, self.pt1_err + self.pt2_err))
+
+    def test_without_errors(self):
+        rpt, rpt_err = mtpt.compute_residual_pt_array(self.pt1, self.pt2)
+        self.assertIsNone(rpt_err)
+
+    def test_invalid_input(self):
+        with self.assertRaises(mtpt.MTex.MTpyError_PT):
+            mtpt.compute_residual_pt_array(self.pt1, self.pt2[:2])
+        with self.assertRaises(mtpt.MTex.MTpyError_PT):
+            mtpt.compute_residual_pt_array(self.pt1, self.pt2,
+                                           residualtype='unknown')
+
+    def test_residual_phase_tensor(self):
+        pt1 = self.pt1[0]
+        pt2 = self.pt2[0]
+        freq = np.logspace(0, -3, pt1.shape[0])
+        rpt_obj = mtpt.ResidualPhaseTensor(
+            mtpt.PhaseTensor(pt_array=pt1, pt_err_array=self.pt1_err[0], freq=freq),
+            mtpt.PhaseTensor(pt_array=pt2, pt_err_array=self.pt2_err[0], freq=freq))
+        rpt, rpt_err = mtpt.compute_residual_pt_array(
+            pt1, pt2, self.pt1_err[0], self.pt2_err[0])
+        self.assertTrue(np.allclose(rpt_obj.rpt, rpt))
+        self.assertTrue(np.allclose(rpt_obj.rpt_err, rpt_err))
+        self.assertTrue(np.allclose(rpt_obj.residual_pt.phimax,
+                                    mtpt.PhaseTensor(pt_array=rpt, freq=freq).phimax))
+
+        # a single matrix
+        rpt_obj.read_pts(pt1[0], pt2[0], self.pt1_err[0][0], self.pt2_err[0][0])
+        self.assertEqual(rpt_obj.rpt.shape, (1, 2, 2))
+        self.assertTrue(np.allclose(rpt_obj.rpt[0], rpt[0]))
+        self.assertTrue(np.allclose(rpt_obj.rpt_err[0], rpt_err[0]))
+
+
+class TestResidualPTArrays(TestCase):
+    def test_get_residual_pt_arrays(self):
+        from mtpy.imaging.mtplottools import get_residual_pt_arrays
+        edi_list = sorted(glob.glob(os.path.join(EDI_DATA_DIR, '*.edi')))[:3]
+        mt_list1 = [MT(fn) for fn in edi_list]
+        mt_list2 = [MT(fn) for fn in edi_list[:2]]
+        mt_list2[1].Z.z = mt_list2[1].Z.z * (1 + 0.1j)
+        freq_list = np.array(sorted(set(np.hstack([mt_obj.Z.freq for mt_obj
+                                                   in mt_list1])),
+                                    reverse=True))
+
+        rpt, rpt_err, found = get_residual_pt_arrays(mt_list1, mt_list2,
+                                                     freq_list)
+        self.assertEqual(rpt.shape, (3, freq_list.size, 2, 2))
+        self.assertEqual(found.tolist(), [True, True, False])
+        # the same station has no residual, a missing station is left at zero
+        self.assertTrue(np.allclose(rpt[0], 0))
+        self.assertTrue(np.all(rpt[2] == 0))
+
+        mt1, mt2 = mt_list1[1], mt_list2[1]
+        expected = mtpt.ResidualPhaseTensor(mt1.pt, mt2.pt)
+        f_index = [np.where(freq_list == ff)[0][0] for ff in mt1.Z.freq]
+        self.assertTrue(np.allclose(rpt[1, f_index], expected.rpt))
+        self.assertTrue(np.allclose(rpt_err[1, f_index], expected.rpt_err))
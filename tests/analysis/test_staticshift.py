@@ -0,0 +1,71 @@
+"""
+TEST mtpy.analysis.staticshift
+"""
+import glob
+import os
+from unittest import TestCase
+
+import numpy as np
+
+import mtpy.analysis.staticshift as staticshift
+from mtpy.core.mt import MT
+from tests import EDI_DATA_DIR, make_temp_dir
+
+
+class Test_StaticShiftSurvey(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.edi_list = sorted(glob.glob(os.path.join(EDI_DATA_DIR, "*.edi")))
+        cls.survey = staticshift.StaticShiftSurvey(edi_list=cls.edi_list)
+
+    def test_query_nearest(self):
+        distances, indices = self.survey.query_nearest(k=2)
+        points = np.column_stack([self.survey.east, self.survey.north])
+        for ii in range(self.survey.num_stations):
+            dist = np.sqrt(((points - points[ii]) ** 2).sum(axis=1))
+            dist[ii] = np.inf
+            np.testing.assert_allclose(distances[ii], np.sort(dist)[:2])
+            self.assertNotIn(ii, indices[ii])
+
+    def test_query_radius(self):
+        for nb, distance in self.survey.query_radius(3000.):
+            self.assertTrue((distance <= 3000.).all())
+        nb, distance = self.survey.query_radius(1e7, station_index=0)[0]
+        self.assertEqual(nb.size, self.survey.num_stations - 1)
+
+    def test_estimate_static_shift(self):
+        # shifts of the per-station estimate_static_spatial_median before
+        # the survey index, radius=3000
+        expected = np.array([[1., 1.],
+                             [1., 1.],
+                             [1.1956353670707702, 4.013340089039918],
+                             [0.7792282580736308, 0.8252581090972777],
+                             [1.2325216064790232, 1.],
+                             [1., 1.],
+                             [1., 1.],
+                             [1., 0.7283894097224548],
+                             [1.1890598216781667, 1.],
+                             [1., 1.],
+                             [1., 1.1914793647558541],
+                             [1., 1.],
+                             [1., 1.286909870016283],
+                             [1., 0.7814460239865997],
+                             [1.3632306316552252, 1.3306563521590804]])
+        self.assertEqual([os.path.basename(fn) for fn in self.edi_list][2],
+                         'pb27c.edi')
+        shifts = self.survey.estimate_static_shift(radius=3000.)
+        np.testing.assert_allclose(shifts, expected, rtol=1e-10)
+
+    def test_remove_static_shift(self):
+        save_dir = make_temp_dir(self.__class__.__name__)
+        results = self.survey.remove_static_shift(radius=3000.,
+                                                  save_dir=save_dir,
+                                                  num_workers=4)
+        self.assertEqual(len(results), len(self.edi_list))
+        for ii, (new_fn, ss_x, ss_y) in enumerate(results):
+            self.assertTrue(os.path.isfile(new_fn))
+            mt_obj = self.survey.mt_obj_list[ii]
+            new_res = MT(new_fn).Z.resistivity
+            np.testing.assert_allclose(new_res[:, 0, 1],
+                                       mt_obj.Z.resistivity[:, 0, 1] / ss_x,
+                                       rtol=1e-3)
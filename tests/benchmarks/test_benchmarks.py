@@ -0,0 +1,87 @@
+"""
+TEST the synthetic data generators of the benchmark suite can be read by
+mtpy and the benchmark runner
+"""
+import json
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from benchmarks import runner, synthetic
+from mtpy.usgs.nims import NIMS
+from mtpy.usgs.zen import Zen3D
+from tests import make_temp_dir
+
+
+class _Bench(object):
+    params = [1, 2]
+    param_names = ['n']
+
+    def setup(self, n):
+        self.values = list(range(n))
+
+    def time_sum(self, n):
+        sum(self.values)
+
+
+class TestSynthetic(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+
+    def test_z3d(self):
+        fn = synthetic.write_z3d_file(os.path.join(self._temp_dir, 'syn.Z3D'),
+                                      df=256, n_seconds=10, component='hy',
+                                      station='200')
+        z3d_obj = Zen3D(fn)
+        z3d_obj.read_z3d()
+        # the first 3 seconds are skipped by the reader
+        self.assertEqual(z3d_obj.ts_obj.ts.data.size, 7 * 256)
+        self.assertEqual(z3d_obj.station, '200')
+        self.assertEqual(z3d_obj.component, 'hy')
+        self.assertEqual(z3d_obj.df, 256)
+        counts = np.round(synthetic.make_time_series(10 * 256, 256) * 1e4)
+        np.testing.assert_allclose(z3d_obj.ts_obj.ts.data.to_numpy(),
+                                   counts[3 * 256:] * z3d_obj._counts_to_mv_conversion,
+                                   rtol=1e-6)
+
+    def test_nims(self):
+        fn = synthetic.write_nims_file(os.path.join(self._temp_dir, 'DATA.BIN'),
+                                       n_seconds=400)
+        nims_obj = NIMS(fn)
+        self.assertEqual(nims_obj.ts.shape, (400 * 8, 5))
+        self.assertEqual(len(nims_obj.stamps), 2)
+        self.assertEqual(nims_obj.start_time.isoformat(),
+                         '2019-01-10T16:00:00+00:00')
+        # the bytes in the first 1000 bytes of the file may be changed
+        hx = np.round(synthetic.make_time_series(400 * 8, 8, 0) * 1000)
+        np.testing.assert_array_equal(nims_obj.ts.hx.to_numpy()[80:], hx[80:])
+
+
+class TestRunner(TestCase):
+    def test_run_and_compare(self):
+        bench_list = [runner.Benchmark('test', _Bench, 'time_sum', params)
+                      for params in runner._get_params(_Bench)]
+        self.assertEqual([bench.name for bench in bench_list],
+                         ['test._Bench.time_sum(1)', 'test._Bench.time_sum(2)'])
+
+        result_dict = runner.run_benchmarks(bench_list, repeat=2,
+                                            verbose=False)
+        self.assertEqual(result_dict['results']['test._Bench.time_sum(2)']['params'],
+                         {'n': 2})
+        save_fn = os.path.join(make_temp_dir(self.__class__.__name__),
+                               'results.json')
+        runner.write_results(result_dict, save_fn)
+        self.assertEqual(runner.read_results(save_fn)['results'],
+                         json.loads(json.dumps(result_dict['results'])))
+
+        slow_dict = json.loads(json.dumps(result_dict))
+        slow_dict['results']['test._Bench.time_sum(1)']['min'] *= 2
+        states = [cc[4] for cc in runner.compare_results(result_dict, slow_dict)]
+        self.assertEqual(states, ['slower', 'same'])
+
+    def test_discover(self):
+        bench_list = runner.discover('ReadZ3D', quick=True)
+        self.assertEqual([bench.name for bench in bench_list],
+                         ['bench_usgs.ReadZ3D.time_read_z3d(60)'])
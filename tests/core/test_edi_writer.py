@@ -0,0 +1,75 @@
+"""
+TEST the edi writer against edi files written by the original writer
+(tests/baseline_edis), lines holding the time of writing are skipped.
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.core import mt
+from mtpy.core.edi import format_data_block
+from tests import TEST_DIR, TEST_MTPY_ROOT, make_temp_dir
+
+BASELINE_EDI_DIR = os.path.join(TEST_DIR, 'baseline_edis')
+
+_time_keys = ['FILEDATE=', 'PROGDATE=', 'provenance.creation_time']
+
+
+def _read_edi_lines(fn):
+    with open(fn) as fid:
+        return [line for line in fid.readlines()
+                if not any(key in line for key in _time_keys)]
+
+
+class TestEdiWriter(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.edi_list = [os.path.join(TEST_MTPY_ROOT, 'examples', 'data', fn)
+                        for fn in ['edi_files/pb23c.edi', 'edi_files/pb27c.edi',
+                                   'edi_files_2/Synth00.edi']]
+
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ + self._testMethodName)
+
+    def _assert_matches_baseline(self, fn, baseline_basename):
+        self.assertEqual(_read_edi_lines(fn),
+                         _read_edi_lines(os.path.join(BASELINE_EDI_DIR,
+                                                      baseline_basename)))
+
+    def test_write_mt_file(self):
+        for edi_fn in self.edi_list:
+            fn = mt.MT(edi_fn).write_mt_file(save_dir=self._temp_dir)
+            self._assert_matches_baseline(fn, os.path.basename(fn))
+
+    def test_write_interpolated(self):
+        mt_obj = mt.MT(self.edi_list[0])
+        new_z, new_t = mt_obj.interpolate(mt_obj.Z.freq[1:12])
+        fn = mt_obj.write_mt_file(save_dir=self._temp_dir,
+                                  fn_basename='pb23_interp',
+                                  new_Z_obj=new_z, new_Tipper_obj=new_t)
+        self._assert_matches_baseline(fn, 'pb23_interp.edi')
+
+    def test_write_mt_files(self):
+        mt_obj_list = [mt.MT(edi_fn) for edi_fn in self.edi_list]
+        # the same station twice is numbered as when written one at a time
+        mt_obj_list.append(mt.MT(self.edi_list[0]))
+        fn_list = mt.write_mt_files(mt_obj_list, save_dir=self._temp_dir,
+                                    num_workers=2)
+        self.assertEqual([os.path.basename(fn) for fn in fn_list],
+                         ['pb23.edi', 'pb27.edi', 'Synth00.edi', 'pb23_1.edi'])
+        for fn in fn_list[:3]:
+            self._assert_matches_baseline(fn, os.path.basename(fn))
+        self._assert_matches_baseline(fn_list[3], 'pb23.edi')
+
+    def test_format_data_block(self):
+        values = np.array([1.5, -0.0, 1e32, np.nan, 2.5e-12, -3, 7])
+        for n_values in [6, 7]:
+            expected = ''
+            for index, value in enumerate(values[:n_values], 1):
+                expected += '{0: 15.6e}'.format(value)
+                if index % 6 == 0:
+                    expected += '\n'
+            expected += '\n'
+            self.assertEqual(format_data_block(values[:n_values]), expected)
+        self.assertEqual(format_data_block(np.array([])), '')
@@ -0,0 +1,56 @@
+"""
+TEST that importing mtpy.core.mt stays fast: the import is timed in a fresh
+interpreter and must not load the heavy optional dependencies.
+
+The budget is in seconds and can be changed with the environment variable
+MTPY_IMPORT_BUDGET, e.g. on a slow CI machine.
+"""
+import json
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from tests import TEST_MTPY_ROOT
+
+IMPORT_BUDGET = float(os.environ.get('MTPY_IMPORT_BUDGET', 1.0))
+N_RUNS = 3
+
+# modules that must only be loaded when they are used
+HEAVY_MODULES = ['matplotlib', 'scipy', 'osgeo', 'pyproj', 'geopandas',
+                 'shapely', 'yaml', 'PyQt5', 'PyQt4']
+
+_script = """
+import json, sys, time
+t0 = time.perf_counter()
+import mtpy.core.mt
+t1 = time.perf_counter()
+print(json.dumps({'time': t1 - t0,
+                  'modules': sorted(set(name.split('.')[0]
+                                        for name in sys.modules))}))
+"""
+
+
+def _time_import():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [TEST_MTPY_ROOT] + [pp for pp in [env.get('PYTHONPATH')] if pp])
+    output = subprocess.check_output([sys.executable, '-c', _script],
+                                     env=env, cwd=TEST_MTPY_ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+class TestImportTime(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.results = [_time_import() for ii in range(N_RUNS)]
+
+    def test_import_budget(self):
+        import_time = min(result['time'] for result in self.results)
+        self.assertLess(import_time, IMPORT_BUDGET,
+                        "import mtpy.core.mt took {0:.3f} s, budget is "
+                        "{1:.3f} s".format(import_time, IMPORT_BUDGET))
+
+    def test_no_heavy_modules(self):
+        loaded = set(self.results[0]['modules'])
+        self.assertEqual([name for name in HEAVY_MODULES if name in loaded], [])
@@ -0,0 +1,95 @@
+"""
+TEST mtpy.core.mt_cache
+"""
+import glob
+import os
+import shutil
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.core import mt_cache
+from mtpy.core.mt import MT
+from tests import EDI_DATA_DIR, make_temp_dir
+
+
+class TestMTCache(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.cache = mt_cache.enable(os.path.join(self._temp_dir, 'cache'))
+        self.cache.clear()
+
+    def tearDown(self):
+        mt_cache.disable()
+
+    def _assert_same(self, mt_obj, mt_ref):
+        self.assertEqual(mt_obj.station, mt_ref.station)
+        for attr in ['lat', 'lon', 'elev', 'east', 'north', 'utm_zone']:
+            self.assertEqual(getattr(mt_obj, attr), getattr(mt_ref, attr))
+        for attr in ['freq', 'z', 'z_err', 'rotation_angle', 'resistivity',
+                     'phase']:
+            np.testing.assert_array_equal(getattr(mt_obj.Z, attr),
+                                          getattr(mt_ref.Z, attr))
+        for attr in ['freq', 'tipper', 'tipper_err', 'mag_real',
+                     'angle_real']:
+            np.testing.assert_array_equal(getattr(mt_obj.Tipper, attr),
+                                          getattr(mt_ref.Tipper, attr))
+        self.assertEqual(mt_obj.Site.survey, mt_ref.Site.survey)
+        self.assertEqual(mt_obj.Notes.info_dict, mt_ref.Notes.info_dict)
+        self.assertEqual(mt_obj.FieldNotes.Electrode_ex.__dict__,
+                         mt_ref.FieldNotes.Electrode_ex.__dict__)
+        self.assertIs(mt_obj._edi_obj.Z, mt_obj.Z)
+
+    def test_read_from_cache(self):
+        edi_list = sorted(glob.glob(os.path.join(EDI_DATA_DIR, '*.edi')))[0:5]
+        for edi_fn in edi_list:
+            mt_ref = MT()
+            mt_ref.read_mt_file(edi_fn, use_cache=False)
+            self.assertFalse(os.path.isfile(self.cache.get_entry_fn(edi_fn)))
+
+            # the first read makes the entry, the second one uses it
+            MT(edi_fn)
+            self.assertTrue(os.path.isfile(self.cache.get_entry_fn(edi_fn)))
+            mt_obj = MT()
+            self.assertTrue(self.cache.load(mt_obj, edi_fn, 'edi'))
+            self._assert_same(mt_obj, mt_ref)
+            self._assert_same(MT(edi_fn), mt_ref)
+
+            # a cached object writes the same edi file
+            ref_fn = mt_ref.write_mt_file(
+                save_dir=self._temp_dir, fn_basename='ref_' + mt_ref.station)
+            new_fn = MT(edi_fn).write_mt_file(
+                save_dir=self._temp_dir, fn_basename='new_' + mt_ref.station)
+            with open(ref_fn) as ref_fid, open(new_fn) as new_fid:
+                self.assertEqual(ref_fid.read(), new_fid.read())
+
+    def test_invalidation(self):
+        edi_fn = os.path.join(self._temp_dir, 'pb23c.edi')
+        shutil.copy(os.path.join(EDI_DATA_DIR, 'pb23c.edi'), edi_fn)
+        mt_obj = MT(edi_fn)
+        self.assertTrue(self.cache.load(MT(), edi_fn, 'edi'))
+
+        # change the station name in the file
+        with open(edi_fn) as fid:
+            lines = fid.read().replace(mt_obj.station, 'changed')
+        time.sleep(.01)
+        with open(edi_fn, 'w') as fid:
+            fid.write(lines)
+        self.assertFalse(self.cache.load(MT(), edi_fn, 'edi'))
+        self.assertEqual(MT(edi_fn).station, 'changed')
+        self.assertEqual(MT(edi_fn).station, 'changed')
+        self.assertTrue(self.cache.load(MT(), edi_fn, 'edi'))
+
+    def test_disabled(self):
+        mt_cache.disable()
+        edi_fn = os.path.join(EDI_DATA_DIR, 'pb23c.edi')
+        MT(edi_fn)
+        self.assertFalse(os.path.isfile(self.cache.get_entry_fn(edi_fn)))
+
+    def test_clear(self):
+        edi_fn = os.path.join(EDI_DATA_DIR, 'pb23c.edi')
+        MT(edi_fn)
+        self.cache.clear()
+        self.assertFalse(os.path.isfile(self.cache.get_entry_fn(edi_fn)))
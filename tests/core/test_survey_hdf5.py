@@ -0,0 +1,156 @@
+"""
+TEST mtpy.core.survey_hdf5
+"""
+import glob
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.core.mt import MT
+from tests import EDI_DATA_DIR, SAMPLE_DIR, make_temp_dir
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+class TestSurveyHDF5(TestCase):
+    def setUp(self):
+        if h5py is None:
+            self.skipTest('h5py is not installed')
+        from mtpy.core.survey_hdf5 import SurveyHDF5
+
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.h5_fn = os.path.join(self._temp_dir, 'survey.h5')
+        self.survey = SurveyHDF5(self.h5_fn, 'w')
+
+    def tearDown(self):
+        if h5py is not None:
+            self.survey.close()
+
+    def _reopen(self):
+        from mtpy.core.survey_hdf5 import SurveyHDF5
+
+        self.survey.close()
+        self.survey = SurveyHDF5(self.h5_fn, 'r')
+
+    def test_transfer_functions(self):
+        edi_list = sorted(glob.glob(os.path.join(EDI_DATA_DIR, '*.edi')))[0:5]
+        mt_list = [MT(fn) for fn in edi_list]
+        self.survey.add_mt_list(mt_list)
+        self._reopen()
+
+        self.assertEqual(self.survey.station_list,
+                         sorted([mt_obj.station for mt_obj in mt_list]))
+        locations = self.survey.get_station_locations()
+        for mt_ref in mt_list:
+            mt_obj = self.survey.get_mt(mt_ref.station)
+            for attr in ['station', 'lat', 'lon', 'elev', 'east', 'north',
+                         'utm_zone']:
+                self.assertEqual(getattr(mt_obj, attr), getattr(mt_ref, attr))
+            self.assertEqual(mt_obj.Site.survey, mt_ref.Site.survey)
+            np.testing.assert_array_equal(mt_obj.Z.freq, mt_ref.Z.freq)
+            np.testing.assert_array_equal(mt_obj.Z.z, mt_ref.Z.z)
+            np.testing.assert_array_equal(mt_obj.Z.z_err, mt_ref.Z.z_err)
+            np.testing.assert_array_equal(mt_obj.Z.resistivity,
+                                          mt_ref.Z.resistivity)
+            np.testing.assert_array_equal(mt_obj.Tipper.tipper,
+                                          mt_ref.Tipper.tipper)
+            row = locations[locations['station'] == mt_ref.station][0]
+            self.assertEqual(row['lat'], mt_ref.lat)
+
+            # one period only
+            period = 1. / mt_ref.Z.freq[3]
+            z_obj, t_obj = self.survey.read_transfer_function(
+                mt_ref.station, period=period * 1.01)
+            self.assertEqual(z_obj.z.shape, (1, 2, 2))
+            np.testing.assert_array_equal(z_obj.z[0], mt_ref.Z.z[3])
+            np.testing.assert_array_equal(t_obj.tipper[0],
+                                          mt_ref.Tipper.tipper[3])
+
+    def test_modem_data(self):
+        from mtpy.modeling.modem import Data
+
+        data_ref = Data()
+        data_ref.read_data_file(os.path.join(SAMPLE_DIR, 'ModEM',
+                                             'ModEM_Data.dat'))
+        self.survey.add_data(data_ref, name='data')
+        self._reopen()
+        self.assertEqual(self.survey.data_list, ['data'])
+
+        data_obj = self.survey.get_data('data')
+        self.assertEqual(data_obj.data_array.dtype, data_ref.data_array.dtype)
+        for name in data_ref.data_array.dtype.names:
+            np.testing.assert_array_equal(data_obj.data_array[name],
+                                          data_ref.data_array[name])
+        np.testing.assert_array_equal(data_obj.period_list,
+                                      data_ref.period_list)
+        self.assertEqual(data_obj.center_point.lat[0],
+                         data_ref.center_point.lat[0])
+        for attr in ['inv_mode', 'units', 'wave_sign_impedance',
+                     'rotation_angle']:
+            self.assertEqual(getattr(data_obj, attr), getattr(data_ref, attr))
+
+        station_list = list(data_ref.data_array['station'][[1, 3]])
+        data_part = self.survey.get_data('data', station_list=station_list)
+        self.assertEqual(list(data_part.data_array['station']), station_list)
+
+    def test_modem_model(self):
+        from mtpy.modeling.modem import Model
+
+        model_ref = Model()
+        model_ref.read_model_file(os.path.join(SAMPLE_DIR, 'ModEM',
+                                               'ModEM_Model_File.rho'))
+        self.survey.add_model(model_ref, name='inv')
+        self._reopen()
+
+        model_obj = self.survey.get_model('inv')
+        np.testing.assert_array_equal(model_obj.res_model, model_ref.res_model)
+        for attr in ['nodes_north', 'nodes_east', 'nodes_z', 'grid_z',
+                     'grid_center']:
+            np.testing.assert_array_equal(getattr(model_obj, attr),
+                                          getattr(model_ref, attr))
+        self.assertEqual(model_obj.title, model_ref.title)
+
+        np.testing.assert_array_equal(
+            self.survey.read_model_slice('inv', depth_index=5),
+            model_ref.res_model[:, :, 5])
+        depth = (model_ref.grid_z[7] + model_ref.grid_z[8]) / 2. - \
+            model_ref.grid_z[0]
+        np.testing.assert_array_equal(
+            self.survey.read_model_slice('inv', depth=depth),
+            model_ref.res_model[:, :, 7])
+
+    def test_time_series(self):
+        try:
+            from mtpy.core.ts import MTTS
+        except ImportError:
+            self.skipTest('pandas is not installed')
+
+        ts_obj = MTTS()
+        ts_obj.station = 'mt01'
+        ts_obj.component = 'EX'
+        ts_obj.ts = np.random.RandomState(0).randn(10000)
+        ts_obj.sampling_rate = 256.
+        ts_obj.start_time_utc = '2020-01-01T00:00:00'
+        self.survey.ts_chunk_size = 1024
+        self.survey.add_time_series(ts_obj, run='run_001')
+        self._reopen()
+
+        self.assertEqual(self.survey.get_run_list('mt01'), ['run_001'])
+        self.assertEqual(self.survey.get_component_list('mt01', 'run_001'),
+                         ['ex'])
+        new_ts = self.survey.get_time_series('mt01', 'run_001', 'ex')
+        np.testing.assert_array_equal(new_ts.ts.data, ts_obj.ts.data)
+        self.assertEqual(new_ts.sampling_rate, 256.)
+        self.assertEqual(new_ts.start_time_utc, ts_obj.start_time_utc)
+        self.assertEqual(new_ts.component, 'EX')
+
+        part_ts = self.survey.get_time_series('mt01', 'run_001', 'ex',
+                                              start=512, stop=1024)
+        np.testing.assert_array_equal(part_ts.ts.data,
+                                      ts_obj.ts.data[512:1024])
+        self.assertEqual(part_ts.start_time_utc, '2020-01-01T00:00:02')
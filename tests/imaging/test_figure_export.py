@@ -0,0 +1,88 @@
+import os
+from unittest import TestCase, mock
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from mtpy.imaging import figure_export
+from tests import SAMPLE_DIR, make_temp_dir
+
+
+class _LinePlot(object):
+    """ minimal plot object, one figure per slope """
+
+    def __init__(self, save_path):
+        self.save_path = save_path
+        self.x = list(range(10))
+
+    def save_slope_figure(self, slope, fig_format='png'):
+        fig = plt.figure()
+        ax = fig.add_subplot(1, 1, 1)
+        ax.plot(self.x, [slope * xx for xx in self.x])
+        fn = os.path.join(self.save_path,
+                          'slope_{0}.{1}'.format(slope, fig_format))
+        fig.savefig(fn, dpi=50)
+        return fn
+
+
+class TestExportFigures(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ + self._testMethodName)
+
+    def test_export_in_process_and_on_pool(self):
+        plot_obj = _LinePlot(self._temp_dir)
+        for num_workers in [1, 3]:
+            timings = figure_export.export_figures(
+                plot_obj, 'save_slope_figure', [3, 1, 2],
+                num_workers=num_workers, render_kwargs={'fig_format': 'png'})
+            self.assertEqual([timing.key for timing in timings], [3, 1, 2])
+            for timing in timings:
+                self.assertTrue(os.path.isfile(timing.fn))
+                self.assertGreaterEqual(timing.seconds, 0)
+            # figures made in this process are closed again
+            self.assertEqual(plt.get_fignums(), [])
+
+        csv_fn = figure_export.write_timings(
+            timings, os.path.join(self._temp_dir, 'timings.csv'))
+        with open(csv_fn) as fid:
+            lines = fid.readlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith('3,'))
+
+    def test_rms_plot_loop(self):
+        from mtpy.modeling.modem import PlotRMSMaps
+        rms_plot = PlotRMSMaps(os.path.join(SAMPLE_DIR, 'ModEM',
+                                            'Modular_MPI_NLCG_004.res'),
+                               plot_yn='n', save_path=self._temp_dir,
+                               fig_dpi=50)
+        timings = rms_plot.plot_loop(num_workers=2)
+        self.assertEqual(len(timings), rms_plot.residual.period_list.size)
+        for timing in timings:
+            self.assertTrue(os.path.isfile(timing.fn))
+
+    def test_pt_maps_save_all_figures(self):
+        from mtpy.modeling.modem.phase_tensor_maps import PlotPTMaps
+        modem_dir = os.path.join(SAMPLE_DIR, 'ModEM')
+        pt_plot = PlotPTMaps(data_fn=os.path.join(modem_dir, 'ModEM_Data.dat'),
+                             resp_fn=os.path.join(modem_dir,
+                                                  'Modular_MPI_NLCG_004.dat'),
+                             ellipse_size=20, dpi=50)
+        pt_plot.plot_period_list = pt_plot.plot_period_list[:2]
+        # rendering for export must never block on show
+        with mock.patch.object(plt, 'show',
+                               side_effect=AssertionError('show called')):
+            timings = pt_plot.save_all_figures(save_path=self._temp_dir,
+                                               file_format='png',
+                                               num_workers=1)
+        self.assertEqual([timing.key for timing in timings], [0, 1])
+        for timing in timings:
+            self.assertTrue(os.path.isfile(timing.fn))
+
+        # figures already plotted are saved with the same return type
+        pt_plot.fig_list.append(plt.figure())
+        timings = pt_plot.save_all_figures(save_path=self._temp_dir,
+                                           file_format='png')
+        self.assertEqual(len(timings), 1)
+        self.assertIsInstance(timings[0], figure_export.FigureTiming)
+        self.assertTrue(os.path.isfile(timings[0].fn))
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.patches import Ellipse, FancyArrow
+
+import mtpy.imaging.mtcolors as mtcl
+import mtpy.imaging.pt_collections as ptc
+
+
+class TestPTCollections(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.x = rng.uniform(0, 10, 20)
+        self.y = rng.uniform(0, 10, 20)
+        self.dx = rng.uniform(-1, 1, 20)
+        self.dy = rng.uniform(-1, 1, 20)
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_arrow_vertices_match_fancy_arrow(self):
+        self.dx[3] = self.dy[3] = 0
+        for includes_head in [True, False]:
+            verts, drawn = ptc.arrow_vertices(self.x, self.y, self.dx,
+                                              self.dy, width=.02,
+                                              head_width=.1, head_length=.15,
+                                              length_includes_head=includes_head)
+            self.assertFalse(drawn[3])
+            self.assertEqual(verts.shape, (19, 8, 2))
+            for xy, x, y, dx, dy in zip(verts, self.x[drawn], self.y[drawn],
+                                        self.dx[drawn], self.dy[drawn]):
+                arrow = FancyArrow(x, y, dx, dy, width=.02, head_width=.1,
+                                   head_length=.15,
+                                   length_includes_head=includes_head)
+                np.testing.assert_allclose(xy, arrow.get_xy()[:8], atol=1e-12)
+
+    def test_ellipse_vertices(self):
+        width = np.full(20, 2.)
+        height = np.full(20, 1.)
+        angle = np.linspace(0, 180, 20)
+        verts = ptc.ellipse_vertices(self.x, self.y, width, height, angle)
+        self.assertEqual(verts.shape, (20, 36, 2))
+        for xy, x, y, aa in zip(verts, self.x, self.y, angle):
+            ellipse = Ellipse((x, y), 2., 1., angle=aa)
+            # every vertex lies on the outline of the ellipse
+            inside = ellipse.get_transform().inverted().transform(xy)
+            np.testing.assert_allclose(np.hypot(*inside.T), 1.)
+
+    def test_get_plot_colors(self):
+        values = np.linspace(-8, 8, 17)
+        bounds = np.arange(-9, 10, 3)
+        for cmap, kwargs in [('mt_bl2gr2rd', {}),
+                             ('mt_seg_bl2wh2rd', {'bounds': bounds})]:
+            colors = mtcl.get_plot_colors(values, 'skew', cmap, -9, 9,
+                                          **kwargs)
+            for value, color in zip(values, colors):
+                np.testing.assert_allclose(
+                    color, mtcl.get_plot_color(value, 'skew', cmap, -9, 9,
+                                               **kwargs))
+
+    def test_plot_collections(self):
+        fig, ax = plt.subplots()
+        width, height = ptc.get_ellipse_size(np.full(20, 30.),
+                                             np.full(20, 60.), 1.)
+        np.testing.assert_allclose(width, 1.)
+        np.testing.assert_allclose(height, .5)
+        ellipses = ptc.plot_ellipses(ax, self.x, self.y, width, height,
+                                     self.x * 10, color_values=self.y * 9,
+                                     comp='phimin', cmap='mt_bl2gr2rd',
+                                     ckmin=0, ckmax=90, lw=.5)
+        arrows = ptc.plot_arrows(ax, self.x, self.y, self.dx, self.dy,
+                                 width=.02, color='k')
+        self.assertEqual(len(ellipses.get_paths()), 20)
+        self.assertEqual(len(ellipses.get_facecolors()), 20)
+        self.assertEqual(len(arrows.get_paths()), 20)
+        fig.canvas.draw()
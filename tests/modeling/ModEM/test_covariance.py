@@ -0,0 +1,81 @@
+"""
+TEST mtpy.modeling.modem.Covariance
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.modeling.modem import Covariance, Model
+from tests import SAMPLE_DIR, make_temp_dir
+
+
+class TestCovariance(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.model_fn = os.path.join(SAMPLE_DIR, 'ModEM',
+                                     'ModEM_Model_File.rho')
+
+    def test_write_read(self):
+        model_obj = Model()
+        model_obj.read_model_file(self.model_fn)
+        mask_arr = np.random.RandomState(0).randint(1, 5,
+                                                    model_obj.res_model.shape)
+        mask_arr[0:3, 0:2, 0:4] = 0
+        mask_arr[-2:, -4:, 2:3] = 9
+        mask_arr[4, 5, 6] = 10
+
+        cov = Covariance(mask_arr=mask_arr.copy(), smoothing_z=0.4)
+        cov.exception_list = [[2, 3, 0], [1, 4, 0]]
+        cov.smoothing_north = np.linspace(.1, .5, mask_arr.shape[2])
+        cov.write_covariance_file(save_path=self._temp_dir,
+                                  model_fn=self.model_fn, air=1e32)
+
+        new_cov = Covariance()
+        new_cov.read_cov_file(cov.cov_fn)
+        self.assertEqual(new_cov.grid_dimensions, mask_arr.shape)
+        np.testing.assert_array_equal(new_cov.mask_arr, mask_arr)
+        np.testing.assert_allclose(new_cov.smoothing_north,
+                                   cov.smoothing_north, atol=.005)
+        self.assertEqual(new_cov.smoothing_z, .4)
+        self.assertEqual(new_cov.smoothing_num, 1)
+        self.assertEqual(new_cov.exception_list, cov.exception_list)
+
+        # one layer after the other, rows north to south
+        with open(cov.cov_fn) as fid:
+            lines = fid.readlines()
+        index = lines.index(' {0:<8.0f}{0:<8.0f}\n'.format(2))
+        self.assertEqual(lines[index + 1],
+                         ''.join(['{0:^3.0f}'.format(value)
+                                  for value in mask_arr[-1, :, 1]]) + '\n')
+
+    def test_mask_from_model(self):
+        model_obj = Model()
+        model_obj.read_model_file(self.model_fn)
+        model_obj.res_model[:] = 100.
+        model_obj.res_model[:, :, 0:2] = 1e12
+        model_obj.res_model[0:4, 0:5, 2] = 0.3
+
+        mask_arr = Covariance().get_mask_from_model(model_obj)
+        self.assertTrue((mask_arr[:, :, 0:2] == 0).all())
+        self.assertTrue((mask_arr[0:4, 0:5, 2] == 9).all())
+        self.assertEqual((mask_arr == 1).sum(),
+                         mask_arr.size - mask_arr[:, :, 0:2].size - 20)
+
+        # air and sea from the topography
+        gcz = (model_obj.grid_z[:-1] + model_obj.grid_z[1:]) / 2.
+        topography = np.random.RandomState(0).uniform(
+            -gcz[8], -gcz[0], model_obj.res_model.shape[0:2])
+        model_obj.surface_dict = {'topography': topography}
+        model_obj.res_model[:] = 100.
+        mask_arr = Covariance().get_mask_from_model(model_obj)
+        for ii, jj in np.ndindex(*topography.shape):
+            for kk, depth in enumerate(gcz):
+                if depth > -topography[ii, jj]:
+                    expected = 1
+                elif depth > 0:
+                    expected = 9
+                else:
+                    expected = 0
+                self.assertEqual(mask_arr[ii, jj, kk], expected)
@@ -0,0 +1,123 @@
+"""
+TEST mtpy.modeling.modem.error_models
+"""
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.modeling.modem import DataError
+from mtpy.modeling.modem import error_models
+
+
+def _reference_error(d2d, error_type, err_value):
+    """
+    error of one tensor as computed per station and period before
+    """
+    d = d2d.flatten()
+    nz = np.nonzero(d)
+    d_xx, d_xy, d_yx, d_yy = d
+    if 'egbert' in error_type:
+        if d_xy == 0.0 and d_yx == 0.0:
+            return err_value * np.max([d_xx, d_yy])
+        if d_xy == 0.0:
+            d_xy = d_yx
+        if d_yx == 0.0:
+            d_yx = d_xy
+        return err_value * np.sqrt(d_xy * d_yx)
+    elif 'median' in error_type:
+        return err_value * np.median(d[nz])
+    elif 'mean_od' in error_type:
+        dod = np.array([d_xy, d_yx])
+        return err_value * np.mean(dod[np.nonzero(dod)])
+    elif 'eigen' in error_type:
+        err = err_value * np.abs(np.linalg.eigvals(d2d)).mean()
+        if np.atleast_1d(err).sum() == 0:
+            err = err_value * d[nz].mean()
+        return err
+    elif 'off_diagonals' in error_type:
+        return np.array([[d_xy, d_xy], [d_yx, d_yx]]) * err_value
+    elif 'percent' in error_type:
+        return err_value * d2d
+
+
+def _reference(z, z_err, error_type, error_value):
+    types = np.resize(np.atleast_1d(error_type).flatten(), 4).reshape(2, 2)
+    err_value = np.asarray(error_value, dtype=float) / 100.
+    inv_err = z_err.copy()
+    for index in np.ndindex(z.shape[:-2]):
+        d2d = np.abs(z[index])
+        if d2d.sum() == 0:
+            continue
+        for ix, iy in np.ndindex(2, 2):
+            err = np.broadcast_to(
+                _reference_error(d2d, types[ix, iy], err_value), (2, 2))
+            inv_err[index + (ix, iy)] = err[ix, iy]
+            if 'floor' in types[ix, iy]:
+                inv_err[index + (ix, iy)] = max(inv_err[index + (ix, iy)],
+                                                z_err[index + (ix, iy)])
+    return inv_err
+
+
+class TestErrorModels(TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        shape = (6, 9, 2, 2)
+        self.z = random.randn(*shape) + 1j * random.randn(*shape)
+        # missing components, tensors and both off diagonals
+        self.z[random.rand(*shape) < .15] = 0
+        self.z[0, 0] = 0
+        self.z[1, 1, 0, 1] = 0
+        self.z[1, 1, 1, 0] = 0
+        self.z[2, 2, [0, 1], [0, 1]] = 0
+        self.z_err = .05 * np.abs(random.randn(*shape)) * np.abs(self.z)
+        self.z_err[0, 0] = .1
+
+    def _assert_reference(self, error_type, error_value):
+        inv_err = error_models.compute_z_inv_error(self.z, self.z_err,
+                                                   error_type, error_value)
+        with np.errstate(invalid='ignore'):
+            ref_err = _reference(self.z, self.z_err, error_type, error_value)
+        self.assertEqual(inv_err.shape, self.z_err.shape)
+        np.testing.assert_allclose(inv_err, ref_err, rtol=1e-10)
+        np.testing.assert_array_equal(inv_err[0, 0], self.z_err[0, 0])
+
+    def test_error_types(self):
+        for error_type in ['egbert', 'median', 'mean_od', 'eigen',
+                           'off_diagonals', 'percent']:
+            for floor in ['', '_floor']:
+                for error_value in [5, np.array([[5, 10], [10, 5]])]:
+                    self._assert_reference(error_type + floor, error_value)
+
+    def test_mixed_error_types(self):
+        error_type = np.array([['egbert_floor', 'percent'],
+                               ['eigen', 'median_floor']])
+        self._assert_reference(error_type, 5)
+        self._assert_reference(error_type, np.array([[5, 10], [10, 5]]))
+
+    def test_bad_error_type(self):
+        with self.assertRaises(DataError):
+            error_models.compute_z_inv_error(self.z, self.z_err, 'egbart', 5)
+        with self.assertRaises(DataError):
+            error_models.compute_z_inv_error(self.z, self.z_err,
+                                             ['egbert', 'median'], 5)
+
+    def test_register_error_model(self):
+        @error_models.register_error_model('max_od')
+        def max_od(z_abs, error_value):
+            z_od = np.maximum(z_abs[..., 0, 1], z_abs[..., 1, 0])
+            return error_value * z_od[..., np.newaxis, np.newaxis]
+
+        try:
+            self.assertIn('max_od', error_models.get_error_model_names())
+            self.assertIs(error_models.get_error_model('max_od_floor'), max_od)
+            inv_err = error_models.compute_z_inv_error(
+                self.z, self.z_err, 'max_od_floor', 10)
+            z_abs = np.abs(self.z[3, 4])
+            expected = np.maximum(.1 * max(z_abs[0, 1], z_abs[1, 0]),
+                                  self.z_err[3, 4])
+            np.testing.assert_allclose(inv_err[3, 4], expected)
+        finally:
+            error_models._error_models.pop('max_od')
+
+        with self.assertRaises(DataError):
+            error_models.register_error_model('my_floor', max_od)
@@ -0,0 +1,69 @@
+"""
+TEST mtpy.modeling.modem.Data.write_data_file
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.modeling.modem import Data
+from tests import SAMPLE_DIR, make_temp_dir
+
+
+def _get_data_lines(data_fn):
+    with open(data_fn) as fid:
+        return [line for line in fid.readlines()
+                if not line.startswith(('#', '>'))]
+
+
+class TestWriteDataFile(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.data_fn = os.path.join(SAMPLE_DIR, 'ModEM', 'ModEM_Data.dat')
+        self.data_obj = Data()
+        self.data_obj.read_data_file(self.data_fn)
+
+    def _write(self, fn_basename, **kwargs):
+        return self.data_obj.write_data_file(
+            save_path=self._temp_dir, fn_basename=fn_basename, fill=False,
+            compute_error=False, elevation=True, **kwargs)
+
+    def test_same_lines(self):
+        new_fn = self._write('new.dat')
+        self.assertEqual(_get_data_lines(new_fn),
+                         _get_data_lines(self.data_fn))
+
+        chunk_fn = self._write('chunk.dat', chunk_size=4)
+        with open(new_fn) as new_fid, open(chunk_fn) as chunk_fid:
+            self.assertEqual(new_fid.read(), chunk_fid.read())
+
+    def test_missing_components(self):
+        z = self.data_obj.data_array['z']
+        z[0, 0, 0, 0] = 0
+        z[1, 2, 0, 1] = 1e32
+        z[2, 3, 1, 0] = np.nan
+        self.data_obj.data_array['z_inv_err'][3, 4, 1, 1] = np.nan
+        z_value = z[3, 4, 1, 1]
+        new_fn = self._write('new.dat')
+
+        n_lines = len(_get_data_lines(self.data_fn))
+        new_lines = _get_data_lines(new_fn)
+        self.assertEqual(len(new_lines), n_lines - 3)
+        self.assertNotIn('nan', ''.join(new_lines))
+
+        # a bad error is the order of magnitude of the data
+        new_obj = Data()
+        new_obj.read_data_file(new_fn)
+        self.assertEqual(new_obj.data_array['z_err'][3, 4, 1, 1],
+                         10 ** np.floor(np.log10(abs(max(z_value.real,
+                                                         z_value.imag)))))
+
+    def test_formatting_2(self):
+        self.data_obj.formatting = '2'
+        new_obj = Data()
+        new_obj.read_data_file(self._write('new.dat'))
+        for key in ['station', 'z', 'z_err', 'tip', 'tip_err', 'rel_north',
+                    'rel_east', 'rel_elev']:
+            np.testing.assert_array_equal(new_obj.data_array[key],
+                                          self.data_obj.data_array[key])
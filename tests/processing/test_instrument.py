@@ -0,0 +1,131 @@
+"""
+TEST mtpy.processing.instrument
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+
+import mtpy.utils.filehandling as MTfh
+from mtpy.processing import instrument
+from tests import make_temp_dir
+
+
+def _get_responsedata():
+    # a high pass first order response from 1e-3 Hz to 20 Hz
+    freqs = np.logspace(-3, np.log10(20), 60)
+    response = 1j * freqs / (0.05 + 1j * freqs) * 3.
+    return np.column_stack((freqs, response.real, response.imag))
+
+
+class TestInstrumentResponse(TestCase):
+    def setUp(self):
+        self.response = instrument.InstrumentResponse(_get_responsedata())
+        self.data = np.cumsum(np.random.RandomState(0).normal(size=20000))
+
+    def test_interpolate_response(self):
+        responsedata = _get_responsedata()
+        spectrum = responsedata[:, 1] + 1j * responsedata[:, 2]
+        freqs = np.array([-1e-3, 0., 5e-4, 1e-3, 20., 25.])
+        response = instrument.interpolate_response(freqs, responsedata)
+        np.testing.assert_array_equal(response[[1, 2, 5]], 0)
+        np.testing.assert_allclose(response[[0, 3, 4]],
+                                   spectrum[[0, 0, -1]])
+
+        middle = responsedata[10:12, 0].mean()
+        np.testing.assert_allclose(
+            instrument.interpolate_response([middle], responsedata),
+            spectrum[10:12].mean())
+
+        lemi = instrument.interpolate_response(responsedata[:, 0],
+                                               responsedata, 'lemi')
+        np.testing.assert_allclose(lemi, spectrum)
+
+    def test_flat_response(self):
+        # windows add up to 1 so a flat response only scales the data
+        response = instrument.InstrumentResponse([[0, 2., 0], [100., 2., 0]])
+        corrected = response.correct(self.data, 1., block_length=256,
+                                     offset=0)
+        np.testing.assert_allclose(corrected, self.data / 2., atol=1e-9)
+
+    def test_correct_cut(self):
+        offset = self.data.mean()
+        corrected = self.response.correct(self.data, 1., block_length=512,
+                                          offset=offset)
+        self.assertEqual(len(self.response._response_cache), 1)
+        # a cut at a multiple of half a block, far enough from the ends
+        part = self.response.correct(self.data[2560:9000], 1.,
+                                     block_length=512, offset=offset)
+        np.testing.assert_allclose(part[1024:-1024],
+                                   corrected[2560 + 1024:9000 - 1024],
+                                   atol=1e-9)
+
+        # the response is removed in the band of the response
+        data = np.random.RandomState(0).normal(size=20000)
+        corrected = self.response.correct(data, 1., block_length=512,
+                                          offset=0)
+        freqs = np.fft.rfftfreq(data.size, 1.)
+        band = (freqs > 0.01) & (freqs < 0.4)
+        ratio = np.fft.rfft(corrected)[band] / np.fft.rfft(data)[band]
+        expected = 1. / (1j * freqs[band] / (0.05 + 1j * freqs[band]) * 3.)
+        self.assertLess(np.median(np.abs(ratio / expected - 1)), 0.05)
+
+    def test_decimate(self):
+        self.assertEqual(instrument.get_decimation_stages(100), [10, 10])
+        self.assertEqual(instrument.get_decimation_stages(36), [9, 4])
+        self.assertEqual(instrument.get_decimation_stages(13), [13])
+
+        tt = np.arange(5000)
+        data = np.sin(2 * np.pi * tt / 500.) + np.sin(2 * np.pi * tt / 3.)
+        decimated = instrument.decimate(data, 12)
+        self.assertEqual(len(decimated), 417)
+        np.testing.assert_allclose(decimated[50:-50],
+                                   np.sin(2 * np.pi * tt[::12] / 500.)[50:-50],
+                                   atol=1e-2)
+
+
+class TestProcessTSFiles(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.in_dir = os.path.join(self._temp_dir, 'in')
+        os.makedirs(os.path.join(self.in_dir, 'day2'))
+        self.data = np.cumsum(np.random.RandomState(0).normal(size=30000))
+        # a continuous run in 3 files over 2 directories and a file after a
+        # gap
+        self.t0 = 1.4e9
+        for fn, start, end in [('st01_0.bx', 0, 7001),
+                                ('st01_1.bx', 7001, 15000),
+                                ('day2/st01_2.bx', 15000, 24000),
+                                ('day2/st01_3.bx', 26000, 30000)]:
+            header = {'station': 'ST01', 'channel': 'BX', 'samplingrate': 2,
+                      't_min': self.t0 + start / 2., 'nsamples': end - start,
+                      'unit': 'mV'}
+            instrument.write_ts_data(os.path.join(self.in_dir, fn), header,
+                                     self.data[start:end])
+
+    def test_process_ts_files(self):
+        responsedata = _get_responsedata()
+        response = instrument.InstrumentResponse(responsedata)
+        run = response.correct(self.data[0:24000], 2., block_length=512,
+                               offset=self.data[0:7001].mean())
+        run = instrument.decimate(run, 4)
+
+        for num_workers in [1, 2]:
+            out_dir = os.path.join(self._temp_dir, 'out%d' % num_workers)
+            fns = instrument.process_ts_files(
+                self.in_dir, out_dir, responsedata, decimation_factor=4,
+                block_length=512, suffix='_true', num_workers=num_workers)
+            self.assertEqual(len(fns), 4)
+            self.assertEqual(fns[2], os.path.join(out_dir, 'day2',
+                                                  'st01_2_true.bx'))
+
+            header = MTfh.read_ts_header(fns[1])
+            self.assertEqual(header['samplingrate'], 0.5)
+            self.assertEqual(header['t_min'], self.t0 + 7004 / 2.)
+            self.assertEqual(header['unit'], 'mV(true)')
+            self.assertEqual(header['nsamples'], 1999)
+
+            data = np.concatenate([instrument.read_ts_data(fn)
+                                   for fn in fns[0:3]])
+            np.testing.assert_allclose(data, run, rtol=1e-8, atol=1e-6)
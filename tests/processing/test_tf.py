@@ -0,0 +1,268 @@
+"""
+TEST mtpy.processing.tf
+"""
+from unittest import TestCase
+
+import numpy as np
+import scipy.signal as sps
+
+from mtpy.processing import tf
+
+
+def _stft_loop(fx, nh, tstep, ng, df, nfbins):
+    """ one window at a time """
+    h = tf.normalize_L2(np.hanning(nh))
+    g = tf.normalize_L2(np.hanning(ng))
+    tlst = np.arange(start=0, stop=len(fx) - nh + 1, step=tstep)
+    tfarray = np.zeros((nfbins // 2, len(tlst)), dtype='complex128')
+    fa = sps.hilbert(tf.dctrend(fx))
+    for place, ii in enumerate(tlst):
+        FXwin = np.fft.fft(tf.padzeros(fa[ii:ii + nh] * h, npad=nfbins))
+        FXwin = FXwin[:nfbins // 2]
+        if ng != 1:
+            FXwin = np.convolve(tf.padzeros(FXwin, npad=len(FXwin) + ng - 1),
+                                g, 'valid')
+        tfarray[:, place] = FXwin[::-1]
+    return tfarray
+
+
+def _robust_loop(fx, func, nh, tstep, df, nfbins):
+    """ one window and frequency at a time """
+    mlst = np.arange(nh) - nh // 2 + 1
+    tlst = np.arange(start=0, stop=len(fx) - nh + 1, step=tstep)
+    flstc = np.fft.fftfreq(nfbins, 1. / df)[nfbins // 2:]
+    h = sps.gaussian(nh, nh / (6 * np.sqrt(2 * np.log(2))))
+    h = h / sum(h)
+    fa = sps.hilbert(tf.dctrend(fx))
+    fa = fa / fa.std()
+    tfarray = np.zeros((nfbins // 2, len(tlst)), dtype='complex')
+    for tpoint, nn in enumerate(tlst):
+        fxwin = h * fa[nn:nn + nh]
+        for fpoint, mm in enumerate(flstc):
+            fxshift = fxwin * np.exp(1j * 2 * np.pi * mlst * mm / df)
+            tfarray[fpoint, tpoint] = func(fxshift.real) + \
+                1j * func(fxshift.imag)
+    return (4. * nh * df) * tfarray
+
+
+def _wvd_loop(fx, nh, tstep, nfbins, beta=None):
+    """ one time instance at a time, modified b distribution if beta """
+    fa = sps.hilbert(tf.dctrend(fx))
+    fn = len(fa)
+    tau = (nh - 1) // 2
+    tlst = np.arange(start=0, stop=fn - 1, step=tstep)
+    tfarray = np.zeros((nfbins, len(tlst)), dtype='complex')
+    for point, nn in enumerate(tlst):
+        tau_min = min(nn, tau, fn - nn - 1)
+        tau_lst = np.arange(-tau_min, tau_min + 1)
+        Rnn = np.conjugate(fa[nn - tau_lst]) * fa[nn + tau_lst]
+        if beta is None:
+            tfarray[:, point] = tf.padzeros(4 * Rnn, npad=nfbins)[::-1]
+        else:
+            mbwin = np.cosh(tau_lst) ** (-2 * beta)
+            mbwin = mbwin / sum(mbwin)
+            tfarray[:, point] = (
+                np.fft.fft(tf.padzeros(mbwin, npad=nfbins)) *
+                np.fft.fft(tf.padzeros(Rnn, npad=nfbins)))[::-1]
+    if beta is None:
+        return np.fft.fft(tfarray, axis=0) / nh
+    return tfarray
+
+
+def _spwvd_loop(fa, fb, tlst, h, g, nfbins):
+    """ one time instance and lag at a time """
+    fn = len(fa)
+    Lh = (len(h) - 1) // 2
+    Lg = (len(g) - 1) // 2
+    nhalf = nfbins // 2
+    tfarray = np.zeros((nfbins, len(tlst)), dtype='complex')
+    for point, tt in enumerate(tlst):
+        tau_lst = list(range(min(tt + Lg, fn - 1 - tt + Lg, nhalf - 1, Lh) + 1))
+        if nhalf <= tt <= fn - 1 - nhalf and nhalf <= Lh:
+            tau_lst.append(nhalf)
+        for tau in tau_lst:
+            plst = np.arange(-min(Lg, fn - 1 - tt - tau), min(Lg, tt - tau) + 1)
+            gp = g[Lg + plst] / g[Lg + plst].sum()
+            Rp = np.sum(gp * fa[tt + tau - plst] * fb[tt - tau - plst].conj())
+            Rm = np.sum(gp * fa[tt - tau - plst] * fb[tt + tau - plst].conj())
+            if tau == nhalf:
+                tfarray[tau, point] = .5 * (h[Lh + tau] * Rp + h[Lh - tau] * Rm)
+                continue
+            tfarray[tau, point] = h[Lh + tau] * Rp
+            if tau > 0:
+                tfarray[nfbins - tau, point] = h[Lh - tau] * Rm
+    return np.fft.fft(tfarray, axis=0)[::-1]
+
+
+def _robust_wvd_loop(fx, nh, ng, tstep, nfbins, df):
+    """ one time instance and frequency at a time """
+    fa = sps.hilbert(tf.dctrend(fx))
+    dt = 1. / (df * 2.)
+    h = sps.gaussian(nh, nh / (5 * np.sqrt(2 * np.log(2))))
+    h /= sum(h)
+    g = sps.gaussian(ng, ng / (5 * np.sqrt(2 * np.log(2))))
+    g /= sum(g)
+    mlst = np.arange(-nh // 2 + 1, nh // 2 + 1)
+    tlst = np.arange(nh // 2, len(fa) - nh // 2, tstep)
+    flst = np.fft.fftfreq(nfbins, dt)[nfbins // 2:]
+    flst[-1] = 0
+    tfarray = np.zeros((nfbins // 2, len(tlst)), dtype='complex')
+    for tpoint, nn in enumerate(tlst):
+        fxwin = h * fa[nn + mlst] * fa[nn - mlst].conj()
+        for fpoint, mm in enumerate(flst):
+            fxmed = np.convolve(g, fxwin * np.exp(1j * 4 * np.pi * mlst * mm * dt),
+                                mode='same') / (nh * ng)
+            tfarray[fpoint, tpoint] = np.median(fxmed.real)
+    return (4. * nh / dt) * tfarray
+
+
+class TestTF(TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        t = np.arange(6000) / 100.
+        self.fx = np.sin(2 * np.pi * 12 * t) + \
+            np.sin(2 * np.pi * (5 + .2 * t) * t) + .5 * random.randn(t.size)
+
+    def test_get_windows(self):
+        windows = tf.get_windows(self.fx, 256, 100)
+        self.assertEqual(windows.shape, ((self.fx.size - 256) // 100 + 1, 256))
+        np.testing.assert_array_equal(windows[7], self.fx[700:956])
+        self.assertEqual(tf.get_windows(self.fx[0:100], 256, 100).shape,
+                         (0, 256))
+
+    def test_stft(self):
+        for ng in [1, 5]:
+            tfarray, tlst, flst = tf.stft(self.fx, nh=256, tstep=64, ng=ng,
+                                          df=100., nfbins=512, block_size=7)
+            np.testing.assert_allclose(
+                tfarray, _stft_loop(self.fx, 256, 64, ng, 100., 512),
+                atol=1e-10)
+            np.testing.assert_array_equal(tlst, np.arange(0, 6000 - 255, 64))
+            self.assertEqual(flst.size, 256)
+
+    def test_robust_stft(self):
+        tfarray = tf.robust_stft_median(self.fx[0:1000], nh=64, tstep=32,
+                                        df=100., nfbins=128)[0]
+        np.testing.assert_allclose(
+            tfarray, _robust_loop(self.fx[0:1000], np.median, 64, 32, 100.,
+                                  128), atol=1e-10)
+
+        alpha = .325
+        a = np.zeros(64)
+        a[int(62 * alpha):int(-62 * alpha + 63)] = 1. / \
+            (64 * (1 - 2 * alpha) + 4 * alpha)
+        tfarray = tf.robust_stft_L(self.fx[0:1000], alpha=alpha, nh=64,
+                                   tstep=32, df=100., nfbins=128)[0]
+        np.testing.assert_allclose(
+            tfarray, _robust_loop(self.fx[0:1000],
+                                  lambda x: np.sum(a * np.sort(x)[::-1]),
+                                  64, 32, 100., 128), atol=1e-10)
+
+    def test_smethod(self):
+        L = 11
+        tfarray, tlst, flst, pxx = tf.smethod(self.fx, L=L, nh=256, tstep=64,
+                                              df=100., nfbins=512)
+        p = sps.gaussian(L, L / np.sqrt(2 * np.log(2)))
+        expected = abs(pxx) ** 2
+        for ff in range(L // 2, pxx.shape[0] - L // 2 - 1):
+            for pp, ll in zip(p, range(-(L // 2), L // 2 + 1)):
+                expected[ff] += 2 * np.real(pp * pxx[ff + ll] *
+                                            pxx[ff - ll].conj())
+        expected[L // 2:-(L // 2)] /= L
+        np.testing.assert_allclose(tfarray, expected, rtol=1e-10)
+
+    def test_spectrogram(self):
+        fx = np.array([self.fx, self.fx[::-1], 2 * self.fx])
+        tfarray, tlst, flst = tf.spectrogram(fx, nh=256, tstep=64, df=100.,
+                                             nfbins=512, block_size=10)
+        self.assertEqual(tfarray.shape, (3, 256, tlst.size))
+        np.testing.assert_allclose(tfarray[2], 4 * tfarray[0])
+
+        # the same as the stft of the analytic signal away from the edges
+        # of the windows
+        pxx = tf.stft(self.fx, nh=256, tstep=64, df=100., nfbins=512)[0]
+        peak = np.argmax(np.abs(pxx).mean(axis=1))
+        self.assertEqual(np.argmax(tfarray[0].mean(axis=1)), peak)
+
+        # blocks and averages
+        one_block = tf.spectrogram(fx, nh=256, tstep=64, df=100.,
+                                   nfbins=512, block_size=1000)[0]
+        np.testing.assert_allclose(tfarray, one_block)
+        tfavg, tlst_avg, flst = tf.spectrogram(fx, nh=256, tstep=64, df=100.,
+                                               nfbins=512, n_average=4,
+                                               block_size=10)
+        self.assertEqual(tfavg.shape[-1], int(np.ceil(tlst.size / 4.)))
+        np.testing.assert_allclose(tfavg[..., 3],
+                                   tfarray[..., 12:16].mean(axis=-1))
+        np.testing.assert_array_equal(tlst_avg, tlst[::4])
+        np.testing.assert_allclose(tfavg[..., -1],
+                                   tfarray[..., 4 * (tlst_avg.size - 1):]
+                                   .mean(axis=-1))
+
+        # s-method of each block
+        tfsm = tf.spectrogram(self.fx, nh=256, tstep=64, df=100., nfbins=512,
+                              L=5, block_size=10)[0]
+        pxx = np.array([FX for tlst, FX in
+                        tf.iter_stft(self.fx, nh=256, tstep=64, nfbins=512,
+                                     block_size=10000)])[0]
+        np.testing.assert_allclose(tfsm, tf._smethod(pxx, 5))
+
+    def test_get_lag_products(self):
+        fa = self.fx + 1j * self.fx[::-1]
+        Rnn, tau_min = tf.get_lag_products(fa, fa, [0, 3, 100, 5999], 5)
+        np.testing.assert_array_equal(tau_min, [0, 3, 5, 0])
+        self.assertEqual(Rnn.shape, (4, 11))
+        np.testing.assert_array_equal(Rnn[2, 8],
+                                      fa[100 - 3].conj() * fa[100 + 3])
+        np.testing.assert_array_equal(Rnn[1, [0, 1, 9, 10]], 0)
+        np.testing.assert_array_equal(Rnn[1, 2:9],
+                                      fa[0:7][::-1].conj() * fa[0:7])
+
+    def test_wvd(self):
+        fx = self.fx[0:2000]
+        tfarray, tlst, flst = tf.wvd(fx, nh=127, tstep=16, nfbins=256,
+                                     df=100., block_size=7)
+        np.testing.assert_allclose(tfarray, _wvd_loop(fx, 127, 16, 256),
+                                   atol=1e-10)
+        np.testing.assert_array_equal(tlst, np.arange(0, 1999, 16))
+        self.assertEqual(flst.size, 128)
+
+        tfarray = tf.modifiedb(fx, nh=127, tstep=16, nfbins=256, df=100.,
+                               block_size=7)[0]
+        np.testing.assert_allclose(tfarray,
+                                   _wvd_loop(fx, 127, 16, 256, beta=.2),
+                                   atol=1e-10)
+
+    def test_spwvd(self):
+        fx = self.fx[0:2000]
+        cross = [fx, np.roll(fx, 7)]
+        for fxx, nh, ng, nfbins, tstep in [(fx, 127, 31, 256, 16),
+                                           (fx, 301, 15, 128, 7),
+                                           (fx, 63, 201, 64, 8),
+                                           (cross, 63, 31, 128, 16)]:
+            tfarray, tlst, flst = tf.spwvd(fxx, tstep=tstep, nfbins=nfbins,
+                                           df=100., nh=nh, ng=ng,
+                                           block_size=5)
+            fa, fb, fn = tf._get_analytic_signals(fxx)
+            h, g = tf._get_spwvd_windows(fn, nh, ng)
+            np.testing.assert_array_equal(tlst, np.arange(0, 2000, tstep))
+            np.testing.assert_allclose(
+                tfarray, _spwvd_loop(fa, fb, tlst, h, g, nfbins), atol=1e-10)
+
+    def test_robust_wvd(self):
+        fx = self.fx[0:1000]
+        tfarray, tlst, flst = tf.robust_wvd(fx, nh=63, ng=15, tstep=32,
+                                            nfbins=128, df=100., block_size=5)
+        np.testing.assert_allclose(
+            tfarray, _robust_wvd_loop(fx, 63, 15, 32, 128, 100.), atol=1e-10)
+        np.testing.assert_array_equal(tlst, np.arange(31, 1000 - 31, 32))
+
+    def test_reassigned_stft(self):
+        rtfarray, tlst, flst, spec = tf.reassigned_stft(
+            self.fx, nh=63, tstep=16, nfbins=256, df=100., block_size=7)
+        self.assertEqual(rtfarray.shape, (128, tlst.size))
+        # energy is moved, not created
+        np.testing.assert_allclose(rtfarray.sum(), spec.sum())
+        one_block = tf.reassigned_stft(self.fx, nh=63, tstep=16, nfbins=256,
+                                       df=100., block_size=1000)
+        np.testing.assert_allclose(rtfarray, one_block[0])
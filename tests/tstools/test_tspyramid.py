@@ -0,0 +1,74 @@
+"""
+TEST mtpy.gui.tstools.tspyramid
+"""
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.gui.tstools.tspyramid import TSPyramid, binminmax
+from tests import make_temp_dir
+
+
+class TestTSPyramid(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.data = np.random.RandomState(0).normal(size=50000)
+        self.data[31234] = 100.
+        # two overlapping segments and a gap, read a few segments at a time
+        self.segments = [(0, self.data[0:12000]),
+                         (11000, self.data[11000:20003]),
+                         (30000, self.data[30000:50000])]
+
+    def _build(self, **kwargs):
+        chunks = [self.segments[0:2], [], self.segments[2:]]
+        return TSPyramid.build(self._temp_dir, chunks, 1000., .01, base=16,
+                               factor=4, minbins=64, **kwargs)
+
+    def test_binminmax(self):
+        index, low, high = binminmax(5, self.data[5:100], 16)
+        np.testing.assert_array_equal(index, np.arange(7))
+        for ii in range(7):
+            values = self.data[max(ii * 16, 5):min(ii * 16 + 16, 100)]
+            self.assertEqual(low[ii], values.min())
+            self.assertEqual(high[ii], values.max())
+
+    def test_levels(self):
+        pyramid = self._build()
+        self.assertEqual(len(pyramid.levels), 4)
+        self.assertEqual(pyramid.meta['first'], 0)
+        self.assertEqual(pyramid.meta['last'], 49999)
+
+        valid = np.zeros(self.data.size, dtype=bool)
+        valid[0:20003] = True
+        valid[30000:] = True
+        for level, bins in enumerate(pyramid.levels):
+            binsize = 16 * 4 ** level
+            expected = [ii for ii in range(-(-self.data.size // binsize))
+                        if valid[ii * binsize:(ii + 1) * binsize].any()]
+            np.testing.assert_array_equal(bins[0], expected)
+            for ii, low, high in bins.T:
+                values = self.data[int(ii) * binsize:(int(ii) + 1) * binsize]
+                values = values[valid[int(ii) * binsize:(int(ii) + 1) * binsize]]
+                self.assertEqual(low, values.min())
+                self.assertEqual(high, values.max())
+
+    def test_read(self):
+        self._build(gaps=[[1200.03, 1300.]], source_size=10)
+        self.assertIsNone(TSPyramid.load(self._temp_dir, source_size=11))
+        pyramid = TSPyramid.load(self._temp_dir, source_size=10)
+        self.assertEqual(pyramid.meta['gaps'], [[1200.03, 1300.]])
+
+        # the coarsest level with enough bins for the window
+        self.assertEqual(pyramid.getlevel(numofsamples=200), 1)
+        self.assertEqual(pyramid.getlevel(1300., 1400., 100), 1)
+        self.assertEqual(pyramid.getlevel(1300., 1400., 400), 0)
+        self.assertIsNone(pyramid.read(1300., 1301., 400))
+
+        # the bins of level 1 overlapping samples 30000 to 40000
+        wave = pyramid.read(1300., 1400., 100)
+        self.assertEqual(wave.shape, (2, 2 * (625 - 468 + 1)))
+        self.assertTrue((wave[1, 0::2] <= wave[1, 1::2]).all())
+        self.assertEqual(wave[1].max(), 100.)
+        np.testing.assert_allclose(wave[0, [0, -1]],
+                                   1000. + np.array([468.5, 625.5]) * .64)
@@ -0,0 +1,100 @@
+"""
+TEST mtpy.usgs.zen_calibration
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.usgs import zen_calibration
+from tests import make_temp_dir
+
+
+def _coil_cal(scale=1.):
+    freq = np.logspace(-4, 4, 33)
+    amplitude = scale * freq / np.sqrt(1 + (freq / 10.) ** 2)
+    phase = 1000. * (np.pi / 2 - np.arctan(freq / 10.))
+    return np.core.records.fromarrays([freq, amplitude, phase],
+                                      names='frequency, amplitude, phase')
+
+
+class TestZenCalibration(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        for coil_num, scale in [('2284', 1.), ('2285', 2.)]:
+            cal = _coil_cal(scale)
+            np.savetxt(os.path.join(self._temp_dir, coil_num + '.csv'),
+                       np.array([cal.frequency, cal.amplitude, cal.phase]).T,
+                       delimiter=',', header='frequency,amplitude,phase')
+        self.cal_cache = zen_calibration.CalibrationCache(self._temp_dir)
+
+    def test_calibration_dict(self):
+        cal_dict = zen_calibration.get_calibration_dict(self._temp_dir)
+        self.assertEqual(sorted(cal_dict.keys()), ['2284', '2285'])
+        # a new file changes the directory, so it is listed again
+        np.savetxt(os.path.join(self._temp_dir, '2286.csv'), np.ones((2, 3)))
+        os.utime(self._temp_dir, ns=(0, os.stat(self._temp_dir).st_mtime_ns +
+                                     10 ** 9))
+        cal_dict = zen_calibration.get_calibration_dict(self._temp_dir)
+        self.assertEqual(sorted(cal_dict.keys()), ['2284', '2285', '2286'])
+
+    def test_response_cache(self):
+        cal = self.cal_cache.get_coil_calibration('2284')
+        np.testing.assert_allclose(cal.amplitude, _coil_cal().amplitude)
+        # the file is read once
+        os.remove(os.path.join(self._temp_dir, '2284.csv'))
+        self.assertIs(self.cal_cache.get_coil_calibration('2284'), cal)
+
+        response = self.cal_cache.get_coil_response('2284', 256, 1024)
+        self.assertIs(self.cal_cache.get_coil_response('2284', 256, 1024),
+                      response)
+        freq = np.fft.rfftfreq(1024, 1. / 256)
+        index = np.argmin(np.abs(freq - 10.))
+        self.assertAlmostEqual(np.abs(response[index]),
+                               10. / np.sqrt(2), places=1)
+        self.assertEqual(response.shape, (513,))
+
+        with self.assertRaises(zen_calibration.CalibrationError):
+            self.cal_cache.get_coil_calibration('9999')
+
+    def test_board_response(self):
+        board_cal = np.core.records.fromrecords(
+            [[2, 256, 1., 10.], [2048, 256, 1., 100.],
+             [2, 4096, 2., 0.], [2048, 4096, 2., 0.]],
+            names='frequency, rate, amplitude, phase')
+        response = self.cal_cache.get_response(256, 512, coil_num='2285',
+                                                board_id='b1',
+                                                board_cal=board_cal)
+        coil = self.cal_cache.get_coil_response('2285', 256, 512)
+        board = self.cal_cache.get_board_response('b1', board_cal, 256, 512)
+        np.testing.assert_allclose(np.abs(board), 1.)
+        np.testing.assert_allclose(response, coil * board)
+
+    def test_calibrate_windows(self):
+        rng = np.random.RandomState(0)
+        data = rng.randn(2, 4096)
+        response = np.array([self.cal_cache.get_coil_response(cc, 256, 512)
+                             for cc in ['2284', '2285']])
+        spectra = zen_calibration.calibrate_windows(data, response, 512,
+                                                    step=256)
+        self.assertEqual(spectra.shape, (2, 15, 257))
+        for ii in range(2):
+            for jj in [0, 7, 14]:
+                window = data[ii, jj * 256:jj * 256 + 512] * np.hanning(512)
+                np.testing.assert_allclose(
+                    spectra[ii, jj], np.fft.rfft(window) / response[ii])
+
+    def test_remove_response(self):
+        rng = np.random.RandomState(1)
+        data = rng.randn(3, 2000)
+        response = np.array([self.cal_cache.get_response(256, 2000,
+                                                         coil_num=cc)
+                             for cc in ['2284', '2285', '2284']])
+        # the spectrum of a real series is real at 0 and the Nyquist frequency
+        response[:, [0, -1]] = np.abs(response[:, [0, -1]])
+        measured = np.fft.irfft(np.fft.rfft(data, axis=-1) * response,
+                                n=2000, axis=-1)
+        np.testing.assert_allclose(
+            zen_calibration.remove_response(measured, response), data,
+            atol=1e-10)
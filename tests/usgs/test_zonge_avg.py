@@ -0,0 +1,96 @@
+"""
+TEST mtpy.usgs.zonge .avg reading and edi export
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+
+import mtpy.core.edi as mtedi
+from mtpy.usgs import zonge
+from tests import make_temp_dir
+
+
+def _write_avg(avg_fn, comp_lst, freq, seed=0):
+    rs = np.random.RandomState(seed)
+    lines = ['$Survey.Type=NSAMT,', '$GPS.Lat=40.5,', '$GPS.Lon=-120.25,']
+    for comp in comp_lst:
+        lines.append('$Rx.Cmp = {0}'.format(comp))
+        lines.append('Skp,Freq,E.mag,B.mag,Z.mag,Z.phz,ARes.mag,ARes.%err,'
+                     'Z.perr,Coher,FC.NUse,FC.NTry')
+        for ff in freq:
+            lines.append('0,{0:.6E},1.0E+00,1.0E+00,{1:.4E},{2:.1f},1.0E+01,'
+                         '{3:.1f},1.0,0.9,10,12'.format(
+                             ff, rs.uniform(.1, 10), rs.uniform(-1500, 1500),
+                             rs.uniform(1, 10)))
+    with open(avg_fn, 'w') as fid:
+        fid.write('\n'.join(lines) + '\n')
+
+
+class TestZongeAvg(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        freq = 2. ** np.arange(-3, 10)
+        self.avg_dict = {'mt01': [os.path.join(self._temp_dir, 'ex.avg'),
+                                  os.path.join(self._temp_dir, 'ey.avg')],
+                         'mt02': [os.path.join(self._temp_dir, 'mt02.avg')]}
+        _write_avg(self.avg_dict['mt01'][0], ['Zxx', 'Zxy'], freq, 0)
+        # ey has fewer frequencies
+        _write_avg(self.avg_dict['mt01'][1], ['Zyx', 'Zyy'], freq[2:], 1)
+        _write_avg(self.avg_dict['mt02'][0], ['Zxy', 'Zyx', 'Tzx', 'Tzy'],
+                   freq[:6], 2)
+
+    def test_read_avg_file(self):
+        zavg = zonge.ZongeMTAvg()
+        for avg_fn in self.avg_dict['mt01']:
+            zavg.read_avg_file(avg_fn)
+        self.assertEqual(zavg.GPS_Lat, 40.5)
+        np.testing.assert_array_equal(zavg.Z.freq, 2. ** np.arange(-3, 10))
+
+        header_dict, comp_dict = zonge.read_avg_components(
+            self.avg_dict['mt01'][1])
+        zr, zi = zavg.convert2complex(comp_dict['zyx']['z.mag'],
+                                      comp_dict['zyx']['z.phz'])
+        np.testing.assert_allclose(zavg.Z.z[2:, 1, 0], zr + zi * 1j)
+        np.testing.assert_allclose(zavg.Z.z_err[2:, 1, 0],
+                                   comp_dict['zyx']['ares.%err'] * .005)
+        # frequencies ey does not have
+        np.testing.assert_array_equal(zavg.Z.z[:2, 1, :], 0)
+        np.testing.assert_array_equal(zavg.Z.z_err[:2, 1, :], 1)
+
+    def test_read_avg_files(self):
+        avg_data = zonge.read_avg_files(self.avg_dict, num_workers=1)
+        self.assertEqual(list(avg_data['station']), ['mt01', 'mt02'])
+        self.assertEqual(avg_data['z'].shape, (2, 13, 2, 2))
+        self.assertEqual(list(avg_data['has_data'].sum(axis=1)), [13, 6])
+
+        for ss, station in enumerate(avg_data['station']):
+            zavg = zonge.ZongeMTAvg()
+            for avg_fn in self.avg_dict[station]:
+                zavg.read_avg_file(avg_fn)
+            has_data = avg_data['has_data'][ss]
+            np.testing.assert_array_equal(avg_data['freq'][has_data],
+                                          zavg.Z.freq)
+            np.testing.assert_allclose(avg_data['z'][ss][has_data], zavg.Z.z)
+        np.testing.assert_allclose(avg_data['tipper'][1][:6],
+                                   zavg.Tipper.tipper)
+
+    def test_write_edi_files(self):
+        save_dir = os.path.join(self._temp_dir, 'edi')
+        edi_fn_lst = zonge.write_edi_files(self.avg_dict, save_dir,
+                                           num_workers=2)
+        self.assertEqual([os.path.basename(edi_fn) for edi_fn in edi_fn_lst],
+                         ['mt01.edi', 'mt02.edi'])
+
+        avg_data = zonge.read_avg_files(self.avg_dict, num_workers=1)
+        for ss, edi_fn in enumerate(edi_fn_lst):
+            edi_obj = mtedi.Edi(edi_fn)
+            self.assertAlmostEqual(edi_obj.lat, 40.5)
+            has_data = avg_data['has_data'][ss]
+            # edi files are sorted by decreasing frequency
+            np.testing.assert_allclose(edi_obj.Z.freq,
+                                       avg_data['freq'][has_data][::-1])
+            np.testing.assert_allclose(edi_obj.Z.z,
+                                       avg_data['z'][ss][has_data][::-1],
+                                       rtol=1e-5)
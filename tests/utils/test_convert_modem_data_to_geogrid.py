@@ -1,10 +1,14 @@
 """
 Tests for resistivity model to geotiff.
 """
+import os
+
 import pytest
 import numpy as np
 
+from mtpy.modeling.modem import Model
 from mtpy.utils import convert_modem_data_to_geogrid as conv
+from tests import SAMPLE_DIR
 
 
 def test_strip_padding():
@@ -119,10 +123,10 @@ def test_interpolate_depth_slice():
 
     res_slice = conv._interpolate_slice(ce, cn, resgrid, 0, tgx, tgy, log_scale=False)
     expected = np.array(
-        [[1024., 2381.063868],
-         [1024., 2381.063868],
-         [1024., 2381.063868],
-         [1024., 2381.063868]]
+        [[100., 150.],
+         [100., 150.],
+         [100., 150.],
+         [100., 150.]]
     )
     assert np.allclose(res_slice, expected)
 
@@ -144,3 +148,34 @@ def test_rotate_geotransform():
     # Rotate about a center point of (0., 0.)
     test = conv._rotate_transform(gt, angle, 0., 0.)
     expected = [100.0, 3.061616997868383e-16, -5., -49.99999999999999, 5., 3.061616997868383e-16]
+
+
+def test_create_geogrid_slice_values(monkeypatch, tmpdir):
+    modem_dir = os.path.join(SAMPLE_DIR, 'ModEM')
+    data_file = os.path.join(modem_dir, 'ModEM_Data.dat')
+    model_file = os.path.join(modem_dir, 'ModEM_Model_File.rho')
+
+    written = {}
+
+    def fake_writer(filename, origin, pixel_width, pixel_height, data, **kwargs):
+        written[os.path.basename(filename)] = data.copy()
+
+    monkeypatch.setattr(conv, 'array2geotiff_writer', fake_writer)
+
+    depths = list(conv.list_depths(model_file)[10:13])
+    for log_scale in [True, False]:
+        conv.create_geogrid(data_file, model_file, str(tmpdir), depths=depths,
+                            epsg_code=28353, log_scale=log_scale)
+
+    model = Model()
+    model.read_model_file(model_fn=model_file)
+    res = conv._strip_resgrid(model.res_model, model.pad_north,
+                              model.pad_east, model.pad_z)
+
+    log_files = sorted(fn for fn in written if fn.endswith('_log10.tif'))
+    assert len(log_files) == len(depths)
+    for log_fn in log_files:
+        linear = written[log_fn.replace('_log10.tif', '.tif')]
+        # linear slices are 10 ** the log10 slices, within the model range
+        np.testing.assert_allclose(linear, 10 ** written[log_fn])
+        assert res.min() <= linear.min() and linear.max() <= res.max()
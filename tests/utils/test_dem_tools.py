@@ -0,0 +1,100 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.utils import filehandling, mesh_tools, gis_tools
+from mtpy.utils.dem_tools import TiledDEM, fill_nodata
+from tests import make_temp_dir
+
+
+class TestTiledDEM(TestCase):
+    def setUp(self):
+        self.tmp_dir = make_temp_dir(self.__class__.__name__)
+        self.ascii_fn = os.path.join(self.tmp_dir, 'surface.asc')
+
+        self.lon = np.arange(148., 150., 0.01)
+        self.lat = np.arange(-36., -34., 0.01)
+        # planar surface, rows S -> N
+        self.elev = np.add.outer(self.lat * 10., self.lon)
+        self.elev[5, 7] = -9999
+
+        with open(self.ascii_fn, 'w') as fid:
+            fid.write('ncols {0}\nnrows {1}\nxllcorner 148.0\n'
+                      'yllcorner -36.0\ncellsize 0.01\n'
+                      'NODATA_value -9999\n'.format(self.lon.size,
+                                                    self.lat.size))
+            for row in self.elev[::-1]:
+                fid.write(' '.join('{0:.4f}'.format(vv) for vv in row) + '\n')
+
+    def test_full_window_matches_ascii(self):
+        dem = TiledDEM(self.ascii_fn, tile_size=16, block_bytes=1000)
+        lon, lat, elev = dem.read_window(-180, 180, -90, 90)
+
+        lon0, lat0, elev0 = filehandling.read_surface_ascii(self.ascii_fn)
+        elev0[elev0 == -9999] = np.nan
+
+        self.assertTrue(np.allclose(lon, lon0))
+        self.assertTrue(np.allclose(lat, lat0))
+        self.assertTrue(np.allclose(elev, elev0, atol=1e-3, equal_nan=True))
+
+    def test_window_and_cache(self):
+        dem = TiledDEM(self.ascii_fn, tile_size=16)
+        lon, lat, elev = dem.read_window(149.0, 149.2, -35.5, -35.3)
+
+        self.assertTrue(lon.min() <= 149.0 and lon.max() >= 149.2)
+        self.assertTrue(lat.min() <= -35.5 and lat.max() >= -35.3)
+        self.assertLess(lon.size, 25)
+        self.assertTrue(np.allclose(elev, np.add.outer(lat * 10., lon),
+                                    atol=1e-3))
+
+        # second instance reads the existing cache
+        mtime = os.path.getmtime(dem.tiles_fn)
+        dem = TiledDEM(self.ascii_fn, tile_size=16)
+        self.assertEqual(mtime, os.path.getmtime(dem.tiles_fn))
+
+    def test_interpolate_elevation_to_grid(self):
+        east, north, zone = gis_tools.project_points_ll2utm([-35.], [149.])
+        grid_east = np.linspace(east[0] - 20000, east[0] + 20000, 20)
+        grid_north = np.linspace(north[0] - 20000, north[0] + 20000, 30)
+        surface = filehandling.read_surface_ascii(self.ascii_fn)
+
+        for method in ['nearest', 'linear']:
+            elev = mesh_tools.interpolate_elevation_to_grid(
+                grid_east, grid_north, utm_zone=zone[0],
+                surfacefile=self.ascii_fn, method=method)
+            elev0 = mesh_tools.interpolate_elevation_to_grid(
+                grid_east, grid_north, utm_zone=zone[0], surface=surface,
+                method=method)
+            self.assertEqual(elev.shape, (30, 20))
+            self.assertTrue(np.allclose(elev, elev0, atol=1e-3))
+
+    def test_nodata_patch(self):
+        ascii_fn = os.path.join(self.tmp_dir, 'surface_nodata.asc')
+        lon = 149. + np.arange(50) * 0.01
+        lat = -35.5 + np.arange(50) * 0.01
+        elev = np.add.outer(lat * 10., lon)
+        elev[20:30, 20:30] = -9999
+        with open(ascii_fn, 'w') as fid:
+            fid.write('ncols 50\nnrows 50\nxllcorner 149.0\n'
+                      'yllcorner -35.5\ncellsize 0.01\n'
+                      'NODATA_value -9999\n')
+            for row in elev[::-1]:
+                fid.write(' '.join('{0:.4f}'.format(vv) for vv in row) + '\n')
+
+        east, north, zone = gis_tools.project_points_ll2utm([-35.25],
+                                                            [149.25])
+        grid_east = np.linspace(east[0] - 15000, east[0] + 15000, 40)
+        grid_north = np.linspace(north[0] - 15000, north[0] + 15000, 40)
+        valid = elev[elev != -9999]
+        for method in ['nearest', 'linear']:
+            elev_mg = mesh_tools.interpolate_elevation_to_grid(
+                grid_east, grid_north, utm_zone=zone[0],
+                surfacefile=ascii_fn, method=method)
+            # the nodata patch is filled from the nearest valid cells
+            self.assertFalse(np.isnan(elev_mg).any())
+            self.assertTrue(np.all(elev_mg >= valid.min() - 1e-3))
+            self.assertTrue(np.all(elev_mg <= valid.max() + 1e-3))
+
+        with self.assertRaises(ValueError):
+            fill_nodata(np.full((3, 3), np.nan))
@@ -0,0 +1,87 @@
+"""
+TEST mtpy.utils.filehandling EDL splitting
+"""
+import calendar
+import os
+import time
+from unittest import TestCase
+
+import numpy as np
+
+import mtpy.utils.filehandling as MTfh
+from tests import make_temp_dir
+
+
+def _write_edl_file(path, starttime, data, two_columns=False):
+    fn = os.path.join(path, 'st01{0}.ex'.format(
+        time.strftime('%y%m%d%H%M%S', time.gmtime(starttime))))
+    if two_columns:
+        np.savetxt(fn, np.column_stack((starttime + np.arange(data.size),
+                                        data)), fmt='%.1f')
+    else:
+        np.savetxt(fn, data, fmt='%d')
+
+
+def _read_split_file(fn):
+    with open(fn) as fid:
+        header = fid.readline().split()
+    return header, np.loadtxt(fn, dtype=int, ndmin=1)
+
+
+class TestEDLSplitFiles(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.in_dir = os.path.join(self._temp_dir, 'in')
+        os.mkdir(self.in_dir)
+        # 1 Hz data from 18:00 for 12 hours in files of 3 hours, with a one
+        # hour gap at 00:00 and an overlapping file
+        self.t0 = calendar.timegm((2013, 1, 1, 18, 0, 0))
+        self.data = np.random.RandomState(0).randint(-1000, 1000, 12 * 3600)
+        for hour in [0, 3, 7, 9]:
+            n = 3 * 3600 if hour != 7 else 3600
+            _write_edl_file(self.in_dir, self.t0 + hour * 3600,
+                            self.data[hour * 3600:hour * 3600 + n],
+                            two_columns=hour == 9)
+        _write_edl_file(self.in_dir, self.t0 + 9000,
+                        self.data[9000:9000 + 3600])
+        self.data[6 * 3600:7 * 3600] = -1
+        self.data[8 * 3600:9 * 3600] = -1
+
+    def test_read_EDL_file(self):
+        fn = os.path.join(self.in_dir, 'st01130101180000.ex')
+        np.testing.assert_array_equal(MTfh.read_EDL_file(fn),
+                                      self.data[0:3 * 3600])
+        fn = os.path.join(self.in_dir, 'st01130102030000.ex')
+        np.testing.assert_array_equal(MTfh.read_EDL_file(fn),
+                                      self.data[9 * 3600:])
+
+    def test_dayfiles(self):
+        fns = MTfh.EDL_make_dayfiles(self.in_dir, 1., outputdir=self._temp_dir,
+                                     num_workers=1)
+        self.assertEqual([os.path.basename(fn) for fn in fns],
+                         ['ST01_1day_20130101_0.ex', 'ST01_1day_20130102_0.ex',
+                          'ST01_1day_20130102_1.ex'])
+
+        header, data = _read_split_file(fns[0])
+        self.assertEqual(header, ['#', 'ST01', 'ex', '1.0', str(self.t0),
+                                  str(6 * 3600)])
+        np.testing.assert_array_equal(data, self.data[0:6 * 3600])
+
+        header, data = _read_split_file(fns[1])
+        self.assertEqual(header[4:], [str(self.t0 + 7 * 3600), '3600'])
+        np.testing.assert_array_equal(data, self.data[7 * 3600:8 * 3600])
+
+        header, data = _read_split_file(fns[2])
+        self.assertEqual(header[4:], [str(self.t0 + 9 * 3600), '10800'])
+        np.testing.assert_array_equal(data, self.data[9 * 3600:])
+
+    def test_Nhour_files_filled(self):
+        fns = MTfh.EDL_make_Nhour_files(6, self.in_dir, 1.,
+                                        outputdir=self._temp_dir,
+                                        fill_value=-1, num_workers=2)
+        self.assertEqual([os.path.basename(fn) for fn in fns],
+                         ['ST01_6hours_20130101_18_0.ex',
+                          'ST01_6hours_20130102_00_0.ex'])
+        data = np.concatenate([_read_split_file(fn)[1] for fn in fns])
+        np.testing.assert_array_equal(data, self.data)
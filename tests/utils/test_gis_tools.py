@@ -128,3 +128,41 @@ class TestGisTools(TestCase):
         self.assertEqual(values.dtype.type, np.float64)
         
     
+
+    def test_get_utm_zones(self):
+        lats = np.array([-80, -72, -71.9, 0, 8, self.lat_d, 84, 85])
+        lons = np.full(lats.size, self.lon_d)
+        zones = gis_tools.get_utm_zones(lats, lons)
+
+        for lat, zone in zip(lats, zones):
+            self.assertEqual(zone, gis_tools.get_utm_zone(lat, self.lon_d)[2])
+
+    def test_project_points_ll2utm(self):
+        lats = np.full(1000, self.lat_d)
+        lons = np.full(1000, self.lon_d)
+        easting, northing, zones = gis_tools.project_points_ll2utm(lats, lons)
+
+        self.assertEqual(easting.shape, (1000,))
+        self.assertTrue(np.allclose(easting, self.easting))
+        self.assertTrue(np.allclose(northing, self.northing))
+        self.assertTrue((zones == self.zone).all())
+
+    def test_project_points_multiple_zones(self):
+        lats = [self.lat_d, 40.0, self.lat_d]
+        lons = [self.lon_d, -115.0, self.lon_d]
+        easting, northing, zones = gis_tools.project_points_ll2utm(lats, lons)
+
+        self.assertEqual(list(zones), [self.zone, '11S', self.zone])
+        for ii in range(3):
+            e, n, z = gis_tools.project_point_ll2utm(lats[ii], lons[ii])
+            self.assertTrue(np.isclose(easting[ii], e))
+            self.assertTrue(np.isclose(northing[ii], n))
+
+        new_lat, new_lon = gis_tools.project_points_utm2ll(easting, northing,
+                                                           zones)
+        self.assertTrue(np.allclose(new_lat, lats))
+        self.assertTrue(np.allclose(new_lon, lons))
+
+    def test_project_points_bad_lat(self):
+        with pytest.raises(gis_tools.GISError):
+            gis_tools.project_points_ll2utm([self.lat_d, 91.], [self.lon_d] * 2)
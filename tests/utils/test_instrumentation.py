@@ -0,0 +1,123 @@
+"""
+TEST mtpy.utils.instrumentation
+"""
+import csv
+import json
+import os
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from mtpy.core.mt import MT
+from mtpy.utils import instrumentation
+from mtpy.utils.mtpylog import MtPyLog
+from tests import EDI_DATA_DIR, make_temp_dir
+
+
+@instrumentation.instrument('test.decorated')
+def _decorated(value):
+    return value * 2
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def _summary_dict(self):
+        return dict([(entry['stage'], entry) for entry in
+                     instrumentation.get_summary()])
+
+    def test_disabled(self):
+        instrumentation.disable()
+        with instrumentation.stage('test.stage') as st:
+            st.add_bytes(10)
+        instrumentation.add_bytes(10)
+        self.assertEqual(_decorated(2), 4)
+        self.assertEqual(instrumentation.get_summary(), [])
+
+    def test_stages(self):
+        instrumentation.enable()
+        for ii in range(2):
+            with instrumentation.stage('test.outer') as st:
+                st.add_bytes(100)
+                time.sleep(.01)
+                self.assertEqual(_decorated(3), 6)
+                instrumentation.add_bytes(5)
+        summary = self._summary_dict()
+        self.assertEqual(summary['test.outer']['count'], 2)
+        self.assertEqual(summary['test.outer']['bytes_read'], 210)
+        self.assertGreaterEqual(summary['test.outer']['wall_time'], .02)
+        self.assertLessEqual(summary['test.outer']['wall_time_min'],
+                             summary['test.outer']['wall_time_max'])
+        self.assertEqual(summary['test.decorated']['count'], 2)
+        self.assertEqual(summary['test.decorated']['bytes_read'], 0)
+        self.assertEqual(instrumentation.get_summary()[0]['stage'],
+                         'test.outer')
+
+    def test_exception_is_recorded(self):
+        instrumentation.enable()
+        with self.assertRaises(ValueError):
+            with instrumentation.stage('test.error'):
+                raise ValueError('error')
+        self.assertEqual(self._summary_dict()['test.error']['count'], 1)
+
+    def test_peak_memory(self):
+        instrumentation.enable(memory=True)
+        with instrumentation.stage('test.outer'):
+            with instrumentation.stage('test.inner'):
+                array = np.ones(2 ** 20)
+                del array
+            array = np.ones(2 ** 18)
+        summary = self._summary_dict()
+        self.assertGreaterEqual(summary['test.inner']['peak_memory'], 8 * 2 ** 20)
+        # the peak of the inner stage is also the peak of the outer stage
+        self.assertGreaterEqual(summary['test.outer']['peak_memory'], 8 * 2 ** 20)
+
+    def test_mt_read_write(self):
+        instrumentation.enable()
+        edi_fn = os.path.join(EDI_DATA_DIR, 'pb23c.edi')
+        mt_obj = MT(edi_fn)
+        mt_obj.interpolate(mt_obj.Z.freq[1:5])
+        mt_obj.write_mt_file(save_dir=self._temp_dir)
+        summary = self._summary_dict()
+        self.assertEqual(summary['mt.MT.read_mt_file']['bytes_read'],
+                         os.path.getsize(edi_fn))
+        for key in ['mt.MT.interpolate', 'mt.MT.write_mt_file']:
+            self.assertEqual(summary[key]['count'], 1)
+
+    def test_export(self):
+        instrumentation.enable()
+        with instrumentation.stage('test.export'):
+            pass
+        json_fn = instrumentation.write_json(os.path.join(self._temp_dir,
+                                                          'stages.json'))
+        with open(json_fn) as fid:
+            self.assertEqual(json.load(fid)[0]['stage'], 'test.export')
+
+        csv_fn = instrumentation.write_csv(os.path.join(self._temp_dir,
+                                                        'stages.csv'))
+        with open(csv_fn) as fid:
+            rows = list(csv.DictReader(fid))
+        self.assertEqual(list(rows[0].keys()), instrumentation.SUMMARY_KEYS)
+        self.assertEqual(rows[0]['count'], '1')
+
+    def test_configure(self):
+        os.environ[instrumentation.ENV_VARIABLE] = 'memory'
+        try:
+            instrumentation.configure_from_environment()
+            self.assertTrue(instrumentation.is_enabled())
+        finally:
+            del os.environ[instrumentation.ENV_VARIABLE]
+        instrumentation.disable()
+
+        MtPyLog._configure_instrumentation({'enabled': True})
+        self.assertTrue(instrumentation.is_enabled())
+        MtPyLog._configure_instrumentation({'enabled': False})
+        self.assertFalse(instrumentation.is_enabled())
@@ -0,0 +1,139 @@
+"""
+TEST mtpy.utils.mseed streaming conversion
+"""
+import calendar
+import os
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+import mtpy.utils.mseed as MTms
+from tests import make_temp_dir
+
+
+class TestMetadata(TestCase):
+    def test_channel_codes(self):
+        self.assertEqual(MTms.component_to_channel('ex', 500), 'CQN')
+        self.assertEqual(MTms.component_to_channel('hz', 1), 'LFZ')
+        self.assertEqual(MTms.component_to_channel('temperature', 1),
+                         'TEMPERATURE')
+        for component in ['ex', 'ey', 'hx', 'hy', 'hz']:
+            for sampling_rate in [4096, 256, 16, 1, 0.01]:
+                self.assertEqual(MTms.channel_to_component(
+                    MTms.component_to_channel(component, sampling_rate)),
+                    component)
+        # codes of the older ts files
+        self.assertEqual(MTms.channel_to_component('EX'), 'ex')
+        self.assertEqual(MTms.channel_to_component('EN'), 'ex')
+        self.assertEqual(MTms.channel_to_component('HE'), 'hy')
+
+    def test_header_roundtrip(self):
+        stats = {'network': 'au', 'station': 'mt01', 'location': '',
+                 'channel': 'BFE', 'sampling_rate': 16.,
+                 'starttime': calendar.timegm((2013, 1, 1, 0, 0, 0)) + .25,
+                 'npts': 161}
+        header = MTms.stats_to_header(stats, units='nT', lat=None)
+        self.assertEqual(header['station'], 'MT01')
+        self.assertEqual(header['component'], 'hy')
+        self.assertEqual(header['units'], 'nT')
+        self.assertNotIn('lat', header)
+        self.assertEqual(header['start_time_utc'], '2013-01-01T00:00:00.250000')
+        self.assertEqual(header['stop_time_utc'], '2013-01-01T00:00:10.250000')
+
+        self.assertEqual(MTms.header_to_stats(header, network='au'),
+                         dict(stats, network='AU', station='MT01'))
+
+
+class TestTSWriter(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.t0 = calendar.timegm((2013, 1, 1, 0, 0, 0))
+        self.data = np.random.RandomState(0).randint(-1000, 1000, 1000)
+
+    def _write(self, legacy_header):
+        fn = os.path.join(self._temp_dir, 'mt01.ex')
+        stats = {'station': 'mt01', 'channel': 'EX', 'sampling_rate': 10.}
+        with MTms.TSWriter(fn, legacy_header=legacy_header,
+                           units='counts') as writer:
+            # continuous chunks, then a gap of one second
+            for start in range(0, 600, 150):
+                writer.write(dict(stats, starttime=self.t0 + start / 10.),
+                             self.data[start:start + 150])
+            writer.write(dict(stats, starttime=self.t0 + 70.),
+                         self.data[600:])
+        return writer.lo_files
+
+    def test_write_read(self):
+        for legacy_header in [False, True]:
+            lo_files = self._write(legacy_header)
+            self.assertEqual(len(lo_files), 2)
+
+            for fn, start, data in zip(lo_files, [0., 70.],
+                                       [self.data[:600], self.data[600:]]):
+                header, n_header = MTms.read_ts_header(fn)
+                self.assertEqual(n_header, 1 if legacy_header else 9)
+                self.assertEqual(header['station'], 'MT01')
+                self.assertEqual(header['component'], 'ex')
+                self.assertEqual(header['units'], 'counts')
+                self.assertEqual(header['n_samples'], len(data))
+                self.assertAlmostEqual(
+                    MTms.utc_to_epoch(header['start_time_utc']),
+                    self.t0 + start, places=5)
+                read_data = np.concatenate(list(MTms.iter_ts_data(
+                    fn, chunk_size=128)))
+                np.testing.assert_array_equal(read_data, data)
+
+            for fn in lo_files:
+                os.remove(fn)
+
+    def test_read_mtts(self):
+        try:
+            from mtpy.core.ts import MTTS
+        except ImportError:
+            self.skipTest('pandas is not installed')
+        fn = self._write(False)[0]
+        ts_obj = MTTS()
+        ts_obj.read_ascii(fn)
+        self.assertEqual(ts_obj.station, 'MT01')
+        self.assertEqual(ts_obj.n_samples, 600)
+        self.assertEqual(ts_obj.start_time_epoch_sec, self.t0)
+        np.testing.assert_array_equal(ts_obj.ts.data.values, self.data[:600])
+
+
+@skipIf(MTms.obspy is None, 'obspy is not installed')
+class TestMiniSEED(TestCase):
+    def setUp(self):
+        self._temp_dir = make_temp_dir(self.__class__.__name__ +
+                                       self._testMethodName)
+        self.t0 = calendar.timegm((2013, 1, 1, 0, 0, 0))
+        self.data = np.random.RandomState(0).randint(-1000, 1000, 20000)
+        # two files of one channel with a gap of 10 samples in between
+        self.lo_files = []
+        for idx, (start, stop) in enumerate([(0, 12000), (12010, 20000)]):
+            stats = {'station': 'MT01', 'channel': 'BQN',
+                     'sampling_rate': 16., 'starttime': self.t0 + start / 16.}
+            fn = os.path.join(self._temp_dir, 'mt01_{0}.mseed'.format(idx))
+            MTms.write_miniseed(fn, stats, [self.data[start:stop]],
+                                reclen=512)
+            self.lo_files.append(fn)
+
+    def test_miniseed2ts(self):
+        lo_written = MTms.miniseed2ts(
+            self.lo_files, os.path.join(self._temp_dir, 'mt01.mseed'),
+            fill_value=0, chunk_size=1000)
+        self.assertEqual(len(lo_written), 1)
+        data = np.concatenate(list(MTms.iter_ts_data(lo_written[0])))
+        expected = self.data.copy()
+        expected[12000:12010] = 0
+        np.testing.assert_array_equal(data, expected)
+
+    def test_windows(self):
+        lo_windows = list(MTms.iter_mseed_windows(self.lo_files, 256. / 16.,
+                                                  fill_value=0))
+        self.assertEqual(len(lo_windows), -(-20000 // 256))
+        for idx, (windowstart, window) in enumerate(lo_windows):
+            self.assertEqual(len(window), 1)
+            self.assertEqual(windowstart, self.t0 + idx * 16.)
+            self.assertEqual(window[0].stats.npts,
+                             min(256, 20000 - idx * 256))
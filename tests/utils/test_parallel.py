@@ -0,0 +1,44 @@
+"""
+TEST mtpy.utils.parallel
+"""
+import os
+from unittest import TestCase
+
+from mtpy.utils import parallel
+
+
+def _init(offset):
+    parallel.worker_state(__name__)['offset'] = offset
+
+
+def _add(value, scale):
+    state = parallel.worker_state(__name__)
+    return (value * scale + state['offset'], state.get('in_process', False),
+            os.getpid())
+
+
+class TestParallel(TestCase):
+    def test_get_num_workers(self):
+        self.assertEqual(parallel.get_num_workers(), os.cpu_count() or 1)
+        self.assertEqual(parallel.get_num_workers(8, n_tasks=3), 3)
+        self.assertEqual(parallel.get_num_workers(0), 1)
+        self.assertEqual(parallel.get_num_workers(4, n_tasks=0), 1)
+
+    def test_map_tasks(self):
+        lo_args = [(value, 2) for value in range(20)]
+        for num_workers in [1, 2]:
+            results = parallel.map_tasks(_add, lo_args,
+                                         num_workers=num_workers,
+                                         initializer=_init, initargs=(100,),
+                                         state=__name__, chunksize=None)
+            self.assertEqual([result[0] for result in results],
+                             [value * 2 + 100 for value in range(20)])
+            in_process = num_workers == 1
+            self.assertTrue(all(result[1] == in_process
+                                for result in results))
+            self.assertEqual(all(result[2] == os.getpid()
+                                 for result in results), in_process)
+            # the state of the calling process is cleared
+            self.assertEqual(parallel.worker_state(__name__), {})
+
+        self.assertEqual(parallel.map_tasks(_add, []), [])
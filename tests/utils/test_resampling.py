@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator, griddata
+
+from mtpy.utils import resampling
+
+
+class TestResampling(TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.grid_north = np.cumsum(rng.uniform(100, 300, 12))
+        self.grid_east = np.cumsum(rng.uniform(100, 300, 15))
+        self.cube = rng.uniform(1, 1000, (5, 12, 15))
+
+        self.target_north, self.target_east = np.meshgrid(
+            np.linspace(self.grid_north[0] - 50, self.grid_north[-1] + 50, 7),
+            np.linspace(self.grid_east[0] - 50, self.grid_east[-1] + 50, 9),
+            indexing='ij')
+
+    def test_rectilinear_matches_regular_grid_interpolator(self):
+        weights = resampling.rectilinear_weights(
+            (self.grid_north, self.grid_east),
+            (self.target_north, self.target_east))
+        result = resampling.resample_cube(weights, self.cube, chunk_size=2)
+        self.assertEqual(result.shape, (5, 7, 9))
+
+        points = np.column_stack([self.target_north.ravel(),
+                                  self.target_east.ravel()])
+        for layer, values in zip(result, self.cube):
+            interp = RegularGridInterpolator(
+                (self.grid_north, self.grid_east), values,
+                bounds_error=False, fill_value=np.nan)
+            expected = interp(points).reshape(self.target_north.shape)
+            self.assertTrue(np.allclose(layer, expected, equal_nan=True))
+
+        with self.assertRaises(ValueError):
+            resampling.rectilinear_weights((self.grid_north, self.grid_east),
+                                           (self.target_north,
+                                            self.target_east),
+                                           bounds_error=True)
+
+    def test_rectilinear_clamp(self):
+        weights = resampling.rectilinear_weights(
+            (self.grid_north, self.grid_east),
+            (self.target_north, self.target_east), clamp=True)
+        layer = weights.apply(self.cube[0])
+        self.assertFalse(np.isnan(layer).any())
+        self.assertAlmostEqual(layer[0, 0], self.cube[0, 0, 0])
+        self.assertAlmostEqual(layer[-1, -1], self.cube[0, -1, -1])
+
+    def test_delaunay_matches_griddata(self):
+        model_n, model_e = np.broadcast_arrays(self.grid_north[:, None],
+                                               self.grid_east[None, :])
+        source = (model_n.ravel(), model_e.ravel())
+        weights = resampling.delaunay_weights(
+            source, (self.target_north, self.target_east))
+        result = weights.apply(self.cube)
+
+        for layer, values in zip(result, self.cube):
+            expected = griddata(source, values.ravel(),
+                                (self.target_north, self.target_east))
+            self.assertTrue(np.allclose(layer, expected, equal_nan=True))
+
+    def test_streamed_slices_log_scale(self):
+        weights = resampling.rectilinear_weights(
+            (self.grid_north, self.grid_east),
+            (self.target_north, self.target_east), clamp=True)
+        slices = list(resampling.resample_slices(weights, self.cube,
+                                                 slice_indices=[3, 1],
+                                                 chunk_size=1,
+                                                 log_scale=True))
+        self.assertEqual([index for index, layer in slices], [3, 1])
+        expected = 10 ** weights.apply(np.log10(self.cube[3]))
+        self.assertTrue(np.allclose(slices[0][1], expected))